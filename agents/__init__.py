@@ -0,0 +1 @@
+# This file makes agents a Python package.
@@ -0,0 +1,371 @@
+import asyncio
+import collections
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import IntEnum
+from typing import Dict, Any, Awaitable, Callable, Deque, List, Optional, Sequence, Tuple, Union
+
+from src.iot_integration.sensor_data_ingestion import topic_matches
+
+# Topics used by register_agents (MQTT-style filters; '+' matches one level)
+TOPIC_PROCESS_READINGS = "skids/+/process"
+TOPIC_PROCESS_BATCHES = "skids/+/process/batch"
+TOPIC_SAFETY_EVENTS = "safety/anomalies"
+TOPIC_PROCEDURES = "safety/procedures"
+TOPIC_VIBRATION = "skids/+/vibration"
+TOPIC_MAINTENANCE_REQUESTS = "maintenance/requests"
+TOPIC_REPORT_REQUESTS = "reports/requests"
+TOPIC_REPORTS = "reports/executive"
+
+
+class Priority(IntEnum):
+    SAFETY = 0  # Never blocked or dropped; served by a dedicated worker per agent
+    CONTROL = 1
+    ANALYTICS = 2
+
+
+SAFETY_LANES: Tuple[Priority, ...] = (Priority.SAFETY,)
+NORMAL_LANES: Tuple[Priority, ...] = (Priority.CONTROL, Priority.ANALYTICS)
+
+
+class AgentMessage:
+    """A message on the bus (Pub/Sub stand-in)."""
+
+    __slots__ = ("topic", "payload", "priority", "published_at")
+
+    def __init__(self, topic: str, payload: Any, priority: Priority = Priority.ANALYTICS):
+        self.topic = topic
+        self.payload = payload
+        self.priority = priority
+        self.published_at = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f"AgentMessage({self.topic!r}, priority={self.priority.name})"
+
+
+Handler = Callable[[AgentMessage], Union[Any, Awaitable[Any]]]
+
+
+class AgentInbox:
+    """
+    Per-agent inbox with one lane per Priority.
+
+    The safety lane is unbounded so safety events are never blocked or dropped; the other
+    lanes hold up to `capacity` messages each and publishers wait for room (backpressure)
+    when an agent falls behind. Consumers take from the highest-priority non-empty lane of
+    the lanes they serve.
+    """
+
+    def __init__(self, name: str, capacity: int = 1000):
+        self.name = name
+        self.capacity = capacity
+        self._lanes: Dict[Priority, Deque[AgentMessage]] = {priority: collections.deque() for priority in Priority}
+        self._ready: Dict[Tuple[Priority, ...], asyncio.Event] = {}
+        self._space = asyncio.Event()
+
+    def depth(self, priority: Optional[Priority] = None) -> int:
+        if priority is not None:
+            return len(self._lanes[priority])
+        return sum(len(lane) for lane in self._lanes.values())
+
+    async def put(self, message: AgentMessage) -> None:
+        lane = self._lanes[message.priority]
+        while message.priority != Priority.SAFETY and len(lane) >= self.capacity:
+            self._space.clear()
+            await self._space.wait()
+        lane.append(message)
+        for lanes, event in self._ready.items():
+            if message.priority in lanes:
+                event.set()
+
+    async def get(self, lanes: Sequence[Priority] = tuple(Priority)) -> AgentMessage:
+        lanes = tuple(lanes)
+        ready = self._ready.setdefault(lanes, asyncio.Event())
+        while True:
+            for priority in lanes:
+                if self._lanes[priority]:
+                    message = self._lanes[priority].popleft()
+                    if priority != Priority.SAFETY:
+                        self._space.set()
+                    return message
+            ready.clear()
+            await ready.wait()
+
+
+class MessageBus:
+    """In-process publish/subscribe bus delivering messages to subscribed agent inboxes."""
+
+    def __init__(self):
+        self._subscriptions: List[Tuple[str, AgentInbox]] = []
+
+    def subscribe(self, topic_filter: str, inbox: AgentInbox) -> None:
+        self._subscriptions.append((topic_filter, inbox))
+
+    async def publish(self, topic: str, payload: Any, priority: Priority = Priority.ANALYTICS) -> int:
+        """
+        Deliver a message to every subscribed inbox (each inbox at most once).
+
+        Returns:
+            Number of inboxes the message was delivered to.
+        """
+        inboxes = []
+        for topic_filter, inbox in self._subscriptions:
+            if inbox not in inboxes and topic_matches(topic_filter, topic):
+                inboxes.append(inbox)
+        for inbox in inboxes:
+            await inbox.put(AgentMessage(topic, payload, priority))
+        return len(inboxes)
+
+
+class _AgentStats:
+    __slots__ = ("processed", "failed", "max_latency_ms", "max_safety_latency_ms")
+
+    def __init__(self):
+        self.processed = 0
+        self.failed = 0
+        self.max_latency_ms = 0.0
+        self.max_safety_latency_ms = 0.0
+
+
+class AgentRuntime:
+    """
+    Asyncio runtime for the agents.
+
+    Each registered agent gets an AgentInbox and two workers: one serving only the safety
+    lane and one serving control and analytics traffic in priority order, so a safety event
+    is picked up immediately even while the agent is busy with analytics. Handlers run on
+    the event loop and must be fast; slow RAG/LLM calls go through call_blocking, which runs
+    them on a thread pool with a timeout and a fallback, and background() keeps follow-up
+    work (e.g. fetching the SOP after a shutdown) off the worker entirely.
+    """
+
+    def __init__(self, inbox_capacity: int = 1000, blocking_workers: int = 4, blocking_timeout_seconds: float = 5.0):
+        """
+        Args:
+            inbox_capacity: Messages per non-safety lane of each inbox.
+            blocking_workers: Threads available to call_blocking.
+            blocking_timeout_seconds: Default timeout of call_blocking.
+        """
+        self.bus = MessageBus()
+        self.inbox_capacity = inbox_capacity
+        self.blocking_timeout_seconds = blocking_timeout_seconds
+        self.logger = logging.getLogger("AgentRuntime")
+        self._executor = ThreadPoolExecutor(max_workers=blocking_workers, thread_name_prefix="agent-blocking")
+        self._agents: Dict[str, Tuple[AgentInbox, List[Tuple[str, Handler]]]] = {}
+        self._stats: Dict[str, _AgentStats] = {}
+        self._workers: List[asyncio.Task] = []
+        self._background: set = set()
+        self.timeouts = 0
+
+    def register(self, name: str, handlers: Dict[str, Handler]) -> AgentInbox:
+        """
+        Register an agent.
+
+        Args:
+            name: Agent name.
+            handlers: Topic filter -> handler (sync or async) taking an AgentMessage. The first
+                matching filter handles a message.
+        """
+        inbox = AgentInbox(name, self.inbox_capacity)
+        self._agents[name] = (inbox, list(handlers.items()))
+        self._stats[name] = _AgentStats()
+        for topic_filter in handlers:
+            self.bus.subscribe(topic_filter, inbox)
+        return inbox
+
+    async def publish(self, topic: str, payload: Any, priority: Priority = Priority.ANALYTICS) -> int:
+        return await self.bus.publish(topic, payload, priority)
+
+    async def call_blocking(
+        self, func: Callable[..., Any], *args: Any, timeout_seconds: Optional[float] = None, fallback: Any = None
+    ) -> Any:
+        """
+        Run a blocking call (RAG query, LLM generation, remote prediction) on the thread pool.
+
+        Returns:
+            The call's result, or `fallback` if it times out or raises. A timed-out call keeps
+            its thread until it returns, but nothing waits for it.
+        """
+        timeout = self.blocking_timeout_seconds if timeout_seconds is None else timeout_seconds
+        future = asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self.logger.warning(f"{getattr(func, '__name__', func)} timed out after {timeout}s; using fallback")
+        except Exception as e:
+            self.logger.error(f"{getattr(func, '__name__', func)} failed: {e}")
+        return fallback
+
+    def background(self, coroutine: Awaitable[Any]) -> asyncio.Task:
+        """Run follow-up work without holding up the calling agent's worker."""
+        task = asyncio.ensure_future(coroutine)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def start(self) -> None:
+        for name, (inbox, _) in self._agents.items():
+            self._workers.append(asyncio.create_task(self._work(name, SAFETY_LANES), name=f"{name}-safety"))
+            self._workers.append(asyncio.create_task(self._work(name, NORMAL_LANES), name=f"{name}-normal"))
+
+    async def stop(self, drain: bool = True, timeout_seconds: float = 10.0) -> None:
+        """Stop the workers, by default after the inboxes and background work are drained."""
+        if drain:
+            deadline = time.monotonic() + timeout_seconds
+            while time.monotonic() < deadline and (
+                any(inbox.depth() for inbox, _ in self._agents.values()) or self._background
+            ):
+                await asyncio.sleep(0.005)
+        for task in self._workers + list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._background, return_exceptions=True)
+        self._workers = []
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-agent processed/failed counts, inbox depths and worst pickup latency."""
+        return {
+            name: {
+                "processed": stats.processed,
+                "failed": stats.failed,
+                "inbox_depth": {priority.name: self._agents[name][0].depth(priority) for priority in Priority},
+                "max_latency_ms": stats.max_latency_ms,
+                "max_safety_latency_ms": stats.max_safety_latency_ms,
+            }
+            for name, stats in self._stats.items()
+        }
+
+    async def _work(self, name: str, lanes: Tuple[Priority, ...]) -> None:
+        inbox, handlers = self._agents[name]
+        stats = self._stats[name]
+        while True:
+            message = await inbox.get(lanes)
+            latency_ms = (time.monotonic() - message.published_at) * 1000
+            stats.max_latency_ms = max(stats.max_latency_ms, latency_ms)
+            if message.priority == Priority.SAFETY:
+                stats.max_safety_latency_ms = max(stats.max_safety_latency_ms, latency_ms)
+            handler = next((h for topic_filter, h in handlers if topic_matches(topic_filter, message.topic)), None)
+            try:
+                result = handler(message)
+                if asyncio.iscoroutine(result):
+                    await result
+                stats.processed += 1
+            except Exception as e:
+                stats.failed += 1
+                self.logger.error(f"{name} failed to handle {message!r}: {e}")
+
+
+def register_agents(
+    runtime: AgentRuntime,
+    process_agent: Any = None,
+    maintenance_agent: Any = None,
+    intelligence_agent: Any = None,
+    rag_timeout_seconds: float = 5.0,
+    report_timeout_seconds: float = 30.0,
+) -> None:
+    """
+    Wire the three agents to the bus.
+
+    ProcessControlAgent handles process readings and reading batches (control lane) and
+    safety events (safety lane) inline, since all are local threshold checks; the RAG lookup
+    of the emergency procedure runs afterwards in the background and is published on TOPIC_PROCEDURES.
+    PredictiveMaintenanceAgent analyses vibration readings inline and schedules maintenance
+    through call_blocking; OperationalIntelligenceAgent builds reports through call_blocking.
+    """
+    if process_agent is not None:
+        async def lookup_procedure(event: Dict) -> None:
+            procedure = await runtime.call_blocking(
+                process_agent.query_emergency_procedure, event, timeout_seconds=rag_timeout_seconds,
+                fallback="Procedure lookup unavailable; follow site emergency SOP.",
+            )
+            await runtime.publish(TOPIC_PROCEDURES, {"event": event, "procedure": procedure})
+
+        def on_reading(message: AgentMessage) -> None:
+            result = process_agent.monitor_injection_rates(message.payload)
+            if result.get("status") == "anomaly_detected":
+                runtime.background(lookup_procedure(result["event"]))
+
+        def on_reading_batch(message: AgentMessage) -> None:
+            batch = message.payload
+            exceptions = process_agent.monitor_injection_rates_batch(
+                batch["pressure"], batch.get("equipment_id"), batch.get("timestamp")
+            )
+            for equipment_id in dict.fromkeys(exception["equipment_id"] for exception in exceptions):
+                runtime.background(lookup_procedure({"type": "CriticalPressure", "equipment_id": equipment_id}))
+
+        def on_safety_event(message: AgentMessage) -> None:
+            if process_agent.detect_process_anomalies(message.payload):
+                runtime.background(lookup_procedure(message.payload))
+
+        runtime.register(process_agent.agent_id, {
+            TOPIC_PROCESS_READINGS: on_reading,
+            TOPIC_PROCESS_BATCHES: on_reading_batch,
+            TOPIC_SAFETY_EVENTS: on_safety_event,
+        })
+
+    if maintenance_agent is not None:
+        async def on_maintenance_request(message: AgentMessage) -> None:
+            await runtime.call_blocking(
+                maintenance_agent.schedule_maintenance_tasks, message.payload["equipment_id"],
+                message.payload.get("reason", "Requested"), timeout_seconds=rag_timeout_seconds,
+            )
+
+        runtime.register(maintenance_agent.agent_id, {
+            TOPIC_VIBRATION: lambda message: maintenance_agent.analyze_vibration_data(message.payload),
+            TOPIC_MAINTENANCE_REQUESTS: on_maintenance_request,
+        })
+
+    if intelligence_agent is not None:
+        async def on_report_request(message: AgentMessage) -> None:
+            report = await runtime.call_blocking(
+                intelligence_agent.create_executive_reports, message.payload.get("period", "Daily"),
+                timeout_seconds=report_timeout_seconds,
+            )
+            if report is not None:
+                await runtime.publish(TOPIC_REPORTS, report)
+
+        runtime.register(intelligence_agent.agent_id, {TOPIC_REPORT_REQUESTS: on_report_request})
+
+
+# --- Demonstration Block ---
+if __name__ == '__main__':
+    from agents.process_control_agent import ProcessControlAgent
+    from agents.predictive_maintenance_agent import PredictiveMaintenanceAgent
+    from agents.operational_intelligence_agent import OperationalIntelligenceAgent
+
+    class SlowRAGEngine:
+        def query(self, question: str) -> str:
+            time.sleep(2.0)  # Vertex AI round trip on a bad day
+            return "SOP-789: Initiate controlled shutdown. Close inlet valve. Notify supervisor."
+
+    async def main():
+        logging.basicConfig(level=logging.WARNING)
+        rag = SlowRAGEngine()
+        runtime = AgentRuntime(blocking_timeout_seconds=1.0)
+        process_agent = ProcessControlAgent("PCA-001", {"critical_pressure_threshold": 180}, rag)
+        register_agents(
+            runtime, process_agent,
+            PredictiveMaintenanceAgent("PdMA-001", {"vibration_threshold_mm_s": 4.0}, rag),
+            OperationalIntelligenceAgent("OIA-001", {}, rag),
+        )
+        for agent_logger in ("ProcessControlAgent-PCA-001", "PredictiveMaintenanceAgent-PdMA-001",
+                             "OperationalIntelligenceAgent-OIA-001"):
+            logging.getLogger(agent_logger).setLevel(logging.ERROR)
+        await runtime.start()
+
+        # Analytics backlog, then a critical-pressure event behind it
+        for i in range(500):
+            await runtime.publish(TOPIC_PROCESS_READINGS.replace("+", "SKID_001"),
+                                  {"pressure": 150, "flow_rate": 140, "equipment_id": "PMP-001"}, Priority.CONTROL)
+        await runtime.publish(TOPIC_REPORT_REQUESTS, {"period": "Daily"})
+        started = time.perf_counter()
+        await runtime.publish(TOPIC_SAFETY_EVENTS, {"type": "CriticalPressure", "details": "Pressure at 212",
+                                                    "equipment_id": "PMP-002"}, Priority.SAFETY)
+        await runtime.stop()
+        print(f"Safety event handled within {runtime.stats()['PCA-001']['max_safety_latency_ms']:.2f} ms of publishing "
+              f"behind 500 queued readings; total run {time.perf_counter() - started:.2f}s, RAG timeouts {runtime.timeouts}")
+        print(runtime.stats())
+
+    asyncio.run(main())
@@ -1,4 +1,3 @@
-```python
 import logging
 import random
 import json
@@ -266,4 +265,3 @@ if __name__ == '__main__':
     print(json.dumps(cost_analysis, indent=2))
 
     print("\n--- Simulation Complete ---")
-```
@@ -1,8 +1,14 @@
-```python
 import logging
 import random
+import time
 from typing import Dict, Any, List
 
+import numpy as np
+
+from src.core.health_history import EquipmentHealthHistory
+from src.core.vibration_features import VibrationFeatureExtractor, feature_summary
+from src.models.digital_twin_models import HealthHistoryConfig, PumpVibrationConfig
+
 # Commented-out imports for actual GCP integration
 # from google.cloud import aiplatform
 
@@ -21,7 +27,19 @@ class PredictiveMaintenanceAgent:
         self.rag_engine = rag_engine
         self.logger = logging.getLogger(f"PredictiveMaintenanceAgent-{self.agent_id}")
         logging.basicConfig(level=logging.INFO) # Basic config for demo
-        self.equipment_health_data: Dict[str, List[Dict]] = {} # To store health updates
+        # Bounded per-equipment, per-metric history with 1-min/1-hour rollups (retention from 'health_history')
+        self.health_history = EquipmentHealthHistory(HealthHistoryConfig(**config.get('health_history', {})))
+        # Waveform feature extraction for pumps listed under 'vibration_pumps' (PumpVibrationConfig or dicts)
+        vibration_pumps = [
+            pump if isinstance(pump, PumpVibrationConfig) else PumpVibrationConfig(**pump)
+            for pump in config.get('vibration_pumps', [])
+        ]
+        self.vibration_extractor = VibrationFeatureExtractor(
+            vibration_pumps,
+            window_samples=config.get('vibration_window_samples', 8192),
+            hop_samples=config.get('vibration_hop_samples', 4096),
+        ) if vibration_pumps else None
+        self._stream_origins: Dict[str, int] = {}  # Wall-clock ns at sample 0 of each pump's stream (moves forward after gaps)
 
         self.logger.info(f"PredictiveMaintenanceAgent {self.agent_id} initialized.")
 
@@ -61,6 +79,58 @@ class PredictiveMaintenanceAgent:
         else:
             self.logger.info(f"Vibration for {equipment_id} is within normal limits.")
 
+    def analyze_vibration_waveforms(self, waveforms: Dict[str, Any]) -> Dict[str, Dict]:
+        """
+        Analyzes raw accelerometer samples from any number of pumps.
+
+        The samples are appended to each pump's stream; every completed sliding window is
+        reduced to RMS, peak, crest factor, kurtosis, overall velocity and bearing-fault band
+        energies in one batched pass (see src.core.vibration_features). Every window's velocity
+        and kurtosis go into the health history (metrics 'velocity_rms' and 'kurtosis'); the
+        worst new window of each pump is sent to predict_equipment_failure when its velocity or
+        kurtosis exceeds the configured threshold.
+
+        Args:
+            waveforms: Equipment id -> new acceleration samples in g.
+
+        Returns:
+            Equipment id -> features of its worst new window (plus 'prediction' if one was
+            made), for pumps that completed at least one window.
+        """
+        if self.vibration_extractor is None:
+            self.logger.warning("No 'vibration_pumps' configured; ignoring waveform data.")
+            return {}
+
+        vibration_threshold = self.config.get('vibration_threshold_mm_s', 4.5)
+        kurtosis_threshold = self.config.get('kurtosis_threshold', 4.0)
+        results = {}
+        for equipment_id, features in self.vibration_extractor.add(waveforms).items():
+            worst = int(np.argmax(features['velocity_rms_mm_s']))
+            summary = feature_summary(features, worst)
+            summary['end_seconds'] = float(features['end_seconds'][worst])
+            # Every window goes into the history, stamped with stream time anchored to the clock.
+            # The anchor only moves forward: after a gap in the stream it catches up with the
+            # clock, so windows never fall behind readings already recorded.
+            origin = max(
+                self._stream_origins.get(equipment_id, 0), time.time_ns() - int(features['end_seconds'][-1] * 1e9)
+            )
+            self._stream_origins[equipment_id] = origin
+            window_times = origin + np.round(features['end_seconds'] * 1e9).astype(np.int64)
+            # Own metric names, apart from scalar 'vibration' readings sent via analyze_vibration_data
+            self.health_history.extend(equipment_id, 'velocity_rms', window_times, features['velocity_rms_mm_s'])
+            self.health_history.extend(equipment_id, 'kurtosis', window_times, features['kurtosis'])
+
+            if summary['velocity_rms_mm_s'] > vibration_threshold or summary['kurtosis'] > kurtosis_threshold:
+                self.logger.warning(
+                    f"Vibration for {equipment_id}: {summary['velocity_rms_mm_s']:.2f} mm/s, "
+                    f"kurtosis {summary['kurtosis']:.1f} (limits {vibration_threshold} mm/s, {kurtosis_threshold})."
+                )
+                summary['prediction'] = self.predict_equipment_failure(
+                    equipment_id, {'equipment_id': equipment_id, **summary}
+                )
+            results[equipment_id] = summary
+        return results
+
     def predict_equipment_failure(self, equipment_id: str, data: Dict) -> Dict:
         """
         Predicts equipment failure using a (mocked) ML model.
@@ -72,6 +142,8 @@ class PredictiveMaintenanceAgent:
         Returns:
             A dictionary containing the prediction result.
         """
+        # The model also sees the equipment's recent history (last/mean/std/trend per metric)
+        data = {**self.health_history.features(equipment_id), **data}
         self.logger.info(f"Predicting potential failure for {equipment_id} with data: {data}")
 
         prediction_result = {}
@@ -141,17 +213,20 @@ class PredictiveMaintenanceAgent:
 
     def track_equipment_health(self, equipment_id: str, health_update: Dict):
         """
-        Tracks equipment health data over time. In a real system, this would persist to a database like BigQuery.
+        Tracks equipment health data over time in the bounded in-memory history (older data is
+        kept only as 1-minute and 1-hour rollups). In a real system, this would also persist to a
+        database like BigQuery.
 
         Args:
             equipment_id: ID of the equipment.
-            health_update: Dictionary containing the health update (e.g., {'type': 'vibration', 'value': 5.5}).
+            health_update: Dictionary containing the health update (e.g., {'type': 'vibration', 'value': 5.5}),
+                optionally with a 'timestamp' (datetime, datetime64 or ns since the epoch; default now).
         """
-        if equipment_id not in self.equipment_health_data:
-            self.equipment_health_data[equipment_id] = []
-
-        self.equipment_health_data[equipment_id].append(health_update)
-        self.logger.info(f"Logged health update for {equipment_id}: {health_update}")
+        self.health_history.record(
+            equipment_id, health_update['type'], health_update['value'], health_update.get('timestamp')
+        )
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Logged health update for {equipment_id}: {health_update}")
         # In a real implementation, this data would be sent to a persistent store:
         # self.logger.info(f"Data for {equipment_id} would be persisted to BigQuery here.")
 
@@ -209,9 +284,33 @@ if __name__ == '__main__':
     # This call should trigger predict_equipment_failure and potentially schedule_maintenance_tasks
     pdm_agent.analyze_vibration_data(high_vibration_data)
 
-    print("\n--- Current Equipment Health Data (in-memory) ---")
-    import json
-    print(json.dumps(pdm_agent.equipment_health_data, indent=2))
+    print("\n--- Simulating Accelerometer Waveforms (outer-race defect on PMP-002) ---")
+    import time
+    waveform_agent = PredictiveMaintenanceAgent(
+        agent_id="PdMA-002",
+        config={
+            **agent_config_pdm,
+            "vibration_pumps": [
+                {"equipment_id": f"PMP-{n:03d}", "sample_rate_hz": 25600, "shaft_speed_hz": 29.5,
+                 "bearing": {"ball_count": 9, "ball_diameter_mm": 7.94, "pitch_diameter_mm": 39.04}}
+                for n in range(1, 49)
+            ],
+        },
+        rag_engine=mock_rag_engine_pdm
+    )
+    waveform_agent.logger.setLevel(logging.WARNING)
+    rng = np.random.default_rng(0)
+    t = np.arange(25600) / 25600
+    waveforms = {f"PMP-{n:03d}": 0.05 * np.sin(2 * np.pi * 29.5 * t) + rng.normal(0, 0.02, len(t)) for n in range(1, 49)}
+    waveforms["PMP-002"] = waveforms["PMP-002"] + 0.3 * (np.sin(2 * np.pi * 105.8 * t) > 0.995)
+    started = time.perf_counter()
+    waveform_results = waveform_agent.analyze_vibration_waveforms(waveforms)
+    print(f"Analyzed 1 s of 25.6 kHz data from 48 pumps in {(time.perf_counter() - started) * 1000:.1f} ms")
+    print(f"PMP-002 features: {waveform_results['PMP-002']}")
+
+    print("\n--- Current Equipment Health History (in-memory) ---")
+    for equipment_id in pdm_agent.health_history.equipment_ids():
+        print(f"{equipment_id}: {pdm_agent.health_history.features(equipment_id)}")
+    print(f"PMP-002 history: {waveform_agent.health_history.features('PMP-002')}")
 
     print("\n--- Simulation Complete ---")
-```
@@ -1,6 +1,7 @@
-```python
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Sequence
+
+import numpy as np
 
 class ProcessControlAgent:
     def __init__(self, agent_id: str, config: Dict, rag_engine: Any):
@@ -17,8 +18,24 @@ class ProcessControlAgent:
         self.rag_engine = rag_engine
         self.logger = logging.getLogger(f"ProcessControlAgent-{self.agent_id}")
         logging.basicConfig(level=logging.INFO) # Basic config for demo
+        self.batches_checked = 0
+        self.reload_thresholds()
         self.logger.info(f"ProcessControlAgent {self.agent_id} initialized with config: {self.config}")
 
+    def reload_thresholds(self):
+        """
+        Compiles the pressure thresholds from config. Called once at start-up; call again after
+        changing 'critical_pressure_threshold' or 'equipment_pressure_thresholds'.
+        """
+        self.default_pressure_threshold = float(self.config.get('critical_pressure_threshold', 200))
+        self.pressure_thresholds = {
+            equipment_id: float(threshold)
+            for equipment_id, threshold in self.config.get('equipment_pressure_thresholds', {}).items()
+        }
+        # No reading at or below the lowest threshold can be an exception
+        self._min_pressure_threshold = min([self.default_pressure_threshold, *self.pressure_thresholds.values()])
+        self._log_sample_every = int(self.config.get('log_sample_every_batches', 1000))
+
     def monitor_injection_rates(self, sensor_data: Dict) -> Dict:
         """
         Monitors injection rates and other sensor data.
@@ -29,9 +46,12 @@ class ProcessControlAgent:
         Returns:
             A dictionary containing the status or actions taken.
         """
-        self.logger.info(f"Received sensor data: {sensor_data}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Received sensor data: {sensor_data}")
 
-        pressure_threshold = self.config.get('critical_pressure_threshold', 200) # Example threshold
+        pressure_threshold = self.pressure_thresholds.get(
+            sensor_data.get('equipment_id'), self.default_pressure_threshold
+        )
 
         if 'pressure' in sensor_data and sensor_data['pressure'] > pressure_threshold:
             self.logger.warning(
@@ -47,6 +67,66 @@ class ProcessControlAgent:
 
         return {"status": "nominal", "data": sensor_data}
 
+    def monitor_injection_rates_batch(
+        self,
+        pressures: Sequence[float],
+        equipment_ids: Optional[Sequence[str]] = None,
+        timestamps: Optional[Sequence[Any]] = None,
+    ) -> List[Dict]:
+        """
+        Checks a batch of readings against the compiled per-equipment pressure thresholds.
+
+        One vectorized comparison against the lowest threshold finds the candidates; only those
+        are checked against their own equipment's threshold. Nominal readings are not logged;
+        a batch summary is logged at DEBUG every 'log_sample_every_batches' batches. Each
+        equipment over its threshold raises one anomaly event (for its highest reading).
+
+        Args:
+            pressures: Pressure readings.
+            equipment_ids: Equipment id of each reading (default: 'EQP-001' for all).
+            timestamps: Optional timestamp of each reading, copied into the exceptions.
+
+        Returns:
+            The exceptions only: one dict per reading over threshold with its index, pressure,
+            threshold and equipment_id (plus timestamp if given), in reading order.
+        """
+        pressures = np.asarray(pressures, dtype=np.float64)
+        self.batches_checked += 1
+        candidates = np.flatnonzero(pressures > self._min_pressure_threshold)
+
+        exceptions = []
+        worst = {}
+        for index in candidates.tolist():
+            equipment_id = equipment_ids[index] if equipment_ids is not None else 'EQP-001'
+            threshold = self.pressure_thresholds.get(equipment_id, self.default_pressure_threshold)
+            pressure = float(pressures[index])
+            if pressure <= threshold:
+                continue
+            exception = {'index': index, 'equipment_id': equipment_id, 'pressure': pressure, 'threshold': threshold}
+            if timestamps is not None:
+                exception['timestamp'] = timestamps[index]
+            exceptions.append(exception)
+            if equipment_id not in worst or pressure > worst[equipment_id]['pressure']:
+                worst[equipment_id] = exception
+
+        if self._log_sample_every and self.batches_checked % self._log_sample_every == 0 \
+                and self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                f"Batch {self.batches_checked}: {len(pressures)} readings, {len(exceptions)} over threshold"
+            )
+        if exceptions:
+            self.logger.warning(
+                f"{len(exceptions)} of {len(pressures)} readings exceed pressure thresholds "
+                f"on {sorted(worst)}."
+            )
+        for equipment_id, exception in worst.items():
+            self.detect_process_anomalies({
+                'type': 'CriticalPressure',
+                'details': f"Pressure at {exception['pressure']}",
+                'equipment_id': equipment_id,
+            })
+        return exceptions
+
     def calculate_optimal_dosage(self, pipeline_conditions: Dict) -> float:
         """
         Calculates the optimal DRA dosage based on pipeline conditions.
@@ -79,29 +159,40 @@ class ProcessControlAgent:
         """
         self.logger.info(f"Analyzing anomaly event: {event}")
 
-        if event.get('type') == 'CriticalPressure':
-            # Google AI Integration: Query RAG engine for emergency procedure
-            # procedure = self.rag_engine.query(
-            #     f"What is the emergency procedure for a {event['type']} event "
-            #     f"related to {event.get('equipment_id')}?"
-            # )
-            # self.logger.info(f"Retrieved procedure from RAG: {procedure}")
-
-            # Mocked procedure for demonstration
-            mock_procedure = "Initiate controlled shutdown as per SOP-789."
-            self.logger.info(f"Using mocked procedure: {mock_procedure}")
-
-            # Based on the (mocked) procedure, decide whether to trigger emergency_shutdown_protocol
-            if "shutdown" in mock_procedure.lower():
-                self.logger.info(f"Critical event {event['type']} requires shutdown.")
-                self.emergency_shutdown_protocol(
-                    f"Critical anomaly detected: {event['type']} - {event['details']}"
-                )
-                return True
+        shutdown_event_types = self.config.get('shutdown_event_types', ['CriticalPressure'])
+        if event.get('type') in shutdown_event_types:
+            # The shutdown decision never waits on the RAG engine: the SOP lookup for the record
+            # is done afterwards by query_emergency_procedure, which AgentRuntime runs in an
+            # executor with a timeout, off the control path.
+            self.logger.info(f"Critical event {event['type']} requires shutdown.")
+            self.emergency_shutdown_protocol(
+                f"Critical anomaly detected: {event['type']} - {event.get('details')}"
+            )
+            return True
 
         self.logger.warning(f"Non-critical anomaly or no specific action defined for: {event}")
         return False
 
+    def query_emergency_procedure(self, event: Dict) -> str:
+        """
+        Retrieves the emergency procedure for an anomaly event from the RAG engine.
+        This can take seconds, so it must not be called on the control path.
+
+        Args:
+            event: A dictionary describing the anomaly event.
+
+        Returns:
+            The procedure text.
+        """
+        if self.rag_engine is None:
+            return "Initiate controlled shutdown as per SOP-789."  # Mocked procedure
+        procedure = self.rag_engine.query(
+            f"What is the emergency procedure for a {event.get('type')} event "
+            f"related to {event.get('equipment_id')}?"
+        )
+        self.logger.info(f"Retrieved procedure from RAG: {procedure}")
+        return procedure
+
     def emergency_shutdown_protocol(self, reason: str):
         """
         Initiates the emergency shutdown protocol.
@@ -179,6 +270,34 @@ if __name__ == '__main__':
     high_pressure_data = {"pressure": 190, "flow_rate": 130, "equipment_id": "PMP-002"}
     process_agent.monitor_injection_rates(high_pressure_data)
 
+    # Batch fast path: 5,000 readings per batch across 50 pumps, rare excursions
+    print("\n--- Benchmarking Batch Monitoring ---")
+    import time
+    logging.getLogger(f"ProcessControlAgent-{process_agent.agent_id}").setLevel(logging.ERROR)
+    batch_agent = ProcessControlAgent(
+        agent_id="PCA-BATCH",
+        config={**agent_config, "equipment_pressure_thresholds": {"PMP-007": 170}},
+        rag_engine=mock_rag_engine
+    )
+    batch_agent.logger.setLevel(logging.ERROR)
+    batch_agent.emergency_shutdown_protocol = lambda reason: None  # Keep the benchmark output readable
+    rng = np.random.default_rng(0)
+    equipment = np.array([f"PMP-{n:03d}" for n in range(50)])[rng.integers(0, 50, 5000)]
+    batches = [rng.normal(150, 8, 5000) for _ in range(200)]
+    latencies = []
+    for pressures in batches:
+        started = time.perf_counter()
+        batch_agent.monitor_injection_rates_batch(pressures, equipment)
+        latencies.append(time.perf_counter() - started)
+    latencies_ms = np.array(latencies) * 1000
+    print(f"Batch of 5000: p50 {np.percentile(latencies_ms, 50):.3f} ms, p99 {np.percentile(latencies_ms, 99):.3f} ms "
+          f"({5000 / np.median(latencies):,.0f} readings/s)")
+
+    started = time.perf_counter()
+    for pressure, equipment_id in zip(batches[0].tolist(), equipment.tolist()):
+        batch_agent.monitor_injection_rates({"pressure": pressure, "equipment_id": equipment_id})
+    print(f"Per-reading path: {(time.perf_counter() - started) * 1000:.3f} ms for the same 5000 readings")
+
     # Generate and print a process report
     print("\n--- Generating Process Report ---")
     report = process_agent.generate_process_report()
@@ -186,4 +305,3 @@ if __name__ == '__main__':
     print(json.dumps(report, indent=2))
 
     print("\n--- Simulation Complete ---")
-```
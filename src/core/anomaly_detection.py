@@ -0,0 +1,371 @@
+import logging
+from typing import List, Any, Dict, Hashable, Optional, Sequence, Tuple
+import numpy as np
+from src.core.time_spine import MinuteSpine
+
+try:
+    from sklearn.ensemble import IsolationForest
+except ImportError:  # scikit-learn is optional; IsolationForestScorer raises when used without it
+    IsolationForest = None
+
+logger = logging.getLogger(__name__)
+
+# Process signals scored by default (see SPINE_SENSOR_FIELDS)
+STREAMING_SENSORS: Tuple[str, ...] = ("F1", "F2", "P1")
+WINDOW_COLUMNS: Tuple[str, ...] = ("flow_rate_f1", "flow_rate_f2", "pressure_p1")
+
+ZSCORE_EVENT_TYPE = "SensorDeviation"
+WINDOW_EVENT_TYPE = "ProcessWindowAnomaly"
+
+_INITIAL_SLOTS = 1024
+
+
+def _require_sklearn() -> None:
+    if IsolationForest is None:
+        raise ImportError("IsolationForestScorer requires scikit-learn (pip install scikit-learn)")
+
+
+class StreamingBaseline:
+    """
+    Exponentially weighted mean and variance per signal, in O(1) memory per signal.
+
+    Signals are keyed by any hashable (e.g. (skid_id, sensor_id)) and held in flat arrays, so
+    a batch of readings for many signals is scored and folded in with array operations. The
+    readings of one signal within a batch are applied in order: a batch is processed in
+    rounds, round k taking every signal's k-th reading, so the number of NumPy passes is the
+    largest per-signal count in the batch rather than the batch size.
+    """
+
+    def __init__(self, alpha: float = 0.01, warmup: int = 30):
+        """
+        Args:
+            alpha: EWMA weight of each new reading (effective memory of about 1/alpha readings).
+            warmup: Readings a signal needs before its z-scores are reported (NaN until then).
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.warmup = warmup
+        self.slots: Dict[Hashable, int] = {}
+        self.mean = np.zeros(_INITIAL_SLOTS)
+        self.variance = np.zeros(_INITIAL_SLOTS)
+        self.count = np.zeros(_INITIAL_SLOTS, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def _slot_indices(self, keys: Sequence[Hashable]) -> np.ndarray:
+        slots = self.slots
+        indices = np.fromiter((slots.setdefault(key, len(slots)) for key in keys), dtype=np.int64, count=len(keys))
+        capacity = len(self.mean)
+        if len(slots) > capacity:
+            size = max(len(slots), 2 * capacity)
+            for name in ("mean", "variance", "count"):
+                grown = np.zeros(size, dtype=getattr(self, name).dtype)
+                grown[:capacity] = getattr(self, name)
+                setattr(self, name, grown)
+        return indices
+
+    def update(self, keys: Sequence[Hashable], values: np.ndarray) -> np.ndarray:
+        """
+        Score readings against their signal's baseline, then fold them into it.
+
+        Args:
+            keys: Signal key of each reading.
+            values: Readings, in time order per signal. NaN readings are skipped.
+
+        Returns:
+            z-score of each reading against the baseline before it (NaN during warm-up, for
+            NaN readings, and for a signal that has shown no variance yet).
+        """
+        values = np.asarray(values, dtype=np.float64)
+        slots = self._slot_indices(keys)
+        scores = np.full(len(values), np.nan)
+        valid = np.flatnonzero(~np.isnan(values))
+        if len(valid) == 0:
+            return scores
+
+        # Rank of each reading among its signal's readings in this batch
+        order = valid[np.argsort(slots[valid], kind="stable")]
+        sorted_slots = slots[order]
+        starts = np.flatnonzero(np.r_[True, sorted_slots[1:] != sorted_slots[:-1]])
+        ranks = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+
+        alpha = self.alpha
+        for rank in range(int(ranks.max()) + 1):
+            rows = order[ranks == rank]
+            slot = slots[rows]
+            x = values[rows]
+            mean, variance, count = self.mean[slot], self.variance[slot], self.count[slot]
+            deviation = x - mean
+            with np.errstate(divide="ignore", invalid="ignore"):
+                z = deviation / np.sqrt(variance)
+            scores[rows] = np.where((count >= self.warmup) & (variance > 0), z, np.nan)
+            # Plain running mean/variance until 1/alpha readings, so the baseline is unbiased
+            # from the start (weight 1 for the first reading seeds the mean)
+            weight = np.maximum(alpha, 1.0 / (count + 1))
+            increment = weight * deviation
+            self.mean[slot] = mean + increment
+            self.variance[slot] = (1 - weight) * (variance + deviation * increment)
+            self.count[slot] = count + 1
+        return scores
+
+    def state(self, key: Hashable) -> Optional[Dict[str, float]]:
+        """Current mean, standard deviation and reading count of a signal, or None if unseen."""
+        slot = self.slots.get(key)
+        if slot is None:
+            return None
+        return {"mean": float(self.mean[slot]), "std": float(np.sqrt(self.variance[slot])),
+                "count": int(self.count[slot])}
+
+
+class StreamingAnomalyDetector:
+    """
+    Online detector for the process streams: one StreamingBaseline entry per (skid, sensor),
+    scoring every reading of the tracked sensors and raising an event when |z| exceeds the
+    threshold. Events are dicts in the shape ProcessControlAgent.detect_process_anomalies
+    takes ('type', 'details', 'equipment_id', ...).
+    """
+
+    def __init__(
+        self,
+        sensor_ids: Sequence[str] = STREAMING_SENSORS,
+        alpha: float = 0.01,
+        z_threshold: float = 6.0,
+        warmup: int = 30,
+    ):
+        self.sensor_ids = tuple(sensor_ids)
+        self.z_threshold = z_threshold
+        self.baseline = StreamingBaseline(alpha=alpha, warmup=warmup)
+        self.readings_scored = 0
+
+    def score(
+        self,
+        skid_ids: Sequence[Any],
+        sensor_ids: np.ndarray,
+        values: np.ndarray,
+        timestamps_ns: np.ndarray,
+        ok: Optional[np.ndarray] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Score a batch of readings and return the anomaly events.
+
+        Args:
+            skid_ids: Skid of each reading.
+            sensor_ids: Sensor of each reading; sensors not tracked are ignored.
+            values: Reading values, in time order per sensor.
+            timestamps_ns: Reading timestamps (int64 ns since the epoch).
+            ok: Optional mask of readings that passed validation; the rest are ignored.
+
+        Returns:
+            One event per reading whose |z| exceeds z_threshold, in batch order.
+        """
+        sensor_ids = np.asarray(sensor_ids)
+        tracked = np.isin(sensor_ids, self.sensor_ids)
+        if ok is not None:
+            tracked &= ok
+        rows = np.flatnonzero(tracked)
+        if len(rows) == 0:
+            return []
+        skids = np.asarray(skid_ids, dtype=object)[rows].tolist()
+        sensors = sensor_ids[rows].tolist()
+        row_values = np.asarray(values, dtype=np.float64)[rows]
+        z = self.baseline.update(list(zip(skids, sensors)), row_values)
+        self.readings_scored += len(rows)
+
+        events = []
+        for i in np.flatnonzero(np.abs(z) > self.z_threshold).tolist():
+            events.append({
+                "type": ZSCORE_EVENT_TYPE,
+                "details": f"{sensors[i]} at {row_values[i]:.3f} (z={z[i]:+.1f})",
+                "equipment_id": skids[i],
+                "sensor_id": sensors[i],
+                "timestamp": np.datetime64(int(timestamps_ns[rows[i]]), "ns"),
+                "value": float(row_values[i]),
+                "score": float(z[i]),
+            })
+        return events
+
+    def score_batch(self, batch: Any) -> List[Dict[str, Any]]:
+        """Score an IngestBatch (src.iot_integration.ingest_records); rows flagged invalid are skipped."""
+        skid_ids = batch.skid_ids if batch.skid_ids is not None else np.full(len(batch), None, dtype=object)
+        return self.score(skid_ids, batch.sensor_ids, batch.values, batch.timestamps_ns, ok=batch.ok)
+
+
+def window_features(
+    spine: MinuteSpine,
+    window_minutes: int = 30,
+    step_minutes: int = 5,
+    columns: Sequence[str] = WINDOW_COLUMNS,
+    min_coverage: float = 0.5,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Summary features of sliding windows over a minute spine.
+
+    Per column: mean, standard deviation, min, max and the change across the window, plus
+    the mean F1-F2 imbalance when both flow columns are present. Minutes without data are
+    ignored; windows where any column has data for less than min_coverage of the minutes
+    are dropped.
+
+    Returns:
+        (window_end, features): the last minute of each kept window (datetime64[m]) and a
+        (windows, features) float array.
+    """
+    if len(spine) < window_minutes:
+        return np.empty(0, dtype="datetime64[m]"), np.empty((0, 0))
+    ends = np.arange(window_minutes - 1, len(spine), step_minutes)
+    keep = np.ones(len(ends), dtype=bool)
+    features = []
+    windows = {}
+    for name in columns:
+        window = np.lib.stride_tricks.sliding_window_view(spine[name].astype(np.float64), window_minutes)[::step_minutes]
+        windows[name] = window
+        present = ~np.isnan(window)
+        count = present.sum(axis=1)
+        keep &= count >= min_coverage * window_minutes
+        filled = np.where(present, window, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = filled.sum(axis=1) / count
+            std = np.sqrt(np.maximum((filled ** 2).sum(axis=1) / count - mean ** 2, 0.0))
+        first = window[np.arange(len(window)), np.argmax(present, axis=1)]
+        last = window[np.arange(len(window)), window_minutes - 1 - np.argmax(present[:, ::-1], axis=1)]
+        features += [
+            mean,
+            np.nan_to_num(std),
+            np.where(present, window, np.inf).min(axis=1),
+            np.where(present, window, -np.inf).max(axis=1),
+            last - first,
+        ]
+    if "flow_rate_f1" in windows and "flow_rate_f2" in windows:
+        imbalance = windows["flow_rate_f1"] - windows["flow_rate_f2"]
+        present = ~np.isnan(imbalance)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            features.append(np.where(present, imbalance, 0.0).sum(axis=1) / present.sum(axis=1))
+        keep &= present.any(axis=1)
+    matrix = np.column_stack(features)[keep]
+    return spine.timestamps[ends[keep]], matrix
+
+
+class IsolationForestScorer:
+    """
+    Batch Isolation Forest over sliding windows of the minute spine (requires scikit-learn).
+
+    Fit on spines of normal operation, then score new spines: each window of window_minutes
+    (every step_minutes) is summarised by window_features and scored, and windows the forest
+    isolates as outliers become events for detect_process_anomalies.
+    """
+
+    def __init__(
+        self,
+        window_minutes: int = 30,
+        step_minutes: int = 5,
+        columns: Sequence[str] = WINDOW_COLUMNS,
+        contamination: float = 0.01,
+        n_estimators: int = 100,
+        random_state: Optional[int] = 0,
+    ):
+        _require_sklearn()
+        self.window_minutes = window_minutes
+        self.step_minutes = step_minutes
+        self.columns = tuple(columns)
+        self.model = IsolationForest(
+            n_estimators=n_estimators, contamination=contamination, random_state=random_state, n_jobs=-1
+        )
+        self.fitted = False
+
+    def features(self, spine: MinuteSpine) -> Tuple[np.ndarray, np.ndarray]:
+        return window_features(spine, self.window_minutes, self.step_minutes, self.columns)
+
+    def fit(self, spines: Sequence[MinuteSpine]) -> "IsolationForestScorer":
+        matrices = [self.features(spine)[1] for spine in spines]
+        matrices = [matrix for matrix in matrices if len(matrix)]
+        if not matrices:
+            raise ValueError("No complete windows to fit on")
+        self.model.fit(np.vstack(matrices))
+        self.fitted = True
+        return self
+
+    def score(self, spine: MinuteSpine) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Returns:
+            (window_end, scores, is_anomaly): per kept window, the Isolation Forest decision
+            score (negative = outlier) and whether it is classed an outlier.
+        """
+        if not self.fitted:
+            raise ValueError("IsolationForestScorer must be fitted before scoring")
+        window_end, matrix = self.features(spine)
+        if len(matrix) == 0:
+            return window_end, np.empty(0), np.empty(0, dtype=bool)
+        scores = self.model.decision_function(matrix)
+        return window_end, scores, scores < 0
+
+    def events(self, spine: MinuteSpine, skid_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Anomaly events for the outlier windows of a skid's spine."""
+        window_end, scores, is_anomaly = self.score(spine)
+        return [
+            {
+                "type": WINDOW_EVENT_TYPE,
+                "details": f"{self.window_minutes}-minute window ending {end} scored {score:.3f}",
+                "equipment_id": skid_id,
+                "timestamp": end,
+                "score": float(score),
+            }
+            for end, score in zip(window_end[is_anomaly].tolist(), scores[is_anomaly].tolist())
+        ]
+
+
+def review_events(agent: Any, events: Sequence[Dict[str, Any]]) -> int:
+    """
+    Hand scored events to a ProcessControlAgent's detect_process_anomalies.
+
+    Returns:
+        Number of events that triggered a critical action.
+    """
+    return sum(bool(agent.detect_process_anomalies(event)) for event in events)
+
+
+# --- Demonstration Block ---
+if __name__ == '__main__':
+    import time
+
+    rng = np.random.default_rng(0)
+    skids, seconds = 2000, 60
+    print(f"--- Streaming z-score over {skids} skids x {len(STREAMING_SENSORS)} sensors, 1 Hz for {seconds} s ---")
+    detector = StreamingAnomalyDetector()
+    skid_column = np.repeat([f"SKID_{n:04d}" for n in range(skids)], len(STREAMING_SENSORS)).astype(object)
+    sensor_column = np.tile(STREAMING_SENSORS, skids)
+    level = np.tile([1200.0, 1190.0, 300.0], skids)
+    per_second = len(level)
+    started = time.perf_counter()
+    events = []
+    for second in range(seconds):
+        values = level + rng.normal(0, 2.0, per_second)
+        if second == seconds - 1:
+            values[8] += 60  # Pressure jump on SKID_0002
+        timestamps = np.full(per_second, 1_700_000_000_000_000_000 + second * 1_000_000_000, dtype=np.int64)
+        events += detector.score(skid_column, sensor_column, values, timestamps)
+    elapsed = time.perf_counter() - started
+    print(f"Scored {detector.readings_scored:,} readings in {elapsed:.2f} s "
+          f"({detector.readings_scored / elapsed:,.0f} readings/s; the network needs {per_second:,}/s)")
+    print(f"Events: {[(e['equipment_id'], e['sensor_id'], round(e['score'], 1)) for e in events[:10]]}")
+
+    if IsolationForest is None:
+        print("\nscikit-learn not installed; skipping the Isolation Forest demo")
+    else:
+        minutes = 14 * 24 * 60
+        timestamps = np.datetime64("2024-03-01T00:00") + np.arange(minutes)
+        def spine(anomaly: bool) -> MinuteSpine:
+            f1 = 1200 + 50 * np.sin(np.arange(minutes) / 720) + rng.normal(0, 3, minutes)
+            f2 = f1 - 10 + rng.normal(0, 3, minutes)
+            p1 = 300 + 0.1 * (f1 - 1200) + rng.normal(0, 1, minutes)
+            if anomaly:
+                f2[5000:5060] -= 80  # Leak: outgoing flow drops for an hour
+            return MinuteSpine(timestamps, {"flow_rate_f1": f1, "flow_rate_f2": f2, "pressure_p1": p1})
+
+        started = time.perf_counter()
+        scorer = IsolationForestScorer().fit([spine(False)])
+        window_events = scorer.events(spine(True), "SKID_0001")
+        print(f"\nIsolation Forest over {minutes} minutes: {len(window_events)} anomalous windows "
+              f"in {time.perf_counter() - started:.2f} s")
+        for event in sorted(window_events, key=lambda e: e["score"])[:3]:
+            print(f"  {event['details']}")
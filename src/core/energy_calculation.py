@@ -1,47 +1,145 @@
-from src.models.digital_twin_models import EnergyCostFactors, Pump # Assuming Pump model might have relevant details like efficiency curves eventually
+import logging
+from typing import Dict, Optional, Union
+import numpy as np
+from src.models.digital_twin_models import EnergyCostFactors, Pump, PumpStatus
+from src.core.time_spine import MinuteSpine, PUMP_STATUS_CODES
+from src.core.pump_curve import PumpCurveData, resolve_pump_efficiency
+from src.core.energy_rates import TimeOfUseRateSchedule
 
-def calculate_pump_power_kw(flow_rate: float, pressure: float, pump_curve_data: dict) -> float:
-    """
-    Calculate pump power in kW based on flow rate, pressure, and pump curve data.
+logger = logging.getLogger(__name__)
 
-    Pump Power = f(Flowrate, Pressure, Pump Curve)
+GPM_TO_M3S = 0.0000630902 # 1 GPM = 0.0000630902 m³/s
+PSI_TO_PA = 6894.76 # 1 PSI = 6894.76 Pa
 
-    Placeholder implementation.
-    Actual implementation will require parsing the pump_curve_data
-    (which might be a set of points, coefficients of a polynomial, etc.)
-    to determine efficiency at the given flow_rate and pressure (operating point),
-    and then calculate hydraulic power and shaft power.
+ArrayLike = Union[float, np.ndarray]
 
-    Power (kW) = (Flow Rate (m³/s) * Pressure (Pa) / Pump Efficiency) / 1000
-    Units need to be consistent. E.g. GPM to m³/s, PSI to Pa.
-    """
-    # This is a highly simplified placeholder.
-    # Assume a constant efficiency for now, or a very simple lookup.
-    # A real pump curve is a function: efficiency = f(flow_rate, head)
-    # And head might be related to pressure.
-
-    # Example: Convert GPM to m³/s (1 GPM = 0.0000630902 m³/s)
-    flow_rate_m3s = flow_rate * 0.0000630902
-    # Example: Convert PSI to Pa (1 PSI = 6894.76 Pa)
-    pressure_pa = pressure * 6894.76
+# --- Array versions (one NumPy pass over a whole minute spine) ---
 
-    # Placeholder: Assume a fixed efficiency for simplicity
-    # In reality, efficiency varies with the operating point (flow and pressure/head)
-    # and would be looked up from the pump_curve_data
-    pump_efficiency = pump_curve_data.get("default_efficiency", 0.75) # Defaulting to 75%
+def calculate_hydraulic_power_kw_array(flow_rate: ArrayLike, pressure: ArrayLike) -> np.ndarray:
+    """
+    Hydraulic power (kW) = Flow Rate (m³/s) * Pressure (Pa) / 1000, for GPM / PSI inputs.
+    """
+    flow_rate_m3s = np.asarray(flow_rate, dtype=np.float64) * GPM_TO_M3S
+    pressure_pa = np.asarray(pressure, dtype=np.float64) * PSI_TO_PA
+    return flow_rate_m3s * pressure_pa / 1000
 
-    if pump_efficiency <= 0:
-        return 0.0 # Avoid division by zero or negative power
+def calculate_pump_power_kw_array(flow_rate: ArrayLike, pressure: ArrayLike, pump_efficiency: ArrayLike) -> np.ndarray:
+    """
+    Shaft power (kW) = Hydraulic Power / Pump Efficiency, element-wise.
+    Entries with a non-positive efficiency give 0.0, as in calculate_pump_power_kw.
+    """
+    flow_rate_m3s = np.asarray(flow_rate, dtype=np.float64) * GPM_TO_M3S
+    pressure_pa = np.asarray(pressure, dtype=np.float64) * PSI_TO_PA
+    pump_efficiency = np.asarray(pump_efficiency, dtype=np.float64)
 
-    # Hydraulic Power (Watts) = Flow Rate (m³/s) * Pressure (Pa)
     hydraulic_power_watts = flow_rate_m3s * pressure_pa
+    valid = pump_efficiency > 0
+    shaft_power_watts = np.divide(hydraulic_power_watts, pump_efficiency, out=np.zeros(np.broadcast(hydraulic_power_watts, pump_efficiency).shape), where=valid)
+    return shaft_power_watts / 1000
 
-    # Shaft Power (Watts) = Hydraulic Power / Pump Efficiency
-    shaft_power_watts = hydraulic_power_watts / pump_efficiency
+def calculate_efficiency_factor_array(operating_point_efficiency: ArrayLike, pump_age_years: ArrayLike, maintenance_history_factor: ArrayLike) -> np.ndarray:
+    """
+    Efficiency Factor = Operating Point Efficiency * Age Degradation * Maintenance Factor, element-wise.
+    Age degradation is 1% per year, floored at 0.
+    """
+    age_degradation = np.maximum(0, 1 - (np.asarray(pump_age_years, dtype=np.float64) * 0.01))
+    return np.asarray(operating_point_efficiency, dtype=np.float64) * age_degradation * np.asarray(maintenance_history_factor, dtype=np.float64)
 
-    shaft_power_kw = shaft_power_watts / 1000
+def calculate_electrical_power_kw_array(pump_power_kw: ArrayLike, efficiency_factor: ArrayLike) -> np.ndarray:
+    """
+    Electrical Power (kW) = Shaft Power / Efficiency Factor. A non-positive factor leaves the
+    shaft power unchanged, as in calculate_energy_cost_per_minute.
+    """
+    pump_power_kw = np.asarray(pump_power_kw, dtype=np.float64)
+    efficiency_factor = np.asarray(efficiency_factor, dtype=np.float64)
+    shape = np.broadcast(pump_power_kw, efficiency_factor).shape
+    return np.divide(pump_power_kw, efficiency_factor, out=np.broadcast_to(pump_power_kw, shape).copy(), where=efficiency_factor > 0)
 
-    print(f"Placeholder: Calculated Pump Power: {shaft_power_kw:.2f} kW for flow {flow_rate}, pressure {pressure}")
+def calculate_energy_cost_array(pump_power_kw: ArrayLike, efficiency_factor: ArrayLike, operating_time_minutes: ArrayLike, energy_rate_per_kwh: ArrayLike) -> np.ndarray:
+    """
+    Energy Cost ($) = (Shaft Power / Efficiency Factor) * Operating Time (hours) * Energy Rate ($/kWh),
+    element-wise. energy_rate_per_kwh may be a scalar or a per-minute rate array.
+    """
+    operating_time_hours = np.asarray(operating_time_minutes, dtype=np.float64) / 60.0
+    energy_consumed_kwh = calculate_electrical_power_kw_array(pump_power_kw, efficiency_factor) * operating_time_hours
+    return energy_consumed_kwh * np.asarray(energy_rate_per_kwh, dtype=np.float64)
+
+def calculate_spine_energy(
+    spine: MinuteSpine,
+    pump_curve_data: PumpCurveData,
+    energy_rate_per_kwh: Union[ArrayLike, TimeOfUseRateSchedule],
+    pump_age_years: float = 0.0,
+    maintenance_history_factor: float = 1.0,
+    motor_efficiency: float = 1.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Compute hydraulic, shaft and electrical power and the per-minute cost for a whole spine.
+
+    Uses flow_rate_f1 and pressure_p1. Minutes where S1 reports the pump OFF or in MAINTENANCE
+    draw no power; minutes with missing flow or pressure stay NaN. The spine's pump_power_kw
+    (shaft power), pump_efficiency_factor and energy_cost_per_minute columns are filled in place.
+
+    Args:
+        spine: Minute spine to price.
+        pump_curve_data: PumpCurve, Pump or legacy dict, as accepted by calculate_pump_power_kw.
+            With a curve, efficiency is looked up at each minute's flow.
+        energy_rate_per_kwh: Static rate, one rate per minute of the spine, or a
+            TimeOfUseRateSchedule that is looked up for every minute.
+        pump_age_years: Pump age used for efficiency degradation.
+        maintenance_history_factor: 1.0 for well-maintained, < 1.0 for poorly maintained.
+        motor_efficiency: Motor/drivetrain efficiency between shaft and electrical power.
+
+    Returns:
+        Dict of arrays: hydraulic_power_kw, shaft_power_kw, efficiency_factor,
+        electrical_power_kw and energy_cost_per_minute.
+    """
+    status = spine["pump_status_s1"]
+    stopped = (status == PUMP_STATUS_CODES.index(PumpStatus.OFF)) | (status == PUMP_STATUS_CODES.index(PumpStatus.MAINTENANCE))
+    flow_rate = np.where(stopped, 0.0, spine["flow_rate_f1"])
+    pressure = spine["pressure_p1"]
+
+    if isinstance(energy_rate_per_kwh, TimeOfUseRateSchedule):
+        energy_rate_per_kwh = energy_rate_per_kwh.rates_for_spine(spine)
+
+    pump_efficiency = resolve_pump_efficiency(pump_curve_data, flow_rate)
+    hydraulic_power_kw = calculate_hydraulic_power_kw_array(flow_rate, pressure)
+    shaft_power_kw = calculate_pump_power_kw_array(flow_rate, pressure, pump_efficiency)
+    efficiency_factor = np.broadcast_to(
+        calculate_efficiency_factor_array(motor_efficiency, pump_age_years, maintenance_history_factor), shaft_power_kw.shape
+    )
+    electrical_power_kw = calculate_electrical_power_kw_array(shaft_power_kw, efficiency_factor)
+    energy_cost = calculate_energy_cost_array(shaft_power_kw, efficiency_factor, 1.0, energy_rate_per_kwh)
+
+    spine.columns["pump_power_kw"] = shaft_power_kw
+    spine.columns["pump_efficiency_factor"] = np.array(efficiency_factor)
+    spine.columns["energy_cost_per_minute"] = energy_cost
+    return {
+        "hydraulic_power_kw": hydraulic_power_kw,
+        "shaft_power_kw": shaft_power_kw,
+        "efficiency_factor": np.array(efficiency_factor),
+        "electrical_power_kw": electrical_power_kw,
+        "energy_cost_per_minute": energy_cost,
+    }
+
+# --- Scalar versions (thin wrappers over the array functions) ---
+
+def calculate_pump_power_kw(flow_rate: float, pressure: float, pump_curve_data: PumpCurveData) -> float:
+    """
+    Calculate pump power in kW based on flow rate, pressure, and pump curve data.
+
+    Pump Power = f(Flowrate, Pressure, Pump Curve)
+
+    Power (kW) = (Flow Rate (m³/s) * Pressure (Pa) / Pump Efficiency) / 1000
+    GPM is converted to m³/s and PSI to Pa.
+
+    pump_curve_data may be a PumpCurve or a Pump with a curve, in which case the efficiency is
+    looked up at the operating flow, or the legacy dict with a single "default_efficiency"
+    (75% if absent).
+    Scalar wrapper around calculate_pump_power_kw_array.
+    """
+    pump_efficiency = resolve_pump_efficiency(pump_curve_data, flow_rate)
+    shaft_power_kw = float(calculate_pump_power_kw_array(flow_rate, pressure, pump_efficiency))
+    logger.debug("Calculated Pump Power: %.2f kW for flow %s, pressure %s", shaft_power_kw, flow_rate, pressure)
     return shaft_power_kw
 
 def calculate_efficiency_factor(operating_point_efficiency: float, pump_age_years: float, maintenance_history_factor: float) -> float:
@@ -49,23 +147,18 @@ def calculate_efficiency_factor(operating_point_efficiency: float, pump_age_year
     Calculate the overall efficiency factor.
     Efficiency Factor = f(Operating Point Efficiency, Pump Age, Maintenance History)
 
-    Placeholder implementation.
-    This would involve a model or heuristics to degrade efficiency based on age and maintenance.
+    Simple degradation model: 1% per year of age (capped at 0), times the maintenance factor
+    (1.0 for well-maintained, < 1.0 for poorly maintained).
+    Scalar wrapper around calculate_efficiency_factor_array.
     """
-    # Example: Simple degradation model
-    age_degradation = max(0, 1 - (pump_age_years * 0.01)) # 1% degradation per year, capped at 0
-
-    # maintenance_history_factor could be e.g. 1.0 for well-maintained, < 1.0 for poorly maintained
-
-    overall_efficiency_factor = operating_point_efficiency * age_degradation * maintenance_history_factor
-
-    print(f"Placeholder: Calculated Efficiency Factor: {overall_efficiency_factor:.3f}")
+    overall_efficiency_factor = float(calculate_efficiency_factor_array(operating_point_efficiency, pump_age_years, maintenance_history_factor))
+    logger.debug("Calculated Efficiency Factor: %.3f", overall_efficiency_factor)
     return overall_efficiency_factor
 
 
 def calculate_energy_cost_per_minute(
     pump_power_kw: float,
-    efficiency_factor: float, # This might be redundant if pump_power_kw already accounts for all efficiencies
+    efficiency_factor: float, # Converts shaft power to electrical power (e.g. motor efficiency * age/maintenance derating)
     operating_time_minutes: float, # Usually 1 minute for "per minute" cost
     energy_rate_per_kwh: float
 ) -> float:
@@ -74,67 +167,17 @@ def calculate_energy_cost_per_minute(
     Energy Cost ($/minute) = Pump Power (kW) × Efficiency Factor × Operating Time (hours) × Energy Rate ($/kWh)
 
     Note: The formula in the spec is `Pump Power (kW) × Efficiency Factor × Operating Time × Energy Rate ($/kWh)`
-    If `Pump Power (kW)` is shaft power (already accounting for pump efficiency at operating point),
-    then `Efficiency Factor` might refer to additional degradation factors (age, maintenance).
-    If `Pump Power (kW)` is hydraulic power, then `Efficiency Factor` must include pump efficiency.
-    Assuming `pump_power_kw` is shaft power, and `efficiency_factor` accounts for further degradations.
-    Operating time needs to be in hours for the formula if energy rate is per kWh.
+    `pump_power_kw` is treated as mechanical shaft power and `efficiency_factor` as the efficiency
+    that converts it to electrical power (Electrical Power = Shaft Power / Efficiency Factor).
+    A non-positive efficiency_factor leaves the shaft power unchanged.
+    Operating time is converted to hours since the energy rate is per kWh.
+    Scalar wrapper around calculate_energy_cost_array.
     """
-
-    operating_time_hours = operating_time_minutes / 60.0
-
-    # This interpretation assumes pump_power_kw is the power drawn by the motor,
-    # and efficiency_factor is an additional adjustment (e.g. for motor efficiency if not included, or other system losses).
-    # Or, if pump_power_kw is hydraulic power, then efficiency_factor is the overall (pump * motor * age) efficiency.
-    # Let's assume pump_power_kw is the actual electrical power consumed by the pump motor system.
-    # And efficiency_factor from the spec is an overall system efficiency that might include age/maintenance factors
-    # not already in the pump_power_kw calculation.
-    # For this placeholder, let's assume pump_power_kw is the input electrical power.
-    # The original formula: Energy Cost ($/minute) = Pump Power (kW) × Efficiency Factor × Operating Time × Energy Rate ($/kWh)
-    # If Pump Power is electrical power, Efficiency Factor might be an adjustment or could be 1.0 if already accounted for.
-    # Let's refine based on the spec's definition of Pump Power = f(Flowrate, Pressure, Pump Curve) -> this is likely shaft power.
-    # And Efficiency Factor = f(Operating Point, Pump Age, Maintenance History)
-    # This suggests that Pump Power (shaft) * (1/Operating Point Efficiency) = Electrical Power.
-    # Then this Electrical Power is affected by (Pump Age, Maintenance History).
-
-    # Simpler: Assume `pump_power_kw` is the final electrical power consumed.
-    # And `efficiency_factor` is an adjustment (e.g. if we want to model deviation from ideal).
-    # For now, let's assume `pump_power_kw` is the actual drawn power.
-    # The `efficiency_factor` in the cost formula might be a misinterpretation or for future use.
-    # Let's use a simplified version for now where pump_power_kw is the key.
-
-    # Cost = Power (kW) * Time (hours) * Rate ($/kWh)
-    energy_consumed_kwh = pump_power_kw * operating_time_hours
-    cost = energy_consumed_kwh * energy_rate_per_kwh
-
-    # If the 'Efficiency Factor' in the cost formula is meant to adjust the pump_power_kw
-    # (e.g. if pump_power_kw was hydraulic power, then cost = (pump_power_kw / efficiency_factor) * time * rate)
-    # Given the spec, `pump_power_kw` seems to be shaft power.
-    # `Efficiency Factor` includes `Operating Point`.
-    # This is a bit ambiguous in the spec. Let's assume `pump_power_kw` is electrical power for now.
-    # And `efficiency_factor` is a multiplier (e.g. for demand charges or other factors, typically it would be divisor if it's efficiency)
-
-    # Re-interpreting: Energy Cost ($/minute) = [Pump Power (kW) / System_Efficiency_Factor] * Operating Time (hours) * Energy Rate ($/kWh)
-    # Where System_Efficiency_Factor combines pump curve efficiency, age, maintenance.
-    # Let's assume calculated `pump_power_kw` is shaft power.
-    # And `efficiency_factor` is the overall system efficiency (e.g. 0.7 for 70%).
-
-    if efficiency_factor <= 0: # This efficiency_factor is the one from EnergyCostFactors
-        actual_electrical_power_kw = pump_power_kw # Or handle as error/very high cost
-    else:
-        # If pump_power_kw is shaft power, then Electrical Power = Shaft Power / Motor_Efficiency
-        # The 'Efficiency Factor' in the spec's cost formula is confusing.
-        # Let's use the `efficiency_factor` parameter as the true overall efficiency for converting shaft power to electrical power.
-        # This means `pump_power_kw` is mechanical shaft power.
-        # Electrical Power (kW) = Mechanical Shaft Power (kW) / Overall System Efficiency
-        # Overall System Efficiency = operating_point_eff * age_factor * maintenance_factor
-        # This `efficiency_factor` parameter should be this overall system efficiency.
-        actual_electrical_power_kw = pump_power_kw / efficiency_factor if efficiency_factor > 0 else pump_power_kw * 100 # Penalize if eff is 0
-
-    energy_consumed_kwh_adjusted = actual_electrical_power_kw * operating_time_hours
-    cost = energy_consumed_kwh_adjusted * energy_rate_per_kwh
-
-    print(f"Placeholder: Calculated Energy Cost: ${cost:.4f} for {operating_time_minutes} min at ${energy_rate_per_kwh}/kWh, using pump power {pump_power_kw} kW and eff factor {efficiency_factor}")
+    cost = float(calculate_energy_cost_array(pump_power_kw, efficiency_factor, operating_time_minutes, energy_rate_per_kwh))
+    logger.debug(
+        "Calculated Energy Cost: $%.4f for %s min at $%s/kWh, using pump power %s kW and eff factor %s",
+        cost, operating_time_minutes, energy_rate_per_kwh, pump_power_kw, efficiency_factor,
+    )
     return cost
 
 if __name__ == '__main__':
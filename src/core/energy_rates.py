@@ -0,0 +1,131 @@
+from datetime import date, datetime
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+import numpy as np
+from src.models.digital_twin_models import ExternalData, TariffDayType, TariffRule
+from src.core.time_spine import MinuteSpine
+
+MINUTES_PER_DAY = 24 * 60
+_DAY_TYPES: Tuple[TariffDayType, ...] = tuple(TariffDayType)
+
+
+def parse_period(period: str) -> Tuple[int, int]:
+    """
+    Parse an 'HH:MM-HH:MM' band into (start, end) minutes of the day.
+
+    Raises:
+        ValueError: If the band is malformed.
+    """
+    try:
+        start_text, end_text = period.split("-")
+        bounds = []
+        for text in (start_text, end_text):
+            hours, minutes = (int(part) for part in text.strip().split(":"))
+            if not (0 <= hours <= 24 and 0 <= minutes < 60) or (hours == 24 and minutes):
+                raise ValueError
+            bounds.append(hours * 60 + minutes)
+    except ValueError:
+        raise ValueError(f"Invalid tariff period '{period}', expected 'HH:MM-HH:MM'") from None
+    return bounds[0], bounds[1]
+
+
+def _period_mask(start: int, end: int) -> np.ndarray:
+    minutes = np.arange(MINUTES_PER_DAY)
+    if start == end:
+        return np.ones(MINUTES_PER_DAY, dtype=bool)
+    if start < end:
+        return (minutes >= start) & (minutes < end)
+    return (minutes >= start) | (minutes < end)  # band wraps past midnight
+
+
+class TimeOfUseRateSchedule:
+    """
+    Time-of-use tariff compiled once into a rate lookup index.
+
+    Every rule is parsed a single time and expanded into a table of rates indexed by
+    (day type, month, minute of day). Pricing any set of timestamps is then pure array
+    arithmetic plus one take, so a multi-year minute spine is priced in one vectorised
+    lookup. Timestamps are interpreted in the tariff's local time.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[TariffRule],
+        holidays: Iterable[date] = (),
+        default_rate_per_kwh: Optional[float] = None,
+    ):
+        """
+        Args:
+            rules: Tariff bands, applied in order (later rules override earlier ones).
+            holidays: Dates priced with HOLIDAY rules instead of WEEKDAY/WEEKEND ones.
+            default_rate_per_kwh: Rate where no band applies; NaN if None.
+        """
+        fill = np.nan if default_rate_per_kwh is None else default_rate_per_kwh
+        table = np.full((len(_DAY_TYPES), 12, MINUTES_PER_DAY), fill, dtype=np.float64)
+
+        for rule in rules:
+            minute_mask = _period_mask(*parse_period(rule.period))
+            months = [m - 1 for m in rule.months] if rule.months else list(range(12))
+            if any(not 0 <= m < 12 for m in months):
+                raise ValueError(f"Invalid months {rule.months} in tariff rule for '{rule.period}'")
+            for day_type in rule.day_types:
+                day_index = _DAY_TYPES.index(day_type)
+                for month in months:
+                    table[day_index, month, minute_mask] = rule.rate_per_kwh
+
+        self._table = table.ravel()
+        self._holidays = np.array(sorted(set(holidays)), dtype="datetime64[D]")
+
+    @classmethod
+    def from_external_data(cls, external_data: ExternalData) -> "TimeOfUseRateSchedule":
+        """
+        Build a schedule from ExternalData: the simple energy_pricing_schedule bands apply to
+        every day, then tariff_rules are layered on top.
+        """
+        rules: List[TariffRule] = [
+            TariffRule(period=period, rate_per_kwh=rate)
+            for period, rate in (external_data.energy_pricing_schedule or {}).items()
+        ]
+        rules.extend(external_data.tariff_rules or [])
+        return cls(rules, external_data.holidays or (), external_data.default_energy_rate_per_kwh)
+
+    def rates_at(self, timestamps) -> np.ndarray:
+        """
+        Rate in $/kWh at each timestamp (datetime64 array or anything NumPy converts).
+        """
+        minutes = np.asarray(timestamps, dtype="datetime64[m]")
+        days = minutes.astype("datetime64[D]")
+        minute_of_day = (minutes - days).astype(np.int64)
+        month = minutes.astype("datetime64[M]").astype(np.int64) % 12
+        weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+
+        day_type = np.where(weekday >= 5, _DAY_TYPES.index(TariffDayType.WEEKEND), _DAY_TYPES.index(TariffDayType.WEEKDAY))
+        if len(self._holidays):
+            day_type = np.where(np.isin(days, self._holidays), _DAY_TYPES.index(TariffDayType.HOLIDAY), day_type)
+
+        return self._table[(day_type * 12 + month) * MINUTES_PER_DAY + minute_of_day]
+
+    def rate_at(self, timestamp: datetime) -> float:
+        """Rate in $/kWh at a single timestamp."""
+        return float(self.rates_at(np.array([timestamp], dtype="datetime64[m]"))[0])
+
+    def rates_for_spine(self, spine: MinuteSpine) -> np.ndarray:
+        """Rate array aligned with every minute of the spine."""
+        return self.rates_at(spine.timestamps)
+
+
+if __name__ == '__main__':
+    external = ExternalData(
+        energy_pricing_schedule={"00:00-07:00": 0.06, "07:00-19:00": 0.12, "19:00-24:00": 0.09},
+        tariff_rules=[
+            TariffRule(period="14:00-19:00", rate_per_kwh=0.21, day_types=[TariffDayType.WEEKDAY], months=[6, 7, 8, 9]),
+            TariffRule(period="00:00-24:00", rate_per_kwh=0.07, day_types=[TariffDayType.WEEKEND, TariffDayType.HOLIDAY]),
+        ],
+        holidays=[date(2023, 7, 4)],
+    )
+    schedule = TimeOfUseRateSchedule.from_external_data(external)
+    for ts in [datetime(2023, 7, 3, 15, 0), datetime(2023, 7, 4, 15, 0), datetime(2023, 1, 3, 15, 0), datetime(2023, 7, 8, 3, 0)]:
+        print(f"{ts:%a %Y-%m-%d %H:%M}: ${schedule.rate_at(ts):.2f}/kWh")
+
+    year = np.arange("2023-01-01", "2024-01-01", dtype="datetime64[m]")
+    rates = schedule.rates_at(year)
+    print(f"Priced {len(year)} minutes; mean rate ${rates.mean():.4f}/kWh")
@@ -0,0 +1,372 @@
+import math
+import time
+from datetime import datetime
+from typing import List, Any, Dict, Optional, Tuple, Union
+import numpy as np
+from src.models.digital_twin_models import HealthHistoryConfig
+from src.core.time_spine import _to_datetime64
+
+NS_PER_SECOND = 1_000_000_000
+RESOLUTIONS: Dict[str, int] = {"1min": 60 * NS_PER_SECOND, "1h": 3600 * NS_PER_SECOND}
+
+TimeLike = Union[datetime, np.datetime64, int, None]
+
+
+def to_ns(timestamp: TimeLike) -> int:
+    """int64 ns since the epoch (UTC) of a datetime, datetime64 or int ns; None means now."""
+    if timestamp is None:
+        return time.time_ns()
+    if isinstance(timestamp, datetime):
+        timestamp = _to_datetime64(timestamp)
+    if isinstance(timestamp, np.datetime64):
+        return int(timestamp.astype("datetime64[ns]").astype(np.int64))
+    return int(timestamp)
+
+
+def _timestamps_ns(timestamps: Any) -> np.ndarray:
+    timestamps = np.asarray(timestamps)
+    if timestamps.dtype.kind == "M":
+        return timestamps.astype("datetime64[ns]").astype(np.int64)
+    if timestamps.dtype == object:
+        return np.array([to_ns(t) for t in timestamps.tolist()], dtype=np.int64)
+    return timestamps.astype(np.int64)
+
+
+class _Ring:
+    """Fixed-capacity columns overwritten oldest-first; rows are kept in time order."""
+
+    def __init__(self, capacity: int, dtypes: Dict[str, Any]):
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in dtypes.items()}
+        self.written = 0
+
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+
+    def oldest_rows(self, count: int) -> np.ndarray:
+        """Ring positions of the `count` oldest rows."""
+        return (self.written - len(self) + np.arange(count)) % self.capacity
+
+    def write(self, rows: Dict[str, np.ndarray]) -> None:
+        count = len(next(iter(rows.values())))
+        if count > self.capacity:
+            self.written += count - self.capacity
+            rows = {name: column[-self.capacity:] for name, column in rows.items()}
+            count = self.capacity
+        positions = (self.written + np.arange(count)) % self.capacity
+        for name, column in rows.items():
+            self.columns[name][positions] = column
+        self.written += count
+
+    def segments(self) -> List[slice]:
+        """One or two slices of the columns that, in order, hold every row oldest first."""
+        held = len(self)
+        start = (self.written - held) % self.capacity
+        if start + held <= self.capacity:
+            return [slice(start, start + held)]
+        return [slice(start, self.capacity), slice(0, held - (self.capacity - start))]
+
+    def select(self, key: str, start_ns: Optional[int], end_ns: Optional[int]) -> Dict[str, np.ndarray]:
+        """Rows with start_ns <= column[key] < end_ns, by binary search of each segment."""
+        parts = []
+        for segment in self.segments():
+            keys = self.columns[key][segment]
+            lo = 0 if start_ns is None else int(np.searchsorted(keys, start_ns, side="left"))
+            hi = len(keys) if end_ns is None else int(np.searchsorted(keys, end_ns, side="left"))
+            if hi > lo:
+                parts.append(slice(segment.start + lo, segment.start + hi))
+        if len(parts) == 1:
+            return {name: column[parts[0]].copy() for name, column in self.columns.items()}
+        return {
+            name: np.concatenate([column[part] for part in parts]) if parts else column[:0].copy()
+            for name, column in self.columns.items()
+        }
+
+
+class _Rollup:
+    """Fixed-width time buckets (count, sum, sum of squares, min, max, last) in a ring."""
+
+    _DTYPES = {"start": np.int64, "count": np.int64, "sum": np.float64, "sum_sq": np.float64,
+               "min": np.float64, "max": np.float64, "last": np.float64}
+
+    def __init__(self, width_ns: int, capacity: int):
+        self.width_ns = width_ns
+        self.ring = _Ring(capacity, self._DTYPES)
+        self.open: Optional[Dict[str, float]] = None  # Bucket still receiving readings
+
+    def add(self, timestamps_ns: np.ndarray, values: np.ndarray) -> None:
+        """Fold sorted readings into the buckets, closing every bucket they move past."""
+        buckets = timestamps_ns // self.width_ns
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(values)]
+        groups = {
+            "start": buckets[starts] * self.width_ns,
+            "count": ends - starts,
+            "sum": np.add.reduceat(values, starts),
+            "sum_sq": np.add.reduceat(values * values, starts),
+            "min": np.minimum.reduceat(values, starts),
+            "max": np.maximum.reduceat(values, starts),
+            "last": values[ends - 1],
+        }
+        if self.open is not None and groups["start"][0] == self.open["start"]:
+            first = self.open
+            groups["count"][0] += first["count"]
+            groups["sum"][0] += first["sum"]
+            groups["sum_sq"][0] += first["sum_sq"]
+            groups["min"][0] = min(groups["min"][0], first["min"])
+            groups["max"][0] = max(groups["max"][0], first["max"])
+        elif self.open is not None:
+            self.ring.write({name: np.array([value]) for name, value in self.open.items()})
+        if len(starts) > 1:
+            self.ring.write({name: column[:-1] for name, column in groups.items()})
+        self.open = {name: column[-1].item() for name, column in groups.items()}
+
+    def select(self, start_ns: Optional[int], end_ns: Optional[int]) -> Dict[str, np.ndarray]:
+        # Every bucket overlapping [start_ns, end_ns) is included
+        if start_ns is not None:
+            start_ns = start_ns - self.width_ns + 1
+        rows = self.ring.select("start", start_ns, end_ns)
+        if self.open is not None and (start_ns is None or self.open["start"] >= start_ns) \
+                and (end_ns is None or self.open["start"] < end_ns):
+            rows = {name: np.append(column, self.open[name]) for name, column in rows.items()}
+        return rows
+
+    def oldest_start(self) -> Optional[int]:
+        if len(self.ring):
+            return int(self.ring.columns["start"][self.ring.oldest_rows(1)[0]])
+        return None if self.open is None else int(self.open["start"])
+
+
+class MetricHistory:
+    """
+    Bounded history of one metric of one piece of equipment.
+
+    Raw readings live in a ring of typed arrays (raw_capacity readings); every reading is
+    also folded into 1-minute and 1-hour rollups, kept in rings sized by the configured
+    retention, so memory is fixed however long the agent runs. Rolling statistics over the
+    raw window are maintained incrementally (O(1) per reading); time-range queries binary
+    search the rings and only copy the rows returned.
+
+    Timestamps must not go backwards: readings older than the newest one held are dropped
+    (and counted), as are NaN values.
+    """
+
+    def __init__(self, config: Optional[HealthHistoryConfig] = None):
+        config = config or HealthHistoryConfig()
+        self.raw = _Ring(config.raw_capacity, {"timestamp": np.int64, "value": np.float64})
+        self.rollups = {
+            "1min": _Rollup(RESOLUTIONS["1min"], math.ceil(config.minute_retention_hours * 60)),
+            "1h": _Rollup(RESOLUTIONS["1h"], math.ceil(config.hour_retention_days * 24)),
+        }
+        self.last_timestamp: Optional[int] = None
+        self.dropped = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def append(self, value: float, timestamp: TimeLike = None) -> None:
+        self.extend(np.array([to_ns(timestamp)], dtype=np.int64), np.array([value], dtype=np.float64))
+
+    def extend(self, timestamps: Any, values: Any) -> int:
+        """
+        Add readings in time order.
+
+        Args:
+            timestamps: datetime64 values, int64 ns since the epoch or datetimes.
+            values: Float readings.
+
+        Returns:
+            Number of readings kept.
+        """
+        timestamps_ns = _timestamps_ns(timestamps)
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return 0
+        floor = np.iinfo(np.int64).min if self.last_timestamp is None else self.last_timestamp
+        previous_max = np.maximum(np.r_[floor, np.maximum.accumulate(timestamps_ns)[:-1]], floor)
+        keep = (timestamps_ns >= previous_max) & ~np.isnan(values)
+        if not keep.all():
+            self.dropped += int((~keep).sum())
+            timestamps_ns, values = timestamps_ns[keep], values[keep]
+            if len(values) == 0:
+                return 0
+
+        # Running sums over the raw window: add the new readings, remove the ones they evict
+        evicted = max(len(self.raw) + len(values) - self.raw.capacity, 0)
+        if evicted:
+            overwritten = self.raw.columns["value"][self.raw.oldest_rows(min(evicted, len(self.raw)))]
+            self._sum -= float(overwritten.sum())
+            self._sum_sq -= float(np.dot(overwritten, overwritten))
+            self._evicted += len(overwritten)
+        kept = values[-self.raw.capacity:]
+        self._sum += float(kept.sum())
+        self._sum_sq += float(np.dot(kept, kept))
+        self.raw.write({"timestamp": timestamps_ns, "value": values})
+        if self._evicted >= self.raw.capacity:  # Re-sum now and then so rounding cannot build up
+            held = np.concatenate([self.raw.columns["value"][s] for s in self.raw.segments()])
+            self._sum, self._sum_sq, self._evicted = float(held.sum()), float(np.dot(held, held)), 0
+
+        for rollup in self.rollups.values():
+            rollup.add(timestamps_ns, values)
+        self.last_timestamp = int(timestamps_ns[-1])
+        return len(values)
+
+    def stats(self) -> Dict[str, float]:
+        """Count, mean, standard deviation and last value of the raw window, in O(1)."""
+        count = len(self.raw)
+        if count == 0:
+            return {"count": 0, "mean": math.nan, "std": math.nan, "last": math.nan}
+        mean = self._sum / count
+        variance = max(self._sum_sq / count - mean * mean, 0.0)
+        last = float(self.raw.columns["value"][(self.raw.written - 1) % self.raw.capacity])
+        return {"count": count, "mean": mean, "std": math.sqrt(variance), "last": last}
+
+    def raw_range(self, start: TimeLike = None, end: TimeLike = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Raw readings with start <= timestamp < end (open-ended when None).
+
+        Returns:
+            (timestamps as datetime64[ns], values)
+        """
+        rows = self.raw.select(
+            "timestamp", None if start is None else to_ns(start), None if end is None else to_ns(end)
+        )
+        return rows["timestamp"].astype("datetime64[ns]"), rows["value"]
+
+    def rollup_range(self, resolution: str, start: TimeLike = None, end: TimeLike = None) -> Dict[str, np.ndarray]:
+        """
+        Rollup buckets of `resolution` ('1min' or '1h') overlapping [start, end), including the
+        bucket still open.
+
+        Returns:
+            Arrays timestamp (bucket start, datetime64[ns]), count, mean, std, min, max, last.
+        """
+        rows = self.rollups[resolution].select(
+            None if start is None else to_ns(start), None if end is None else to_ns(end)
+        )
+        count = rows["count"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = rows["sum"] / count
+            std = np.sqrt(np.maximum(rows["sum_sq"] / count - mean * mean, 0.0))
+        return {"timestamp": rows["start"].astype("datetime64[ns]"), "count": count, "mean": mean, "std": std,
+                "min": rows["min"], "max": rows["max"], "last": rows["last"]}
+
+    def query(self, start: TimeLike = None, end: TimeLike = None) -> Tuple[np.ndarray, np.ndarray, str]:
+        """
+        Values over [start, end) at the finest resolution still held for `start`: raw readings
+        if the raw ring reaches back that far, else 1-minute, else 1-hour means.
+
+        Returns:
+            (timestamps as datetime64[ns], values, resolution) with resolution 'raw', '1min' or '1h'.
+        """
+        start_ns = None if start is None else to_ns(start)
+        if len(self.raw):
+            oldest = int(self.raw.columns["timestamp"][self.raw.oldest_rows(1)[0]])
+            if self.raw.written <= self.raw.capacity or (start_ns is not None and start_ns >= oldest):
+                return (*self.raw_range(start, end), "raw")
+        oldest_minute = self.rollups["1min"].oldest_start()
+        covered = start_ns is not None and oldest_minute is not None and start_ns >= oldest_minute
+        resolution = "1min" if covered else "1h"
+        rows = self.rollup_range(resolution, start, end)
+        return rows["timestamp"], rows["mean"], resolution
+
+    def trend_per_hour(self, window_seconds: float = 6 * 3600) -> float:
+        """Least-squares slope of the 1-minute means over the last window_seconds, per hour (NaN if < 2 minutes)."""
+        if self.last_timestamp is None:
+            return math.nan
+        rows = self.rollup_range("1min", self.last_timestamp - int(window_seconds * NS_PER_SECOND))
+        if len(rows["mean"]) < 2:
+            return math.nan
+        hours = (rows["timestamp"].astype(np.int64) - rows["timestamp"][0].astype(np.int64)) / (3600 * NS_PER_SECOND)
+        hours_centered = hours - hours.mean()
+        return float(np.dot(hours_centered, rows["mean"] - rows["mean"].mean()) / np.dot(hours_centered, hours_centered))
+
+
+class EquipmentHealthHistory:
+    """Per-equipment, per-metric MetricHistory store used by PredictiveMaintenanceAgent."""
+
+    def __init__(self, config: Optional[HealthHistoryConfig] = None):
+        self.config = config or HealthHistoryConfig()
+        self._series: Dict[str, Dict[str, MetricHistory]] = {}
+
+    def series(self, equipment_id: str, metric: str, create: bool = False) -> Optional[MetricHistory]:
+        metrics = self._series.get(equipment_id)
+        if metrics is None:
+            if not create:
+                return None
+            metrics = self._series[equipment_id] = {}
+        history = metrics.get(metric)
+        if history is None and create:
+            history = metrics[metric] = MetricHistory(self.config)
+        return history
+
+    def record(self, equipment_id: str, metric: str, value: float, timestamp: TimeLike = None) -> None:
+        self.series(equipment_id, metric, create=True).append(value, timestamp)
+
+    def extend(self, equipment_id: str, metric: str, timestamps: Any, values: Any) -> int:
+        return self.series(equipment_id, metric, create=True).extend(timestamps, values)
+
+    def equipment_ids(self) -> List[str]:
+        return list(self._series)
+
+    def metrics(self, equipment_id: str) -> List[str]:
+        return list(self._series.get(equipment_id, {}))
+
+    def features(self, equipment_id: str, trend_window_seconds: float = 6 * 3600) -> Dict[str, float]:
+        """<metric>_last, _mean, _std and _trend_per_hour for every metric of the equipment."""
+        features = {}
+        for metric, history in self._series.get(equipment_id, {}).items():
+            stats = history.stats()
+            features[f"{metric}_last"] = stats["last"]
+            features[f"{metric}_mean"] = stats["mean"]
+            features[f"{metric}_std"] = stats["std"]
+            features[f"{metric}_trend_per_hour"] = history.trend_per_hour(trend_window_seconds)
+        return features
+
+    def nbytes(self) -> int:
+        """Memory held by the history arrays; bounded by the configuration, not by uptime."""
+        return sum(
+            sum(column.nbytes for column in history.raw.columns.values())
+            + sum(column.nbytes for rollup in history.rollups.values() for column in rollup.ring.columns.values())
+            for metrics in self._series.values()
+            for history in metrics.values()
+        )
+
+
+# --- Demonstration Block ---
+if __name__ == '__main__':
+    config = HealthHistoryConfig(raw_capacity=4096, minute_retention_hours=48, hour_retention_days=365)
+    store = EquipmentHealthHistory(config)
+    rng = np.random.default_rng(0)
+    pumps, days = 20, 30
+    t0 = np.datetime64("2024-01-01", "ns").astype(np.int64)
+
+    # One reading per pump and metric every 10 s for 30 days, added an hour at a time
+    started = time.perf_counter()
+    per_hour = 360
+    for hour in range(days * 24):
+        timestamps = t0 + (hour * per_hour + np.arange(per_hour)) * 10 * NS_PER_SECOND
+        for n in range(pumps):
+            drift = 0.002 * hour if n == 3 else 0.0  # Bearing wear on one pump
+            store.extend(f"PMP-{n:03d}", "vibration", timestamps, 2.5 + drift + rng.normal(0, 0.1, per_hour))
+            store.extend(f"PMP-{n:03d}", "temperature", timestamps, 60 + rng.normal(0, 0.5, per_hour))
+    elapsed = time.perf_counter() - started
+    readings = pumps * 2 * days * 24 * per_hour
+    print(f"Stored {readings:,} readings in {elapsed:.2f} s ({readings / elapsed:,.0f}/s); "
+          f"history holds {store.nbytes() / 1e6:.1f} MB")
+
+    history = store.series("PMP-003", "vibration")
+    started = time.perf_counter()
+    for _ in range(10_000):
+        history.stats()
+    print(f"Rolling stats: {(time.perf_counter() - started) / 10_000 * 1e6:.2f} us per call -> {history.stats()}")
+
+    last = np.datetime64(history.last_timestamp, "ns")
+    started = time.perf_counter()
+    for start in (last - np.timedelta64(2, "h"), last - np.timedelta64(1, "D"), last - np.timedelta64(20, "D")):
+        timestamps, values, resolution = history.query(start)
+        print(f"Since {start}: {len(values)} points at {resolution}")
+    print(f"Features for PMP-003: {store.features('PMP-003')}")
@@ -0,0 +1,116 @@
+from typing import Callable, Dict, Optional, Sequence, Tuple
+import numpy as np
+from src.models.digital_twin_models import SensorConfig, SensorType
+
+# An interpolation strategy maps observations (sorted, unique timestamps in ns and their
+# values) onto sample timestamps in ns, returning NaN where it cannot produce a value.
+InterpolationStrategy = Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]
+
+_STRATEGIES: Dict[str, InterpolationStrategy] = {}
+
+# Strategy used for each kind of sensor unless the registry is changed.
+DEFAULT_STRATEGY_BY_SENSOR_TYPE: Dict[SensorType, str] = {
+    SensorType.PUMP_STATUS: "step",
+    SensorType.FLOW_RATE: "linear",
+    SensorType.PRESSURE: "linear",
+}
+
+# Sensor types of the standard skid sensors, used when no SensorConfig is supplied.
+DEFAULT_SENSOR_TYPES: Dict[str, SensorType] = {
+    "F1": SensorType.FLOW_RATE,
+    "F2": SensorType.FLOW_RATE,
+    "S1": SensorType.PUMP_STATUS,
+    "P1": SensorType.PRESSURE,
+}
+
+
+def register_interpolation_strategy(name: str) -> Callable[[InterpolationStrategy], InterpolationStrategy]:
+    """Decorator that registers an interpolation strategy under the given name."""
+    def decorator(func: InterpolationStrategy) -> InterpolationStrategy:
+        _STRATEGIES[name] = func
+        return func
+    return decorator
+
+
+def get_interpolation_strategy(name: str) -> InterpolationStrategy:
+    """
+    Look up a registered strategy.
+
+    Raises:
+        KeyError: If no strategy is registered under that name.
+    """
+    try:
+        return _STRATEGIES[name]
+    except KeyError:
+        raise KeyError(f"Unknown interpolation strategy '{name}'. Registered: {sorted(_STRATEGIES)}") from None
+
+
+@register_interpolation_strategy("step")
+def step_interpolation(obs_ts: np.ndarray, obs_values: np.ndarray, sample_ts: np.ndarray) -> np.ndarray:
+    """Carry the last observation at or before each sample forward (ffill)."""
+    idx = np.searchsorted(obs_ts, sample_ts, side="right") - 1
+    result = np.full(len(sample_ts), np.nan)
+    known = idx >= 0
+    result[known] = obs_values[idx[known]]
+    return result
+
+
+@register_interpolation_strategy("linear")
+def linear_interpolation(obs_ts: np.ndarray, obs_values: np.ndarray, sample_ts: np.ndarray) -> np.ndarray:
+    """
+    Interpolate linearly between the observations either side of each sample.
+    Samples after the last observation hold its value; samples before the first are NaN.
+    """
+    if len(obs_ts) == 0:
+        return np.full(len(sample_ts), np.nan)
+    # Offsets from the first observation keep the float64 conversion exact over long ranges.
+    origin = obs_ts[0]
+    result = np.interp((sample_ts - origin).astype(np.float64), (obs_ts - origin).astype(np.float64), obs_values)
+    result[sample_ts < origin] = np.nan
+    return result
+
+
+def resolve_sensor_strategies(
+    sensor_ids: Sequence[str], sensor_configs: Optional[Sequence[SensorConfig]] = None
+) -> Dict[str, Tuple[InterpolationStrategy, Optional[int]]]:
+    """
+    Work out the strategy and staleness limit (in ns, None for unlimited) for each sensor.
+
+    Sensors without a SensorConfig fall back to DEFAULT_SENSOR_TYPES.
+    """
+    configs = {config.sensor_id: config for config in sensor_configs or ()}
+    resolved = {}
+    for sensor_id in sensor_ids:
+        config = configs.get(sensor_id)
+        sensor_type = config.sensor_type if config else DEFAULT_SENSOR_TYPES[sensor_id]
+        staleness_ns = None
+        if config is not None and config.max_staleness_minutes is not None:
+            staleness_ns = int(config.max_staleness_minutes * 60 * 1_000_000_000)
+        resolved[sensor_id] = (get_interpolation_strategy(DEFAULT_STRATEGY_BY_SENSOR_TYPE[sensor_type]), staleness_ns)
+    return resolved
+
+
+def interpolate_sensor(
+    obs_ts: np.ndarray,
+    obs_values: np.ndarray,
+    sample_ts: np.ndarray,
+    strategy: InterpolationStrategy,
+    max_staleness_ns: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Apply a strategy to one sensor's sorted observations and enforce the staleness limit.
+
+    Duplicate timestamps keep their last observation. Samples whose most recent observation
+    is older than max_staleness_ns come back as NaN.
+    """
+    if len(obs_ts) > 1:
+        keep_last = np.append(obs_ts[1:] != obs_ts[:-1], True)
+        obs_ts, obs_values = obs_ts[keep_last], obs_values[keep_last]
+
+    result = strategy(obs_ts, obs_values, sample_ts)
+
+    if max_staleness_ns is not None and len(obs_ts):
+        idx = np.searchsorted(obs_ts, sample_ts, side="right") - 1
+        stale = (idx < 0) | (sample_ts - obs_ts[np.maximum(idx, 0)] > max_staleness_ns)
+        result[stale] = np.nan
+    return result
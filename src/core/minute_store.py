@@ -0,0 +1,205 @@
+import os
+from datetime import date, datetime
+from typing import List, Dict, Optional, Sequence, Union
+import numpy as np
+from src.core.time_spine import MISSING_STATUS_CODE, SPINE_SENSOR_FIELDS, MinuteSpine
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; MinuteSpineStore raises when used without it
+    pa = None
+
+TIMESTAMP_COLUMN = "timestamp"
+_DATA_FILE = "part-0.parquet"
+
+TimeBound = Union[datetime, date, np.datetime64, str, None]
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("MinuteSpineStore requires pyarrow (pip install pyarrow)")
+
+
+def _bound(value: TimeBound) -> Optional[np.datetime64]:
+    return None if value is None else np.datetime64(value, "ns")
+
+
+class MinuteSpineStore:
+    """
+    Local columnar store of minute spines as Hive-partitioned Parquet.
+
+    Layout: <root>/skid_id=<skid>/date=<YYYY-MM-DD>/part-0.parquet, one file per skid and
+    day holding the timestamp plus every numeric spine column. Reads open only the skid's
+    day files in the requested range through pyarrow.dataset, with column pruning and the
+    timestamp predicate pushed down to the scan, and the result comes back as a MinuteSpine of
+    NumPy arrays without creating per-row objects.
+    """
+
+    def __init__(self, root: str, compression: str = "zstd"):
+        _require_pyarrow()
+        self.root = root
+        self.compression = compression
+
+    def _day_path(self, skid_id: str, day: np.datetime64) -> str:
+        return os.path.join(self.root, f"skid_id={skid_id}", f"date={day}", _DATA_FILE)
+
+    def write(self, skid_id: str, spine: MinuteSpine) -> int:
+        """
+        Store a skid's spine, one Parquet file per day. Minutes already stored for the same
+        days are kept unless the new spine has a row for that minute; that row replaces the
+        stored one as a whole, even where its values are NaN (or MISSING_STATUS_CODE).
+
+        Object columns (e.g. the skid_id column of a merged spine) are not stored; the skid is
+        the partition key.
+
+        Returns:
+            Number of day partitions written.
+        """
+        if len(spine) == 0:
+            return 0
+        timestamps = spine.timestamps.astype("datetime64[ns]")
+        columns = {name: values for name, values in spine.columns.items() if values.dtype.kind in "biuf"}
+        days = spine.timestamps.astype("datetime64[D]")
+        order = None
+        if np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind="stable")
+            timestamps, days = timestamps[order], days[order]
+            columns = {name: values[order] for name, values in columns.items()}
+
+        boundaries = np.flatnonzero(days[1:] != days[:-1]) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [len(days)]])
+        for lo, hi in zip(starts, ends):
+            table = pa.table(
+                {TIMESTAMP_COLUMN: timestamps[lo:hi], **{name: values[lo:hi] for name, values in columns.items()}}
+            )
+            path = self._day_path(skid_id, days[lo])
+            if os.path.exists(path):
+                table = _merge_day(pq.read_table(path), table)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            pq.write_table(table, path, compression=self.compression)
+        return len(starts)
+
+    def _dataset(self, skid_id: str, start: Optional[np.datetime64], end: Optional[np.datetime64]):
+        """Dataset over the skid's day files that overlap [start, end), or None if there are none."""
+        first = None if start is None else start.astype("datetime64[D]").astype(object)
+        last = None if end is None else end.astype("datetime64[D]").astype(object)
+        paths = [
+            self._day_path(skid_id, np.datetime64(day))
+            for day in self.days(skid_id)
+            if (first is None or day >= first) and (last is None or day <= last)
+        ]
+        if not paths:
+            return None
+        # Listing the files skips discovery of the other skids' partitions; the schema is
+        # unified over the listed files so columns added later are read (as nulls) from older days
+        schema = pa.unify_schemas([pq.read_schema(path) for path in paths]) if len(paths) > 1 else None
+        return ds.dataset(paths, schema=schema, format="parquet")
+
+    def skids(self) -> List[str]:
+        """Skid ids with stored data."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name.split("=", 1)[1] for name in os.listdir(self.root) if name.startswith("skid_id="))
+
+    def days(self, skid_id: str) -> List[date]:
+        """Days stored for a skid, in order."""
+        skid_dir = os.path.join(self.root, f"skid_id={skid_id}")
+        if not os.path.isdir(skid_dir):
+            return []
+        return sorted(date.fromisoformat(name.split("=", 1)[1]) for name in os.listdir(skid_dir) if name.startswith("date="))
+
+    def read(
+        self,
+        skid_id: str,
+        start: TimeBound = None,
+        end: TimeBound = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> MinuteSpine:
+        """
+        Load a skid's minutes in [start, end) as a MinuteSpine.
+
+        Args:
+            skid_id: Skid to read.
+            start, end: Optional time bounds (end exclusive).
+            columns: Spine columns to load (all stored columns if None).
+
+        Returns:
+            MinuteSpine sorted by timestamp; empty if nothing matches.
+        """
+        start64, end64 = _bound(start), _bound(end)
+        dataset = self._dataset(skid_id, start64, end64)
+        if dataset is None:
+            return MinuteSpine(np.array([], dtype="datetime64[m]"), {name: np.array([]) for name in columns or []})
+
+        predicate = None
+        if start64 is not None:
+            predicate = ds.field(TIMESTAMP_COLUMN) >= pa.scalar(start64, pa.timestamp("ns"))
+        if end64 is not None:
+            upper = ds.field(TIMESTAMP_COLUMN) < pa.scalar(end64, pa.timestamp("ns"))
+            predicate = upper if predicate is None else predicate & upper
+
+        if columns is None:
+            columns = [name for name in dataset.schema.names if name != TIMESTAMP_COLUMN]
+        table = dataset.to_table(columns=[TIMESTAMP_COLUMN, *columns], filter=predicate)
+
+        timestamps = table.column(TIMESTAMP_COLUMN).to_numpy()
+        if len(timestamps) > 1 and np.any(timestamps[1:] < timestamps[:-1]):
+            table = table.take(pc.sort_indices(table, sort_keys=[(TIMESTAMP_COLUMN, "ascending")]))
+            timestamps = table.column(TIMESTAMP_COLUMN).to_numpy()
+        return MinuteSpine(timestamps, {name: _to_numpy(name, table.column(name)) for name in columns})
+
+
+def _to_numpy(name: str, column) -> np.ndarray:
+    """
+    Column as a NumPy array. Nulls (e.g. from schema evolution) become MISSING_STATUS_CODE in
+    the pump status column, which must stay integer codes, and NaN elsewhere.
+    """
+    if not column.null_count:
+        return column.to_numpy()
+    if name == SPINE_SENSOR_FIELDS["S1"]:
+        return pc.fill_null(column, MISSING_STATUS_CODE).to_numpy().astype(np.int8)
+    return column.to_numpy(zero_copy_only=False).astype(np.float64)
+
+
+def _merge_day(existing, new):
+    """Union of two day tables; rows of `new` win on equal timestamps."""
+    combined = pa.concat_tables([new, existing], promote_options="default")
+    timestamps = combined.column(TIMESTAMP_COLUMN).to_numpy()
+    _, first = np.unique(timestamps, return_index=True)  # sorted, first occurrence = new rows
+    return combined.take(pa.array(first))
+
+
+if __name__ == '__main__':
+    import shutil
+    import tempfile
+    import time
+
+    minutes = np.arange(np.datetime64("2023-01-01T00:00"), np.datetime64("2024-01-01T00:00"), dtype="datetime64[m]")
+    rng = np.random.default_rng(0)
+    spine = MinuteSpine(minutes, {
+        SPINE_SENSOR_FIELDS["F1"]: rng.normal(1200, 50, len(minutes)),
+        SPINE_SENSOR_FIELDS["F2"]: rng.normal(1150, 50, len(minutes)),
+        SPINE_SENSOR_FIELDS["S1"]: np.zeros(len(minutes), dtype=np.int8),
+        SPINE_SENSOR_FIELDS["P1"]: rng.normal(300, 10, len(minutes)),
+    })
+
+    root = tempfile.mkdtemp()
+    try:
+        store = MinuteSpineStore(root)
+        started = time.perf_counter()
+        store.write("SKID_001", spine)
+        print(f"Wrote {len(spine)} minutes in {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        year = store.read("SKID_001")
+        print(f"Read a year ({len(year)} minutes, {len(year.columns)} columns) in {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        week = store.read("SKID_001", start="2023-06-01", end="2023-06-08", columns=["pressure_p1"])
+        print(f"Read one week of pressure ({len(week)} minutes) in {(time.perf_counter() - started) * 1e3:.1f} ms")
+    finally:
+        shutil.rmtree(root)
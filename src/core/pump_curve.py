@@ -0,0 +1,104 @@
+from functools import lru_cache
+from typing import Tuple, Union
+import numpy as np
+from src.models.digital_twin_models import Pump, PumpCurve
+
+# Efficiency used when neither a curve nor a "default_efficiency" is available.
+DEFAULT_PUMP_EFFICIENCY = 0.75
+
+PumpCurveData = Union[PumpCurve, Pump, dict]
+
+
+class PumpCurveTable:
+    """
+    Dense, evenly spaced lookup grid built once from a PumpCurve.
+
+    Efficiency and head are linearly interpolated from the manufacturer points onto
+    grid_resolution flow values. A lookup is then an index computation plus an array
+    take, O(1) per operating point and vectorised over arrays of flows. Flows outside
+    the manufacturer range are clamped to the nearest end of the curve.
+    """
+
+    def __init__(self, curve: PumpCurve):
+        flow_points = np.asarray(curve.flow_points_gpm, dtype=np.float64)
+        self.min_flow_gpm = float(flow_points[0])
+        self.max_flow_gpm = float(flow_points[-1])
+
+        grid = np.linspace(self.min_flow_gpm, self.max_flow_gpm, curve.grid_resolution)
+        self._inverse_step = (curve.grid_resolution - 1) / (self.max_flow_gpm - self.min_flow_gpm)
+        self._last_index = curve.grid_resolution - 1
+        self.efficiency_table = np.interp(grid, flow_points, np.asarray(curve.efficiency_points, dtype=np.float64))
+        self.head_table = np.interp(grid, flow_points, np.asarray(curve.head_points_ft, dtype=np.float64))
+
+    def _lookup(self, table: np.ndarray, flow_rate) -> np.ndarray:
+        flow_rate = np.asarray(flow_rate, dtype=np.float64)
+        missing = np.isnan(flow_rate)
+        position = (np.where(missing, self.min_flow_gpm, flow_rate) - self.min_flow_gpm) * self._inverse_step
+        index = np.clip(np.rint(position), 0, self._last_index).astype(np.intp)
+        result = table[index]
+        if missing.any():
+            result = np.where(missing, np.nan, result)
+        return result
+
+    def efficiency_at(self, flow_rate) -> np.ndarray:
+        """Pump efficiency (0-1) at the given flow rate(s) in GPM; NaN flows give NaN."""
+        return self._lookup(self.efficiency_table, flow_rate)
+
+    def head_at(self, flow_rate) -> np.ndarray:
+        """Pump head in feet at the given flow rate(s) in GPM; NaN flows give NaN."""
+        return self._lookup(self.head_table, flow_rate)
+
+
+@lru_cache(maxsize=256)
+def _cached_table(key: Tuple[Tuple[float, ...], Tuple[float, ...], Tuple[float, ...], int]) -> PumpCurveTable:
+    flow, head, efficiency, resolution = key
+    return PumpCurveTable(
+        PumpCurve(flow_points_gpm=list(flow), head_points_ft=list(head), efficiency_points=list(efficiency), grid_resolution=resolution)
+    )
+
+
+def get_pump_curve_table(curve: PumpCurve) -> PumpCurveTable:
+    """
+    Return the lookup table for a curve, building it only the first time a curve with
+    these points is seen.
+    """
+    key = (tuple(curve.flow_points_gpm), tuple(curve.head_points_ft), tuple(curve.efficiency_points), curve.grid_resolution)
+    return _cached_table(key)
+
+
+def resolve_pump_efficiency(pump_curve_data: PumpCurveData, flow_rate) -> np.ndarray:
+    """
+    Pump efficiency at the operating point(s) for any supported description of the pump.
+
+    Args:
+        pump_curve_data: A PumpCurve, a Pump (its pump_curve is used when set), or the legacy
+            dict with a single "default_efficiency".
+        flow_rate: Flow rate(s) in GPM.
+
+    Returns:
+        Efficiency array broadcast to the shape of flow_rate.
+    """
+    if isinstance(pump_curve_data, Pump):
+        if pump_curve_data.pump_curve is None:
+            pump_curve_data = {}
+        else:
+            pump_curve_data = pump_curve_data.pump_curve
+
+    if isinstance(pump_curve_data, PumpCurve):
+        return get_pump_curve_table(pump_curve_data).efficiency_at(flow_rate)
+
+    efficiency = pump_curve_data.get("default_efficiency", DEFAULT_PUMP_EFFICIENCY)
+    return np.broadcast_to(np.float64(efficiency), np.shape(flow_rate))
+
+
+if __name__ == '__main__':
+    curve = PumpCurve(
+        flow_points_gpm=[0, 500, 1000, 1500, 2000, 2500],
+        head_points_ft=[820, 800, 760, 690, 590, 450],
+        efficiency_points=[0.0, 0.55, 0.74, 0.82, 0.80, 0.68],
+    )
+    table = get_pump_curve_table(curve)
+    flows = np.array([250.0, 1500.0, 1750.0, 3000.0])
+    print(f"Efficiency at {flows} GPM: {table.efficiency_at(flows)}")
+    print(f"Head at {flows} GPM: {table.head_at(flows)}")
+    print(f"Same table on second lookup: {get_pump_curve_table(curve) is table}")
@@ -0,0 +1,176 @@
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterable, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+from src.models.digital_twin_models import SensorDataPoint, SensorConfig
+from src.core.time_spine import MinuteSpine, arrays_from_columns, build_minute_spine
+
+
+def partition_by_skid(points: Iterable[SensorDataPoint]) -> Dict[str, List[SensorDataPoint]]:
+    """
+    Split a mixed stream of readings into one list per skid.
+
+    Raises:
+        ValueError: If a reading has no skid_id.
+    """
+    partitions: Dict[str, List[SensorDataPoint]] = {}
+    for point in points:
+        if point.skid_id is None:
+            raise ValueError(f"Sensor reading {point.sensor_id}@{point.timestamp} has no skid_id")
+        partitions.setdefault(point.skid_id, []).append(point)
+    return partitions
+
+
+def _split_fields(points: Sequence[SensorDataPoint]) -> Tuple[List[Any], List[str], List[Any]]:
+    """Plain timestamp, sensor id and raw value lists; far cheaper to pickle than the models."""
+    return [p.timestamp for p in points], [p.sensor_id for p in points], [p.value for p in points]
+
+
+def _build_skid_spine(
+    skid_id: str,
+    timestamps: List[Any],
+    sensor_ids: List[str],
+    raw_values: List[Any],
+    sensor_configs: Optional[Sequence[SensorConfig]] = None,
+) -> Tuple[str, MinuteSpine, Dict[str, Any]]:
+    # Runs inside a worker process: both the conversion to arrays (the bulk of the work) and
+    # the vectorized spine build happen here.
+    started = time.perf_counter()
+    arrays = arrays_from_columns(timestamps, sensor_ids, raw_values)
+    converted = time.perf_counter()
+    spine = build_minute_spine(*arrays, sensor_configs=sensor_configs)
+    stats = {
+        "worker_pid": os.getpid(),
+        "points": len(timestamps),
+        "minutes": len(spine),
+        "convert_seconds": converted - started,
+        "busy_seconds": time.perf_counter() - started,
+    }
+    return skid_id, spine, stats
+
+
+class ShardedSpineResult:
+    """
+    Per-skid minute spines produced by build_skid_spines, plus per-worker throughput.
+    """
+
+    def __init__(self, spines: Dict[str, MinuteSpine], worker_stats: List[Dict[str, Any]], wall_seconds: float):
+        self.spines = spines
+        self.worker_stats = worker_stats
+        self.wall_seconds = wall_seconds
+
+    def merged(self) -> MinuteSpine:
+        """
+        Combine every skid's spine into one spine ordered by timestamp (then skid_id),
+        with a skid_id column identifying the source of each row.
+        """
+        if not self.spines:
+            return build_minute_spine(np.empty(0, dtype="datetime64[ns]"), np.empty(0), np.empty(0))
+
+        skids = sorted(self.spines)
+        timestamps = np.concatenate([self.spines[s].timestamps for s in skids])
+        skid_column = np.concatenate([np.full(len(self.spines[s]), s, dtype=object) for s in skids])
+        # Skids are concatenated in sorted order, so a stable sort on time keeps skid_id as the tie-breaker.
+        order = np.argsort(timestamps, kind="stable")
+
+        columns = {"skid_id": skid_column[order]}
+        for name in self.spines[skids[0]].columns:
+            columns[name] = np.concatenate([self.spines[s][name] for s in skids])[order]
+        return MinuteSpine(timestamps[order], columns)
+
+
+def _summarise_workers(task_stats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    per_worker: Dict[int, Dict[str, Any]] = {}
+    for stats in task_stats:
+        worker = per_worker.setdefault(
+            stats["worker_pid"],
+            {"worker_pid": stats["worker_pid"], "skids": 0, "points": 0, "minutes": 0,
+             "convert_seconds": 0.0, "busy_seconds": 0.0},
+        )
+        worker["skids"] += 1
+        worker["points"] += stats["points"]
+        worker["minutes"] += stats["minutes"]
+        worker["convert_seconds"] += stats["convert_seconds"]
+        worker["busy_seconds"] += stats["busy_seconds"]
+
+    for worker in per_worker.values():
+        busy = worker["busy_seconds"]
+        worker["points_per_second"] = worker["points"] / busy if busy > 0 else float("inf")
+        worker["minutes_per_second"] = worker["minutes"] / busy if busy > 0 else float("inf")
+    return sorted(per_worker.values(), key=lambda w: w["worker_pid"])
+
+
+def build_skid_spines(
+    data: Union[Iterable[SensorDataPoint], Mapping[str, Sequence[SensorDataPoint]]],
+    max_workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    sensor_configs: Optional[Mapping[str, Sequence[SensorConfig]]] = None,
+) -> ShardedSpineResult:
+    """
+    Build minute spines for many skids in parallel.
+
+    Readings are partitioned by skid_id and each skid's readings are sent, as plain field
+    lists, to a ProcessPoolExecutor worker, which converts them to arrays and builds the
+    spine with build_minute_spine. The conversion is most of the work, so it runs in the
+    workers too; worker_stats report throughput over both steps.
+
+    Args:
+        data: Either a mixed stream of SensorDataPoints carrying skid_id, or a mapping of
+            skid_id to that skid's readings.
+        max_workers: Worker process count for the default pool (defaults to the CPU count).
+        executor: Optional executor to use instead of creating a process pool.
+        sensor_configs: Optional SensorConfig list per skid_id, controlling interpolation
+            and staleness limits (see build_minute_spine).
+
+    Returns:
+        A ShardedSpineResult with one MinuteSpine per skid and throughput per worker.
+    """
+    partitions = dict(data) if isinstance(data, Mapping) else partition_by_skid(data)
+    started = time.perf_counter()
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    spines: Dict[str, MinuteSpine] = {}
+    task_stats: List[Dict[str, Any]] = []
+    try:
+        futures = [
+            executor.submit(
+                _build_skid_spine, skid_id, *_split_fields(points), (sensor_configs or {}).get(skid_id)
+            )
+            for skid_id, points in partitions.items()
+        ]
+        for future in as_completed(futures):
+            skid_id, spine, stats = future.result()
+            spines[skid_id] = spine
+            task_stats.append(stats)
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    return ShardedSpineResult(spines, _summarise_workers(task_stats), time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    from datetime import datetime, timedelta
+
+    start = datetime(2023, 1, 1)
+    demo_points = [
+        SensorDataPoint(timestamp=start + timedelta(seconds=20 * i), sensor_id=sensor_id, value=100.0 + i, skid_id=f"SKID_{skid:03d}")
+        for skid in range(8)
+        for i in range(2000)
+        for sensor_id in ("F1", "P1")
+    ]
+
+    result = build_skid_spines(demo_points, max_workers=4)
+    merged = result.merged()
+    print(f"Built {len(result.spines)} skid spines ({len(merged)} merged minutes) in {result.wall_seconds:.2f}s")
+    for worker in result.worker_stats:
+        print(
+            f"Worker {worker['worker_pid']}: {worker['skids']} skids, "
+            f"{worker['points_per_second']:.0f} points/s, {worker['minutes_per_second']:.0f} minutes/s "
+            f"({worker['convert_seconds'] / worker['busy_seconds']:.0%} of busy time converting)"
+        )
+    print(merged.to_minute_level_data()[:2])
@@ -1,77 +1,209 @@
-from typing import List, Any
-from src.models.digital_twin_models import SensorDataPoint, MinuteLevelData
-from datetime import datetime, timedelta
+from typing import List, Any, Dict, Iterator, Optional, Sequence, Tuple
+import numpy as np
+from src.models.digital_twin_models import SensorDataPoint, MinuteLevelData, PumpStatus, SensorConfig
+from src.core.interpolation import interpolate_sensor, resolve_sensor_strategies
+from datetime import datetime, timedelta, timezone
 
-def create_time_spine(exception_data: List[SensorDataPoint]) -> List[MinuteLevelData]:
+# Sensors that make up a minute-level record and the MinuteLevelData field each one fills.
+SPINE_SENSOR_FIELDS: Dict[str, str] = {
+    "F1": "flow_rate_f1",
+    "F2": "flow_rate_f2",
+    "S1": "pump_status_s1",
+    "P1": "pressure_p1",
+}
+
+# S1 reports a PumpStatus; inside the array engine it is carried as an integer code
+# (index into this tuple) so every sensor can share one float64 value array.
+PUMP_STATUS_CODES: Tuple[PumpStatus, ...] = tuple(PumpStatus)
+MISSING_STATUS_CODE = -1
+
+NS_PER_MINUTE = 60 * 1_000_000_000
+
+
+def encode_pump_status(value: Any) -> float:
+    """
+    Convert a raw S1 reading (PumpStatus, "ON"/"OFF" string, bool or 0/1) into its float code.
+    """
+    if isinstance(value, PumpStatus):
+        status = value
+    elif isinstance(value, str):
+        status = PumpStatus(value.upper())
+    elif isinstance(value, (bool, int, float, np.integer, np.floating)):
+        status = PumpStatus.ON if value else PumpStatus.OFF
+    else:
+        raise ValueError(f"Cannot interpret {value!r} as a pump status")
+    return float(PUMP_STATUS_CODES.index(status))
+
+
+def _to_datetime64(timestamp: datetime) -> np.datetime64:
+    # Timezone-aware timestamps are normalised to naive UTC, the convention used by the spine.
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(timestamp, "ns")
+
+
+def arrays_from_points(points: Sequence[SensorDataPoint]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convert SensorDataPoint objects into the sorted (timestamps, sensor_ids, values) arrays
+    consumed by build_minute_spine.
+
+    The input sequence is not modified. Points with equal timestamps keep their original
+    relative order (stable sort), so the later point still wins when forward-filling.
+
+    Returns:
+        timestamps as datetime64[ns], sensor ids as a unicode array and values as float64
+        (S1 statuses encoded with encode_pump_status).
+    """
+    return arrays_from_columns(
+        [p.timestamp for p in points], [p.sensor_id for p in points], [p.value for p in points]
+    )
+
+
+def arrays_from_columns(
+    timestamps: Sequence[datetime], sensor_ids: Sequence[str], raw_values: Sequence[Any]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    arrays_from_points for readings already split into plain per-field lists, which are much
+    cheaper to send to another process than SensorDataPoint objects.
+    """
+    if not len(timestamps):
+        return np.empty(0, dtype="datetime64[ns]"), np.empty(0, dtype="<U1"), np.empty(0, dtype=np.float64)
+
+    times = np.array([_to_datetime64(t) for t in timestamps], dtype="datetime64[ns]")
+    ids = np.array(sensor_ids)
+    values = np.array(
+        [encode_pump_status(v) if s == "S1" else float(v) for s, v in zip(sensor_ids, raw_values)],
+        dtype=np.float64,
+    )
+
+    order = np.argsort(times, kind="stable")
+    return times[order], ids[order], values[order]
+
+
+class MinuteSpine:
+    """
+    Columnar (struct-of-arrays) minute-level time spine.
+
+    Each column is a NumPy array with one entry per minute. Float columns use NaN for
+    "no data"; pump_status_s1 holds PumpStatus codes with MISSING_STATUS_CODE for "no data".
+    MinuteLevelData objects are only created when rows are requested.
+    """
+
+    def __init__(self, timestamps: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.timestamps = np.asarray(timestamps, dtype="datetime64[m]")
+        self.columns = columns
+        for name, column in columns.items():
+            if len(column) != len(self.timestamps):
+                raise ValueError(f"Column '{name}' has {len(column)} rows, expected {len(self.timestamps)}")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def _row_values(self, name: str, fill_value: Optional[float]) -> List[Any]:
+        column = self.columns[name]
+        if name == "pump_status_s1":
+            return [PUMP_STATUS_CODES[code] if code >= 0 else None for code in column.tolist()]
+        if column.dtype.kind == "f":
+            return [fill_value if value != value else value for value in column.tolist()]
+        return column.tolist()
+
+    def iter_minute_level_data(self, fill_value: Optional[float] = None) -> Iterator[MinuteLevelData]:
+        """
+        Lazily yield one MinuteLevelData per minute.
+
+        Args:
+            fill_value: Value used for float columns that have no data (NaN). Defaults to None.
+        """
+        names = [name for name in self.columns if name in MinuteLevelData.model_fields]
+        column_values = [self._row_values(name, fill_value) for name in names]
+        for i, timestamp in enumerate(self.timestamps.tolist()):
+            yield MinuteLevelData(timestamp=timestamp, **{name: values[i] for name, values in zip(names, column_values)})
+
+    def to_minute_level_data(self, fill_value: Optional[float] = None) -> List[MinuteLevelData]:
+        """Materialise every row as a MinuteLevelData object."""
+        return list(self.iter_minute_level_data(fill_value=fill_value))
+
+
+def build_minute_spine(
+    timestamps: np.ndarray,
+    sensor_ids: np.ndarray,
+    values: np.ndarray,
+    sensor_configs: Optional[Sequence[SensorConfig]] = None,
+) -> MinuteSpine:
+    """
+    Build the whole minute grid for sorted exception data in one vectorised pass.
+
+    The spine runs from the minute of the first reading to the minute of the last one.
+    Each minute is sampled at its end (inclusive), using the interpolation strategy
+    registered for the sensor's SensorType: step/forward-fill for pump status and linear
+    interpolation for flow and pressure by default (see src.core.interpolation).
+    Minutes before a sensor's first report, or past its max_staleness_minutes, have no data.
+
+    Args:
+        timestamps: Reading timestamps, sorted ascending (datetime64 or anything NumPy converts).
+        sensor_ids: Sensor identifier for each reading (e.g. "F1", "P1").
+        values: Float value for each reading (S1 statuses encoded with encode_pump_status).
+        sensor_configs: Optional SensorConfig per sensor; sensors without one use their default type.
+
+    Returns:
+        A MinuteSpine with one column per sensor in SPINE_SENSOR_FIELDS.
+    """
+    ts_ns = np.asarray(timestamps, dtype="datetime64[ns]").astype(np.int64)
+    sensor_ids = np.asarray(sensor_ids)
+    values = np.asarray(values, dtype=np.float64)
+
+    if len(ts_ns) == 0:
+        empty_columns = {field: np.empty(0, dtype=np.float64) for field in SPINE_SENSOR_FIELDS.values()}
+        empty_columns["pump_status_s1"] = np.empty(0, dtype=np.int8)
+        return MinuteSpine(np.empty(0, dtype="datetime64[m]"), empty_columns)
+
+    first_minute = ts_ns[0] // NS_PER_MINUTE
+    last_minute = ts_ns[-1] // NS_PER_MINUTE
+    minutes = np.arange(first_minute, last_minute + 1, dtype=np.int64)
+    # A reading counts for a minute if it arrived at or before the end of that minute.
+    minute_ends_ns = (minutes + 1) * NS_PER_MINUTE
+
+    strategies = resolve_sensor_strategies(list(SPINE_SENSOR_FIELDS), sensor_configs)
+
+    columns: Dict[str, np.ndarray] = {}
+    for sensor_id, field in SPINE_SENSOR_FIELDS.items():
+        mask = sensor_ids == sensor_id
+        strategy, max_staleness_ns = strategies[sensor_id]
+        filled = interpolate_sensor(ts_ns[mask], values[mask], minute_ends_ns, strategy, max_staleness_ns)
+
+        if field == "pump_status_s1":
+            codes = np.full(len(minutes), MISSING_STATUS_CODE, dtype=np.int8)
+            known = ~np.isnan(filled)
+            codes[known] = filled[known].astype(np.int8)
+            columns[field] = codes
+        else:
+            columns[field] = filled
+
+    return MinuteSpine(minutes.astype("datetime64[m]"), columns)
+
+
+def create_time_spine(
+    exception_data: List[SensorDataPoint], sensor_configs: Optional[Sequence[SensorConfig]] = None
+) -> List[MinuteLevelData]:
     """
     Convert exception-based sensor data to minute-level time series.
 
-    This is a placeholder implementation.
-    Actual implementation will involve:
-    1. Sorting by timestamp.
-    2. Forward-filling last known values for each sensor.
-    3. Interpolating missing periods (e.g., linear interpolation for continuous values).
-    4. Generating minute-level records, potentially aggregating or selecting values.
+    The input is converted to arrays, run through build_minute_spine (sorting, per-sensor
+    interpolation and staleness limits) and materialised as MinuteLevelData.
+    Minutes with no usable value for a sensor are None rather than a made-up 0.0.
+    The input list is not sorted in place.
+    Callers that do not need Pydantic rows should use build_minute_spine directly.
     """
     if not exception_data:
         return []
 
-    # Sort data by timestamp to ensure correct processing order
-    exception_data.sort(key=lambda x: x.timestamp)
-
-    # Determine the time range for the spine
-    min_time = exception_data[0].timestamp.replace(second=0, microsecond=0)
-    max_time = exception_data[-1].timestamp.replace(second=0, microsecond=0)
-
-    # Placeholder for last known values of each relevant sensor
-    # In a real scenario, you'd track F1, F2, S1, P1 etc. separately
-    last_known_values = {}
-
-    minute_level_data_list: List[MinuteLevelData] = []
-
-    current_minute_timestamp = min_time
-    data_idx = 0
-
-    while current_minute_timestamp <= max_time:
-        # Collect all data points within this minute
-        # This is a simplified approach; sophisticated forward-filling and interpolation needed
-
-        # Update last known values from exception_data up to current_minute_timestamp
-        while data_idx < len(exception_data) and exception_data[data_idx].timestamp <= current_minute_timestamp + timedelta(minutes=1):
-            point = exception_data[data_idx]
-            last_known_values[point.sensor_id] = point.value
-            # Here you might also store the timestamp of this last known value for interpolation logic
-            data_idx += 1
-
-        # Create a minute level record using the last known values
-        # This is highly simplified. Real implementation needs proper handling for each sensor type.
-        minute_data = MinuteLevelData(
-            timestamp=current_minute_timestamp,
-            flow_rate_f1=float(last_known_values.get("F1", 0.0)), # Example: default to 0.0 if no data
-            flow_rate_f2=float(last_known_values.get("F2", 0.0)),
-            # pump_status_s1 needs mapping from raw value to PumpStatus enum if not already
-            pump_status_s1=last_known_values.get("S1"),
-            pressure_p1=float(last_known_values.get("P1", 0.0))
-            # Other fields like dra_injection_rate_actual would be derived or come from other sources
-        )
-        minute_level_data_list.append(minute_data)
-
-        current_minute_timestamp += timedelta(minutes=1)
-
-    # This is a very basic placeholder.
-    # A robust implementation would need to handle:
-    # - Different data types for sensor values.
-    # - Specific interpolation strategies (linear, constant, etc.).
-    # - Missing data at the beginning of the series.
-    # - Efficiently querying and updating last known values.
-    # - Aligning data from multiple sensors that might report at different times.
-
-    print(f"Placeholder: Generated {len(minute_level_data_list)} minute-level records.")
-    return minute_level_data_list
+    return build_minute_spine(*arrays_from_points(exception_data), sensor_configs=sensor_configs).to_minute_level_data()
 
 if __name__ == '__main__':
     # Example usage:
-    from src.models.digital_twin_models import PumpStatus # Import PumpStatus for example
     sample_exceptions = [
         SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 0, 15), sensor_id="F1", value=1500.0, units="GPM"),
         SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 0, 20), sensor_id="P1", value=300.0, units="PSI"),
@@ -100,4 +232,12 @@ if __name__ == '__main__':
     for record in minute_data_longer_result:
         print(record.model_dump_json())
 
-    print("Note: This is a placeholder and needs significant refinement for actual use.")
+    # Columnar engine: a week of one-second F1 readings, without building a row per minute
+    start = np.datetime64("2023-01-01T00:00:00", "ns")
+    n = 7 * 24 * 3600
+    spine = build_minute_spine(
+        start + np.arange(n) * np.timedelta64(1, "s"),
+        np.full(n, "F1"),
+        1500.0 + np.sin(np.arange(n) / 600.0),
+    )
+    print(f"\nColumnar spine: {len(spine)} minutes, first F1 values {spine['flow_rate_f1'][:3]}")
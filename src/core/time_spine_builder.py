@@ -0,0 +1,203 @@
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from datetime import datetime, timedelta
+import numpy as np
+from src.models.digital_twin_models import SensorDataPoint, MinuteLevelData
+from src.core.time_spine import (
+    SPINE_SENSOR_FIELDS,
+    PUMP_STATUS_CODES,
+    NS_PER_MINUTE,
+    encode_pump_status,
+    _to_datetime64,
+)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class TimeSpineBuilder:
+    """
+    Stateful, incremental counterpart of create_time_spine for live feeds.
+
+    Points are accepted one at a time or in micro-batches and finished MinuteLevelData
+    rows are returned as soon as their minute closes. Last known values and the event-time
+    watermark are kept between calls, so history never has to be re-processed.
+
+    A minute closes once the watermark (latest event time seen minus allowed_lateness)
+    has passed its end. Points arriving out of order within the lateness window are placed
+    in the minute they belong to; points for minutes that have already been emitted are
+    counted in late_points and only update the state for the minutes still to come.
+    Each point costs O(1) work.
+
+    Values are carried forward (step interpolation) for every sensor: linear interpolation
+    needs the next reading, so backfills that want it should use build_minute_spine.
+    """
+
+    def __init__(self, allowed_lateness: timedelta = timedelta(seconds=30)):
+        """
+        Args:
+            allowed_lateness: How far behind the newest event a point may arrive and still
+                be placed in its own minute.
+        """
+        self.allowed_lateness_ns = int(allowed_lateness.total_seconds() * 1_000_000_000)
+        self.late_points = 0
+
+        self._last_values: Dict[str, Any] = {}
+        self._last_ts_ns: Dict[str, int] = {}
+        self._pending: Dict[int, List[Tuple[int, str, Any]]] = {}
+        self._next_minute: Optional[int] = None
+        self._max_event_ns: Optional[int] = None
+        self._emitted_any = False
+
+    @property
+    def watermark(self) -> Optional[datetime]:
+        """Event time up to which the input is considered complete (None before any data)."""
+        if self._max_event_ns is None:
+            return None
+        return _EPOCH + timedelta(microseconds=(self._max_event_ns - self.allowed_lateness_ns) // 1000)
+
+    @property
+    def last_known_values(self) -> Dict[str, Any]:
+        """Last value applied to the spine for each sensor."""
+        return dict(self._last_values)
+
+    def add(self, point: SensorDataPoint) -> List[MinuteLevelData]:
+        """
+        Accept a single sensor reading.
+
+        Returns:
+            MinuteLevelData rows for every minute closed by this reading (often empty).
+        """
+        self._accept(point)
+        return self._close_minutes(self._watermark_ns())
+
+    def add_batch(self, points: Iterable[SensorDataPoint]) -> List[MinuteLevelData]:
+        """
+        Accept a micro-batch of readings (in any order).
+
+        Returns:
+            MinuteLevelData rows for every minute closed by this batch.
+        """
+        readings = [self._convert(point) for point in points]
+        if readings:
+            self._seed(min(reading[0] for reading in readings))
+        for reading in readings:
+            self._accept_value(*reading)
+        return self._close_minutes(self._watermark_ns())
+
+    def add_arrays(self, timestamps, sensor_ids, values) -> List[MinuteLevelData]:
+        """
+        Accept a micro-batch given as arrays, skipping SensorDataPoint construction.
+
+        Args:
+            timestamps: datetime64 values or int64 ns since the epoch.
+            sensor_ids: Sensor ids.
+            values: Float values, with S1 statuses encoded as in the spine engine (NaN for unknown).
+
+        Returns:
+            MinuteLevelData rows for every minute closed by this batch.
+        """
+        timestamps = np.asarray(timestamps)
+        if timestamps.dtype.kind == "M":
+            timestamps = timestamps.astype("datetime64[ns]").astype(np.int64)
+        if len(timestamps):
+            self._seed(int(timestamps.min()))
+        for ts_ns, sensor_id, value in zip(timestamps.tolist(), np.asarray(sensor_ids).tolist(), np.asarray(values, dtype=np.float64).tolist()):
+            if sensor_id == "S1":
+                # NaN is an unknown status; it reads as missing, as in build_minute_spine
+                value = None if value != value else PUMP_STATUS_CODES[int(value)]
+            self._accept_value(ts_ns, sensor_id, value)
+        if self._max_event_ns is None:
+            return []
+        return self._close_minutes(self._watermark_ns())
+
+    def advance(self, timestamp_ns: int) -> List[MinuteLevelData]:
+        """
+        Move event time forward without a reading, e.g. when exception compression dropped
+        the newest readings: they were within tolerance of the carried-forward values, so the
+        minutes they cover can still close.
+
+        Returns:
+            MinuteLevelData rows for every minute closed.
+        """
+        if self._max_event_ns is None:
+            return []
+        self._max_event_ns = max(self._max_event_ns, int(timestamp_ns))
+        return self._close_minutes(self._watermark_ns())
+
+    def flush(self) -> List[MinuteLevelData]:
+        """
+        Close every minute up to and including the minute of the newest reading,
+        e.g. on shutdown or at the end of a backfill.
+        """
+        if self._max_event_ns is None:
+            return []
+        return self._close_minutes(self._max_event_ns + NS_PER_MINUTE)
+
+    def _watermark_ns(self) -> int:
+        return self._max_event_ns - self.allowed_lateness_ns
+
+    def _accept(self, point: SensorDataPoint):
+        reading = self._convert(point)
+        self._seed(reading[0])
+        self._accept_value(*reading)
+
+    @staticmethod
+    def _convert(point: SensorDataPoint) -> Tuple[int, str, Any]:
+        ts_ns = int(_to_datetime64(point.timestamp).astype("int64"))
+        value = PUMP_STATUS_CODES[int(encode_pump_status(point.value))] if point.sensor_id == "S1" else float(point.value)
+        return ts_ns, point.sensor_id, value
+
+    def _seed(self, first_ns: int):
+        # The spine starts at the earliest reading of the first call, whatever order it arrived in.
+        if self._next_minute is None:
+            self._next_minute = first_ns // NS_PER_MINUTE
+
+    def _accept_value(self, ts_ns: int, sensor_id: str, value: Any):
+
+        # First minute whose end (inclusive) is at or after the reading.
+        minute = -(-ts_ns // NS_PER_MINUTE) - 1
+        if minute < self._next_minute:
+            if self._emitted_any:
+                self.late_points += 1
+            minute = self._next_minute
+
+        self._pending.setdefault(minute, []).append((ts_ns, sensor_id, value))
+        if self._max_event_ns is None or ts_ns > self._max_event_ns:
+            self._max_event_ns = ts_ns
+
+    def _close_minutes(self, watermark_ns: int) -> List[MinuteLevelData]:
+        rows: List[MinuteLevelData] = []
+        # Strictly past the end, so a second reading stamped exactly on the boundary still counts.
+        while (self._next_minute + 1) * NS_PER_MINUTE < watermark_ns:
+            rows.append(self._emit(self._next_minute))
+            self._next_minute += 1
+        return rows
+
+    def _emit(self, minute: int) -> MinuteLevelData:
+        for ts_ns, sensor_id, value in self._pending.pop(minute, ()):
+            if ts_ns >= self._last_ts_ns.get(sensor_id, ts_ns):
+                self._last_ts_ns[sensor_id] = ts_ns
+                self._last_values[sensor_id] = value
+        self._emitted_any = True
+        return MinuteLevelData(
+            timestamp=_EPOCH + timedelta(minutes=minute),
+            **{field: self._last_values.get(sensor_id) for sensor_id, field in SPINE_SENSOR_FIELDS.items()},
+        )
+
+
+if __name__ == '__main__':
+    from src.models.digital_twin_models import PumpStatus
+
+    builder = TimeSpineBuilder(allowed_lateness=timedelta(seconds=10))
+    feed = [
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 0, 15), sensor_id="F1", value=1500.0),
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 0, 25), sensor_id="S1", value=PumpStatus.ON),
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 1, 30), sensor_id="F1", value=1505.0),
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 1, 20), sensor_id="P1", value=300.0),  # out of order
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 3, 5), sensor_id="F1", value=1510.0),
+    ]
+    for message in feed:
+        for row in builder.add(message):
+            print(f"Closed minute: {row.model_dump_json()}")
+    for row in builder.flush():
+        print(f"Flushed minute: {row.model_dump_json()}")
+    print(f"Watermark: {builder.watermark}, late points: {builder.late_points}")
@@ -0,0 +1,238 @@
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Dict, Any, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ForecastCoverageError(ValueError):
+    """Raised when a forecast does not cover the requested planning horizon."""
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class Forecast:
+    """
+    Immutable, array-backed time series of one or more forecast fields.
+
+    Values are piecewise constant: each entry holds from its timestamp until the next one.
+    align() resamples a field onto a planning grid in one vectorised step by averaging this
+    step function over every slot, so hourly, 15-minute and irregular sources all produce
+    the per-slot mean (a source on the grid itself is returned unchanged). The most recently
+    aligned arrays are cached, so rolling replans do not grow the cache without bound. All
+    arrays are read-only, so a Forecast can be handed between agents and threads without copying.
+    """
+
+    # A few fields per horizon, for the current and previous replan
+    ALIGNED_CACHE_SIZE = 8
+
+    def __init__(self, timestamps, columns: Mapping[str, Any]):
+        """
+        Args:
+            timestamps: Entry timestamps (anything NumPy converts to datetime64[ns]).
+            columns: Field name to values, one per timestamp; NaN marks a missing value.
+
+        Raises:
+            ValueError: If a column's length differs from the timestamps.
+        """
+        timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+        order = None
+        if len(timestamps) > 1 and np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind="stable")
+            timestamps = timestamps[order]
+
+        self.timestamps = _read_only(timestamps)
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, values in columns.items():
+            values = np.asarray(values, dtype=np.float64)
+            if values.shape != timestamps.shape:
+                raise ValueError(f"Forecast field '{name}' has {len(values)} values for {len(timestamps)} timestamps")
+            self.columns[name] = _read_only(values if order is None else values[order])
+        self._aligned: "OrderedDict[Tuple[Any, ...], np.ndarray]" = OrderedDict()
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]], fields: Optional[Sequence[str]] = None) -> "Forecast":
+        """
+        Build from the legacy list of {'timestamp': dt, field: value, ...} dicts. Fields default
+        to every key other than 'timestamp'; missing or None values become NaN.
+        """
+        if fields is None:
+            fields = sorted({key for record in records for key in record if key != "timestamp"})
+        timestamps = np.array([record["timestamp"] for record in records], dtype="datetime64[ns]")
+        columns = {
+            name: np.array([np.nan if record.get(name) is None else record[name] for record in records], dtype=np.float64)
+            for name in fields
+        }
+        return cls(timestamps, columns)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.columns
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Legacy list-of-dicts form (NaN values are left out)."""
+        records = []
+        for i, ts in enumerate(self.timestamps.astype("datetime64[us]").tolist()):
+            record: Dict[str, Any] = {"timestamp": ts}
+            for name, values in self.columns.items():
+                if not np.isnan(values[i]):
+                    record[name] = float(values[i])
+            records.append(record)
+        return records
+
+    def scaled(self, field: str, factor: float) -> "Forecast":
+        """New forecast with one field multiplied by factor; other fields share memory."""
+        if factor == 1.0 or field not in self.columns:
+            return self
+        return Forecast(self.timestamps, {**self.columns, field: self.columns[field] * factor})
+
+    def window(self, start: datetime, end: datetime) -> "Forecast":
+        """
+        Entries needed to describe [start, end): views, no copies. The entry in effect at start
+        is kept so alignment over the window is unchanged.
+        """
+        lo = max(int(np.searchsorted(self.timestamps, np.datetime64(start, "ns"), side="right")) - 1, 0)
+        hi = int(np.searchsorted(self.timestamps, np.datetime64(end, "ns"), side="left"))
+        return Forecast(self.timestamps[lo:hi], {name: values[lo:hi] for name, values in self.columns.items()})
+
+    def resolution(self) -> Optional[np.timedelta64]:
+        """Median spacing between entries, None with fewer than two entries."""
+        if len(self.timestamps) < 2:
+            return None
+        return np.median(np.diff(self.timestamps).astype(np.int64)).astype("timedelta64[ns]")
+
+    def coverage_issues(
+        self, field: str, start: datetime, end: datetime, max_gap: Optional[np.timedelta64] = None
+    ) -> List[str]:
+        """
+        Problems with using `field` over [start, end): the field is missing, starts after
+        start, ends (last entry plus the source resolution) before end, or has a gap longer
+        than max_gap (twice the source resolution by default).
+        """
+        values = self.columns.get(field)
+        if values is None or np.isnan(values).all():
+            return [f"no '{field}' values"]
+        timestamps = self.timestamps[~np.isnan(values)]
+        start, end = np.datetime64(start, "ns"), np.datetime64(end, "ns")
+        step = self.resolution() or np.timedelta64(0, "ns")
+        issues = []
+        if timestamps[0] > start:
+            issues.append(f"'{field}' starts at {timestamps[0]}, after {start}")
+        if timestamps[-1] + step < end:
+            issues.append(f"'{field}' ends at {timestamps[-1] + step}, before {end}")
+        max_gap = max_gap if max_gap is not None else 2 * step
+        inside = timestamps[(timestamps >= start) & (timestamps < end)]
+        if max_gap > np.timedelta64(0, "ns") and len(inside) > 1:
+            gaps = np.diff(inside)
+            if (gaps > max_gap).any():
+                issues.append(f"'{field}' has {(gaps > max_gap).sum()} gap(s) longer than {max_gap}")
+        return issues
+
+    def align(
+        self,
+        field: str,
+        start: datetime,
+        num_slots: int,
+        slot_minutes: int = 60,
+        default: Optional[float] = None,
+        require_coverage: bool = False,
+    ) -> np.ndarray:
+        """
+        Mean value of `field` over each slot of the grid start + k * slot_minutes.
+
+        Before the first entry the first value is used. Entries with NaN are ignored.
+
+        Args:
+            default: Returned for every slot when the field has no values (NaN if None); a
+                missing field with a default is not a coverage problem.
+            require_coverage: Raise instead of logging a warning when coverage_issues() reports
+                problems.
+
+        Returns:
+            Read-only float64 array of num_slots values; recent (field, grid) results are cached.
+
+        Raises:
+            ForecastCoverageError: If require_coverage is set and the horizon is not covered.
+        """
+        start64 = np.datetime64(start, "ns")
+        key = (field, int(start64.astype(np.int64)), num_slots, slot_minutes, default, require_coverage)
+        cached = self._aligned.get(key)
+        if cached is not None:
+            self._aligned.move_to_end(key)
+            return cached
+
+        slot = np.timedelta64(slot_minutes, "m").astype("timedelta64[ns]")
+        values = self.columns.get(field)
+        valid = None if values is None else ~np.isnan(values)
+        if valid is None or not valid.any():
+            if require_coverage and default is None:
+                raise ForecastCoverageError(f"no '{field}' values")
+            aligned = np.full(num_slots, np.nan if default is None else default, dtype=np.float64)
+        else:
+            issues = self.coverage_issues(field, start, start64 + num_slots * slot)
+            if issues:
+                if require_coverage:
+                    raise ForecastCoverageError("; ".join(issues))
+                logger.warning("Forecast coverage: %s", "; ".join(issues))
+            aligned = _step_mean(
+                self.timestamps[valid].astype(np.int64),
+                values[valid],
+                start64.astype(np.int64) + np.arange(num_slots + 1) * slot.astype(np.int64),
+            )
+        aligned = _read_only(aligned)
+        self._aligned[key] = aligned
+        if len(self._aligned) > self.ALIGNED_CACHE_SIZE:
+            self._aligned.popitem(last=False)
+        return aligned
+
+
+def _step_mean(timestamps: np.ndarray, values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Mean of the step function (timestamps, values) between consecutive edges (int64 ns)."""
+    # Integral of the step function from timestamps[0] up to each entry, then up to each edge.
+    # Before timestamps[0] the first value extends backwards (negative integral).
+    durations = np.diff(timestamps).astype(np.float64)
+    cumulative = np.concatenate([[0.0], np.cumsum(values[:-1] * durations)])
+    index = np.maximum(np.searchsorted(timestamps, edges, side="right") - 1, 0)
+    integral = cumulative[index] + values[index] * (edges - timestamps[index]).astype(np.float64)
+    return np.diff(integral) / np.diff(edges).astype(np.float64)
+
+
+ForecastInput = Union[Forecast, Sequence[Dict[str, Any]], None]
+
+
+def as_forecast(forecast: ForecastInput) -> Forecast:
+    """Accept a Forecast, a legacy list of dicts, or None (an empty forecast)."""
+    if isinstance(forecast, Forecast):
+        return forecast
+    return Forecast.from_records(forecast or [])
+
+
+if __name__ == '__main__':
+    import time
+    from datetime import timedelta
+
+    start = datetime(2024, 3, 4)
+    quarter_hourly = Forecast(
+        np.arange(np.datetime64(start), np.datetime64(start + timedelta(days=8)), np.timedelta64(15, "m")),
+        {"rate_per_kwh": 0.08 + 0.04 * np.sin(np.arange(8 * 96) / 96 * 2 * np.pi)},
+    )
+    started = time.perf_counter()
+    hourly = quarter_hourly.align("rate_per_kwh", start, 168, 60)
+    print(f"Aligned {len(quarter_hourly)} 15-minute prices to 168 hourly slots in {(time.perf_counter() - started) * 1e3:.2f} ms")
+    print(f"First hours: {np.round(hourly[:4], 4)}; cached: {quarter_hourly.align('rate_per_kwh', start, 168, 60) is hourly}")
+
+    irregular = Forecast.from_records([
+        {'timestamp': start, 'flow_gpm': 1000},
+        {'timestamp': start + timedelta(minutes=20), 'flow_gpm': 1300},
+        {'timestamp': start + timedelta(hours=2, minutes=45), 'flow_gpm': 900},
+    ])
+    print(f"Irregular flow per hour: {irregular.align('flow_gpm', start, 4)}")
+    print(f"Coverage issues over a week: {irregular.coverage_issues('flow_gpm', start, start + timedelta(days=7))}")
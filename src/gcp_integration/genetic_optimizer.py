@@ -0,0 +1,221 @@
+import logging
+import time
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from src.models.digital_twin_models import GeneticAlgorithmParameters
+from src.gcp_integration.optimization import NO_PUMP
+from src.gcp_integration.schedule_evaluation import ScheduleEvaluator
+
+logger = logging.getLogger(__name__)
+
+
+def _chunk_fitness(evaluator: ScheduleEvaluator, pumps: np.ndarray, ppm: np.ndarray, penalty: float) -> np.ndarray:
+    evaluation = evaluator.evaluate(pumps, ppm)
+    return evaluation.total_cost + penalty * evaluation.violations
+
+
+class GeneticScheduleOptimizer:
+    """
+    Genetic algorithm over (pump per slot, ppm per slot) schedules.
+
+    Every generation is scored in one ScheduleEvaluator call (or one call per worker when an
+    executor is given), so fitness is the real schedule cost plus a penalty per violated
+    slot. Offspring are repaired before scoring: pumps under maintenance are swapped for the
+    available one, runs longer than the continuous-runtime limit are broken by switching
+    pump, and ppm is clipped to the allowed range, so the population stays feasible
+    wherever the constraints allow it.
+
+    Runs are reproducible for a given seed as long as they stop on the generation or stall
+    limit rather than on the wall-clock budget.
+    """
+
+    def __init__(
+        self,
+        evaluator: ScheduleEvaluator,
+        parameters: Optional[GeneticAlgorithmParameters] = None,
+        executor: Optional[Executor] = None,
+        workers: int = 1,
+    ):
+        """
+        Args:
+            evaluator: Evaluator for the planning horizon being optimized.
+            parameters: GA settings (defaults if None).
+            executor: Optional executor (e.g. a ProcessPoolExecutor) to score the population on.
+            workers: Number of population chunks submitted to the executor per generation.
+        """
+        self.evaluator = evaluator
+        self.parameters = parameters or GeneticAlgorithmParameters()
+        self.executor = executor
+        self.workers = max(workers, 1)
+        self.rng = np.random.default_rng(self.parameters.seed)
+        self.history: List[float] = []
+
+        self._available = ~evaluator.unavailable  # (pumps, slots)
+        self._any_available = self._available.any(axis=0)
+        self._min_ppm = evaluator.constraints.min_dra_concentration_ppm
+        self._max_ppm = evaluator.constraints.max_dra_concentration_ppm
+
+    def fitness(self, pumps: np.ndarray, ppm: np.ndarray) -> np.ndarray:
+        """Total cost plus violation penalty for every individual."""
+        penalty = self.parameters.penalty_per_violation
+        if self.executor is None or self.workers == 1:
+            return _chunk_fitness(self.evaluator, pumps, ppm, penalty)
+        chunks = np.array_split(np.arange(len(pumps)), self.workers)
+        futures = [
+            self.executor.submit(_chunk_fitness, self.evaluator, pumps[chunk], ppm[chunk], penalty)
+            for chunk in chunks if len(chunk)
+        ]
+        return np.concatenate([future.result() for future in futures])
+
+    def repair(self, pumps: np.ndarray, ppm: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Make schedules respect maintenance, the runtime limit and the ppm range where possible."""
+        num_slots = pumps.shape[1]
+        slots = np.arange(num_slots)
+        pumps = np.where(pumps == NO_PUMP, 0, pumps)
+        pumps = np.where(self._available[pumps, slots], pumps, 1 - pumps)
+        pumps = np.where(self._any_available, pumps, NO_PUMP)
+
+        limit = self.evaluator.runtime_limit
+        if limit is not None:
+            run = np.zeros((len(pumps), 2), dtype=np.int64)
+            rows = np.arange(len(pumps))
+            for t in range(num_slots):
+                current = pumps[:, t]
+                running = current != NO_PUMP
+                pump = np.maximum(current, 0)
+                too_long = running & (run[rows, pump] >= limit) & self._available[1 - pump, t]
+                pump = np.where(too_long, 1 - pump, pump)
+                pumps[:, t] = np.where(running, pump, NO_PUMP)
+                run[rows, pump] = np.where(running, run[rows, pump] + 1, 0)
+                run[rows, 1 - pump] = 0
+
+        ppm = np.where(pumps == NO_PUMP, 0.0, np.clip(ppm, self._min_ppm, self._max_ppm))
+        return pumps, ppm
+
+    def _initial_population(self, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        num_slots = self.evaluator.num_slots
+        pumps = self.rng.integers(0, 2, size=(size, num_slots))
+        ppm = self.rng.uniform(self._min_ppm, self._max_ppm, size=(size, num_slots))
+        # Seed a few structured schedules: primary with min and max DRA
+        if size >= 2:
+            pumps[:2] = 0
+            ppm[0] = self._min_ppm
+            ppm[1] = self._max_ppm
+        return self.repair(pumps, ppm)
+
+    def _select(self, fitness: np.ndarray, count: int) -> np.ndarray:
+        """Tournament selection: index of the fittest of tournament_size random individuals."""
+        entrants = self.rng.integers(0, len(fitness), size=(count, self.parameters.tournament_size))
+        return entrants[np.arange(count), np.argmin(fitness[entrants], axis=1)]
+
+    def _crossover(self, pumps: np.ndarray, ppm: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Two-point crossover of consecutive pairs of parents."""
+        half = len(pumps) // 2
+        num_slots = pumps.shape[1]
+        cuts = np.sort(self.rng.integers(0, num_slots + 1, size=(half, 2)), axis=1)
+        slots = np.arange(num_slots)
+        swap = (slots >= cuts[:, :1]) & (slots < cuts[:, 1:])
+        swap &= (self.rng.random(half) < self.parameters.crossover_rate)[:, None]
+
+        pumps, ppm = pumps.copy(), ppm.copy()
+        a, b = slice(0, 2 * half, 2), slice(1, 2 * half, 2)
+        for values in (pumps, ppm):
+            first, second = values[a].copy(), values[b].copy()
+            values[a] = np.where(swap, second, first)
+            values[b] = np.where(swap, first, second)
+        return pumps, ppm
+
+    def _mutate(self, pumps: np.ndarray, ppm: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        params = self.parameters
+        flip = self.rng.random(pumps.shape) < params.pump_mutation_rate
+        pumps = np.where(flip, 1 - np.maximum(pumps, 0), pumps)
+
+        perturb = self.rng.random(ppm.shape) < params.ppm_mutation_rate
+        ppm = np.where(perturb, ppm + self.rng.normal(0.0, params.ppm_mutation_scale, ppm.shape), ppm)
+        # Optimal rates often sit on a bound, so occasionally snap straight to one
+        snap = self.rng.random(ppm.shape) < params.ppm_mutation_rate / 2
+        bound = np.where(self.rng.random(ppm.shape) < 0.5, self._min_ppm, self._max_ppm)
+        ppm = np.where(snap, bound, ppm)
+        return pumps, ppm
+
+    def run(self, time_limit_seconds: float = 10.0) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+        """
+        Evolve schedules until the generation limit, stall limit or wall-clock budget is hit.
+
+        Returns:
+            The best pump_index[t] and ppm[t] found, and run statistics.
+        """
+        params = self.parameters
+        started = time.perf_counter()
+        size = params.population_size
+        elite = min(params.elite_count, size)
+
+        pumps, ppm = self._initial_population(size)
+        fitness = self.fitness(pumps, ppm)
+        best = int(np.argmin(fitness))
+        best_pumps, best_ppm, best_fitness = pumps[best].copy(), ppm[best].copy(), float(fitness[best])
+        self.history = [best_fitness]
+
+        generation = stalled = 0
+        stop_reason = "generations"
+        while generation < params.max_generations:
+            if time.perf_counter() - started >= time_limit_seconds:
+                stop_reason = "time_limit"
+                break
+            if params.stall_generations is not None and stalled >= params.stall_generations:
+                stop_reason = "stalled"
+                break
+            generation += 1
+
+            elite_index = np.argsort(fitness, kind="stable")[:elite]
+            parents = self._select(fitness, size - elite)
+            children_pumps, children_ppm = self._mutate(*self._crossover(pumps[parents], ppm[parents]))
+            children_pumps, children_ppm = self.repair(children_pumps, children_ppm)
+            children_fitness = self.fitness(children_pumps, children_ppm)
+
+            pumps = np.concatenate([pumps[elite_index], children_pumps])
+            ppm = np.concatenate([ppm[elite_index], children_ppm])
+            fitness = np.concatenate([fitness[elite_index], children_fitness])
+
+            best = int(np.argmin(fitness))
+            if fitness[best] < best_fitness - 1e-9:
+                best_pumps, best_ppm, best_fitness = pumps[best].copy(), ppm[best].copy(), float(fitness[best])
+                stalled = 0
+            else:
+                stalled += 1
+            self.history.append(best_fitness)
+
+        stats = {
+            "generations": generation,
+            "best_fitness": best_fitness,
+            "stop_reason": stop_reason,
+            "elapsed_seconds": time.perf_counter() - started,
+        }
+        logger.debug("Genetic optimizer finished: %s", stats)
+        return best_pumps, best_ppm, stats
+
+
+if __name__ == '__main__':
+    from datetime import datetime, timedelta
+    from src.models.digital_twin_models import ModelType, OptimizationConstraints
+    from src.gcp_integration.optimization import optimize_injection_schedule
+
+    start = datetime(2024, 3, 4)
+    constraints = OptimizationConstraints(
+        min_dra_concentration_ppm=5.0,
+        max_dra_concentration_ppm=15.0,
+        max_continuous_pump_runtime_hours=24,
+        maintenance_windows=[{'start': start + timedelta(days=1), 'end': start + timedelta(days=1, hours=6)}],
+    )
+    demand = [{'timestamp': start + timedelta(hours=i), 'flow_gpm': 1000 + (i % 24) * 10} for i in range(168)]
+    prices = [{'timestamp': start + timedelta(hours=i), 'rate_per_kwh': 0.06 + (i % 5) * 0.02} for i in range(168)]
+
+    for model_type in (ModelType.LINEAR_PROGRAMMING, ModelType.GENETIC_ALGORITHMS):
+        started = time.perf_counter()
+        schedule = optimize_injection_schedule(
+            constraints, start, demand, prices, model_type=model_type,
+            ga_parameters=GeneticAlgorithmParameters(seed=42), time_limit_seconds=5.0,
+        )
+        print(f"{model_type.value}: energy ${schedule.projected_total_energy_cost:.2f}, "
+              f"DRA {schedule.projected_dra_usage_gallons:.1f} gal in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,138 @@
+from functools import lru_cache
+from typing import Dict, Any, Iterable, Optional, Sequence, Tuple
+import numpy as np
+from src.models.digital_twin_models import OptimizationConstraints, PumpType
+
+# Pump taken out of service by windows that do not name one (the legacy behaviour).
+DEFAULT_MAINTENANCE_PUMP = PumpType.PRIMARY
+
+WindowKey = Tuple[int, int, PumpType]
+
+
+def _window_key(window: Dict[str, Any]) -> WindowKey:
+    """(start ns, end ns, pump) of a {'start', 'end', optional 'pump'} window dict."""
+    pump = window.get("pump")
+    return (
+        int(np.datetime64(window["start"], "ns").astype(np.int64)),
+        int(np.datetime64(window["end"], "ns").astype(np.int64)),
+        DEFAULT_MAINTENANCE_PUMP if pump is None else PumpType(pump),
+    )
+
+
+def merge_intervals(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sort intervals and merge overlapping or touching ones. Empty intervals (end <= start)
+    are dropped.
+
+    Returns:
+        Sorted, disjoint (starts, ends).
+    """
+    keep = ends > starts
+    starts, ends = starts[keep], ends[keep]
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    running_end = np.maximum.accumulate(ends)
+    # A new merged interval begins wherever a start lies beyond every earlier end
+    new_group = np.concatenate([[True], starts[1:] > running_end[:-1]])
+    group_end = np.concatenate([np.flatnonzero(new_group)[1:] - 1, [len(starts) - 1]])
+    return starts[new_group], running_end[group_end]
+
+
+class MaintenanceWindowIndex:
+    """
+    Sorted interval index of maintenance windows, one per pump.
+
+    Windows are merged per pump into disjoint sorted intervals, so whether any window
+    overlaps a slot is one binary search: the last interval starting before the slot ends
+    overlaps it exactly when its end lies after the slot start. A whole horizon of slots is
+    answered with a single vectorised searchsorted.
+    """
+
+    def __init__(self, windows: Iterable[Dict[str, Any]] = ()):
+        """
+        Args:
+            windows: {'start': datetime, 'end': datetime, 'pump': PumpType} dicts. Windows
+                without a 'pump' apply to DEFAULT_MAINTENANCE_PUMP.
+        """
+        self._intervals: Dict[PumpType, Tuple[np.ndarray, np.ndarray]] = {}
+        keys = [_window_key(window) for window in windows]
+        for pump in PumpType:
+            starts = np.array([start for start, _, p in keys if p == pump], dtype=np.int64)
+            ends = np.array([end for _, end, p in keys if p == pump], dtype=np.int64)
+            self._intervals[pump] = merge_intervals(starts, ends)
+
+    def intervals(self, pump: PumpType) -> Tuple[np.ndarray, np.ndarray]:
+        """Merged (starts, ends) of a pump's windows as datetime64[ns] arrays."""
+        starts, ends = self._intervals[pump]
+        return starts.astype("datetime64[ns]"), ends.astype("datetime64[ns]")
+
+    def __len__(self) -> int:
+        """Number of merged intervals across all pumps."""
+        return sum(len(starts) for starts, _ in self._intervals.values())
+
+    def overlaps(self, pump: PumpType, starts, ends) -> np.ndarray:
+        """
+        Whether each [start, end) range overlaps one of the pump's windows.
+
+        Args:
+            starts, ends: Range bounds (datetime64 arrays or anything NumPy converts).
+        """
+        window_starts, window_ends = self._intervals[pump]
+        starts = np.asarray(starts, dtype="datetime64[ns]").astype(np.int64)
+        ends = np.asarray(ends, dtype="datetime64[ns]").astype(np.int64)
+        if len(window_starts) == 0:
+            return np.zeros(np.shape(starts), dtype=bool)
+        index = np.searchsorted(window_starts, ends, side="left") - 1
+        return (index >= 0) & (window_ends[np.maximum(index, 0)] > starts)
+
+    def slot_mask(self, slot_starts: np.ndarray, slot_minutes: int, pumps: Sequence[PumpType]) -> np.ndarray:
+        """mask[p, t] is True when pumps[p] has a window overlapping slot t."""
+        slot_starts = np.asarray(slot_starts, dtype="datetime64[ns]")
+        slot_ends = slot_starts + np.timedelta64(slot_minutes, "m")
+        return np.array([self.overlaps(pump, slot_starts, slot_ends) for pump in pumps]).reshape(len(pumps), len(slot_starts))
+
+
+@lru_cache(maxsize=64)
+def _cached_index(keys: Tuple[WindowKey, ...]) -> MaintenanceWindowIndex:
+    return MaintenanceWindowIndex(
+        {"start": np.datetime64(start, "ns"), "end": np.datetime64(end, "ns"), "pump": pump} for start, end, pump in keys
+    )
+
+
+def get_maintenance_index(constraints: OptimizationConstraints) -> MaintenanceWindowIndex:
+    """
+    Return the interval index for the constraints' maintenance windows, building it only the
+    first time a set of windows is seen.
+    """
+    keys = tuple(_window_key(window) for window in constraints.maintenance_windows or [])
+    return _cached_index(keys)
+
+
+if __name__ == '__main__':
+    import time
+    from datetime import datetime, timedelta
+
+    start = datetime(2024, 1, 1)
+    rng = np.random.default_rng(0)
+    offsets = rng.integers(0, 365 * 24 * 60, size=5000)
+    durations = rng.integers(30, 12 * 60, size=5000)
+    windows = [
+        {"start": start + timedelta(minutes=int(o)), "end": start + timedelta(minutes=int(o + d)),
+         "pump": PumpType.PRIMARY if i % 3 else PumpType.BACKUP}
+        for i, (o, d) in enumerate(zip(offsets, durations))
+    ]
+    constraints = OptimizationConstraints(
+        min_dra_concentration_ppm=5.0, max_dra_concentration_ppm=15.0, maintenance_windows=windows
+    )
+
+    started = time.perf_counter()
+    index = get_maintenance_index(constraints)
+    built = time.perf_counter() - started
+    slots = np.datetime64(start, "ns") + np.arange(365 * 24 * 60) * np.timedelta64(1, "m")
+    started = time.perf_counter()
+    mask = index.slot_mask(slots, 1, (PumpType.PRIMARY, PumpType.BACKUP))
+    print(f"{len(windows)} windows merged into {len(index)} intervals in {built * 1e3:.1f} ms")
+    print(f"Checked {len(slots)} one-minute slots in {(time.perf_counter() - started) * 1e3:.1f} ms; "
+          f"primary out {mask[0].mean():.1%}, backup out {mask[1].mean():.1%}")
@@ -1,105 +1,586 @@
-from typing import List, Dict, Any
-from src.models.digital_twin_models import OptimizationConstraints, OptimizedSchedule, OptimizedAction, PumpType
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import coo_matrix
+from src.models.digital_twin_models import (
+    OptimizationConstraints,
+    OptimizedSchedule,
+    OptimizedAction,
+    PumpType,
+    ScheduleCostParameters,
+    ModelType,
+    GeneticAlgorithmParameters,
+)
+from src.core.energy_calculation import calculate_pump_power_kw_array, calculate_energy_cost_array
+from src.gcp_integration.forecasts import ForecastInput, as_forecast
+from src.gcp_integration.maintenance_windows import get_maintenance_index
+from concurrent.futures import Executor
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
+# Order of the pumps in the decision variables: index 0 = primary, 1 = backup.
+PUMP_ORDER: Tuple[PumpType, PumpType] = (PumpType.PRIMARY, PumpType.BACKUP)
+NO_PUMP = -1
+
+
+def _slot_cost_coefficients(
+    flow_gpm: np.ndarray,
+    pressure_psi: np.ndarray,
+    rate_per_kwh: np.ndarray,
+    params: ScheduleCostParameters,
+    slot_minutes: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Linear cost of running each pump in each slot.
+
+    Returns:
+        base_cost[p, t]: energy cost of running pump p in slot t with no DRA.
+        ppm_cost[p, t]: change in total cost (energy saved plus DRA bought) per ppm injected.
+    """
+    efficiencies = np.array([params.primary_pump_efficiency, params.backup_pump_efficiency])[:, None]
+    shaft_kw = calculate_pump_power_kw_array(flow_gpm[None, :], pressure_psi[None, :], efficiencies)
+    base_cost = calculate_energy_cost_array(shaft_kw, params.motor_efficiency, slot_minutes, rate_per_kwh[None, :])
+
+    dra_gallons_per_ppm = flow_gpm * slot_minutes * 1e-6
+    ppm_cost = -base_cost * params.drag_reduction_per_ppm + dra_gallons_per_ppm[None, :] * params.dra_cost_per_gallon
+    return base_cost, ppm_cost
+
+
+def _check_drag_reduction(constraints: OptimizationConstraints, params: ScheduleCostParameters) -> None:
+    """
+    The pressure model 1 - drag_reduction_per_ppm * ppm must stay positive over the allowed
+    ppm range; past that the linear model would price energy as negative.
+
+    Raises:
+        ValueError: If drag_reduction_per_ppm * max_dra_concentration_ppm >= 1.
+    """
+    reduction = params.drag_reduction_per_ppm * constraints.max_dra_concentration_ppm
+    if reduction >= 1:
+        raise ValueError(
+            f"drag_reduction_per_ppm ({params.drag_reduction_per_ppm}) x max_dra_concentration_ppm "
+            f"({constraints.max_dra_concentration_ppm}) = {reduction:.2f}; the pressure reduction must stay below 1"
+        )
+
+
+def _slot_start(timestamp: datetime, slot_minutes: int) -> datetime:
+    """Start of the planning slot containing timestamp (slots are aligned to midnight)."""
+    minute_of_day = timestamp.hour * 60 + timestamp.minute
+    floored = minute_of_day - minute_of_day % slot_minutes
+    return timestamp.replace(hour=floored // 60, minute=floored % 60, second=0, microsecond=0)
+
+
+def align_forecasts(
+    demand_forecast: ForecastInput,
+    energy_price_forecast: ForecastInput,
+    planning_start_time: datetime,
+    num_slots: int,
+    slot_minutes: int,
+    params: ScheduleCostParameters,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Flow (GPM), pressure (psi) and energy rate ($/kWh) per slot, falling back to the cost parameter defaults."""
+    demand = as_forecast(demand_forecast)
+    prices = as_forecast(energy_price_forecast)
+    grid = (planning_start_time, num_slots, slot_minutes)
+    return (
+        demand.align("flow_gpm", *grid, default=params.default_flow_gpm),
+        demand.align("pressure_psi", *grid, default=params.line_pressure_psi),
+        prices.align("rate_per_kwh", *grid, default=params.default_energy_rate_per_kwh),
+    )
+
+
+def _horizon_inputs(
+    constraints: OptimizationConstraints,
+    planning_start_time: datetime,
+    num_slots: int,
+    slot_minutes: int,
+    demand_forecast: ForecastInput,
+    energy_price_forecast: ForecastInput,
+    params: ScheduleCostParameters,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Flow, cost coefficients and pump availability for every slot of the horizon."""
+    _check_drag_reduction(constraints, params)
+    slot_starts = np.datetime64(planning_start_time, "ns") + np.arange(num_slots) * np.timedelta64(slot_minutes, "m")
+    flow_gpm, pressure_psi, rate_per_kwh = align_forecasts(
+        demand_forecast, energy_price_forecast, planning_start_time, num_slots, slot_minutes, params
+    )
+    base_cost, ppm_cost = _slot_cost_coefficients(flow_gpm, pressure_psi, rate_per_kwh, params, slot_minutes)
+    return flow_gpm, base_cost, ppm_cost, _maintenance_mask(constraints, slot_starts, slot_minutes)
+
+
+def _maintenance_mask(constraints: OptimizationConstraints, slot_starts: np.ndarray, slot_minutes: int) -> np.ndarray:
+    """
+    unavailable[p, t] is True when pump p may not run in slot t. A maintenance window takes
+    its pump (the primary pump if it names none) out of service for every slot it overlaps.
+    """
+    return get_maintenance_index(constraints).slot_mask(slot_starts, slot_minutes, PUMP_ORDER)
+
+
+def _runtime_limit_slots(constraints: OptimizationConstraints, slot_minutes: int) -> Optional[int]:
+    """
+    Maximum number of consecutive slots a pump may run, or None when unconstrained. A limit
+    longer than the horizon is kept: runtime carried in from before the horizon counts too.
+    """
+    if constraints.max_continuous_pump_runtime_hours is None:
+        return None
+    return int(constraints.max_continuous_pump_runtime_hours * 60 // slot_minutes)
+
+
+class InjectionScheduleProblem:
+    """
+    Pump-assignment / DRA-rate MILP over a fixed number of slots, solved with HiGHS.
+
+    Variables (P pumps, N slots): run[p, t] binary, ppm[p, t] continuous, where ppm[p, t] is
+    the DRA rate while pump p runs slot t. Each slot runs exactly one available pump (none if
+    every pump is out of service), ppm[p, t] lies in [min_ppm, max_ppm] when run[p, t] = 1 and
+    is 0 otherwise, and no pump runs more than runtime_limit consecutive slots, counting the
+    slots it had already been running for before the horizon started.
+
+    The runtime limit (at most runtime_limit running slots in any runtime_limit + 1) is
+    written on cumulative run counts cum[p, t] = run[p, 0] + ... + run[p, t]: each window
+    is the difference of two of them, so it takes two nonzeros however long the limit, and
+    the windows reaching back before the horizon become upper bounds on the first cum
+    values. The LP relaxation is the same as with one row per sliding window.
+
+    The constraint matrix depends only on the horizon shape, the ppm range and the runtime
+    limit, so it is assembled once and reused for every solve. Costs, maintenance windows and
+    carried-over runtime only change variable bounds and the right-hand side of a few rows.
+    """
+
+    def __init__(self, num_slots: int, min_ppm: float, max_ppm: float, runtime_limit: Optional[int]):
+        self.num_slots = num_slots
+        self.min_ppm = min_ppm
+        self.max_ppm = max_ppm
+        self.runtime_limit = runtime_limit
+        num_pumps = len(PUMP_ORDER)
+        n_run = num_pumps * num_slots
+        self._n_run = n_run
+        # Variable blocks, each (pump, slot) in row-major order: run, ppm, then cumulative runs
+        run_var = np.arange(n_run).reshape(num_pumps, num_slots)
+        ppm_var = n_run + run_var
+        cum_var = 2 * n_run + run_var
+        ones = np.ones(n_run)
+        blocks: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []  # (rows, cols, data)
+
+        # One pump per slot; the right-hand side is set per solve (0 if no pump is available).
+        slot_rows = np.tile(np.arange(num_slots), num_pumps)
+        blocks.append((slot_rows, run_var.ravel(), ones))
+        lower = [np.ones(num_slots)]
+        upper = [np.ones(num_slots)]
+        row = num_slots
+
+        # ppm - max_ppm * run <= 0 and ppm - min_ppm * run >= 0, one row per (pump, slot) each
+        for coef_run, low, high in ((-max_ppm, -np.inf, 0.0), (-min_ppm, 0.0, np.inf)):
+            r = row + np.arange(n_run)
+            blocks.append((np.concatenate([r, r]), np.concatenate([ppm_var.ravel(), run_var.ravel()]),
+                           np.concatenate([ones, np.full(n_run, coef_run)])))
+            lower.append(np.full(n_run, low))
+            upper.append(np.full(n_run, high))
+            row += n_run
+
+        if runtime_limit is not None:
+            # cum[t] - cum[t-1] - run[t] = 0 (cum[-1] = 0)
+            r = (row + np.arange(n_run)).reshape(num_pumps, num_slots)
+            blocks.append((r.ravel(), cum_var.ravel(), ones))
+            blocks.append((r.ravel(), run_var.ravel(), -ones))
+            blocks.append((r[:, 1:].ravel(), cum_var[:, :-1].ravel(), np.full(num_pumps * (num_slots - 1), -1.0)))
+            lower.append(np.zeros(n_run))
+            upper.append(np.zeros(n_run))
+            row += n_run
+
+            # Windows ending at t >= runtime_limit: cum[t] - cum[t - runtime_limit - 1] <= runtime_limit.
+            # Earlier windows reach into the carried runtime and are bounds on cum (see solve).
+            ends = np.arange(runtime_limit, num_slots)
+            r = (row + np.arange(num_pumps * len(ends))).reshape(num_pumps, len(ends))
+            blocks.append((r.ravel(), cum_var[:, ends].ravel(), np.ones(r.size)))
+            inner = ends > runtime_limit
+            blocks.append((r[:, inner].ravel(), cum_var[:, ends[inner] - runtime_limit - 1].ravel(),
+                           np.full(num_pumps * int(inner.sum()), -1.0)))
+            lower.append(np.full(r.size, -np.inf))
+            upper.append(np.full(r.size, float(runtime_limit)))
+            row += r.size
+
+        rows, cols, data = (np.concatenate(part) for part in zip(*blocks))
+        num_vars = (3 if runtime_limit is not None else 2) * n_run
+        self.matrix = coo_matrix((data, (rows, cols)), shape=(row, num_vars)).tocsr()
+        self._lower = np.concatenate(lower)
+        self._upper = np.concatenate(upper)
+        self._integrality = np.zeros(num_vars)
+        self._integrality[:n_run] = 1
+
+    def solve(
+        self,
+        base_cost: np.ndarray,
+        ppm_cost: np.ndarray,
+        unavailable: np.ndarray,
+        carried_runtime: Optional[np.ndarray] = None,
+        time_limit_seconds: float = 10.0,
+        incumbent: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            base_cost, ppm_cost: Cost coefficients per (pump, slot), see _slot_cost_coefficients.
+            unavailable: True where a pump may not run a slot.
+            carried_runtime: Consecutive slots each pump had been running for when the horizon
+                starts (zeros if None).
+            time_limit_seconds: Solver wall-clock limit.
+            incumbent: A known (pump_index, ppm) schedule. It is returned instead of the solver
+                result when the solver stops without a better solution.
+
+        Returns:
+            pump_index[t] (index into PUMP_ORDER, NO_PUMP if none) and ppm[t].
+
+        Raises:
+            ValueError: If the constraints cannot be satisfied.
+        """
+        lower = self._lower.copy()
+        upper = self._upper.copy()
+        any_available = (~unavailable).any(axis=0).astype(np.float64)
+        lower[:self.num_slots] = any_available
+        upper[:self.num_slots] = any_available
+
+        n_run = self._n_run
+        cost = np.zeros(self.matrix.shape[1])
+        cost[:2 * n_run] = np.concatenate([base_cost.ravel(), ppm_cost.ravel()])
+        upper_bounds = np.full(len(cost), np.inf)
+        upper_bounds[:2 * n_run] = np.concatenate(
+            [(~unavailable).ravel().astype(np.float64), np.where(unavailable, 0.0, self.max_ppm).ravel()]
+        )
+        if self.runtime_limit is not None:
+            # The window ending at slot j < runtime_limit also covers the runtime_limit - j slots
+            # before the horizon, of which min(runtime_limit - j, carried) were running.
+            limit = self.runtime_limit
+            head = np.arange(min(limit, self.num_slots))
+            carried = np.zeros(len(PUMP_ORDER)) if carried_runtime is None else np.asarray(carried_runtime)
+            cum_upper = limit - np.minimum(limit - head[None, :], carried[:, None])
+            upper_bounds[2 * n_run:].reshape(len(PUMP_ORDER), self.num_slots)[:, head] = cum_upper
+        result = milp(
+            c=cost,
+            constraints=LinearConstraint(self.matrix, lower, upper),
+            integrality=self._integrality,
+            bounds=Bounds(np.zeros(len(cost)), upper_bounds),
+            options={"time_limit": time_limit_seconds},
+        )
+
+        if incumbent is not None and (result.x is None or result.status != 0):
+            incumbent_cost = self.schedule_cost(base_cost, ppm_cost, *incumbent)
+            if result.x is None or incumbent_cost < result.fun:
+                logger.debug("Solver stopped (%s); keeping warm-start schedule", result.message)
+                return incumbent
+        if result.x is None:
+            raise ValueError(f"No feasible injection schedule: {result.message}")
+
+        run = np.rint(result.x[:n_run]).reshape(len(PUMP_ORDER), self.num_slots)
+        ppm = result.x[n_run:2 * n_run].reshape(len(PUMP_ORDER), self.num_slots)
+        pump_index = np.where(run.any(axis=0), run.argmax(axis=0), NO_PUMP)
+        return pump_index, np.clip((ppm * run).sum(axis=0), 0.0, self.max_ppm)
+
+    def is_feasible(
+        self,
+        pump_index: np.ndarray,
+        ppm: np.ndarray,
+        unavailable: np.ndarray,
+        carried_runtime: Optional[np.ndarray] = None,
+    ) -> bool:
+        """Whether a (pump_index, ppm) schedule satisfies every constraint of this problem."""
+        running = pump_index != NO_PUMP
+        slots = np.arange(self.num_slots)
+        if not np.array_equal(running, (~unavailable).any(axis=0)):
+            return False
+        if unavailable[np.maximum(pump_index, 0), slots][running].any():
+            return False
+        tolerance = 1e-6
+        if np.any(running & ((ppm < self.min_ppm - tolerance) | (ppm > self.max_ppm + tolerance))):
+            return False
+        if self.runtime_limit is not None:
+            carried = np.zeros(len(PUMP_ORDER), dtype=np.int64) if carried_runtime is None else carried_runtime
+            for p in range(len(PUMP_ORDER)):
+                run_length = int(carried[p])
+                for on in pump_index == p:
+                    run_length = run_length + 1 if on else 0
+                    if run_length > self.runtime_limit:
+                        return False
+        return True
+
+    @staticmethod
+    def schedule_cost(base_cost: np.ndarray, ppm_cost: np.ndarray, pump_index: np.ndarray, ppm: np.ndarray) -> float:
+        """Objective value of a (pump_index, ppm) schedule."""
+        running = pump_index != NO_PUMP
+        slots = np.arange(len(pump_index))[running]
+        pumps = pump_index[running]
+        return float((base_cost[pumps, slots] + ppm_cost[pumps, slots] * ppm[running]).sum())
+
+
 def optimize_injection_schedule(
     constraints: OptimizationConstraints,
     current_timestamp: datetime,
     # Potentially needs access to:
-    # - Demand forecasts (flow requirements)
-    # - Energy price forecasts (if variable)
     # - Current system state (e.g., pump health)
     # - DRA effectiveness models
     # - Historical performance data
-    demand_forecast: List[Dict[str, Any]], # e.g. [{'timestamp': dt, 'flow_gpm': 1000}, ...]
-    energy_price_forecast: List[Dict[str, Any]] # e.g. [{'timestamp': dt, 'rate_per_kwh': 0.12}, ...]
+    demand_forecast: ForecastInput, # Forecast, or e.g. [{'timestamp': dt, 'flow_gpm': 1000, 'pressure_psi': 300}, ...]
+    energy_price_forecast: ForecastInput, # Forecast, or e.g. [{'timestamp': dt, 'rate_per_kwh': 0.12}, ...]
+    cost_parameters: Optional[ScheduleCostParameters] = None,
+    horizon_hours: int = 7 * 24,
+    slot_minutes: int = 60,
+    time_limit_seconds: float = 10.0,
+    model_type: ModelType = ModelType.LINEAR_PROGRAMMING,
+    ga_parameters: Optional[GeneticAlgorithmParameters] = None,
+    executor: Optional[Executor] = None,
+    workers: int = 1,
 ) -> OptimizedSchedule:
     """
     Generates an optimized 7-day forward DRA injection schedule.
 
-    Objective: Minimize total energy costs over 7-day horizon.
+    Objective: Minimize total energy costs (plus the DRA bought to save them) over the horizon.
     Constraints:
     - Maintain DRA concentration within acceptable range.
-    - Respect pump operational limits.
-    - Account for maintenance windows.
-
-    This is a placeholder implementation.
-    Actual implementation would involve:
-    1. Defining the objective function (minimize sum(energy_cost_per_minute * injection_rate * time_period)).
-       - energy_cost_per_minute itself is a function of flow, pressure, pump efficiency, energy rate.
-       - injection_rate affects DRA concentration and drag reduction (which impacts flow/pressure needed).
-    2. Defining decision variables (e.g., DRA injection rate per time step, active pump per time step).
-    3. Translating all constraints into mathematical form for an optimization solver (e.g., PuLP, CVXPY, SciPy.optimize, or Vertex AI Optimization).
-    4. Calling the solver and interpreting the results.
-    """
-
-    print(f"Placeholder: Optimizing injection schedule with constraints: {constraints.model_dump_json()}")
-    print(f"Demand Forecast sample: {demand_forecast[0] if demand_forecast else 'N/A'}")
-    print(f"Energy Price Forecast sample: {energy_price_forecast[0] if energy_price_forecast else 'N/A'}")
+    - Respect the maximum continuous pump runtime.
+    - Account for maintenance windows (the pump under maintenance is out of service; the other one runs).
 
-    # Placeholder: Generate a very simple, non-optimized schedule for demonstration.
-    # This schedule will just run the primary pump at a constant DRA rate.
+    The horizon is split into slots (168 hourly slots by default) and solved as a MILP with
+    SciPy's HiGHS backend: the active pump per slot is binary, the DRA ppm per slot is
+    continuous. DRA lowers the pressure the pump has to supply by drag_reduction_per_ppm per
+    ppm, so the energy cost of each slot is linear in the ppm for a given pump; see
+    ScheduleCostParameters. Forecasts are resampled to the slot grid with Forecast.align (the
+    mean over each slot); pass Forecast objects to reuse their cached alignment.
 
-    actions: List[OptimizedAction] = []
+    With model_type GENETIC_ALGORITHMS the same horizon is searched by
+    GeneticScheduleOptimizer instead, which scores whole populations with ScheduleEvaluator
+    (optionally on `executor`, split into `workers` chunks) and always returns within
+    time_limit_seconds; ga_parameters controls it, including the random seed.
 
-    # Determine planning horizon
-    planning_start_time = current_timestamp.replace(minute=0, second=0, microsecond=0)
-
-    # For a 7-day plan, create hourly actions
-    num_hours_in_plan = 7 * 24
-
-    # Example fixed DRA rate (ppm) - in reality, this is a key decision variable
-    # This rate should be chosen to respect min/max DRA concentration based on flow.
-    # For placeholder, let's use an average of min/max if available.
-    example_dra_rate_ppm = (constraints.min_dra_concentration_ppm + constraints.max_dra_concentration_ppm) / 2.0
-
-    active_pump_for_plan = PumpType.PRIMARY # Default to primary pump
+    Raises:
+        ValueError: If the constraints cannot be satisfied, the DRA pressure reduction would
+            reach 100% within the ppm range, or the model type is unsupported.
+    """
+    params = cost_parameters or ScheduleCostParameters()
+    planning_start_time = _slot_start(current_timestamp, slot_minutes)
+    num_slots = horizon_hours * 60 // slot_minutes
+    flow_gpm, base_cost, ppm_cost, unavailable = _horizon_inputs(
+        constraints, planning_start_time, num_slots, slot_minutes, demand_forecast, energy_price_forecast, params
+    )
+    if model_type == ModelType.LINEAR_PROGRAMMING:
+        problem = InjectionScheduleProblem(
+            num_slots,
+            constraints.min_dra_concentration_ppm,
+            constraints.max_dra_concentration_ppm,
+            _runtime_limit_slots(constraints, slot_minutes),
+        )
+        pump_index, ppm = problem.solve(base_cost, ppm_cost, unavailable, time_limit_seconds=time_limit_seconds)
+    elif model_type == ModelType.GENETIC_ALGORITHMS:
+        # Imported here because both modules build on the helpers in this one
+        from src.gcp_integration.schedule_evaluation import ScheduleEvaluator
+        from src.gcp_integration.genetic_optimizer import GeneticScheduleOptimizer
 
-    for i in range(num_hours_in_plan):
-        action_start_time = planning_start_time + timedelta(hours=i)
+        evaluator = ScheduleEvaluator(
+            constraints, planning_start_time, num_slots, demand_forecast, energy_price_forecast, params, slot_minutes
+        )
+        pump_index, ppm, _ = GeneticScheduleOptimizer(evaluator, ga_parameters, executor, workers).run(time_limit_seconds)
+        # The search only penalizes violations, so its best schedule may still break them
+        evaluation = evaluator.evaluate(pump_index, ppm)
+        if not evaluation.feasible:
+            raise ValueError(
+                f"No feasible injection schedule found: {int(evaluation.violations)} violating slots "
+                f"(ppm {int(evaluation.ppm_violations)}, maintenance {int(evaluation.maintenance_violations)}, "
+                f"runtime {int(evaluation.runtime_violations)}, coverage {int(evaluation.coverage_violations)})"
+            )
+    else:
+        raise ValueError(f"Unsupported optimization model type: {model_type}")
 
-        # Check for maintenance windows (very basic check)
-        is_in_maintenance = False
-        if constraints.maintenance_windows:
-            for window in constraints.maintenance_windows:
-                if window['start'] <= action_start_time < window['end']:
-                    is_in_maintenance = True
-                    break
+    return _build_schedule(
+        constraints, planning_start_time, slot_minutes, pump_index, ppm, base_cost, flow_gpm, unavailable, params
+    )
 
-        current_active_pump = PumpType.BACKUP if is_in_maintenance else active_pump_for_plan
-        current_dra_rate = 0.0 if is_in_maintenance else example_dra_rate_ppm # No injection during maintenance
 
-        # Placeholder for projected cost - in a real scenario, this would be calculated
-        # based on the action (pump, DRA rate), forecasted flow/pressure, and energy price.
-        projected_cost_for_hour = 10.0 # Arbitrary placeholder cost
+def _build_schedule(
+    constraints: OptimizationConstraints,
+    planning_start_time: datetime,
+    slot_minutes: int,
+    pump_index: np.ndarray,
+    ppm: np.ndarray,
+    base_cost: np.ndarray,
+    flow_gpm: np.ndarray,
+    unavailable: np.ndarray,
+    params: ScheduleCostParameters,
+) -> OptimizedSchedule:
+    """Turn solver output into an OptimizedSchedule with per-slot projected energy costs."""
+    num_slots = len(ppm)
+    running = pump_index != NO_PUMP
+    slot_energy_cost = np.where(
+        running,
+        base_cost[np.maximum(pump_index, 0), np.arange(num_slots)] * (1 - params.drag_reduction_per_ppm * ppm),
+        0.0,
+    )
+    maintenance = unavailable.any(axis=0)
 
+    actions: List[OptimizedAction] = []
+    for i in range(num_slots):
+        if not running[i]:
+            notes = "No pump available"
+        elif maintenance[i]:
+            notes = "Maintenance scheduled"
+        else:
+            notes = "Nominal operation"
         actions.append(
             OptimizedAction(
-                timestamp=action_start_time,
-                duration_minutes=60, # Hourly actions
-                dra_injection_rate_ppm=current_dra_rate,
-                active_pump=current_active_pump,
-                projected_energy_cost_for_period=projected_cost_for_hour,
-                notes="Maintenance scheduled" if is_in_maintenance else "Nominal operation"
+                timestamp=planning_start_time + timedelta(minutes=slot_minutes * i),
+                duration_minutes=slot_minutes,
+                dra_injection_rate_ppm=float(ppm[i]),
+                active_pump=PUMP_ORDER[pump_index[i]] if running[i] else None,
+                projected_energy_cost_for_period=float(slot_energy_cost[i]),
+                notes=notes,
             )
         )
 
-    total_projected_cost = sum(action.projected_energy_cost_for_period for action in actions if action.projected_energy_cost_for_period is not None)
-
-    optimal_schedule = OptimizedSchedule(
+    return OptimizedSchedule(
         plan_id=f"OPTPLAN_{planning_start_time.strftime('%Y%m%d%H%M%S')}",
         generated_at=datetime.now(),
         planning_horizon_start=planning_start_time,
-        planning_horizon_end=planning_start_time + timedelta(hours=num_hours_in_plan -1), # End of the last hour block
+        planning_horizon_end=planning_start_time + timedelta(minutes=slot_minutes * (num_slots - 1)), # Start of the last slot
         actions=actions,
-        projected_total_energy_cost=total_projected_cost,
-        constraints_details=constraints
+        projected_total_energy_cost=float(slot_energy_cost.sum()),
+        projected_dra_usage_gallons=float((flow_gpm * slot_minutes * ppm * 1e-6).sum()),
+        constraints_details=constraints,
     )
 
-    print(f"Placeholder: Generated schedule with {len(actions)} actions.")
-    return optimal_schedule
+def _advance_runtime(carried_runtime: np.ndarray, elapsed_pump_index: np.ndarray) -> np.ndarray:
+    """Consecutive running slots per pump after the elapsed slots have run as planned."""
+    runtime = carried_runtime.copy()
+    for pump in elapsed_pump_index:
+        for p in range(len(PUMP_ORDER)):
+            runtime[p] = runtime[p] + 1 if pump == p else 0
+    return runtime
+
+
+class RollingHorizonOptimizer:
+    """
+    Re-plans the injection schedule as time moves forward, reusing the previous plan.
+
+    The MILP for a given horizon shape, ppm range and runtime limit is built once and kept
+    across calls; each replan() only refreshes costs, maintenance availability and the
+    carried-over pump runtime. The previous schedule, shifted forward by the elapsed slots
+    (with its last slot repeated to fill the new end of the horizon), is passed to the solver
+    as a warm-start incumbent: it is kept whenever the time limit is hit before a better
+    schedule is found, so a replan always returns a feasible plan quickly. Slots that have
+    elapsed since the previous plan are assumed to have run as planned.
+    """
+
+    def __init__(
+        self,
+        constraints: OptimizationConstraints,
+        cost_parameters: Optional[ScheduleCostParameters] = None,
+        horizon_hours: int = 7 * 24,
+        slot_minutes: int = 60,
+        time_limit_seconds: float = 2.0,
+    ):
+        self.cost_parameters = cost_parameters or ScheduleCostParameters()
+        self.slot_minutes = slot_minutes
+        self.num_slots = horizon_hours * 60 // slot_minutes
+        self.time_limit_seconds = time_limit_seconds
+        self.schedule: Optional[OptimizedSchedule] = None
+        self.problem: Optional[InjectionScheduleProblem] = None
+        self._pump_index: Optional[np.ndarray] = None
+        self._ppm: Optional[np.ndarray] = None
+        self._carried_runtime = np.zeros(len(PUMP_ORDER), dtype=np.int64)
+        self.update_constraints(constraints)
+
+    def update_constraints(self, constraints: OptimizationConstraints) -> None:
+        """
+        Use new constraints from the next replan on. The constraint matrix is rebuilt only if
+        the ppm range or runtime limit changed; maintenance windows just change bounds.
+        """
+        runtime_limit = _runtime_limit_slots(constraints, self.slot_minutes)
+        problem = self.problem
+        if (
+            problem is None
+            or problem.min_ppm != constraints.min_dra_concentration_ppm
+            or problem.max_ppm != constraints.max_dra_concentration_ppm
+            or problem.runtime_limit != runtime_limit
+        ):
+            self.problem = InjectionScheduleProblem(
+                self.num_slots,
+                constraints.min_dra_concentration_ppm,
+                constraints.max_dra_concentration_ppm,
+                runtime_limit,
+            )
+        self.constraints = constraints
+
+    def replan(
+        self,
+        current_timestamp: datetime,
+        demand_forecast: ForecastInput,
+        energy_price_forecast: ForecastInput,
+        carried_runtime_slots: Optional[Dict[PumpType, int]] = None,
+    ) -> OptimizedSchedule:
+        """
+        Optimize the horizon starting at the slot containing current_timestamp.
+
+        Args:
+            current_timestamp: Time of the re-plan.
+            demand_forecast, energy_price_forecast: As for optimize_injection_schedule.
+            carried_runtime_slots: Consecutive slots each pump has actually been running for;
+                overrides the runtime derived from the previous plan.
+
+        Raises:
+            ValueError: If the constraints cannot be satisfied.
+        """
+        planning_start_time = _slot_start(current_timestamp, self.slot_minutes)
+        incumbent = None
+        carried = np.zeros(len(PUMP_ORDER), dtype=np.int64)
+
+        if self.schedule is not None and planning_start_time >= self.schedule.planning_horizon_start:
+            elapsed = planning_start_time - self.schedule.planning_horizon_start
+            shift = int(elapsed // timedelta(minutes=self.slot_minutes))
+            carried = _advance_runtime(self._carried_runtime, self._pump_index[:shift])
+            if shift < self.num_slots:
+                tail = np.full(shift, self._pump_index[-1])
+                incumbent = (
+                    np.concatenate([self._pump_index[shift:], tail]),
+                    np.concatenate([self._ppm[shift:], np.full(shift, self._ppm[-1])]),
+                )
+        if carried_runtime_slots is not None:
+            carried = np.array([carried_runtime_slots.get(pump, 0) for pump in PUMP_ORDER], dtype=np.int64)
+
+        flow_gpm, base_cost, ppm_cost, unavailable = _horizon_inputs(
+            self.constraints,
+            planning_start_time,
+            self.num_slots,
+            self.slot_minutes,
+            demand_forecast,
+            energy_price_forecast,
+            self.cost_parameters,
+        )
+        if incumbent is not None and not self.problem.is_feasible(*incumbent, unavailable, carried):
+            incumbent = None
+
+        pump_index, ppm = self.problem.solve(
+            base_cost,
+            ppm_cost,
+            unavailable,
+            carried_runtime=carried,
+            time_limit_seconds=self.time_limit_seconds,
+            incumbent=incumbent,
+        )
+        self._pump_index, self._ppm, self._carried_runtime = pump_index, ppm, carried
+        self.schedule = _build_schedule(
+            self.constraints,
+            planning_start_time,
+            self.slot_minutes,
+            pump_index,
+            ppm,
+            base_cost,
+            flow_gpm,
+            unavailable,
+            self.cost_parameters,
+        )
+        return self.schedule
+
 
 if __name__ == '__main__':
+    import time
+
     sample_constraints = OptimizationConstraints(
         min_dra_concentration_ppm=5.0,
         max_dra_concentration_ppm=15.0,
@@ -113,30 +594,38 @@ if __name__ == '__main__':
     )
 
     # Dummy forecast data
-    now = datetime.now()
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
     dummy_demand_forecast = [
         {'timestamp': now + timedelta(hours=i), 'flow_gpm': 1000 + i*10} for i in range(7*24)
     ]
     dummy_energy_prices = [
-        {'timestamp': now + timedelta(hours=i), 'rate_per_kwh': 0.10 + (i%5)*0.01} for i in range(7*24)
+        {'timestamp': now + timedelta(hours=i), 'rate_per_kwh': 0.06 + (i%5)*0.02} for i in range(7*24)
     ]
 
+    started = time.perf_counter()
     schedule = optimize_injection_schedule(
         constraints=sample_constraints,
         current_timestamp=now,
         demand_forecast=dummy_demand_forecast,
         energy_price_forecast=dummy_energy_prices
         )
+    elapsed = time.perf_counter() - started
 
-    print("\n--- Generated Optimal Schedule (Placeholder) ---")
+    print("\n--- Generated Optimal Schedule ---")
     # Limiting output for brevity
     print(f"Plan ID: {schedule.plan_id}")
-    print(f"Generated At: {schedule.generated_at}")
-    print(f"Total Projected Cost: {schedule.projected_total_energy_cost}")
+    print(f"Solved in: {elapsed:.2f}s")
+    print(f"Total Projected Cost: {schedule.projected_total_energy_cost:.2f}")
+    print(f"Projected DRA Usage (gal): {schedule.projected_dra_usage_gallons:.2f}")
     print(f"Number of Actions: {len(schedule.actions)}")
     if schedule.actions:
         print("\nFirst few actions:")
         for i in range(min(5, len(schedule.actions))):
             print(schedule.actions[i].model_dump_json())
 
-    print("\nNote: This is a placeholder and needs a proper optimization model and solver for actual use.")
+    # Rolling re-plan an hour later on the same problem
+    rolling = RollingHorizonOptimizer(sample_constraints)
+    rolling.replan(now, dummy_demand_forecast, dummy_energy_prices)
+    started = time.perf_counter()
+    replanned = rolling.replan(now + timedelta(hours=1), dummy_demand_forecast, dummy_energy_prices)
+    print(f"\nRe-planned from {replanned.planning_horizon_start} in {time.perf_counter() - started:.3f}s, cost {replanned.projected_total_energy_cost:.2f}")
@@ -0,0 +1,223 @@
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from src.models.digital_twin_models import (
+    OptimizationConstraints,
+    OptimizedInjectionSchedule,
+    OptimizedSchedule,
+    ScheduleCostParameters,
+    SevenDayOptimizationPlan,
+    WhatIfScenario,
+)
+from src.gcp_integration.optimization import optimize_injection_schedule
+from src.gcp_integration.forecasts import Forecast, ForecastInput, as_forecast
+from src.gcp_integration.schedule_evaluation import evaluate_schedule
+
+logger = logging.getLogger(__name__)
+
+BASELINE_SCENARIO_ID = "baseline"
+
+
+def apply_scenario(
+    scenario: WhatIfScenario,
+    constraints: OptimizationConstraints,
+    demand_forecast: ForecastInput,
+    energy_price_forecast: ForecastInput,
+) -> Tuple[OptimizationConstraints, Forecast, Forecast]:
+    """
+    Constraints and forecasts for one scenario: replacement forecasts are used first, then
+    scaled, and the scenario's maintenance windows are added to the baseline ones.
+    """
+    demand = as_forecast(scenario.demand_forecast or demand_forecast).scaled("flow_gpm", scenario.demand_scale)
+    prices = as_forecast(scenario.energy_price_forecast or energy_price_forecast).scaled("rate_per_kwh", scenario.price_scale)
+    if scenario.additional_maintenance_windows:
+        windows = list(constraints.maintenance_windows or []) + scenario.additional_maintenance_windows
+        constraints = constraints.model_copy(update={"maintenance_windows": windows})
+    return constraints, demand, prices
+
+
+def _solve_scenario(
+    scenario: WhatIfScenario,
+    constraints: OptimizationConstraints,
+    current_timestamp: datetime,
+    demand_forecast: ForecastInput,
+    energy_price_forecast: ForecastInput,
+    cost_parameters: Optional[ScheduleCostParameters],
+    time_limit_seconds: float,
+) -> Tuple[str, Optional[OptimizedSchedule], Optional[str]]:
+    """Worker: optimize one scenario. Infeasible scenarios return the error instead of raising."""
+    scenario_constraints, demand, prices = apply_scenario(scenario, constraints, demand_forecast, energy_price_forecast)
+    try:
+        schedule = optimize_injection_schedule(
+            scenario_constraints,
+            current_timestamp,
+            demand,
+            prices,
+            cost_parameters=cost_parameters,
+            time_limit_seconds=time_limit_seconds,
+        )
+    except ValueError as exc:
+        return scenario.scenario_id, None, str(exc)
+    return scenario.scenario_id, schedule, None
+
+
+def to_injection_schedule(
+    schedule: OptimizedSchedule,
+    scenario_id: Optional[str] = None,
+    cost_parameters: Optional[ScheduleCostParameters] = None,
+) -> OptimizedInjectionSchedule:
+    """Convert an optimizer result into the UI-facing OptimizedInjectionSchedule."""
+    params = cost_parameters or ScheduleCostParameters()
+    energy_cost = schedule.projected_total_energy_cost or 0.0
+    dra_gallons = schedule.projected_dra_usage_gallons or 0.0
+    horizon = schedule.planning_horizon_end - schedule.planning_horizon_start
+    return OptimizedInjectionSchedule(
+        planning_horizon_days=round(horizon.total_seconds() / 86400) or 1,
+        schedule=[
+            {
+                "timestamp": action.timestamp,
+                "dra_injection_rate": action.dra_injection_rate_ppm,
+                "active_pump": action.active_pump,
+                "projected_energy_cost": action.projected_energy_cost_for_period,
+            }
+            for action in schedule.actions
+        ],
+        projected_total_energy_cost=schedule.projected_total_energy_cost,
+        projected_dra_utilization=schedule.projected_dra_usage_gallons,
+        scenario_id=scenario_id,
+        projected_total_operating_cost=energy_cost + dra_gallons * params.dra_cost_per_gallon,
+    )
+
+
+def run_what_if_scenarios(
+    constraints: OptimizationConstraints,
+    current_timestamp: datetime,
+    demand_forecast: ForecastInput,
+    energy_price_forecast: ForecastInput,
+    scenarios: Sequence[WhatIfScenario],
+    cost_parameters: Optional[ScheduleCostParameters] = None,
+    max_workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+    time_limit_seconds: float = 10.0,
+    top_n: Optional[int] = None,
+) -> SevenDayOptimizationPlan:
+    """
+    Optimize the baseline and every what-if scenario in parallel and rank the results.
+
+    Each scenario is solved with optimize_injection_schedule on a ProcessPoolExecutor.
+    Scenarios whose constraints cannot be satisfied are logged and left out of the plan.
+
+    Args:
+        constraints, current_timestamp, demand_forecast, energy_price_forecast: The baseline
+            inputs, as for optimize_injection_schedule.
+        scenarios: Perturbations of the baseline to optimize.
+        cost_parameters: Cost model shared by every scenario.
+        max_workers: Worker process count for the default pool (defaults to the CPU count).
+        executor: Optional executor to use instead of creating a process pool.
+        time_limit_seconds: Solver time limit per scenario.
+        top_n: Keep only the N cheapest schedules (all if None).
+
+    Returns:
+        A SevenDayOptimizationPlan whose recommended_schedules are ordered from the lowest to
+        the highest projected operating cost (energy plus DRA), each with its
+        cost_delta_vs_baseline. Scenarios with other demand or prices differ from the baseline
+        partly because of those inputs, so expected_total_cost_savings compares like for like:
+        the baseline schedule re-priced under the cheapest scenario's demand and prices, minus
+        that scenario's cost (None if the baseline is infeasible). cost_spread is the
+        difference between the most and least expensive schedule.
+    """
+    ids = [BASELINE_SCENARIO_ID] + [scenario.scenario_id for scenario in scenarios]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"Scenario ids must be unique and not '{BASELINE_SCENARIO_ID}'")
+
+    all_scenarios = [WhatIfScenario(scenario_id=BASELINE_SCENARIO_ID, description="Baseline forecast")]
+    all_scenarios.extend(scenarios)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    results: Dict[str, OptimizedInjectionSchedule] = {}
+    baseline_schedule: Optional[OptimizedSchedule] = None
+    try:
+        futures = [
+            executor.submit(
+                _solve_scenario,
+                scenario,
+                constraints,
+                current_timestamp,
+                demand_forecast,
+                energy_price_forecast,
+                cost_parameters,
+                time_limit_seconds,
+            )
+            for scenario in all_scenarios
+        ]
+        for future in as_completed(futures):
+            scenario_id, schedule, error = future.result()
+            if schedule is None:
+                logger.warning("Scenario %s skipped: %s", scenario_id, error)
+                continue
+            results[scenario_id] = to_injection_schedule(schedule, scenario_id, cost_parameters)
+            if scenario_id == BASELINE_SCENARIO_ID:
+                baseline_schedule = schedule
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    ranked = sorted(results.values(), key=lambda s: (s.projected_total_operating_cost, s.scenario_id))
+    costs = [s.projected_total_operating_cost for s in ranked]
+    savings = None
+    if baseline_schedule is not None:
+        baseline_cost = results[BASELINE_SCENARIO_ID].projected_total_operating_cost
+        for schedule in ranked:
+            schedule.cost_delta_vs_baseline = schedule.projected_total_operating_cost - baseline_cost
+        best = next(scenario for scenario in all_scenarios if scenario.scenario_id == ranked[0].scenario_id)
+        _, demand, prices = apply_scenario(best, constraints, demand_forecast, energy_price_forecast)
+        repriced = evaluate_schedule(baseline_schedule, demand, prices, cost_parameters)
+        savings = float(repriced.total_cost) - costs[0]
+    if top_n is not None:
+        ranked = ranked[:top_n]
+
+    return SevenDayOptimizationPlan(
+        plan_id=f"WHATIF_{current_timestamp.strftime('%Y%m%d%H%M%S')}",
+        generated_at=datetime.now(),
+        recommended_schedules=ranked,
+        expected_total_cost_savings=savings,
+        what_if_scenarios_available=len(results) > 1,
+        cost_spread=costs[-1] - costs[0] if costs else None,
+    )
+
+
+if __name__ == '__main__':
+    import time
+    from datetime import timedelta
+
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    base_constraints = OptimizationConstraints(
+        min_dra_concentration_ppm=5.0, max_dra_concentration_ppm=15.0, max_continuous_pump_runtime_hours=48
+    )
+    demand = [{'timestamp': now + timedelta(hours=i), 'flow_gpm': 1000 + (i % 24) * 10} for i in range(7 * 24)]
+    prices = [{'timestamp': now + timedelta(hours=i), 'rate_per_kwh': 0.06 + (i % 5) * 0.02} for i in range(7 * 24)]
+
+    what_ifs = [
+        WhatIfScenario(
+            scenario_id=f"S{i:02d}",
+            demand_scale=0.8 + 0.02 * i,
+            price_scale=0.9 + 0.01 * (i % 10),
+            additional_maintenance_windows=(
+                [{'start': now + timedelta(days=i % 7), 'end': now + timedelta(days=i % 7, hours=6)}] if i % 3 == 0 else []
+            ),
+        )
+        for i in range(30)
+    ]
+
+    started = time.perf_counter()
+    plan = run_what_if_scenarios(base_constraints, now, demand, prices, what_ifs, top_n=5)
+    print(f"Solved {len(what_ifs) + 1} scenarios in {time.perf_counter() - started:.2f}s")
+    print(f"Cost spread: {plan.cost_spread:.2f}, savings vs the baseline plan under the same inputs: "
+          f"{plan.expected_total_cost_savings:.2f}")
+    for schedule in plan.recommended_schedules:
+        print(f"  {schedule.scenario_id}: ${schedule.projected_total_operating_cost:.2f} "
+              f"({schedule.cost_delta_vs_baseline:+.2f} vs baseline)")
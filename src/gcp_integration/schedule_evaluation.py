@@ -0,0 +1,237 @@
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import numpy as np
+from src.models.digital_twin_models import (
+    OptimizationConstraints,
+    OptimizedAction,
+    OptimizedSchedule,
+    ScheduleCostParameters,
+)
+from src.core.energy_calculation import calculate_pump_power_kw_array, calculate_energy_cost_array
+from src.gcp_integration.optimization import (
+    NO_PUMP,
+    PUMP_ORDER,
+    _check_drag_reduction,
+    _maintenance_mask,
+    _runtime_limit_slots,
+    align_forecasts,
+)
+from src.gcp_integration.forecasts import ForecastInput
+
+PPM_TOLERANCE = 1e-6
+
+
+def actions_to_arrays(actions: Sequence[OptimizedAction]) -> Tuple[np.ndarray, np.ndarray]:
+    """pump_index (index into PUMP_ORDER, NO_PUMP when no pump runs) and ppm per action."""
+    pump_index = np.array(
+        [NO_PUMP if action.active_pump is None else PUMP_ORDER.index(action.active_pump) for action in actions],
+        dtype=np.int64,
+    )
+    ppm = np.array([action.dra_injection_rate_ppm for action in actions], dtype=np.float64)
+    return pump_index, ppm
+
+
+def _run_lengths(running: np.ndarray) -> np.ndarray:
+    """Length of the consecutive run ending at each slot (0 where not running), along the last axis."""
+    index = np.arange(running.shape[-1])
+    last_stop = np.maximum.accumulate(np.where(running, -1, index), axis=-1)
+    return np.where(running, index - last_stop, 0)
+
+
+class ScheduleEvaluation:
+    """
+    Cost and constraint check of one or many candidate schedules.
+
+    Per-slot arrays have shape (candidates, slots) and totals shape (candidates,). When a
+    single schedule was evaluated the leading candidate axis is dropped.
+    """
+
+    def __init__(
+        self,
+        slot_energy_cost: np.ndarray,
+        slot_dra_gallons: np.ndarray,
+        dra_cost_per_gallon: float,
+        ppm_violations: np.ndarray,
+        maintenance_violations: np.ndarray,
+        runtime_violations: np.ndarray,
+        coverage_violations: np.ndarray,
+    ):
+        self.slot_energy_cost = slot_energy_cost
+        self.slot_dra_gallons = slot_dra_gallons
+        self.total_energy_cost = slot_energy_cost.sum(axis=-1)
+        self.total_dra_gallons = slot_dra_gallons.sum(axis=-1)
+        self.total_dra_cost = self.total_dra_gallons * dra_cost_per_gallon
+        self.total_cost = self.total_energy_cost + self.total_dra_cost
+        # Violation counts are numbers of offending slots
+        self.ppm_violations = ppm_violations
+        self.maintenance_violations = maintenance_violations
+        self.runtime_violations = runtime_violations
+        self.coverage_violations = coverage_violations
+        self.violations = ppm_violations + maintenance_violations + runtime_violations + coverage_violations
+        self.feasible = self.violations == 0
+
+
+class ScheduleEvaluator:
+    """
+    Prices candidate schedules over one planning horizon.
+
+    Forecasts, pump availability and constraint limits are aligned to the slot grid once in
+    the constructor; evaluate() is then pure array arithmetic over a whole population of
+    candidates, using the same energy model as the optimizer: DRA lowers the pressure the
+    active pump supplies by drag_reduction_per_ppm per ppm.
+    """
+
+    def __init__(
+        self,
+        constraints: OptimizationConstraints,
+        planning_start_time: datetime,
+        num_slots: int,
+        demand_forecast: ForecastInput,
+        energy_price_forecast: ForecastInput,
+        cost_parameters: Optional[ScheduleCostParameters] = None,
+        slot_minutes: int = 60,
+    ):
+        params = cost_parameters or ScheduleCostParameters()
+        _check_drag_reduction(constraints, params)
+        self.params = params
+        self.constraints = constraints
+        self.planning_start_time = planning_start_time
+        self.num_slots = num_slots
+        self.slot_minutes = slot_minutes
+
+        slot_starts = np.datetime64(planning_start_time, "ns") + np.arange(num_slots) * np.timedelta64(slot_minutes, "m")
+        self.flow_gpm, self.pressure_psi, self.rate_per_kwh = align_forecasts(
+            demand_forecast, energy_price_forecast, planning_start_time, num_slots, slot_minutes, params
+        )
+        self.unavailable = _maintenance_mask(constraints, slot_starts, slot_minutes)
+        self.runtime_limit = _runtime_limit_slots(constraints, slot_minutes)
+        self._pump_efficiency = np.array([params.primary_pump_efficiency, params.backup_pump_efficiency])
+        self._dra_gallons_per_ppm = self.flow_gpm * slot_minutes * 1e-6
+
+    @classmethod
+    def for_schedule(
+        cls,
+        schedule: OptimizedSchedule,
+        demand_forecast: ForecastInput,
+        energy_price_forecast: ForecastInput,
+        cost_parameters: Optional[ScheduleCostParameters] = None,
+    ) -> "ScheduleEvaluator":
+        """Evaluator on the slot grid of an existing schedule (uniform slot lengths assumed)."""
+        slot_minutes = schedule.actions[0].duration_minutes if schedule.actions else 60
+        return cls(
+            schedule.constraints_details,
+            schedule.planning_horizon_start,
+            len(schedule.actions),
+            demand_forecast,
+            energy_price_forecast,
+            cost_parameters,
+            slot_minutes,
+        )
+
+    def evaluate(self, pump_index: np.ndarray, ppm: np.ndarray) -> ScheduleEvaluation:
+        """
+        Args:
+            pump_index: Index into PUMP_ORDER of the running pump per slot (NO_PUMP for none),
+                shape (slots,) or (candidates, slots).
+            ppm: DRA rate per slot, same shape.
+
+        Returns:
+            A ScheduleEvaluation; slots without a running pump cost nothing.
+        """
+        pump_index = np.asarray(pump_index)
+        ppm = np.asarray(ppm, dtype=np.float64)
+        single = pump_index.ndim == 1
+        pump_index = np.atleast_2d(pump_index)
+        ppm = np.atleast_2d(ppm)
+        if pump_index.shape[-1] != self.num_slots or ppm.shape != pump_index.shape:
+            raise ValueError(f"Expected schedules of {self.num_slots} slots, got {pump_index.shape} and {ppm.shape}")
+
+        running = pump_index != NO_PUMP
+        pump = np.maximum(pump_index, 0)
+        ppm = np.where(running, ppm, 0.0)
+
+        reduced_pressure = self.pressure_psi * (1 - self.params.drag_reduction_per_ppm * ppm)
+        shaft_kw = calculate_pump_power_kw_array(self.flow_gpm, reduced_pressure, self._pump_efficiency[pump])
+        energy_cost = calculate_energy_cost_array(shaft_kw, self.params.motor_efficiency, self.slot_minutes, self.rate_per_kwh)
+        slot_energy_cost = np.where(running, energy_cost, 0.0)
+        slot_dra_gallons = self._dra_gallons_per_ppm * ppm
+
+        min_ppm = self.constraints.min_dra_concentration_ppm - PPM_TOLERANCE
+        max_ppm = self.constraints.max_dra_concentration_ppm + PPM_TOLERANCE
+        ppm_violations = (running & ((ppm < min_ppm) | (ppm > max_ppm))).sum(axis=-1)
+        slots = np.arange(self.num_slots)
+        maintenance_violations = (running & self.unavailable[pump, slots]).sum(axis=-1)
+        coverage_violations = (~running & (~self.unavailable).any(axis=0)).sum(axis=-1)
+        runtime_violations = np.zeros(len(pump_index), dtype=np.int64)
+        if self.runtime_limit is not None:
+            for p in range(len(PUMP_ORDER)):
+                runtime_violations += (_run_lengths(running & (pump_index == p)) > self.runtime_limit).sum(axis=-1)
+
+        evaluation = ScheduleEvaluation(
+            slot_energy_cost,
+            slot_dra_gallons,
+            self.params.dra_cost_per_gallon,
+            ppm_violations,
+            maintenance_violations,
+            runtime_violations,
+            coverage_violations,
+        )
+        if single:
+            for name, value in vars(evaluation).items():
+                if isinstance(value, np.ndarray):
+                    setattr(evaluation, name, value[0])
+        return evaluation
+
+
+def evaluate_schedule(
+    schedule: OptimizedSchedule,
+    demand_forecast: ForecastInput,
+    energy_price_forecast: ForecastInput,
+    cost_parameters: Optional[ScheduleCostParameters] = None,
+) -> ScheduleEvaluation:
+    """Price an OptimizedSchedule against (possibly updated) forecasts and check its constraints."""
+    evaluator = ScheduleEvaluator.for_schedule(schedule, demand_forecast, energy_price_forecast, cost_parameters)
+    return evaluator.evaluate(*actions_to_arrays(schedule.actions))
+
+
+def apply_evaluation(schedule: OptimizedSchedule, evaluation: ScheduleEvaluation) -> OptimizedSchedule:
+    """Copy of the schedule with per-action and total projections taken from a single-schedule evaluation."""
+    actions = [
+        action.model_copy(update={"projected_energy_cost_for_period": float(cost)})
+        for action, cost in zip(schedule.actions, evaluation.slot_energy_cost)
+    ]
+    return schedule.model_copy(
+        update={
+            "actions": actions,
+            "projected_total_energy_cost": float(evaluation.total_energy_cost),
+            "projected_dra_usage_gallons": float(evaluation.total_dra_gallons),
+        }
+    )
+
+
+if __name__ == '__main__':
+    import time
+    from datetime import timedelta
+    from src.gcp_integration.optimization import optimize_injection_schedule
+
+    start = datetime(2024, 3, 4)
+    constraints = OptimizationConstraints(
+        min_dra_concentration_ppm=5.0, max_dra_concentration_ppm=15.0, max_continuous_pump_runtime_hours=24
+    )
+    demand = [{'timestamp': start + timedelta(hours=i), 'flow_gpm': 1000 + (i % 24) * 10} for i in range(168)]
+    prices = [{'timestamp': start + timedelta(hours=i), 'rate_per_kwh': 0.06 + (i % 5) * 0.02} for i in range(168)]
+
+    schedule = optimize_injection_schedule(constraints, start, demand, prices)
+    evaluation = evaluate_schedule(schedule, demand, prices)
+    print(f"Optimized schedule: ${evaluation.total_cost:.2f} total, {int(evaluation.violations)} violations")
+
+    evaluator = ScheduleEvaluator(constraints, start, 168, demand, prices)
+    rng = np.random.default_rng(0)
+    candidates = 5000
+    pumps = rng.integers(0, 2, size=(candidates, 168))
+    ppm = rng.uniform(4.0, 16.0, size=(candidates, 168))
+    started = time.perf_counter()
+    population = evaluator.evaluate(pumps, ppm)
+    elapsed = time.perf_counter() - started
+    print(f"Scored {candidates} random candidates in {elapsed * 1000:.1f} ms ({candidates / elapsed:.0f}/s)")
+    print(f"Feasible: {int(population.feasible.sum())}, cheapest: ${population.total_cost.min():.2f}")
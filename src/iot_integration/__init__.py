@@ -0,0 +1 @@
+# This file makes src/iot_integration a Python package.
@@ -0,0 +1,362 @@
+from typing import List, Dict, Optional, Sequence, Tuple
+import numpy as np
+from src.models.digital_twin_models import SensorConfig
+from src.core.interpolation import linear_interpolation, resolve_sensor_strategies
+from src.iot_integration.ingest_records import IngestBatch
+from src.iot_integration.sensor_codes import STATUS_OK
+
+NS_PER_SECOND = 1_000_000_000
+_FIRST_WINDOW = 64
+# Staleness cap: a compressed sensor still reports at least this often within max_staleness_minutes
+_STALENESS_FRACTION = 0.5
+_SLOPE_SLACK = 1e-9
+# Held-back readings per series before a segment is settled regardless (no max interval set)
+_MAX_PENDING = 100_000
+
+Anchor = Tuple[int, float]
+
+
+def _windows(start: int, end: int):
+    """Growing [start, stop) windows, so a scan costs O(distance to the next decision)."""
+    size = _FIRST_WINDOW
+    while True:
+        stop = min(start + size, end)
+        yield stop
+        if stop == end:
+            return
+        size *= 4
+
+
+def deadband(
+    timestamps_ns: np.ndarray,
+    values: np.ndarray,
+    band: float,
+    max_interval_ns: Optional[int] = None,
+    anchor: Optional[Anchor] = None,
+) -> np.ndarray:
+    """
+    Exception deadband: indices of the readings that differ from the last kept value by
+    more than `band` (or come more than max_interval_ns after it). Carrying the kept values
+    forward reproduces every reading to within `band`.
+
+    Args:
+        timestamps_ns, values: One sensor's readings, sorted by time.
+        band: Deadband in sensor units.
+        max_interval_ns: Longest gap between kept readings.
+        anchor: (timestamp, value) of the last reading kept before these; if None the first
+            reading is kept.
+    """
+    count = len(values)
+    keep: List[int] = []
+    position = 0
+    if anchor is None:
+        if count == 0:
+            return np.empty(0, dtype=np.int64)
+        keep.append(0)
+        anchor = (int(timestamps_ns[0]), float(values[0]))
+        position = 1
+    while position < count:
+        next_keep = None
+        for stop in _windows(position, count):
+            exceeds = np.abs(values[position:stop] - anchor[1]) > band
+            if max_interval_ns is not None:
+                exceeds |= timestamps_ns[position:stop] - anchor[0] > max_interval_ns
+            hits = np.flatnonzero(exceeds)
+            if len(hits):
+                next_keep = position + int(hits[0])
+                break
+        if next_keep is None:
+            break
+        keep.append(next_keep)
+        anchor = (int(timestamps_ns[next_keep]), float(values[next_keep]))
+        position = next_keep + 1
+    return np.array(keep, dtype=np.int64)
+
+
+def _door_segment(
+    anchor: Anchor, timestamps_ns: np.ndarray, values: np.ndarray, deviation: float, max_interval_ns: Optional[int]
+) -> Tuple[int, bool]:
+    """
+    Furthest reading P such that every reading between the anchor and P lies within
+    `deviation` of the straight line from the anchor to P, and whether that choice is final
+    (the door closed or the interval limit was reached within these readings).
+    """
+    anchor_ns, anchor_value = anchor
+    elapsed = np.maximum(timestamps_ns - anchor_ns, 1).astype(np.float64)
+    upper = np.minimum.accumulate((values + deviation - anchor_value) / elapsed)
+    lower = np.maximum.accumulate((values - deviation - anchor_value) / elapsed)
+
+    limit, decided = len(values), False
+    closed = np.flatnonzero(lower > upper)
+    if len(closed):
+        limit, decided = int(closed[0]) + 1, True
+    if max_interval_ns is not None:
+        over = np.flatnonzero(timestamps_ns[:limit] - anchor_ns > max_interval_ns)
+        if len(over):
+            limit, decided = max(int(over[0]), 1), True
+
+    # The line to P must fit inside the door formed by the readings before P
+    slope = (values[:limit] - anchor_value) / elapsed[:limit]
+    slack = _SLOPE_SLACK * (np.abs(slope[1:]) + deviation / elapsed[1:limit])
+    valid = np.ones(limit, dtype=bool)
+    valid[1:] = (slope[1:] >= lower[:limit - 1] - slack) & (slope[1:] <= upper[:limit - 1] + slack)
+    return int(np.flatnonzero(valid)[-1]), decided
+
+
+def swinging_door(
+    timestamps_ns: np.ndarray,
+    values: np.ndarray,
+    deviation: float,
+    max_interval_ns: Optional[int] = None,
+    anchor: Optional[Anchor] = None,
+    final: bool = True,
+) -> Tuple[np.ndarray, int]:
+    """
+    Swinging-door compression: indices of the readings to keep so that linear
+    interpolation between kept readings reproduces every reading to within `deviation`.
+
+    Each segment is found with one vectorised pass over a growing window: the door is the
+    running intersection of the slope ranges that keep each reading within the deviation,
+    and the segment ends at the furthest reading whose own slope fits inside the door of
+    the readings before it (checking that slope, rather than keeping the reading before the
+    door closes, is what bounds the error by `deviation` instead of twice it).
+
+    Args:
+        timestamps_ns, values: One sensor's readings, sorted by time.
+        deviation: Largest allowed reconstruction error, in sensor units.
+        max_interval_ns: Longest gap between kept readings.
+        anchor: Last kept (timestamp, value) before these readings; if None the first
+            reading is kept.
+        final: If False, readings after the last decided segment are left undecided (more
+            data could extend the segment) instead of being settled.
+
+    Returns:
+        Indices to keep, and the index of the first undecided reading (len(values) if final).
+    """
+    count = len(values)
+    keep: List[int] = []
+    position = 0
+    if anchor is None:
+        if count == 0:
+            return np.empty(0, dtype=np.int64), 0
+        keep.append(0)
+        anchor = (int(timestamps_ns[0]), float(values[0]))
+        position = 1
+    while position < count:
+        for stop in _windows(position, count):
+            end, decided = _door_segment(
+                anchor, timestamps_ns[position:stop], values[position:stop], deviation, max_interval_ns
+            )
+            if decided:
+                break
+        if not decided and not final:
+            break
+        end += position
+        keep.append(end)
+        anchor = (int(timestamps_ns[end]), float(values[end]))
+        position = end + 1
+    return np.array(keep, dtype=np.int64), position
+
+
+class _SeriesState:
+    __slots__ = ("anchor", "pending_ts", "pending_values")
+
+    def __init__(self):
+        self.anchor: Optional[Anchor] = None
+        self.pending_ts = np.empty(0, dtype=np.int64)
+        self.pending_values = np.empty(0, dtype=np.float64)
+
+
+class SensorCompressor:
+    """
+    Per-sensor exception compression of live readings before storage and spine building.
+
+    Settings come from each SensorConfig's compression_* fields. Sensors that the spine
+    interpolates linearly (flow, pressure) get swinging-door compression, so linear
+    interpolation of the kept readings stays within compression_deviation of every raw
+    reading; step-interpolated sensors (pump status) get a plain deadband, which bounds the
+    carried-forward error by compression_deadband. Sensors without settings, and readings
+    whose status is not STATUS_OK, pass through unchanged.
+
+    State is kept per (skid, sensor) between batches. The swinging door can only settle a
+    segment once a later reading closes it, so the newest readings of a series are held
+    back until then (at most compression_max_interval_seconds); flush() releases them.
+
+    With step_only, every sensor gets the deadband (using compression_deviation as the band
+    for linear sensors), for consumers that carry values forward such as TimeSpineBuilder:
+    swinging-door endpoints carried forward would flatten ramps and then jump.
+    """
+
+    def __init__(self, sensor_configs: Sequence[SensorConfig], step_only: bool = False):
+        """
+        Args:
+            sensor_configs: Sensors and their compression_* settings.
+            step_only: Use the deadband for every sensor, bounding the error of step
+                (carry-forward) reconstruction instead of linear interpolation.
+        """
+        strategies = resolve_sensor_strategies([config.sensor_id for config in sensor_configs], sensor_configs)
+        self.step_only = step_only
+        self._settings: Dict[str, Tuple[bool, float, Optional[int]]] = {}
+        for config in sensor_configs:
+            tolerance = config.compression_deadband
+            linear = strategies[config.sensor_id][0] is linear_interpolation
+            if linear and config.compression_deviation is not None:
+                tolerance = config.compression_deviation
+            linear = linear and not step_only
+            if tolerance is None:
+                continue
+            max_interval = config.compression_max_interval_seconds
+            if config.max_staleness_minutes is not None:
+                cap = config.max_staleness_minutes * 60 * _STALENESS_FRACTION
+                max_interval = cap if max_interval is None else min(max_interval, cap)
+            self._settings[config.sensor_id] = (
+                linear, tolerance, None if max_interval is None else int(max_interval * NS_PER_SECOND)
+            )
+        self._series: Dict[Tuple[Optional[str], str], _SeriesState] = {}
+        self.readings_in = 0
+        self.readings_out = 0
+
+    @property
+    def ratio(self) -> float:
+        """Compressible readings received per reading kept."""
+        return self.readings_in / self.readings_out if self.readings_out else 0.0
+
+    def compress(self, batch: IngestBatch) -> IngestBatch:
+        """
+        Compress a batch (any order, any mix of skids and sensors).
+
+        Returns:
+            The kept readings, which may include held-back readings from earlier batches,
+            sorted by timestamp.
+        """
+        skids = batch.skid_ids if batch.skid_ids is not None else np.full(len(batch), None, dtype=object)
+        compressible = batch.ok & np.isin(batch.sensor_ids, list(self._settings))
+        parts = [(batch.timestamps_ns[~compressible], batch.sensor_ids[~compressible],
+                  batch.values[~compressible], batch.statuses[~compressible], skids[~compressible])]
+
+        for skid_id in set(skids[compressible].tolist()):
+            of_skid = compressible & (skids == skid_id)
+            for sensor_id in np.unique(batch.sensor_ids[of_skid]).tolist():
+                selected = np.flatnonzero(of_skid & (batch.sensor_ids == sensor_id))
+                timestamps, values = self._compress_series(
+                    skid_id, sensor_id, batch.timestamps_ns[selected], batch.values[selected], final=False
+                )
+                parts.append(self._part(skid_id, sensor_id, timestamps, values))
+        return self._combine(parts, batch)
+
+    def flush(self, skid_id: Optional[str] = None) -> IngestBatch:
+        """Release the held-back readings of one skid (every skid if None)."""
+        parts = []
+        for (series_skid, sensor_id), state in self._series.items():
+            if skid_id is not None and series_skid != skid_id:
+                continue
+            timestamps, values = self._compress_series(series_skid, sensor_id, None, None, final=True)
+            parts.append(self._part(series_skid, sensor_id, timestamps, values))
+        return self._combine(parts, None)
+
+    def _compress_series(
+        self, skid_id: Optional[str], sensor_id: str, timestamps: Optional[np.ndarray], values: Optional[np.ndarray], final: bool
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        linear, tolerance, max_interval_ns = self._settings[sensor_id]
+        state = self._series.setdefault((skid_id, sensor_id), _SeriesState())
+        if timestamps is not None:
+            self.readings_in += len(timestamps)
+            order = np.argsort(timestamps, kind="stable")
+            timestamps, values = timestamps[order], values[order]
+            if state.anchor is not None:  # readings older than the last kept one cannot be placed
+                newer = timestamps > state.anchor[0]
+                timestamps, values = timestamps[newer], values[newer]
+            timestamps = np.concatenate([state.pending_ts, timestamps])
+            values = np.concatenate([state.pending_values, values])
+        else:
+            timestamps, values = state.pending_ts, state.pending_values
+
+        final = final or len(values) > _MAX_PENDING
+        if linear:
+            keep, undecided = swinging_door(timestamps, values, tolerance, max_interval_ns, state.anchor, final)
+        else:
+            keep, undecided = deadband(timestamps, values, tolerance, max_interval_ns, state.anchor), len(values)
+        if len(keep):
+            state.anchor = (int(timestamps[keep[-1]]), float(values[keep[-1]]))
+        state.pending_ts, state.pending_values = timestamps[undecided:], values[undecided:]
+        self.readings_out += len(keep)
+        return timestamps[keep], values[keep]
+
+    @staticmethod
+    def _part(skid_id, sensor_id, timestamps, values):
+        count = len(timestamps)
+        return (timestamps, np.full(count, sensor_id), values,
+                np.full(count, STATUS_OK, dtype=np.int16), np.full(count, skid_id, dtype=object))
+
+    @staticmethod
+    def _combine(parts, source: Optional[IngestBatch]) -> IngestBatch:
+        timestamps = np.concatenate([np.empty(0, dtype=np.int64)] + [p[0] for p in parts])
+        sensor_ids = np.concatenate([np.empty(0, dtype="<U1")] + [p[1] for p in parts])
+        values = np.concatenate([np.empty(0)] + [p[2] for p in parts])
+        statuses = np.concatenate([np.empty(0, dtype=np.int16)] + [p[3] for p in parts])
+        skids = np.concatenate([np.empty(0, dtype=object)] + [p[4] for p in parts])
+        order = np.argsort(timestamps, kind="stable")
+        keep_skids = source is None or source.skid_ids is not None
+        return IngestBatch(
+            timestamps[order], sensor_ids[order], values[order], statuses[order],
+            skids[order] if keep_skids else None, list(source.rejected) if source is not None else [],
+        )
+
+
+if __name__ == '__main__':
+    import time
+    from src.models.digital_twin_models import SensorType
+    from src.core.time_spine import build_minute_spine, SPINE_SENSOR_FIELDS
+    from src.iot_integration.ingest_records import validate_batch
+
+    configs = [
+        SensorConfig(sensor_id="F1", sensor_type=SensorType.FLOW_RATE, location="Inlet", purpose="Flow",
+                     compression_deviation=2.0, compression_max_interval_seconds=600),
+        SensorConfig(sensor_id="F2", sensor_type=SensorType.FLOW_RATE, location="Outlet", purpose="Flow",
+                     compression_deviation=2.0, compression_max_interval_seconds=600),
+        SensorConfig(sensor_id="P1", sensor_type=SensorType.PRESSURE, location="Header", purpose="Pressure",
+                     compression_deviation=0.25, compression_max_interval_seconds=600),
+        SensorConfig(sensor_id="S1", sensor_type=SensorType.PUMP_STATUS, location="Pump", purpose="Status",
+                     compression_deadband=0.5),
+    ]
+
+    # One day at 1 Hz per sensor: slow daily swings, ramps, and +/-0.1 PSI / +/-1 GPM jitter
+    rng = np.random.default_rng(0)
+    seconds = np.arange(24 * 3600)
+    timestamps = np.datetime64("2024-03-04", "ns").astype(np.int64) + seconds * NS_PER_SECOND
+    signals = {
+        "F1": 1200 + 150 * np.sin(2 * np.pi * seconds / 86400) + rng.uniform(-1, 1, len(seconds)),
+        "F2": 1180 + 150 * np.sin(2 * np.pi * seconds / 86400) + rng.uniform(-1, 1, len(seconds)),
+        "P1": 300 + 20 * np.clip((seconds % 14400 - 7200) / 1800, -1, 1) + rng.uniform(-0.1, 0.1, len(seconds)),
+        "S1": ((seconds // 21600) % 2).astype(np.float64),
+    }
+    ids = np.concatenate([np.full(len(seconds), sensor_id) for sensor_id in signals])
+    raw = IngestBatch(np.tile(timestamps, 4), ids, np.concatenate(list(signals.values())),
+                      np.zeros(len(ids), dtype=np.int16))
+
+    compressor = SensorCompressor(configs)
+    started = time.perf_counter()
+    kept = []
+    order = np.argsort(raw.timestamps_ns, kind="stable")
+    for lo in range(0, len(order), 4000):  # 1000 s micro-batches, all sensors interleaved
+        part = order[lo:lo + 4000]
+        kept.append(compressor.compress(IngestBatch(raw.timestamps_ns[part], raw.sensor_ids[part], raw.values[part], raw.statuses[part])))
+    kept.append(compressor.flush())
+    elapsed = time.perf_counter() - started
+    compressed = IngestBatch.concat(kept)
+    print(f"{len(raw)} readings -> {len(compressed)} kept ({compressor.ratio:.0f}x) in {elapsed:.2f}s "
+          f"({len(raw) / elapsed:,.0f} readings/s)")
+
+    for sensor_id, signal in signals.items():
+        mask = compressed.sensor_ids == sensor_id
+        if sensor_id == "S1":
+            continue
+        rebuilt = linear_interpolation(compressed.timestamps_ns[mask], compressed.values[mask], timestamps)
+        print(f"  {sensor_id}: {mask.sum()} readings, max reconstruction error {np.abs(rebuilt - signal).max():.3f}")
+
+    raw_spine = build_minute_spine(*raw.spine_arrays())
+    compressed_spine = build_minute_spine(*compressed.spine_arrays())
+    for sensor_id in ("F1", "P1"):
+        field = SPINE_SENSOR_FIELDS[sensor_id]
+        difference = np.nanmax(np.abs(raw_spine.columns[field] - compressed_spine.columns[field]))
+        print(f"  minute spine {field}: max difference {difference:.3f}")
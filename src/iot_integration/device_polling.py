@@ -0,0 +1,550 @@
+import asyncio
+import logging
+import struct
+import time
+from typing import List, Dict, Any, Awaitable, Callable, Optional, Sequence, Tuple, Union
+import numpy as np
+from src.models.digital_twin_models import (
+    PolledDeviceConfig,
+    PolledPointConfig,
+    PollingMetrics,
+    ReportingMethod,
+    SensorConfig,
+)
+from src.core.time_spine import encode_pump_status
+from src.iot_integration.ingest_records import IngestBatch, quality_statuses
+
+try:
+    import asyncua
+except ImportError:  # asyncua is optional; only OPC UA devices need it
+    asyncua = None
+
+logger = logging.getLogger(__name__)
+
+# Big-endian register encodings (one or two 16-bit words, high word first)
+REGISTER_TYPES: Dict[str, np.dtype] = {
+    "uint16": np.dtype(">u2"),
+    "int16": np.dtype(">i2"),
+    "uint32": np.dtype(">u4"),
+    "int32": np.dtype(">i4"),
+    "float32": np.dtype(">f4"),
+}
+MAX_REGISTERS_PER_READ = 125  # Modbus limit for function 3/4
+READ_HOLDING_REGISTERS = 3
+READ_INPUT_REGISTERS = 4
+
+BatchCallback = Callable[[str, IngestBatch], Union[None, Awaitable[None]]]
+
+
+class ModbusError(Exception):
+    """Exception response from a Modbus device."""
+
+    def __init__(self, function: int, code: int):
+        super().__init__(f"Modbus exception {code} for function {function}")
+        self.function = function
+        self.code = code
+
+
+def encode_registers(value: float, data_type: str = "float32") -> np.ndarray:
+    """Register words (uint16) holding a value in the given encoding."""
+    return np.frombuffer(np.array([value], dtype=REGISTER_TYPES[data_type]).tobytes(), dtype=">u2").astype(np.uint16)
+
+
+class ModbusReadPlan:
+    """
+    Coalesced register reads for a device's points.
+
+    Points are sorted by address and merged into blocks whenever the gap to the previous
+    point is at most max_gap registers and the block stays within the Modbus limit, so a
+    device with dozens of points is usually read with one or two requests. Decoding the
+    blocks back into values is a gather plus one frombuffer per data type.
+    """
+
+    def __init__(self, points: Sequence[PolledPointConfig], max_gap: int = 16, max_registers: int = MAX_REGISTERS_PER_READ):
+        """
+        Raises:
+            ValueError: For a non-integer address or an unknown data type.
+        """
+        widths = []
+        for point in points:
+            if not isinstance(point.address, int):
+                raise ValueError(f"{point.sensor_id}: Modbus address must be a register number, got {point.address!r}")
+            if point.data_type not in REGISTER_TYPES:
+                raise ValueError(f"{point.sensor_id}: unknown data type {point.data_type!r}")
+            widths.append(REGISTER_TYPES[point.data_type].itemsize // 2)
+
+        self.blocks: List[Tuple[int, int]] = []
+        block_of = np.empty(len(points), dtype=np.int64)
+        for i in sorted(range(len(points)), key=lambda i: points[i].address):
+            start, end = points[i].address, points[i].address + widths[i]
+            if self.blocks:
+                block_start, block_count = self.blocks[-1]
+                block_end = block_start + block_count
+                if start - block_end <= max_gap and max(block_end, end) - block_start <= max_registers:
+                    self.blocks[-1] = (block_start, max(block_end, end) - block_start)
+                    block_of[i] = len(self.blocks) - 1
+                    continue
+            self.blocks.append((start, end - start))
+            block_of[i] = len(self.blocks) - 1
+
+        # Position of each point's first word in the concatenated block responses
+        block_offsets = np.concatenate([[0], np.cumsum([count for _, count in self.blocks])])
+        self._decoders: List[Tuple[np.ndarray, np.ndarray, np.dtype]] = []
+        for data_type, dtype in REGISTER_TYPES.items():
+            members = np.array([i for i, point in enumerate(points) if point.data_type == data_type], dtype=np.int64)
+            if len(members) == 0:
+                continue
+            first_word = np.array(
+                [block_offsets[block_of[i]] + points[i].address - self.blocks[block_of[i]][0] for i in members]
+            )
+            words = first_word[:, None] + np.arange(dtype.itemsize // 2)
+            self._decoders.append((members, words, dtype))
+        self.scale = np.array([point.scale for point in points], dtype=np.float64)
+        self.offset = np.array([point.offset for point in points], dtype=np.float64)
+
+    def decode(self, block_registers: Sequence[np.ndarray]) -> np.ndarray:
+        """Engineering values of every point (in config order) from the blocks' register words."""
+        registers = np.concatenate(block_registers).astype(">u2")
+        raw = np.empty(len(self.scale), dtype=np.float64)
+        for members, words, dtype in self._decoders:
+            raw[members] = np.frombuffer(registers[words].tobytes(), dtype=dtype)
+        return raw * self.scale + self.offset
+
+
+class ModbusTcpClient:
+    """
+    Minimal asyncio Modbus TCP client for register reads.
+
+    Requests are tagged with transaction ids and a background task matches responses to
+    them, so any number of reads (from one device's blocks or from many devices behind the
+    same gateway) can be in flight on one connection at once: a device poll costs one
+    network round trip however many blocks it needs.
+    """
+
+    def __init__(self, host: str, port: int = 502, timeout_seconds: float = 2.0):
+        self.host = host
+        self.port = port
+        self.timeout_seconds = timeout_seconds
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_transaction = 0
+        self._receiver: Optional[asyncio.Task] = None
+
+    @property
+    def closed(self) -> bool:
+        return self._writer is None
+
+    async def connect(self) -> "ModbusTcpClient":
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout_seconds
+        )
+        self._receiver = asyncio.create_task(self._receive())
+        return self
+
+    async def read_registers(self, unit_id: int, address: int, count: int, function: int = READ_HOLDING_REGISTERS) -> np.ndarray:
+        """
+        Read `count` registers starting at `address`.
+
+        Raises:
+            ModbusError: If the device answers with an exception response.
+            ConnectionError: If the connection is closed or drops.
+            asyncio.TimeoutError: If no answer arrives within timeout_seconds.
+        """
+        if self._writer is None:
+            raise ConnectionError(f"not connected to {self.host}:{self.port}")
+        transaction = self._next_transaction
+        self._next_transaction = (transaction + 1) % 65536
+        future = asyncio.get_running_loop().create_future()
+        self._pending[transaction] = future
+        self._writer.write(struct.pack(">HHHBBHH", transaction, 0, 6, unit_id, function, address, count))
+        try:
+            return await asyncio.wait_for(future, self.timeout_seconds)
+        finally:
+            self._pending.pop(transaction, None)
+
+    async def _receive(self) -> None:
+        try:
+            while True:
+                transaction, _, length, _ = struct.unpack(">HHHB", await self._reader.readexactly(7))
+                pdu = await self._reader.readexactly(length - 1)
+                future = self._pending.get(transaction)
+                if future is None or future.done():
+                    continue
+                if pdu[0] & 0x80:
+                    future.set_exception(ModbusError(pdu[0] & 0x7F, pdu[1]))
+                else:
+                    future.set_result(np.frombuffer(pdu[2:2 + pdu[1]], dtype=">u2").astype(np.uint16))
+        except (asyncio.IncompleteReadError, ConnectionError, OSError) as exc:
+            error = ConnectionError(f"connection to {self.host}:{self.port} lost: {exc}")
+        except asyncio.CancelledError:
+            error = ConnectionError(f"connection to {self.host}:{self.port} closed")
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._close_transport()
+
+    def _close_transport(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def close(self) -> None:
+        if self._receiver is not None:
+            self._receiver.cancel()
+            await asyncio.gather(self._receiver, return_exceptions=True)
+        self._close_transport()
+
+
+class OpcUaClient:
+    """OPC UA connection (via asyncua) reading any number of nodes in one Read request."""
+
+    def __init__(self, endpoint: str, timeout_seconds: float = 2.0):
+        if asyncua is None:
+            raise ImportError("OpcUaClient requires asyncua (pip install asyncua)")
+        self._client = asyncua.Client(endpoint, timeout=timeout_seconds)
+        self._nodes: Dict[Tuple[str, ...], List[Any]] = {}
+        self.closed = True
+
+    async def connect(self) -> "OpcUaClient":
+        await self._client.connect()
+        self.closed = False
+        return self
+
+    async def read_values(self, node_ids: Sequence[str]) -> np.ndarray:
+        key = tuple(node_ids)
+        nodes = self._nodes.get(key)
+        if nodes is None:
+            nodes = self._nodes[key] = [self._client.get_node(node_id) for node_id in node_ids]
+        try:
+            return np.array(await self._client.read_values(nodes), dtype=np.float64)
+        except (OSError, asyncua.ua.UaError) as exc:
+            raise ConnectionError(str(exc)) from exc
+
+    async def close(self) -> None:
+        self.closed = True
+        await self._client.disconnect()
+
+
+def _endpoint(device: PolledDeviceConfig) -> Tuple[ReportingMethod, str, int]:
+    return device.protocol, device.host, device.port
+
+
+async def connect_device(device: PolledDeviceConfig) -> Any:
+    """Open a connection of the device's protocol (the ConnectionPool default)."""
+    if device.protocol == ReportingMethod.MODBUS_TCP_POLLING:
+        return await ModbusTcpClient(device.host, device.port, device.timeout_seconds).connect()
+    if device.protocol == ReportingMethod.OPC_UA_POLLING:
+        return await OpcUaClient(f"opc.tcp://{device.host}:{device.port}", device.timeout_seconds).connect()
+    raise ValueError(f"{device.device_id}: {device.protocol} is not a polled protocol")
+
+
+class ConnectionPool:
+    """
+    Connections shared by every device behind the same endpoint (protocol, host, port).
+
+    Up to max_connections_per_endpoint connections are opened per endpoint and handed out
+    round-robin; closed or discarded connections are replaced on the next get().
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[PolledDeviceConfig], Awaitable[Any]] = connect_device,
+        max_connections_per_endpoint: int = 1,
+    ):
+        self._connect = connect
+        self.max_connections_per_endpoint = max_connections_per_endpoint
+        self._connections: Dict[Tuple, List[Any]] = {}
+        self._locks: Dict[Tuple, asyncio.Lock] = {}
+        self._turn: Dict[Tuple, int] = {}
+
+    def __len__(self) -> int:
+        return sum(1 for connections in self._connections.values() for c in connections if not c.closed)
+
+    async def get(self, device: PolledDeviceConfig) -> Any:
+        key = _endpoint(device)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            live = [c for c in self._connections.get(key, []) if not c.closed]
+            if len(live) < self.max_connections_per_endpoint:
+                live.append(await self._connect(device))
+            self._connections[key] = live
+            self._turn[key] = (self._turn.get(key, -1) + 1) % len(live)
+            return live[self._turn[key]]
+
+    async def discard(self, device: PolledDeviceConfig, connection: Any) -> None:
+        """Drop a broken connection so the next get() reconnects."""
+        connections = self._connections.get(_endpoint(device), [])
+        if connection in connections:
+            connections.remove(connection)
+        await connection.close()
+
+    async def close(self) -> None:
+        for connections in self._connections.values():
+            for connection in connections:
+                await connection.close()
+        self._connections.clear()
+
+
+class _DeviceReader:
+    def __init__(self, device: PolledDeviceConfig):
+        self.device = device
+        self.sensor_ids = np.array([point.sensor_id for point in device.points])
+        self.status_index = np.flatnonzero(self.sensor_ids == "S1")
+        if device.protocol == ReportingMethod.OPC_UA_POLLING:
+            self.plan = None
+            self.node_ids = [str(point.address) for point in device.points]
+            self.scale = np.array([point.scale for point in device.points], dtype=np.float64)
+            self.offset = np.array([point.offset for point in device.points], dtype=np.float64)
+            self.requests = 1
+        else:
+            self.plan = ModbusReadPlan(device.points)
+            self.requests = len(self.plan.blocks)
+
+    async def read(self, connection: Any) -> np.ndarray:
+        if self.plan is None:
+            values = await connection.read_values(self.node_ids) * self.scale + self.offset
+        else:
+            blocks = await asyncio.gather(*(
+                connection.read_registers(self.device.unit_id, start, count) for start, count in self.plan.blocks
+            ))
+            values = self.plan.decode(blocks)
+        # Pump status registers hold 0/1 (or a run bit); report them as PUMP_STATUS_CODES
+        for i in self.status_index:
+            if not np.isnan(values[i]):
+                values[i] = encode_pump_status(values[i])
+        return values
+
+
+class PollingScheduler:
+    """
+    Polls Modbus TCP / OPC UA devices concurrently and emits their readings as IngestBatches.
+
+    Each device runs on its own interval (start times are staggered so hundreds of devices
+    do not fire at once), reads are coalesced per device (ModbusReadPlan, or one OPC UA
+    Read for all nodes) and connections come from a ConnectionPool, so devices behind one
+    gateway share a connection. A semaphore bounds the number of polls in flight. A poll
+    that overruns its interval skips the missed ticks rather than queueing them.
+
+    Batches use the same record format as the MQTT path, so `on_batch` can be
+    SensorIngestionService.ingest to feed both sources into one set of spine builders.
+    """
+
+    def __init__(
+        self,
+        devices: Sequence[PolledDeviceConfig],
+        on_batch: Optional[BatchCallback] = None,
+        sensor_configs: Optional[Sequence[SensorConfig]] = None,
+        pool: Optional[ConnectionPool] = None,
+        max_concurrent_polls: int = 256,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            devices: Devices to poll.
+            on_batch: Called (or awaited) with (skid_id, batch) after every successful poll.
+            sensor_configs: Passed to the range checks of quality_statuses.
+            pool: Connection pool (a default one-connection-per-endpoint pool if None).
+            max_concurrent_polls: Upper bound on polls in flight.
+            clock: Wall clock for reading timestamps (epoch seconds).
+        """
+        self.devices = list(devices)
+        self.on_batch = on_batch
+        self.sensor_configs = sensor_configs
+        self.pool = pool or ConnectionPool()
+        self.clock = clock
+        self._readers = {device.device_id: _DeviceReader(device) for device in self.devices}
+        self._semaphore = asyncio.Semaphore(max_concurrent_polls)
+        self._tasks: List[asyncio.Task] = []
+        self._metrics = PollingMetrics(devices=len(self.devices))
+        self._poll_seconds_total = 0.0
+
+    def metrics(self) -> PollingMetrics:
+        polls = self._metrics.polls
+        return self._metrics.model_copy(update={
+            "mean_poll_seconds": self._poll_seconds_total / polls if polls else 0.0,
+            "open_connections": len(self.pool),
+        })
+
+    async def poll(self, device: PolledDeviceConfig) -> Optional[IngestBatch]:
+        """
+        Poll one device once.
+
+        Returns:
+            The readings, or None if the poll failed (the failure is logged and counted).
+        """
+        reader = self._readers[device.device_id]
+        started = time.perf_counter()
+        timestamp = self.clock()
+        connection = None
+        try:
+            connection = await self.pool.get(device)
+            values = await reader.read(connection)
+        except (ConnectionError, OSError, asyncio.TimeoutError, ModbusError) as exc:
+            self._metrics.failed_polls += 1
+            logger.warning("Poll of %s failed: %r", device.device_id, exc)
+            if connection is not None and not isinstance(exc, ModbusError):
+                await self.pool.discard(device, connection)
+            return None
+        elapsed = time.perf_counter() - started
+        self._metrics.polls += 1
+        self._metrics.requests += reader.requests
+        self._metrics.records += len(values)
+        self._metrics.max_poll_seconds = max(self._metrics.max_poll_seconds, elapsed)
+        self._poll_seconds_total += elapsed
+
+        timestamps = np.full(len(values), int(round(timestamp * 1e9)), dtype=np.int64)
+        return IngestBatch(
+            timestamps, reader.sensor_ids, values,
+            quality_statuses(reader.sensor_ids, values, self.sensor_configs),
+            np.full(len(values), device.skid_id, dtype=object),
+        )
+
+    async def _device_loop(self, device: PolledDeviceConfig, first_delay: float) -> None:
+        loop = asyncio.get_running_loop()
+        interval = device.poll_interval_seconds
+        next_tick = loop.time() + first_delay
+        while True:
+            await asyncio.sleep(max(next_tick - loop.time(), 0.0))
+            try:
+                async with self._semaphore:
+                    batch = await self.poll(device)
+                if batch is not None and self.on_batch is not None:
+                    result = self.on_batch(device.skid_id, batch)
+                    if asyncio.iscoroutine(result):
+                        await result
+            except Exception:
+                # A bad reading or a failing sink must not end this device's polling
+                self._metrics.errors += 1
+                logger.exception("Polling %s failed", device.device_id)
+            next_tick += interval
+            behind = loop.time() - next_tick
+            if behind > 0:
+                missed = int(behind // interval) + 1
+                self._metrics.missed_ticks += missed
+                next_tick += missed * interval
+
+    async def start(self) -> None:
+        count = max(len(self.devices), 1)
+        self._tasks = [
+            asyncio.create_task(self._device_loop(device, device.poll_interval_seconds * i / count), name=f"poll-{device.device_id}")
+            for i, device in enumerate(self.devices)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.pool.close()
+
+
+class ModbusSimulator:
+    """
+    Local Modbus TCP server with per-unit holding registers, for tests and demos.
+
+    Requests are answered concurrently after `latency_seconds`, like a network link to a
+    remote PLC, so pipelined requests on one connection overlap.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0, registers_per_unit: int = 10_000):
+        self.latency_seconds = latency_seconds
+        self.registers_per_unit = registers_per_unit
+        self.requests = 0
+        self.connections = 0
+        self._units: Dict[int, np.ndarray] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: set = set()
+        self._tasks: set = set()
+
+    def registers(self, unit_id: int) -> np.ndarray:
+        if unit_id not in self._units:
+            self._units[unit_id] = np.zeros(self.registers_per_unit, dtype=np.uint16)
+        return self._units[unit_id]
+
+    def set_value(self, unit_id: int, address: int, value: float, data_type: str = "float32") -> None:
+        words = encode_registers(value, data_type)
+        self.registers(unit_id)[address:address + len(words)] = words
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start listening; returns the bound port."""
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop listening and drop every open connection (as a device going offline would)."""
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            while True:
+                transaction, _, length, unit_id = struct.unpack(">HHHB", await reader.readexactly(7))
+                pdu = await reader.readexactly(length - 1)
+                task = asyncio.create_task(self._respond(writer, transaction, unit_id, pdu))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, transaction: int, unit_id: int, pdu: bytes) -> None:
+        self.requests += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        function = pdu[0]
+        if function not in (READ_HOLDING_REGISTERS, READ_INPUT_REGISTERS):
+            body = struct.pack(">BB", function | 0x80, 1)
+        else:
+            address, count = struct.unpack(">HH", pdu[1:5])
+            if count > MAX_REGISTERS_PER_READ or address + count > self.registers_per_unit:
+                body = struct.pack(">BB", function | 0x80, 2)
+            else:
+                data = self.registers(unit_id)[address:address + count].astype(">u2").tobytes()
+                body = struct.pack(">BB", function, len(data)) + data
+        if not writer.is_closing():
+            writer.write(struct.pack(">HHHB", transaction, 0, len(body) + 1, unit_id) + body)
+
+
+if __name__ == '__main__':
+    async def main():
+        # 400 PLCs behind 4 gateways, 20 ms link latency, 12 points each spread over 3 register areas
+        simulators = [ModbusSimulator(latency_seconds=0.02) for _ in range(4)]
+        ports = [await simulator.start() for simulator in simulators]
+        points = [
+            PolledPointConfig(sensor_id=sensor_id, address=base + 2 * i)
+            for base, sensor_ids in ((0, ["F1", "F2", "P1", "T1"]), (100, ["V1", "V2", "V3", "V4"]), (400, ["A1", "A2", "A3", "A4"]))
+            for i, sensor_id in enumerate(sensor_ids)
+        ]
+        devices = []
+        for n in range(400):
+            gateway = n % 4
+            unit_id = n // 4 + 1
+            for point in points:
+                simulators[gateway].set_value(unit_id, point.address, 1000.0 + n)
+            devices.append(PolledDeviceConfig(
+                device_id=f"PLC_{n:03d}", skid_id=f"SKID_{n:03d}", host="127.0.0.1", port=ports[gateway],
+                unit_id=unit_id, poll_interval_seconds=1.0, points=points,
+            ))
+
+        received = []
+        scheduler = PollingScheduler(devices, on_batch=lambda skid_id, batch: received.append(len(batch)))
+        await scheduler.start()
+        await asyncio.sleep(5.0)
+        await scheduler.stop()
+        metrics = scheduler.metrics()
+        naive_seconds = len(devices) * len(points) * 0.02
+        print(f"{metrics.polls} polls of {len(devices)} devices in 5s ({metrics.polls / 5:.0f} polls/s, "
+              f"{metrics.records / 5:,.0f} readings/s), {metrics.requests / max(metrics.polls, 1):.1f} requests per poll, "
+              f"mean poll {metrics.mean_poll_seconds * 1e3:.0f} ms, max {metrics.max_poll_seconds * 1e3:.0f} ms, "
+              f"missed ticks {metrics.missed_ticks}, failed {metrics.failed_polls}")
+        print(f"One read per point, one device at a time: {naive_seconds:.0f}s per sweep of all devices")
+
+    asyncio.run(main())
@@ -0,0 +1,302 @@
+import warnings
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Iterator, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from src.models.digital_twin_models import SensorConfig, SensorDataPoint, SensorType
+from src.core.time_spine import PUMP_STATUS_CODES, encode_pump_status, _to_datetime64
+from src.core.interpolation import DEFAULT_SENSOR_TYPES
+from src.iot_integration.sensor_codes import STATUS_INVALID, STATUS_OK, STATUS_OUT_OF_RANGE
+
+# Plausible raw value range per sensor type; readings outside are flagged STATUS_OUT_OF_RANGE.
+PLAUSIBLE_RANGES: Dict[SensorType, Tuple[float, float]] = {
+    SensorType.FLOW_RATE: (0.0, 20000.0),  # GPM
+    SensorType.PRESSURE: (0.0, 3000.0),  # PSI
+    SensorType.PUMP_STATUS: (0.0, float(len(PUMP_STATUS_CODES) - 1)),
+}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class IngestRecord:
+    """One validated raw reading; a light __slots__ object instead of a SensorDataPoint."""
+
+    __slots__ = ("timestamp_ns", "sensor_id", "value", "status", "skid_id")
+
+    def __init__(self, timestamp_ns: int, sensor_id: str, value: float, status: int = STATUS_OK, skid_id: Optional[str] = None):
+        self.timestamp_ns = timestamp_ns
+        self.sensor_id = sensor_id
+        self.value = value
+        self.status = status
+        self.skid_id = skid_id
+
+    @property
+    def timestamp(self) -> datetime:
+        return np.datetime64(self.timestamp_ns, "ns").astype("datetime64[us]").item()
+
+    def to_sensor_data_point(self) -> SensorDataPoint:
+        """Convert at an API boundary; S1 codes become PumpStatus again."""
+        value: Any = PUMP_STATUS_CODES[int(self.value)] if self.sensor_id == "S1" else self.value
+        # Already validated, so skip pydantic validation
+        return SensorDataPoint.model_construct(
+            timestamp=self.timestamp, sensor_id=self.sensor_id, value=value, units=None, skid_id=self.skid_id
+        )
+
+    def __repr__(self) -> str:
+        return f"IngestRecord({self.timestamp}, {self.sensor_id!r}, {self.value!r}, status={self.status})"
+
+
+class IngestBatch:
+    """
+    Array-backed micro-batch of validated readings.
+
+    Columns are NumPy arrays (timestamps as int64 ns, values as float64 with S1 statuses
+    encoded as in the spine engine, STATUS_* codes), so the batch goes to the spine engine
+    or a SensorRingBuffer without per-record objects. Payloads that could not be turned
+    into a record at all are listed in `rejected` as (payload index, reason).
+    """
+
+    def __init__(
+        self,
+        timestamps_ns: np.ndarray,
+        sensor_ids: np.ndarray,
+        values: np.ndarray,
+        statuses: np.ndarray,
+        skid_ids: Optional[np.ndarray] = None,
+        rejected: Optional[List[Tuple[int, str]]] = None,
+    ):
+        self.timestamps_ns = timestamps_ns
+        self.sensor_ids = sensor_ids
+        self.values = values
+        self.statuses = statuses
+        self.skid_ids = skid_ids
+        self.rejected = rejected or []
+
+    def __len__(self) -> int:
+        return len(self.timestamps_ns)
+
+    def __getitem__(self, index: int) -> IngestRecord:
+        return IngestRecord(
+            int(self.timestamps_ns[index]),
+            str(self.sensor_ids[index]),
+            float(self.values[index]),
+            int(self.statuses[index]),
+            None if self.skid_ids is None else self.skid_ids[index],
+        )
+
+    def __iter__(self) -> Iterator[IngestRecord]:
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def ok(self) -> np.ndarray:
+        """Mask of the records with STATUS_OK."""
+        return self.statuses == STATUS_OK
+
+    def spine_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Sorted (timestamps, sensor_ids, values) of the STATUS_OK records for build_minute_spine."""
+        ok = self.ok
+        timestamps = self.timestamps_ns[ok]
+        order = np.argsort(timestamps, kind="stable")
+        return timestamps[order].astype("datetime64[ns]"), self.sensor_ids[ok][order], self.values[ok][order]
+
+    def append_to(self, ring_buffer) -> int:
+        """Append every record (with its status) to a SensorRingBuffer."""
+        return ring_buffer.append(
+            self.timestamps_ns, ring_buffer.codebook.codes(self.sensor_ids.tolist()), self.values, self.statuses
+        )
+
+    def to_sensor_data_points(self, include_invalid: bool = False) -> List[SensorDataPoint]:
+        """SensorDataPoints for an API boundary (STATUS_OK records only unless include_invalid)."""
+        indices = range(len(self)) if include_invalid else np.flatnonzero(self.ok)
+        return [self[i].to_sensor_data_point() for i in indices]
+
+    @classmethod
+    def concat(cls, batches: Sequence["IngestBatch"]) -> "IngestBatch":
+        batches = [batch for batch in batches if len(batch) or batch.rejected]
+        if not batches:
+            return empty_batch()
+        has_skids = any(batch.skid_ids is not None for batch in batches)
+        return cls(
+            np.concatenate([batch.timestamps_ns for batch in batches]),
+            np.concatenate([batch.sensor_ids for batch in batches]),
+            np.concatenate([batch.values for batch in batches]),
+            np.concatenate([batch.statuses for batch in batches]),
+            np.concatenate([
+                batch.skid_ids if batch.skid_ids is not None else np.full(len(batch), None, dtype=object)
+                for batch in batches
+            ]) if has_skids else None,
+            [entry for batch in batches for entry in batch.rejected],
+        )
+
+
+def empty_batch() -> IngestBatch:
+    return IngestBatch(
+        np.empty(0, dtype=np.int64), np.empty(0, dtype="<U1"), np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int16)
+    )
+
+
+def _parse_timestamps(raw: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    int64 ns timestamps for ISO-8601 strings, epoch seconds or datetimes, and a validity mask.
+    Each kind is converted in one vectorised call; only strings with a non-UTC offset are
+    parsed one at a time.
+    """
+    result = np.zeros(len(raw), dtype=np.int64)
+    valid = np.zeros(len(raw), dtype=bool)
+    numbers, strings, others = [], [], []
+    for i, value in enumerate(raw):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            numbers.append(i)
+        elif isinstance(value, str):
+            strings.append(i)
+        else:
+            others.append(i)
+
+    if numbers:
+        seconds = np.array([raw[i] for i in numbers], dtype=np.float64)
+        finite = np.isfinite(seconds)
+        result[numbers] = np.where(finite, np.rint(np.where(finite, seconds, 0) * 1e9), 0).astype(np.int64)
+        valid[numbers] = finite
+
+    if strings:
+        utc = [raw[i][:-1] if raw[i].endswith("Z") else raw[i][:-6] if raw[i].endswith("+00:00") else raw[i] for i in strings]
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")  # timezone offsets are deprecated in numpy; parse those below
+                result[strings] = np.array(utc, dtype="datetime64[ns]").astype(np.int64)
+            valid[strings] = True
+        except (ValueError, DeprecationWarning, UserWarning):
+            others.extend(strings)
+    for i in others:
+        try:
+            value = raw[i]
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if isinstance(value, datetime):
+                result[i] = _to_datetime64(value).astype("datetime64[ns]").astype(np.int64)
+                valid[i] = True
+            elif isinstance(value, np.datetime64):
+                result[i] = value.astype("datetime64[ns]").astype(np.int64)
+                valid[i] = True
+        except (ValueError, TypeError, OverflowError):
+            pass
+    return result, valid
+
+
+def _parse_values(sensor_ids: np.ndarray, raw: List[Any]) -> np.ndarray:
+    """float64 values (S1 statuses encoded); NaN where a value cannot be read."""
+    values = np.full(len(raw), np.nan)
+    is_status = sensor_ids == "S1"
+    numeric = np.flatnonzero(~is_status)
+    if len(numeric):
+        try:
+            values[numeric] = np.array([raw[i] for i in numeric], dtype=np.float64)
+        except (ValueError, TypeError):
+            for i in numeric:
+                try:
+                    values[i] = float(raw[i])
+                except (ValueError, TypeError):
+                    pass
+    for i in np.flatnonzero(is_status):
+        try:
+            values[i] = encode_pump_status(raw[i])
+        except (ValueError, TypeError):
+            pass
+    return values
+
+
+def quality_statuses(
+    sensor_ids: np.ndarray, values: np.ndarray, sensor_configs: Optional[Sequence[SensorConfig]] = None
+) -> np.ndarray:
+    """
+    STATUS_* code per reading: STATUS_INVALID for non-finite values, STATUS_OUT_OF_RANGE
+    outside PLAUSIBLE_RANGES for the sensor's type, STATUS_OK otherwise.
+    """
+    readable = np.isfinite(values)
+    statuses = np.where(readable, STATUS_OK, STATUS_INVALID).astype(np.int16)
+    sensor_types = dict(DEFAULT_SENSOR_TYPES)
+    sensor_types.update({config.sensor_id: config.sensor_type for config in sensor_configs or ()})
+    for sensor_type, (low, high) in PLAUSIBLE_RANGES.items():
+        of_type = [sensor_id for sensor_id, t in sensor_types.items() if t == sensor_type]
+        if not of_type:
+            continue
+        outside = readable & np.isin(sensor_ids, of_type) & ((values < low) | (values > high))
+        statuses[outside] = STATUS_OUT_OF_RANGE
+    return statuses
+
+
+def validate_batch(
+    payloads: Sequence[Mapping[str, Any]],
+    sensor_configs: Optional[Sequence[SensorConfig]] = None,
+    skid_id: Optional[str] = None,
+) -> IngestBatch:
+    """
+    Validate a micro-batch of raw payloads in one pass.
+
+    Each payload is {'timestamp': ISO-8601 string, epoch seconds or datetime, 'sensor_id': str,
+    'value': number (or pump status for S1), optional 'skid_id'}. Payloads without a usable
+    sensor_id or timestamp are rejected; values that cannot be read become NaN with
+    STATUS_INVALID, and values outside PLAUSIBLE_RANGES for the sensor's type are kept but
+    flagged STATUS_OUT_OF_RANGE.
+
+    Args:
+        payloads: Decoded message payloads.
+        sensor_configs: Optional configs giving sensor types beyond DEFAULT_SENSOR_TYPES.
+        skid_id: Skid for payloads that do not name one (e.g. taken from the MQTT topic).
+    """
+    rejected: List[Tuple[int, str]] = []
+    kept: List[int] = []
+    sensor_ids: List[str] = []
+    for i, payload in enumerate(payloads):
+        sensor_id = payload.get("sensor_id") if isinstance(payload, Mapping) else None
+        if not isinstance(sensor_id, str) or not sensor_id:
+            rejected.append((i, "missing sensor_id"))
+            continue
+        kept.append(i)
+        sensor_ids.append(sensor_id)
+
+    timestamps, valid_ts = _parse_timestamps([payloads[i].get("timestamp") for i in kept])
+    for position in np.flatnonzero(~valid_ts):
+        rejected.append((kept[position], "invalid timestamp"))
+    kept = [kept[position] for position in np.flatnonzero(valid_ts)]
+    timestamps = timestamps[valid_ts]
+    ids = np.array(sensor_ids)[valid_ts] if sensor_ids else np.empty(0, dtype="<U1")
+
+    values = _parse_values(ids, [payloads[i].get("value") for i in kept])
+    skid_ids = None
+    if skid_id is not None or any("skid_id" in payloads[i] for i in kept):
+        skid_ids = np.array([payloads[i].get("skid_id", skid_id) for i in kept], dtype=object)
+    rejected.sort()
+    return IngestBatch(timestamps, ids, values, quality_statuses(ids, values, sensor_configs), skid_ids, rejected)
+
+if __name__ == '__main__':
+    import time
+    from src.core.time_spine import arrays_from_points
+
+    # Ingest benchmark: pydantic SensorDataPoint per message vs one validate_batch per micro-batch
+    count, batch_size = 200_000, 1000
+    rng = np.random.default_rng(0)
+    start = datetime(2024, 3, 4, tzinfo=timezone.utc).timestamp()
+    sensors = np.array(["F1", "F2", "P1", "S1"])[rng.integers(0, 4, count)]
+    payloads = [
+        {
+            "timestamp": start + i * 0.25,
+            "sensor_id": str(sensor),
+            "value": ("ON" if i % 2 else "OFF") if sensor == "S1" else float(rng.normal(1000, 50)),
+            "skid_id": "SKID_001",
+        }
+        for i, sensor in enumerate(sensors)
+    ]
+    iso_payloads = [{**p, "timestamp": datetime.fromtimestamp(p["timestamp"], timezone.utc).isoformat()} for p in payloads]
+
+    started = time.perf_counter()
+    points = [SensorDataPoint(**{**p, "timestamp": datetime.fromtimestamp(p["timestamp"], timezone.utc)}) for p in payloads]
+    arrays_from_points(points)
+    pydantic_rate = count / (time.perf_counter() - started)
+
+    for label, source in (("epoch", payloads), ("ISO-8601", iso_payloads)):
+        started = time.perf_counter()
+        batches = [validate_batch(source[lo:lo + batch_size]) for lo in range(0, count, batch_size)]
+        IngestBatch.concat(batches).spine_arrays()
+        batch_rate = count / (time.perf_counter() - started)
+        print(f"validate_batch ({label} timestamps): {batch_rate:,.0f} msgs/s")
+    print(f"SensorDataPoint per message:        {pydantic_rate:,.0f} msgs/s")
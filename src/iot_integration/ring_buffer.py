@@ -0,0 +1,209 @@
+import os
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from src.models.digital_twin_models import SensorDataPoint
+from src.core.time_spine import encode_pump_status, _to_datetime64
+from src.iot_integration.sensor_codes import STATUS_OK, SensorCodebook
+
+# Fixed-width raw reading: 20 bytes, no padding
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<i8"),  # ns since the epoch (UTC)
+    ("value", "<f8"),
+    ("sensor_code", "<i2"),  # see SensorCodebook
+    ("status", "<i2"),  # STATUS_* quality code
+])
+
+_MAGIC = np.frombuffer(b"DRARING1", dtype="<u8")[0]
+_VERSION = 1
+_HEADER_WORDS = 8  # 64-byte header of uint64: magic, version, capacity, total records written
+_CAPACITY, _WRITTEN = 2, 3
+HEADER_BYTES = _HEADER_WORDS * 8
+
+
+class SensorRingBuffer:
+    """
+    Append-only, memory-mapped ring buffer of fixed-width raw sensor readings.
+
+    The file is a 64-byte header followed by `capacity` RECORD_DTYPE records; once full,
+    the oldest records are overwritten. Records are read as NumPy views straight onto the
+    mapped file, so the ingest process and the spine builder (in the same or another
+    process) share readings without serialising them, and everything survives a restart:
+    reopening the file resumes where the writer stopped.
+
+    There must be a single writer. The write counter is only advanced after the records
+    are in place, so readers never see a partially written batch; a reader that falls more
+    than `capacity` records behind loses the overwritten ones (see oldest_sequence).
+    """
+
+    def __init__(self, path: str, capacity: Optional[int] = None, codebook: Optional[SensorCodebook] = None):
+        """
+        Args:
+            path: Buffer file; created if it does not exist.
+            capacity: Number of records (required when creating; checked when reopening).
+            codebook: Sensor id codes; defaults to one persisted next to the buffer file.
+
+        Raises:
+            ValueError: If the file is not a ring buffer, or capacity does not match it.
+        """
+        self.path = path
+        self.codebook = codebook or SensorCodebook(f"{path}.codes.json")
+        if os.path.exists(path):
+            header = np.memmap(path, dtype="<u8", mode="r", shape=(_HEADER_WORDS,))
+            if header[0] != _MAGIC or header[1] != _VERSION:
+                raise ValueError(f"{path} is not a sensor ring buffer")
+            stored_capacity = int(header[_CAPACITY])
+            del header
+            if capacity is not None and capacity != stored_capacity:
+                raise ValueError(f"{path} holds {stored_capacity} records, not {capacity}")
+            capacity = stored_capacity
+        else:
+            if not capacity or capacity <= 0:
+                raise ValueError("capacity is required to create a ring buffer")
+            with open(path, "wb") as f:
+                f.truncate(HEADER_BYTES + capacity * RECORD_DTYPE.itemsize)
+            header = np.memmap(path, dtype="<u8", mode="r+", shape=(_HEADER_WORDS,))
+            header[:4] = [_MAGIC, _VERSION, capacity, 0]
+            header.flush()
+            del header
+
+        self.capacity = capacity
+        self._header = np.memmap(path, dtype="<u8", mode="r+", shape=(_HEADER_WORDS,))
+        self._records = np.memmap(path, dtype=RECORD_DTYPE, mode="r+", offset=HEADER_BYTES, shape=(capacity,))
+
+    @property
+    def total_written(self) -> int:
+        """Records appended since the buffer was created (the next record's sequence number)."""
+        return int(self._header[_WRITTEN])
+
+    @property
+    def oldest_sequence(self) -> int:
+        """Sequence number of the oldest record still held."""
+        return max(self.total_written - self.capacity, 0)
+
+    def __len__(self) -> int:
+        return min(self.total_written, self.capacity)
+
+    def append(self, timestamps, sensor_codes, values, statuses=None) -> int:
+        """
+        Append a batch of readings.
+
+        Args:
+            timestamps: datetime64 values or int64 ns since the epoch.
+            sensor_codes: int16 sensor codes (see SensorCodebook).
+            values: Float values.
+            statuses: STATUS_* codes (STATUS_OK if None).
+
+        Returns:
+            Sequence number after the batch (the new total_written).
+        """
+        timestamps = np.asarray(timestamps)
+        if timestamps.dtype.kind == "M":
+            timestamps = timestamps.astype("datetime64[ns]").astype(np.int64)
+        count = len(timestamps)
+        batch = np.empty(count, dtype=RECORD_DTYPE)
+        batch["timestamp"] = timestamps
+        batch["value"] = values
+        batch["sensor_code"] = sensor_codes
+        batch["status"] = STATUS_OK if statuses is None else statuses
+
+        written = self.total_written
+        if count > self.capacity:  # only the newest capacity records can survive
+            written += count - self.capacity
+            batch = batch[-self.capacity:]
+        start = written % self.capacity
+        first = min(len(batch), self.capacity - start)
+        self._records[start:start + first] = batch[:first]
+        self._records[:len(batch) - first] = batch[first:]
+        self._header[_WRITTEN] = written + len(batch)
+        return self.total_written
+
+    def append_points(self, points: Sequence[SensorDataPoint]) -> int:
+        """Append SensorDataPoints (API boundary); S1 statuses are encoded as in the spine engine."""
+        return self.append(
+            np.array([_to_datetime64(p.timestamp) for p in points], dtype="datetime64[ns]"),
+            self.codebook.codes(p.sensor_id for p in points),
+            np.array([encode_pump_status(p.value) if p.sensor_id == "S1" else float(p.value) for p in points]),
+        )
+
+    def segments(self, since: Optional[int] = None) -> List[np.ndarray]:
+        """
+        Zero-copy views of the records appended from sequence `since` on (all held records if
+        None), in append order: one view, or two when the range wraps around the end.
+        """
+        end = self.total_written
+        begin = self.oldest_sequence if since is None else max(since, self.oldest_sequence)
+        if begin >= end:
+            return []
+        count = end - begin
+        lo = begin % self.capacity
+        first = min(count, self.capacity - lo)
+        segments = [self._records[lo:lo + first]]
+        if count > first:
+            segments.append(self._records[:count - first])
+        return segments
+
+    def records(self, since: Optional[int] = None) -> np.ndarray:
+        """Records from `since` on as one array: a view unless the range wraps (then a copy)."""
+        segments = self.segments(since)
+        if not segments:
+            return self._records[:0]
+        return segments[0] if len(segments) == 1 else np.concatenate(segments)
+
+    def spine_arrays(self, since: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (timestamps, sensor_ids, values) of the STATUS_OK records from `since` on, sorted by
+        timestamp (stable), ready for build_minute_spine.
+        """
+        records = self.records(since)
+        records = records[records["status"] == STATUS_OK]
+        order = np.argsort(records["timestamp"], kind="stable")
+        records = records[order]
+        return (
+            records["timestamp"].astype("datetime64[ns]"),
+            self.codebook.sensor_ids(records["sensor_code"]),
+            records["value"].astype(np.float64),
+        )
+
+    def flush(self) -> None:
+        """Force the mapped pages to disk (the OS does this lazily otherwise)."""
+        self._records.flush()
+        self._header.flush()
+
+    def close(self) -> None:
+        self.flush()
+        del self._records
+        del self._header
+
+    def __enter__(self) -> "SensorRingBuffer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+if __name__ == '__main__':
+    import tempfile
+    import time
+    from src.core.time_spine import build_minute_spine
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "skid_001.ring")
+    day_ns = 24 * 60 * 60 * 10**9
+    count = 2_000_000
+    rng = np.random.default_rng(0)
+    timestamps = np.datetime64("2024-03-04", "ns").astype(np.int64) + np.sort(rng.integers(0, day_ns, count))
+
+    with SensorRingBuffer(path, capacity=1_000_000) as buffer:
+        codes = buffer.codebook.codes(["F1", "F2", "P1"])
+        started = time.perf_counter()
+        for lo in range(0, count, 10_000):
+            hi = lo + 10_000
+            buffer.append(timestamps[lo:hi], codes[rng.integers(0, 3, hi - lo)], rng.normal(1000, 20, hi - lo))
+        elapsed = time.perf_counter() - started
+        print(f"Appended {count} records in {elapsed:.2f}s ({count / elapsed:,.0f}/s); holding {len(buffer)}")
+
+    with SensorRingBuffer(path) as reopened:
+        started = time.perf_counter()
+        spine = build_minute_spine(*reopened.spine_arrays())
+        print(f"Reopened buffer ({reopened.total_written} written) -> {len(spine)}-minute spine in {time.perf_counter() - started:.2f}s")
+        print(f"{os.path.getsize(path) / len(reopened):.1f} bytes per record on disk")
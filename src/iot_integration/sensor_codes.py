@@ -0,0 +1,83 @@
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from src.core.time_spine import SPINE_SENSOR_FIELDS
+
+# Quality status stored with every raw reading
+STATUS_OK = 0
+STATUS_INVALID = 1  # value could not be interpreted (kept as NaN)
+STATUS_OUT_OF_RANGE = 2  # value outside the plausible range for its sensor type
+
+
+class SensorCodebook:
+    """
+    Stable mapping between sensor ids and the int16 codes stored in binary records.
+
+    The spine sensors (F1, F2, S1, P1) always have codes 0-3; other sensor ids get the next
+    free code the first time they are seen. When a path is given the mapping is persisted
+    as JSON and reloaded, so codes written before a restart keep their meaning.
+    """
+
+    MAX_CODE = np.iinfo(np.int16).max
+
+    def __init__(self, path: Optional[str] = None, sensor_ids: Iterable[str] = ()):
+        self.path = path
+        self._lock = threading.Lock()
+        self._codes: Dict[str, int] = {}
+        self._load()
+        for sensor_id in [*SPINE_SENSOR_FIELDS, *sensor_ids]:
+            self.code(sensor_id)
+
+    def code(self, sensor_id: str) -> int:
+        """Code of a sensor id, assigning (and persisting) a new one if needed."""
+        code = self._codes.get(sensor_id)
+        if code is not None:
+            return code
+        with self._lock:
+            code = self._codes.get(sensor_id)
+            if code is None:
+                code = len(self._codes)
+                if code > self.MAX_CODE:
+                    raise ValueError(f"No int16 sensor codes left for '{sensor_id}'")
+                self._codes[sensor_id] = code
+                self._save()
+        return code
+
+    def codes(self, sensor_ids: Iterable[str]) -> np.ndarray:
+        """int16 codes for many sensor ids."""
+        return np.array([self.code(sensor_id) for sensor_id in sensor_ids], dtype=np.int16)
+
+    def sensor_ids(self, codes: np.ndarray) -> np.ndarray:
+        """Unicode array of the sensor ids behind an array of codes."""
+        codes = np.asarray(codes)
+        if len(codes) and codes.max() >= len(self._codes):
+            self._load()  # codes assigned by another process sharing the file
+        lookup = self.lookup_table()
+        return lookup[np.asarray(codes, dtype=np.int64)]
+
+    def lookup_table(self) -> np.ndarray:
+        """Unicode array indexed by code."""
+        names: List[str] = [""] * len(self._codes)
+        for sensor_id, code in self._codes.items():
+            names[code] = sensor_id
+        return np.array(names)
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def _load(self) -> None:
+        if self.path is not None and os.path.exists(self.path):
+            with open(self.path) as f:
+                stored = {sensor_id: int(code) for sensor_id, code in json.load(f).items()}
+            with self._lock:
+                self._codes.update(stored)
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._codes, f)
+        os.replace(tmp_path, self.path)
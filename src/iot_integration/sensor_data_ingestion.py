@@ -0,0 +1,470 @@
+import asyncio
+import collections
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Any, AsyncIterator, Awaitable, Callable, Deque, Optional, Sequence, Tuple, Union
+import numpy as np
+from src.models.digital_twin_models import IngestionMetrics, MinuteLevelData, SensorConfig
+from src.core.time_spine_builder import TimeSpineBuilder
+from src.iot_integration.compression import SensorCompressor
+from src.iot_integration.ingest_records import IngestBatch, validate_batch
+
+try:
+    import aiomqtt
+except ImportError:  # aiomqtt is optional; only AiomqttTransport needs it
+    aiomqtt = None
+
+logger = logging.getLogger(__name__)
+
+# Skids publish JSON readings (one object or a list) to dra/<skid_id>/sensors
+DEFAULT_TOPICS = ("dra/+/sensors",)
+SKID_TOPIC_LEVEL = 1
+
+Message = Tuple[str, bytes]
+RowsCallback = Callable[[str, List[MinuteLevelData]], Union[None, Awaitable[None]]]
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """MQTT topic filter match with '+' (one level) and '#' (all remaining levels) wildcards."""
+    filter_levels = topic_filter.split("/")
+    topic_levels = topic.split("/")
+    for i, level in enumerate(filter_levels):
+        if level == "#":
+            return True
+        if i >= len(topic_levels) or (level != "+" and level != topic_levels[i]):
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+class InMemoryBroker:
+    """
+    In-process stand-in for an MQTT broker with persistent (clean_session=False) QoS 1
+    sessions, for tests and local runs.
+
+    Messages for a subscribed client are queued in its session whether or not it is
+    connected, and clients pull them at their own pace, as a broker holding unacknowledged
+    messages would. go_offline() simulates a network outage: connected clients see a
+    ConnectionError and reconnects fail until restore().
+    """
+
+    def __init__(self):
+        self.online = True
+        self._sessions: Dict[str, "_Session"] = {}
+
+    def client(self, client_id: str = "dra-ingest") -> "InMemoryMqttClient":
+        return InMemoryMqttClient(self, client_id)
+
+    def _session(self, client_id: str) -> "_Session":
+        return self._sessions.setdefault(client_id, _Session())
+
+    def publish(self, topic: str, payload: Union[bytes, str, Dict[str, Any], List[Dict[str, Any]]]) -> int:
+        """
+        Queue a message for every session subscribed to the topic.
+
+        Returns:
+            Number of sessions the message was queued for.
+        """
+        if not isinstance(payload, (bytes, str)):
+            payload = json.dumps(payload, default=str)
+        if isinstance(payload, str):
+            payload = payload.encode()
+        delivered = 0
+        for session in self._sessions.values():
+            if any(topic_matches(topic_filter, topic) for topic_filter in session.subscriptions):
+                session.queue.append((topic, payload))
+                session.wake()
+                delivered += 1
+        return delivered
+
+    def pending(self, client_id: str = "dra-ingest") -> int:
+        """Messages queued for a client and not yet delivered."""
+        return len(self._session(client_id).queue)
+
+    def go_offline(self) -> None:
+        self.online = False
+        for session in self._sessions.values():
+            session.wake()
+
+    def restore(self) -> None:
+        self.online = True
+
+
+class _Session:
+    def __init__(self):
+        self.subscriptions: List[str] = []
+        self.queue: Deque[Message] = collections.deque()
+        self.event: Optional[asyncio.Event] = None
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+
+
+class InMemoryMqttClient:
+    """Client of an InMemoryBroker with the transport interface used by SensorIngestionService."""
+
+    def __init__(self, broker: InMemoryBroker, client_id: str):
+        self.broker = broker
+        self.client_id = client_id
+        self._connected = False
+
+    async def connect(self) -> None:
+        if not self.broker.online:
+            raise ConnectionError("broker unreachable")
+        self._connected = True
+
+    async def subscribe(self, topic: str, qos: int = 1) -> None:
+        session = self.broker._session(self.client_id)
+        if topic not in session.subscriptions:
+            session.subscriptions.append(topic)
+
+    async def messages(self) -> AsyncIterator[Message]:
+        session = self.broker._session(self.client_id)
+        if session.event is None:
+            session.event = asyncio.Event()
+        while True:
+            if not (self.broker.online and self._connected):
+                self._connected = False
+                raise ConnectionError("connection lost")
+            if session.queue:
+                yield session.queue.popleft()
+                continue
+            session.event.clear()
+            await session.event.wait()
+
+    async def disconnect(self) -> None:
+        self._connected = False
+
+
+class AiomqttTransport:
+    """
+    Transport for a real broker through aiomqtt, with a persistent session so the broker
+    keeps QoS 1 messages while the service is disconnected.
+
+    Limit: paho acknowledges QoS 1 messages as they arrive and aiomqtt buffers them in its
+    own queue, which is unbounded by default, so while the service is connected the broker
+    does not hold back a backlog and a post-outage burst is buffered in memory. aiomqtt's
+    max_queued_incoming_messages (passed through client_kwargs) bounds that buffer, but
+    messages beyond it are discarded after being acknowledged, so it is not set here.
+    """
+
+    def __init__(self, hostname: str, port: int = 1883, client_id: str = "dra-ingest", **client_kwargs: Any):
+        if aiomqtt is None:
+            raise ImportError("AiomqttTransport requires aiomqtt (pip install aiomqtt)")
+        self._factory = lambda: aiomqtt.Client(hostname, port, identifier=client_id, clean_session=False, **client_kwargs)
+        self._client = None
+
+    async def connect(self) -> None:
+        await self.disconnect()
+        client = self._factory()
+        try:
+            await client.__aenter__()
+        except aiomqtt.MqttError as exc:
+            raise ConnectionError(str(exc)) from exc
+        self._client = client
+
+    async def subscribe(self, topic: str, qos: int = 1) -> None:
+        await self._client.subscribe(topic, qos=qos)
+
+    async def messages(self) -> AsyncIterator[Message]:
+        try:
+            async for message in self._client.messages:
+                yield message.topic.value, bytes(message.payload)
+        except aiomqtt.MqttError as exc:
+            raise ConnectionError(str(exc)) from exc
+
+    async def disconnect(self) -> None:
+        if self._client is not None:
+            try:
+                await self._client.__aexit__(None, None, None)
+            except aiomqtt.MqttError:
+                pass
+            self._client = None
+
+
+class SensorIngestionService:
+    """
+    Asyncio service that subscribes to skid topics and feeds per-skid TimeSpineBuilders.
+
+    A receiver task moves messages from the transport into a bounded queue and a processor
+    task drains it in micro-batches: payloads are decoded, validated in one validate_batch
+    call per skid and passed to the skid's builder as arrays. When the processor falls
+    behind the queue fills up and the receiver blocks instead of dropping, so messages stay
+    with the transport until there is room. A burst of backlog after a network outage is
+    therefore absorbed at processing speed rather than lost. With InMemoryBroker the backlog
+    stays with the broker; AiomqttTransport buffers it in client memory instead (see its
+    docstring). Closed minutes are handed to `on_rows`.
+
+    A skid whose readings fail to process does not take the rest of the micro-batch with
+    it: the failure is logged and counted, and that skid's payloads are kept in
+    `dead_letters` for inspection or replay.
+
+    The transport is any object with async connect(), subscribe(topic, qos), messages()
+    (an async iterator of (topic, payload bytes) raising ConnectionError when the link
+    drops) and disconnect(); see InMemoryMqttClient and AiomqttTransport.
+    """
+
+    def __init__(
+        self,
+        transport: Any,
+        topics: Sequence[str] = DEFAULT_TOPICS,
+        on_rows: Optional[RowsCallback] = None,
+        sensor_configs: Optional[Sequence[SensorConfig]] = None,
+        compressor: Optional[SensorCompressor] = None,
+        builder_factory: Callable[[], TimeSpineBuilder] = TimeSpineBuilder,
+        queue_size: int = 10_000,
+        batch_size: int = 500,
+        batch_timeout_seconds: float = 0.05,
+        reconnect_delay_seconds: float = 1.0,
+        rate_window_seconds: float = 10.0,
+        dead_letter_size: int = 1_000,
+    ):
+        """
+        Args:
+            transport: MQTT transport (see class docstring).
+            topics: Topic filters to subscribe to; the skid id is topic level SKID_TOPIC_LEVEL.
+            on_rows: Called (or awaited) with (skid_id, rows) whenever minutes close.
+            sensor_configs: Passed to validate_batch for range checks.
+            compressor: Optional exception compression applied before the builders. The
+                builders carry values forward, so it must be created with step_only=True.
+            builder_factory: Creates the builder for a newly seen skid.
+            queue_size: Maximum messages held between receiver and processor.
+            batch_size: Maximum messages per micro-batch.
+            batch_timeout_seconds: How long a partial batch waits for more messages.
+            reconnect_delay_seconds: Initial reconnect back-off (doubles up to 30 s).
+            rate_window_seconds: Window for messages_per_second.
+            dead_letter_size: Most recent failed (skid_id, payloads) kept in dead_letters.
+        """
+        if compressor is not None and not compressor.step_only:
+            raise ValueError(
+                "TimeSpineBuilder carries values forward; use SensorCompressor(..., step_only=True) so the "
+                "compression error bound holds for the spine"
+            )
+        self.transport = transport
+        self.topics = list(topics)
+        self.on_rows = on_rows
+        self.sensor_configs = sensor_configs
+        self.compressor = compressor
+        self.builder_factory = builder_factory
+        self.batch_size = batch_size
+        self.batch_timeout_seconds = batch_timeout_seconds
+        self.reconnect_delay_seconds = reconnect_delay_seconds
+        self.rate_window_seconds = rate_window_seconds
+        self.builders: Dict[str, TimeSpineBuilder] = {}
+        self.dead_letters: Deque[Tuple[str, List[Dict[str, Any]]]] = collections.deque(maxlen=dead_letter_size)
+
+        self._queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._metrics = IngestionMetrics()
+        self._rate_samples: Deque[Tuple[float, int]] = collections.deque()
+        self._newest_event_ns: Optional[int] = None
+
+    def metrics(self) -> IngestionMetrics:
+        """Current throughput, queue depth and lag."""
+        now = time.monotonic()
+        while self._rate_samples and self._rate_samples[0][0] < now - self.rate_window_seconds:
+            self._rate_samples.popleft()
+        rate = 0.0
+        if self._rate_samples:
+            span = max(now - self._rate_samples[0][0], 1e-3)
+            rate = sum(count for _, count in self._rate_samples) / span
+        event_lag = None
+        if self._newest_event_ns is not None:
+            event_lag = time.time() - self._newest_event_ns / 1e9
+        return self._metrics.model_copy(update={
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "messages_per_second": rate,
+            "event_lag_seconds": event_lag,
+        })
+
+    async def start(self) -> None:
+        """Start the receiver and processor tasks."""
+        self._queue = asyncio.Queue(maxsize=self._queue_size)
+        self._tasks = [
+            asyncio.create_task(self._receive(), name="mqtt-receive"),
+            asyncio.create_task(self._process(), name="mqtt-process"),
+        ]
+
+    async def stop(self, drain: bool = True) -> None:
+        """
+        Stop receiving; with drain, process everything already queued before returning.
+        """
+        receiver, processor = self._tasks
+        receiver.cancel()
+        await asyncio.gather(receiver, return_exceptions=True)
+        if drain:
+            await self._queue.join()
+        processor.cancel()
+        await asyncio.gather(processor, return_exceptions=True)
+        await self.transport.disconnect()
+        self._tasks = []
+
+    async def wait_idle(self) -> None:
+        """Wait until every queued message has been processed."""
+        await self._queue.join()
+
+    async def _receive(self) -> None:
+        delay = self.reconnect_delay_seconds
+        first = True
+        while True:
+            try:
+                await self.transport.connect()
+                for topic in self.topics:
+                    await self.transport.subscribe(topic, qos=1)
+                if not first:
+                    self._metrics.reconnects += 1
+                    logger.info("Reconnected to broker")
+                first = False
+                delay = self.reconnect_delay_seconds
+                async for message in self.transport.messages():
+                    # Blocks while the queue is full: backpressure instead of dropping
+                    await self._queue.put((message, time.monotonic()))
+                    self._metrics.messages_received += 1
+                    self._metrics.max_queue_depth = max(self._metrics.max_queue_depth, self._queue.qsize())
+            except ConnectionError as exc:
+                logger.warning("Broker connection lost (%s); retrying in %.1fs", exc, delay)
+                await self.transport.disconnect()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def _next_batch(self) -> List[Tuple[Message, float]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.batch_timeout_seconds
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _process(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._handle(batch)
+            except Exception:
+                logger.exception("Failed to process a batch of %d messages", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _decode(self, batch: Sequence[Tuple[Message, float]]) -> Dict[str, List[Dict[str, Any]]]:
+        """Payloads grouped by skid id (taken from the topic unless the payload names one)."""
+        by_skid: Dict[str, List[Dict[str, Any]]] = {}
+        for (topic, payload), _ in batch:
+            try:
+                decoded = json.loads(payload)
+            except (ValueError, UnicodeDecodeError):
+                self._metrics.decode_errors += 1
+                continue
+            levels = topic.split("/")
+            topic_skid = levels[SKID_TOPIC_LEVEL] if len(levels) > SKID_TOPIC_LEVEL else topic
+            for reading in decoded if isinstance(decoded, list) else [decoded]:
+                skid_id = reading.get("skid_id", topic_skid) if isinstance(reading, dict) else topic_skid
+                by_skid.setdefault(skid_id, []).append(reading)
+        return by_skid
+
+    async def _handle(self, batch: Sequence[Tuple[Message, float]]) -> None:
+        self._metrics.lag_seconds = time.monotonic() - batch[0][1]
+        for skid_id, payloads in self._decode(batch).items():
+            try:
+                await self.ingest(skid_id, validate_batch(payloads, self.sensor_configs, skid_id=skid_id))
+            except Exception:
+                logger.exception("Failed to process %d readings of %s", len(payloads), skid_id)
+                self._metrics.processing_errors += 1
+                self.dead_letters.append((skid_id, payloads))
+        self._metrics.messages_processed += len(batch)
+        self._metrics.batches += 1
+        self._rate_samples.append((time.monotonic(), len(batch)))
+
+    async def ingest(self, skid_id: str, records: IngestBatch) -> None:
+        """
+        Feed an already validated batch to the skid's builder, e.g. readings from the
+        Modbus/OPC UA polling scheduler, so every source shares the same spine state.
+        """
+        ok = records.ok
+        self._metrics.records_accepted += int(ok.sum())
+        self._metrics.records_rejected += len(records.rejected) + int((~ok).sum())
+        if not ok.any():
+            return
+        newest = int(records.timestamps_ns[ok].max())
+        self._newest_event_ns = newest if self._newest_event_ns is None else max(self._newest_event_ns, newest)
+        if self.compressor is not None:
+            accepted = int(ok.sum())
+            records = self.compressor.compress(records)
+            ok = records.ok
+            self._metrics.records_compressed += accepted - int(ok.sum())
+
+        builder = self.builders.get(skid_id)
+        if builder is None:
+            builder = self.builders[skid_id] = self.builder_factory()
+        rows = builder.add_arrays(records.timestamps_ns[ok], records.sensor_ids[ok], records.values[ok])
+        # Compressed-away readings still count as event time, so flat stretches keep closing minutes
+        rows += builder.advance(newest)
+        if rows and self.on_rows is not None:
+            result = self.on_rows(skid_id, rows)
+            if asyncio.iscoroutine(result):
+                await result
+
+    def flush(self) -> Dict[str, List[MinuteLevelData]]:
+        """Close the open minutes of every skid (e.g. after stop()), releasing readings still
+        held back by the compressor first."""
+        rows = {}
+        for skid_id, builder in self.builders.items():
+            rows[skid_id] = []
+            if self.compressor is not None:
+                held = self.compressor.flush(skid_id)
+                ok = held.ok
+                rows[skid_id] = builder.add_arrays(held.timestamps_ns[ok], held.sensor_ids[ok], held.values[ok])
+            rows[skid_id].extend(builder.flush())
+        return rows
+
+
+if __name__ == '__main__':
+    async def main():
+        broker = InMemoryBroker()
+        minutes: Dict[str, int] = collections.Counter()
+        service = SensorIngestionService(
+            broker.client(), queue_size=2_000,
+            on_rows=lambda skid_id, rows: minutes.update({skid_id: len(rows)}),
+        )
+        await service.start()
+        await asyncio.sleep(0)
+
+        # An hour of 1 Hz F1/F2/P1 readings from 20 skids, published as a post-outage burst
+        broker.go_offline()
+        start = datetime(2024, 3, 4, tzinfo=timezone.utc).timestamp()
+        rng = np.random.default_rng(0)
+        count = 0
+        for second in range(3600):
+            for skid in range(20):
+                broker.publish(f"dra/SKID_{skid:03d}/sensors", [
+                    {"timestamp": start + second, "sensor_id": "F1", "value": float(rng.normal(1000, 20))},
+                    {"timestamp": start + second, "sensor_id": "F2", "value": float(rng.normal(990, 20))},
+                    {"timestamp": start + second, "sensor_id": "P1", "value": float(rng.normal(300, 5))},
+                ])
+                count += 1
+        print(f"{count} messages backed up during the outage")
+
+        started = time.perf_counter()
+        broker.restore()
+        while service.metrics().messages_processed < count:
+            await asyncio.sleep(0.5)
+            metrics = service.metrics()
+            print(f"  {metrics.messages_per_second:,.0f} msgs/s, queue {metrics.queue_depth}, lag {metrics.lag_seconds * 1e3:.0f} ms")
+        elapsed = time.perf_counter() - started
+        await service.stop()
+        metrics = service.metrics()
+        print(f"Caught up in {elapsed:.1f}s ({count / elapsed:,.0f} msgs/s, {metrics.records_accepted / elapsed:,.0f} readings/s); "
+              f"max queue depth {metrics.max_queue_depth}, {sum(minutes.values())} minutes closed")
+
+    asyncio.run(main())
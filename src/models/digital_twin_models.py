@@ -1,7 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional, Dict, Any, Union
 from enum import Enum
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 
 # --- General/Shared Enums and Models ---
 
@@ -21,6 +21,8 @@ class SensorType(str, Enum):
 
 class ReportingMethod(str, Enum):
     EXCEPTION_BASED_MQTT = "Exception-based via MQTT"
+    MODBUS_TCP_POLLING = "Polled via Modbus TCP"
+    OPC_UA_POLLING = "Polled via OPC UA"
 
 # --- Physical Layer Components ---
 
@@ -30,6 +32,48 @@ class SensorConfig(BaseModel):
     location: str = Field(..., description="Location of the sensor")
     purpose: str = Field(..., description="Purpose of the sensor")
     reporting_method: ReportingMethod = Field(default=ReportingMethod.EXCEPTION_BASED_MQTT, description="How the sensor reports data")
+    max_staleness_minutes: Optional[float] = Field(None, description="Minutes after the last report before time-spine values are treated as missing (None = no limit)")
+    compression_deadband: Optional[float] = Field(None, description="Exception deadband in sensor units: readings within this of the last stored value are dropped (None = no compression)")
+    compression_deviation: Optional[float] = Field(None, description="Swinging-door deviation in sensor units for linearly interpolated sensors (defaults to compression_deadband)")
+    compression_max_interval_seconds: Optional[float] = Field(None, description="Longest gap between stored readings of a compressed sensor; capped below max_staleness_minutes")
+
+class PolledPointConfig(BaseModel):
+    sensor_id: str = Field(..., description="Sensor the polled value is reported as, e.g., F1")
+    address: Union[int, str] = Field(..., description="Modbus holding register (int) or OPC UA node id (str)")
+    data_type: str = Field(default="float32", description="Modbus register encoding: uint16, int16, uint32, int32 or float32 (big-endian words)")
+    scale: float = Field(default=1.0, description="Engineering value = raw * scale + offset")
+    offset: float = Field(default=0.0)
+
+class PolledDeviceConfig(BaseModel):
+    # A PLC or gateway read by the polling scheduler (src.iot_integration.device_polling)
+    device_id: str = Field(..., description="Unique identifier of the device")
+    skid_id: str = Field(..., description="Skid the device's readings belong to")
+    protocol: ReportingMethod = Field(default=ReportingMethod.MODBUS_TCP_POLLING, description="MODBUS_TCP_POLLING or OPC_UA_POLLING")
+    host: str = Field(..., description="Device or gateway host name / IP")
+    port: int = Field(default=502, description="TCP port (502 for Modbus TCP, usually 4840 for OPC UA)")
+    unit_id: int = Field(default=1, description="Modbus unit id behind the gateway")
+    poll_interval_seconds: float = Field(default=1.0, gt=0)
+    timeout_seconds: float = Field(default=2.0, gt=0)
+    points: List[PolledPointConfig] = Field(..., description="Values read on every poll")
+
+class PumpCurve(BaseModel):
+    # Manufacturer performance curve: head and efficiency at a set of flow points.
+    # Lookups go through src.core.pump_curve, which builds a dense interpolation grid once per curve.
+    flow_points_gpm: List[float] = Field(..., description="Flow points of the curve in GPM, strictly increasing")
+    head_points_ft: List[float] = Field(..., description="Pump head in feet at each flow point")
+    efficiency_points: List[float] = Field(..., description="Pump efficiency (0-1) at each flow point")
+    grid_resolution: int = Field(default=2048, description="Number of points in the precomputed lookup grid")
+
+    @model_validator(mode="after")
+    def _check_points(self) -> "PumpCurve":
+        n = len(self.flow_points_gpm)
+        if n < 2 or len(self.head_points_ft) != n or len(self.efficiency_points) != n:
+            raise ValueError("Pump curve needs at least two points and equal-length flow, head and efficiency lists")
+        if any(b <= a for a, b in zip(self.flow_points_gpm, self.flow_points_gpm[1:])):
+            raise ValueError("Pump curve flow points must be strictly increasing")
+        if self.grid_resolution < 2:
+            raise ValueError("grid_resolution must be at least 2")
+        return self
 
 class Pump(BaseModel):
     pump_id: str = Field(..., description="Identifier for the pump")
@@ -37,7 +81,27 @@ class Pump(BaseModel):
     horsepower: Optional[float] = Field(None, description="Horsepower of the pump, if variable or known")
     continuous_operation_capability: bool = Field(True, description="Whether the pump is capable of continuous operation")
     current_status: PumpStatus = Field(default=PumpStatus.OFF, description="Current operational status of the pump")
-    # Add other relevant pump characteristics from pump curve if needed later
+    pump_curve: Optional[PumpCurve] = Field(None, description="Manufacturer performance curve, if known")
+
+class BearingGeometry(BaseModel):
+    # Rolling-element bearing dimensions; fault frequencies follow from these and the shaft speed
+    ball_count: int = Field(..., gt=0, description="Number of rolling elements")
+    ball_diameter_mm: float = Field(..., gt=0)
+    pitch_diameter_mm: float = Field(..., gt=0)
+    contact_angle_deg: float = Field(default=0.0, ge=0, lt=90)
+
+class PumpVibrationConfig(BaseModel):
+    # Accelerometer set-up of one pump (see src.core.vibration_features)
+    equipment_id: str = Field(..., description="Pump the accelerometer is mounted on")
+    sample_rate_hz: float = Field(..., gt=0, description="Accelerometer sample rate")
+    shaft_speed_hz: float = Field(..., gt=0, description="Running speed of the shaft (RPM / 60)")
+    bearing: Optional[BearingGeometry] = Field(None, description="Bearing geometry; without it only the 1X-3X shaft bands are computed")
+
+class HealthHistoryConfig(BaseModel):
+    # Retention of the per-equipment, per-metric health history (see src.core.health_history)
+    raw_capacity: int = Field(default=4096, gt=0, description="Raw readings kept per metric")
+    minute_retention_hours: float = Field(default=48.0, gt=0, description="How long 1-minute rollups are kept")
+    hour_retention_days: float = Field(default=365.0, gt=0, description="How long 1-hour rollups are kept")
 
 class InjectionUnit(BaseModel):
     unit_id: str = Field(default="IU01", description="Identifier for the injection unit")
@@ -66,9 +130,11 @@ class SensorDataPoint(BaseModel):
     sensor_id: str = Field(..., description="Identifier of the sensor reporting the data (e.g., F1, P1)")
     value: Any = Field(..., description="Actual value reported by the sensor (can be float, bool for status, etc.)")
     units: Optional[str] = Field(None, description="Units of the sensor value, if applicable (e.g., 'GPM', 'PSI')")
+    skid_id: Optional[str] = Field(None, description="Skid the reading came from, e.g., 'ATL_SKID_01'")
 
 class MinuteLevelData(BaseModel):
     timestamp: datetime = Field(..., description="Minute-level timestamp (YYYY-MM-DD HH:MM:00)")
+    skid_id: Optional[str] = Field(None, description="Skid this minute belongs to, when spines for several skids are combined")
     flow_rate_f1: Optional[float] = Field(None, description="Incoming fuel flow rate at F1")
     flow_rate_f2: Optional[float] = Field(None, description="Outgoing fuel flow rate at F2")
     pump_status_s1: Optional[PumpStatus] = Field(None, description="Status of the pump(s)")
@@ -79,6 +145,23 @@ class MinuteLevelData(BaseModel):
     pump_power_kw: Optional[float] = Field(None, description="Calculated pump power in kW for this minute")
     pump_efficiency_factor: Optional[float] = Field(None, description="Calculated pump efficiency factor for this minute")
 
+class IngestionMetrics(BaseModel):
+    # Snapshot of a live ingestion service (see src.iot_integration.sensor_data_ingestion)
+    messages_received: int = Field(0, description="Messages taken off the transport")
+    messages_processed: int = Field(0, description="Messages decoded and handed to the time-spine builders")
+    records_accepted: int = Field(0, description="Sensor readings that passed validation")
+    records_rejected: int = Field(0, description="Readings rejected or flagged invalid/out of range by validation")
+    decode_errors: int = Field(0, description="Messages whose payload could not be decoded")
+    batches: int = Field(0, description="Micro-batches processed")
+    queue_depth: int = Field(0, description="Messages waiting in the ingest queue")
+    max_queue_depth: int = Field(0, description="Highest queue depth seen")
+    messages_per_second: float = Field(0.0, description="Processing rate over the recent window")
+    lag_seconds: float = Field(0.0, description="Time the oldest message of the last batch waited in the queue")
+    event_lag_seconds: Optional[float] = Field(None, description="Wall-clock time minus the newest event timestamp processed")
+    reconnects: int = Field(0, description="Transport reconnections after a connection loss")
+    records_compressed: int = Field(0, description="Valid readings removed by exception compression")
+    processing_errors: int = Field(0, description="Per-skid batches whose processing raised; their payloads go to dead_letters")
+
 
 class EnergyCostFactors(BaseModel):
     # Factors used in energy cost calculation: Pump Power (kW) × Efficiency Factor × Operating Time × Energy Rate ($/kWh)
@@ -101,8 +184,23 @@ class LabAnalysisResult(BaseModel):
     dra_concentration_percentage: float
     is_compliant: bool
 
+class TariffDayType(str, Enum):
+    WEEKDAY = "WEEKDAY"
+    WEEKEND = "WEEKEND"
+    HOLIDAY = "HOLIDAY"
+
+class TariffRule(BaseModel):
+    # One time-of-use price band. Rules are applied in order, so later (more specific) rules override earlier ones.
+    period: str = Field(..., description="Local time band 'HH:MM-HH:MM'; may wrap past midnight, '00:00-24:00' is the whole day")
+    rate_per_kwh: float = Field(..., description="Energy rate in $/kWh for this band")
+    day_types: List[TariffDayType] = Field(default_factory=lambda: list(TariffDayType), description="Day types the band applies to")
+    months: Optional[List[int]] = Field(None, description="Months (1-12) the band applies to, for seasonal tariffs; None = all year")
+
 class ExternalData(BaseModel):
     energy_pricing_schedule: Optional[Dict[str, float]] = Field(None, description="Time-of-use energy rates") # e.g. {"00:00-06:00": 0.05, ...}
+    tariff_rules: Optional[List[TariffRule]] = Field(None, description="Weekday/weekend, seasonal and holiday rules applied after energy_pricing_schedule")
+    holidays: Optional[List[date]] = Field(None, description="Dates priced with HOLIDAY tariff rules")
+    default_energy_rate_per_kwh: Optional[float] = Field(None, description="Rate for times no tariff band covers")
     operational_schedules: Optional[Dict[str, Any]] = Field(None, description="Pipeline operational schedules") # e.g., planned maintenance
 
 # --- GCP Cloud Analytics Platform ---
@@ -131,14 +229,85 @@ class OptimizationConstraints(BaseModel):
     min_dra_concentration_ppm: float # Parts per million, or percentage if preferred
     max_dra_concentration_ppm: float
     max_continuous_pump_runtime_hours: Optional[float] = None
-    maintenance_windows: Optional[List[Dict[str, datetime]]] = Field(None, description="List of {'start': datetime, 'end': datetime}")
+    maintenance_windows: Optional[List[Dict[str, Any]]] = Field(None, description="List of {'start': datetime, 'end': datetime, 'pump': PumpType (optional, defaults to PRIMARY)}")
     # Other pump operational limits
 
+class ScheduleCostParameters(BaseModel):
+    # Linear cost model used by the schedule optimizer. DRA lowers friction losses, so the
+    # pressure the active pump has to supply drops by drag_reduction_per_ppm for every ppm injected.
+    # The optimizer requires drag_reduction_per_ppm * max_dra_concentration_ppm < 1.
+    line_pressure_psi: float = Field(default=300.0, description="Pressure without DRA, used when the demand forecast has no 'pressure_psi'")
+    drag_reduction_per_ppm: float = Field(default=0.03, description="Fractional pressure reduction per ppm of DRA")
+    primary_pump_efficiency: float = Field(default=0.80, description="Pump efficiency of the primary pump")
+    backup_pump_efficiency: float = Field(default=0.72, description="Pump efficiency of the backup pump")
+    motor_efficiency: float = Field(default=0.90, description="Motor/drivetrain efficiency (shaft to electrical power)")
+    dra_cost_per_gallon: float = Field(default=8.0, description="DRA chemical cost in $/gallon")
+    default_flow_gpm: float = Field(default=1000.0, description="Flow used when no demand forecast is available")
+    default_energy_rate_per_kwh: float = Field(default=0.12, description="Rate used when no energy price forecast is available")
+
+class GeneticAlgorithmParameters(BaseModel):
+    # Settings of the genetic-algorithm schedule optimizer
+    population_size: int = Field(default=200, ge=4)
+    max_generations: int = Field(default=400, ge=1)
+    elite_count: int = Field(default=4, ge=0, description="Best schedules copied unchanged into the next generation")
+    tournament_size: int = Field(default=3, ge=1)
+    crossover_rate: float = Field(default=0.9, ge=0, le=1)
+    pump_mutation_rate: float = Field(default=0.01, ge=0, le=1, description="Per-slot probability of switching pump")
+    ppm_mutation_rate: float = Field(default=0.05, ge=0, le=1, description="Per-slot probability of perturbing the ppm")
+    ppm_mutation_scale: float = Field(default=2.0, ge=0, description="Standard deviation of a ppm perturbation")
+    penalty_per_violation: float = Field(default=1000.0, ge=0, description="Fitness penalty ($) per violated slot")
+    stall_generations: Optional[int] = Field(default=60, description="Stop after this many generations without improvement")
+    seed: Optional[int] = Field(default=None, description="Random seed for reproducible runs")
+
+class OptimizedAction(BaseModel):
+    timestamp: datetime = Field(..., description="Start of the planning slot")
+    duration_minutes: int = Field(default=60, description="Length of the planning slot in minutes")
+    dra_injection_rate_ppm: float = Field(..., description="Planned DRA concentration for the slot")
+    active_pump: Optional[PumpType] = Field(..., description="Pump running during the slot (None if no pump can run)")
+    projected_energy_cost_for_period: Optional[float] = Field(None, description="Projected pump energy cost for the slot ($)")
+    notes: Optional[str] = None
+
+class OptimizedSchedule(BaseModel):
+    plan_id: str
+    generated_at: datetime = Field(default_factory=datetime.now)
+    planning_horizon_start: datetime
+    planning_horizon_end: datetime = Field(..., description="Start of the last planning slot")
+    actions: List[OptimizedAction]
+    projected_total_energy_cost: Optional[float] = None
+    projected_dra_usage_gallons: Optional[float] = None
+    constraints_details: OptimizationConstraints
+
 class OptimizedInjectionSchedule(BaseModel):
     planning_horizon_days: int = Field(default=7)
     schedule: List[Dict[str, Any]] = Field(..., description="List of timed actions, e.g., {'timestamp': datetime, 'dra_injection_rate': float, 'active_pump': PumpType}")
     projected_total_energy_cost: Optional[float] = None
     projected_dra_utilization: Optional[float] = None # e.g., total DRA used
+    scenario_id: Optional[str] = Field(None, description="What-if scenario the schedule was optimized for")
+    projected_total_operating_cost: Optional[float] = Field(None, description="Energy plus DRA cost ($), used to rank alternatives")
+    cost_delta_vs_baseline: Optional[float] = Field(None, description="Operating cost minus the baseline schedule's ($), including the effect of the scenario's own demand and prices")
+
+class WhatIfScenario(BaseModel):
+    # A perturbation of the baseline forecasts/constraints to optimize as an alternative plan
+    scenario_id: str
+    description: Optional[str] = None
+    demand_scale: float = Field(default=1.0, description="Multiplier applied to every forecast flow_gpm")
+    price_scale: float = Field(default=1.0, description="Multiplier applied to every forecast rate_per_kwh")
+    demand_forecast: Optional[List[Dict[str, Any]]] = Field(None, description="Replaces the baseline demand forecast before scaling")
+    energy_price_forecast: Optional[List[Dict[str, Any]]] = Field(None, description="Replaces the baseline price forecast before scaling")
+    additional_maintenance_windows: List[Dict[str, Any]] = Field(default_factory=list, description="Added to the baseline maintenance windows")
+
+class PollingMetrics(BaseModel):
+    # Snapshot of the Modbus/OPC UA polling scheduler
+    devices: int = Field(0, description="Devices being polled")
+    polls: int = Field(0, description="Completed polls")
+    failed_polls: int = Field(0, description="Polls that failed (timeout, connection or protocol error)")
+    requests: int = Field(0, description="Protocol read requests sent (after coalescing)")
+    records: int = Field(0, description="Readings produced")
+    missed_ticks: int = Field(0, description="Poll ticks skipped because a device's previous poll overran its interval")
+    errors: int = Field(0, description="Unexpected errors raised by a poll or by on_batch; the device keeps being polled")
+    mean_poll_seconds: float = Field(0.0, description="Mean duration of a device poll")
+    max_poll_seconds: float = Field(0.0, description="Longest device poll")
+    open_connections: int = Field(0, description="Pooled connections currently open")
 
 # --- User Interface Layer (Conceptual Models for data transfer to UI) ---
 
@@ -174,8 +343,9 @@ class SevenDayOptimizationPlan(BaseModel):
     plan_id: str
     generated_at: datetime
     recommended_schedules: List[OptimizedInjectionSchedule] # Could be one or multiple alternative schedules
-    expected_total_cost_savings: Optional[float] = None
+    expected_total_cost_savings: Optional[float] = Field(None, description="Baseline schedule re-priced under the recommended scenario's demand and prices, minus that scenario's cost ($)")
     what_if_scenarios_available: bool = Field(default=False)
+    cost_spread: Optional[float] = Field(None, description="Most minus least expensive recommended schedule ($)")
 
 class HistoricalTrendDataPoint(BaseModel):
     timestamp: datetime
@@ -0,0 +1,121 @@
+import asyncio
+import time
+
+from agents.agent_runtime import (
+    TOPIC_PROCEDURES,
+    TOPIC_SAFETY_EVENTS,
+    AgentInbox,
+    AgentMessage,
+    AgentRuntime,
+    Priority,
+    register_agents,
+)
+from agents.process_control_agent import ProcessControlAgent
+
+
+class SlowRAG:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def query(self, question):
+        time.sleep(self.delay)
+        return "SOP-789"
+
+
+def test_inbox_serves_safety_first_and_applies_backpressure():
+    """A full inbox blocks new analytics messages but still accepts safety ones, which are served first."""
+    async def scenario():
+        inbox = AgentInbox("A", capacity=2)
+        await inbox.put(AgentMessage("a", 1, Priority.ANALYTICS))
+        await inbox.put(AgentMessage("a", 2, Priority.ANALYTICS))
+        blocked = asyncio.ensure_future(inbox.put(AgentMessage("a", 3, Priority.ANALYTICS)))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        for _ in range(100):
+            await asyncio.wait_for(inbox.put(AgentMessage("s", 0, Priority.SAFETY)), 0.1)
+        assert (await inbox.get()).priority == Priority.SAFETY
+        assert (await inbox.get((Priority.CONTROL, Priority.ANALYTICS))).payload == 1
+        await asyncio.wait_for(blocked, 0.1)
+        return inbox.depth(Priority.ANALYTICS), inbox.depth(Priority.SAFETY)
+
+    assert asyncio.run(scenario()) == (2, 99)
+
+
+def test_routes_by_topic_filter():
+    """Messages reach every agent whose +/# topic filter matches, and nobody else."""
+    async def scenario():
+        runtime = AgentRuntime()
+        seen = []
+        runtime.register("A", {"skids/+/process": lambda m: seen.append(("A", m.topic))})
+        runtime.register("B", {"skids/#": lambda m: seen.append(("B", m.topic))})
+        await runtime.start()
+        assert await runtime.publish("skids/S1/process", {}) == 2
+        assert await runtime.publish("skids/S1/vibration", {}) == 1
+        assert await runtime.publish("other", {}) == 0
+        await runtime.stop()
+        return seen
+
+    assert sorted(asyncio.run(scenario())) == [
+        ("A", "skids/S1/process"), ("B", "skids/S1/process"), ("B", "skids/S1/vibration"),
+    ]
+
+
+def test_safety_event_is_not_queued_behind_slow_handlers():
+    """A safety message is handled ahead of a backlog of slow analytics work."""
+    async def scenario():
+        runtime = AgentRuntime()
+        handled = {}
+
+        async def slow(message):
+            await asyncio.sleep(0.05)
+
+        runtime.register("A", {"work": slow, "alarm": lambda m: handled.setdefault("at", time.monotonic())})
+        await runtime.start()
+        for _ in range(20):
+            await runtime.publish("work", {}, Priority.ANALYTICS)
+        published = time.monotonic()
+        await runtime.publish("alarm", {}, Priority.SAFETY)
+        await asyncio.sleep(0.02)
+        await runtime.stop(drain=False)
+        return handled["at"] - published, runtime.stats()["A"]
+
+    latency, stats = asyncio.run(scenario())
+    assert latency < 0.02
+    assert stats["processed"] < 21 and stats["inbox_depth"]["ANALYTICS"] > 0
+
+
+def test_call_blocking_times_out_to_fallback_and_counts_failures():
+    """Slow or failing blocking calls return the fallback; only the slow one counts as a timeout."""
+    async def scenario():
+        runtime = AgentRuntime(blocking_timeout_seconds=0.05)
+        started = time.monotonic()
+        result = await runtime.call_blocking(time.sleep, 1.0, fallback="fallback")
+        elapsed = time.monotonic() - started
+        failed = await runtime.call_blocking(int, "x", fallback=-1)
+        ok = await runtime.call_blocking(int, "7")
+        await runtime.stop()
+        return result, elapsed, failed, ok, runtime.timeouts
+
+    result, elapsed, failed, ok, timeouts = asyncio.run(scenario())
+    assert (result, failed, ok, timeouts) == ("fallback", -1, 7, 1)
+    assert elapsed < 0.5
+
+
+def test_shutdown_does_not_wait_for_slow_procedure_lookup():
+    """A critical event shuts down at once; a slow procedure lookup times out to a placeholder."""
+    async def scenario():
+        runtime = AgentRuntime()
+        agent = ProcessControlAgent("PCA-1", {}, SlowRAG(0.3))
+        register_agents(runtime, agent, rag_timeout_seconds=0.1)
+        shutdowns, procedures = [], []
+        agent.emergency_shutdown_protocol = lambda reason: shutdowns.append(time.monotonic())
+        runtime.register("listener", {TOPIC_PROCEDURES: lambda m: procedures.append(m.payload["procedure"])})
+        await runtime.start()
+        published = time.monotonic()
+        await runtime.publish(TOPIC_SAFETY_EVENTS, {"type": "CriticalPressure", "details": "212"}, Priority.SAFETY)
+        await runtime.stop()
+        return shutdowns[0] - published, procedures, runtime.timeouts
+
+    shutdown_after, procedures, timeouts = asyncio.run(scenario())
+    assert shutdown_after < 0.1
+    assert timeouts == 1 and procedures and "unavailable" in procedures[0]
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from agents.process_control_agent import ProcessControlAgent
+from src.core.anomaly_detection import (
+    ZSCORE_EVENT_TYPE,
+    IsolationForestScorer,
+    StreamingAnomalyDetector,
+    StreamingBaseline,
+    review_events,
+    window_features,
+)
+from src.core.time_spine import MinuteSpine
+from src.iot_integration.ingest_records import IngestBatch
+from src.iot_integration.sensor_codes import STATUS_INVALID
+
+T0 = np.datetime64("2024-03-04", "ns").astype(np.int64)
+
+
+def _reference(values, alpha):
+    mean, variance, scores = 0.0, 0.0, []
+    for n, x in enumerate(values):
+        scores.append((x - mean) / np.sqrt(variance) if n >= 2 and variance > 0 else np.nan)
+        weight = max(alpha, 1.0 / (n + 1))
+        deviation = x - mean
+        mean += weight * deviation
+        variance = (1 - weight) * (variance + deviation * weight * deviation)
+    return np.array(scores), mean, variance
+
+
+def test_baseline_matches_sequential_ewma_across_batches():
+    """Batched baseline updates match a per-sensor sequential EWMA, including the final state."""
+    rng = np.random.default_rng(0)
+    keys = rng.choice(["a", "b", "c"], 500)
+    values = rng.normal(10, 2, 500)
+    baseline = StreamingBaseline(alpha=0.05, warmup=2)
+    scores = np.concatenate([baseline.update(keys[lo:lo + 37].tolist(), values[lo:lo + 37]) for lo in range(0, 500, 37)])
+
+    for key in "abc":
+        expected, mean, variance = _reference(values[keys == key], 0.05)
+        np.testing.assert_allclose(scores[keys == key], expected)
+        state = baseline.state(key)
+        assert state["count"] == (keys == key).sum()
+        assert state["mean"] == pytest.approx(mean) and state["std"] == pytest.approx(np.sqrt(variance))
+    assert len(baseline) == 3 and baseline.state("d") is None
+
+
+def test_baseline_grows_and_skips_nan():
+    """The baseline grows past its initial capacity and NaN readings do not update it."""
+    baseline = StreamingBaseline(warmup=1)
+    keys = [f"s{n}" for n in range(3000)]
+    baseline.update(keys, np.ones(3000))
+    scores = baseline.update(keys, np.r_[np.nan, np.full(2999, 2.0)])
+    assert np.isnan(scores).all()  # No variance yet
+    assert baseline.state("s0")["count"] == 1 and baseline.state("s2999")["count"] == 2
+
+
+def test_detector_flags_spikes_on_valid_tracked_readings():
+    """Only spikes on tracked sensors with a valid status raise z-score events."""
+    rng = np.random.default_rng(1)
+    detector = StreamingAnomalyDetector(z_threshold=6.0)
+    for second in range(200):
+        values = np.array([1200.0, 1190.0, 300.0, 1.0, 300.0]) + rng.normal(0, 1, 5)
+        if second == 199:
+            values[[2, 3, 4]] += 50
+        batch = IngestBatch(
+            np.full(5, T0 + second * 1_000_000_000), np.array(["F1", "F2", "P1", "S1", "P1"]), values,
+            np.array([0, 0, 0, 0, STATUS_INVALID if second == 199 else 0], dtype=np.int16),
+            np.array(["A", "A", "A", "A", "B"], dtype=object),
+        )
+        events = detector.score_batch(batch)
+        assert events == [] or second == 199
+    assert [(e["type"], e["equipment_id"], e["sensor_id"]) for e in events] == [(ZSCORE_EVENT_TYPE, "A", "P1")]
+    assert events[0]["score"] > 6 and events[0]["timestamp"] == np.datetime64(int(T0) + 199_000_000_000, "ns")
+    assert len(detector.baseline) == 4
+
+
+def test_window_features_summarise_windows_and_drop_sparse_ones():
+    """Window features summarise each window; windows with mostly missing minutes are dropped."""
+    minutes = 60
+    f1 = np.arange(minutes, dtype=float)
+    f2 = f1 - 5
+    p1 = np.full(minutes, 300.0)
+    p1[35:60] = np.nan
+    spine = MinuteSpine(np.datetime64("2024-03-04T00:00") + np.arange(minutes),
+                        {"flow_rate_f1": f1, "flow_rate_f2": f2, "pressure_p1": p1})
+    ends, features = window_features(spine, window_minutes=10, step_minutes=10)
+
+    assert ends.tolist() == (np.datetime64("2024-03-04T00:00") + np.array([9, 19, 29, 39])).tolist()
+    first = features[0]
+    np.testing.assert_allclose(first[:5], [4.5, np.std(np.arange(10)), 0, 9, 9])
+    np.testing.assert_allclose(first[10:], [300, 0, 300, 300, 0, 5])
+    # Minutes 30-39 have pressure for half the window and are kept; 40-59 have none
+    assert len(window_features(spine, window_minutes=100)[0]) == 0
+
+
+def test_scored_events_feed_detect_process_anomalies():
+    """Scored events go through the agent's review, and only the shutdown event types trigger a shutdown."""
+    agent = ProcessControlAgent("PCA-1", {"shutdown_event_types": ["CriticalPressure"]}, None)
+    shutdowns = []
+    agent.emergency_shutdown_protocol = shutdowns.append
+    events = [{"type": ZSCORE_EVENT_TYPE, "details": "P1 at 350", "equipment_id": "A"},
+              {"type": "CriticalPressure", "details": "Pressure at 212", "equipment_id": "A"}]
+    assert review_events(agent, events) == 1 and len(shutdowns) == 1
+
+
+def test_isolation_forest_flags_leak_window():
+    """A forest fitted on a clean spine flags windows around a leak between F1 and F2."""
+    pytest.importorskip("sklearn")
+    rng = np.random.default_rng(2)
+    minutes = 3 * 24 * 60
+
+    def spine(leak):
+        f1 = 1200 + rng.normal(0, 3, minutes)
+        f2 = f1 - 10 + rng.normal(0, 3, minutes)
+        if leak:
+            f2[2000:2060] -= 80
+        return MinuteSpine(np.datetime64("2024-03-01T00:00") + np.arange(minutes),
+                           {"flow_rate_f1": f1, "flow_rate_f2": f2, "pressure_p1": 300 + rng.normal(0, 1, minutes)})
+
+    scorer = IsolationForestScorer(contamination=0.005).fit([spine(False)])
+    events = scorer.events(spine(True), "A")
+    assert events and all(e["equipment_id"] == "A" for e in events)
+    assert any(np.datetime64("2024-03-01T00:00") + 2000 <= e["timestamp"] <= np.datetime64("2024-03-01T00:00") + 2090
+               for e in events)
@@ -0,0 +1,155 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.models.digital_twin_models import SensorConfig, SensorType
+from src.core.interpolation import linear_interpolation, step_interpolation
+from src.iot_integration.compression import NS_PER_SECOND, SensorCompressor, deadband, swinging_door
+from src.iot_integration.ingest_records import IngestBatch
+from src.iot_integration.sensor_codes import STATUS_INVALID, STATUS_OK
+from src.iot_integration.sensor_data_ingestion import InMemoryBroker, SensorIngestionService
+
+T0 = np.datetime64("2024-03-04", "ns").astype(np.int64)
+
+
+def _signal(count=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    timestamps = T0 + np.cumsum(rng.integers(1, 5, count)) * NS_PER_SECOND
+    values = 300 + np.cumsum(rng.normal(0, 0.05, count)) + rng.uniform(-0.1, 0.1, count)
+    return timestamps, values
+
+
+def _config(sensor_id, sensor_type, **compression):
+    return SensorConfig(sensor_id=sensor_id, sensor_type=sensor_type, location="skid", purpose="test", **compression)
+
+
+def test_swinging_door_error_is_bounded_by_deviation():
+    """Linear interpolation of the kept points stays within the swinging-door deviation."""
+    timestamps, values = _signal()
+    for deviation in (0.05, 0.25, 1.0):
+        keep, undecided = swinging_door(timestamps, values, deviation)
+        assert undecided == len(values) and keep[0] == 0 and keep[-1] == len(values) - 1
+        rebuilt = linear_interpolation(timestamps[keep], values[keep], timestamps)
+        assert np.abs(rebuilt - values).max() <= deviation * (1 + 1e-9)
+    assert len(swinging_door(timestamps, values, 0.25)[0]) < len(values) / 10
+
+
+def test_streaming_matches_one_shot_and_respects_max_interval():
+    """Compressing in chunks keeps the same points as one pass and never exceeds max_interval."""
+    timestamps, values = _signal()
+    max_interval = 120 * NS_PER_SECOND
+    expected, _ = swinging_door(timestamps, values, 0.25, max_interval)
+
+    kept, anchor, pending = [], None, np.empty(0, dtype=np.int64)
+    for lo in range(0, len(values), 777):
+        indices = np.concatenate([pending, np.arange(lo, min(lo + 777, len(values)))])
+        keep, undecided = swinging_door(timestamps[indices], values[indices], 0.25, max_interval, anchor, final=False)
+        kept.extend(indices[keep])
+        if len(keep):
+            anchor = (timestamps[indices[keep[-1]]], values[indices[keep[-1]]])
+        pending = indices[undecided:]
+    keep, _ = swinging_door(timestamps[pending], values[pending], 0.25, max_interval, anchor)
+    kept.extend(pending[keep])
+
+    np.testing.assert_array_equal(kept, expected)
+    assert np.diff(timestamps[expected]).max() <= max_interval
+
+
+def test_deadband_bounds_carried_forward_error():
+    """Carrying deadband points forward stays within the deadband; an anchor drops the first point."""
+    timestamps, values = _signal()
+    keep = deadband(timestamps, values, 0.5, max_interval_ns=300 * NS_PER_SECOND)
+    rebuilt = step_interpolation(timestamps[keep], values[keep], timestamps)
+    assert np.abs(rebuilt - values).max() <= 0.5
+    assert np.diff(timestamps[keep]).max() <= 300 * NS_PER_SECOND + 4 * NS_PER_SECOND
+    assert len(deadband(timestamps, values, 0.5, anchor=(int(timestamps[0]), float(values[0])))) < len(keep)
+
+
+def test_compressor_routes_sensors_and_passes_through_the_rest():
+    """Each sensor gets its configured compression; unconfigured sensors and bad readings pass through."""
+    configs = [
+        _config("P1", SensorType.PRESSURE, compression_deviation=0.25, max_staleness_minutes=10),
+        _config("S1", SensorType.PUMP_STATUS, compression_deadband=0.5),
+        _config("F1", SensorType.FLOW_RATE),
+    ]
+    count = 3600
+    timestamps = T0 + np.arange(count) * NS_PER_SECOND
+    pressure = 300 + np.random.default_rng(1).uniform(-0.1, 0.1, count)
+    status = (np.arange(count) >= 1800).astype(float)
+    batch = IngestBatch(
+        np.concatenate([timestamps] * 3),
+        np.array(["P1"] * count + ["S1"] * count + ["F1"] * count),
+        np.concatenate([pressure, status, np.full(count, 1000.0)]),
+        np.zeros(3 * count, dtype=np.int16),
+        np.array(["A"] * (3 * count), dtype=object),
+    )
+    batch.statuses[5] = STATUS_INVALID
+
+    compressor = SensorCompressor(configs)
+    out = IngestBatch.concat([compressor.compress(batch), compressor.flush()])
+    p1 = (out.sensor_ids == "P1") & (out.statuses == STATUS_OK)
+    # Flat pressure is held only by the staleness heartbeat (half of 10 minutes)
+    assert p1.sum() <= 15 and np.diff(out.timestamps_ns[p1]).max() <= 300 * NS_PER_SECOND
+    np.testing.assert_array_equal(out.values[out.sensor_ids == "S1"], [0.0, 1.0])
+    assert (out.sensor_ids == "F1").sum() == count
+    assert ((out.sensor_ids == "P1") & (out.statuses == STATUS_INVALID)).sum() == 1
+    assert set(out.skid_ids.tolist()) == {"A"}
+    assert compressor.ratio > 100
+
+
+def test_ingestion_service_compresses_before_building():
+    """The ingestion service compresses readings before they reach the minute builders."""
+    configs = [_config("P1", SensorType.PRESSURE, compression_deviation=0.25, compression_max_interval_seconds=60)]
+
+    async def scenario():
+        broker = InMemoryBroker()
+        rows = []
+        service = SensorIngestionService(
+            broker.client(), sensor_configs=configs, compressor=SensorCompressor(configs, step_only=True),
+            on_rows=lambda skid, r: rows.extend(r),
+        )
+        await service.start()
+        await asyncio.sleep(0)
+        for second in range(0, 600):
+            broker.publish("dra/A/sensors", {"timestamp": float(T0 / 1e9 + second), "sensor_id": "P1",
+                                             "value": 300.0 + 0.1 * (-1) ** second})
+        while service.metrics().messages_processed < 600:
+            await asyncio.sleep(0.01)
+        await service.stop()
+        return rows + service.flush()["A"], service.metrics()
+
+    rows, metrics = asyncio.run(scenario())
+    assert len(rows) == 10
+    assert all(abs(row.pressure_p1 - 300.0) <= 0.35 for row in rows)
+    assert metrics.records_accepted == 600 and metrics.records_compressed > 500
+
+
+def test_service_spine_error_stays_within_deviation_on_ramps():
+    """On a ramp the compressed spine stays within the deviation of the raw one without late points."""
+    configs = [_config("F1", SensorType.FLOW_RATE, compression_deviation=2.0, compression_max_interval_seconds=600)]
+    with pytest.raises(ValueError):
+        SensorIngestionService(InMemoryBroker().client(), compressor=SensorCompressor(configs))
+
+    async def scenario(compressor):
+        broker = InMemoryBroker()
+        rows = []
+        service = SensorIngestionService(
+            broker.client(), sensor_configs=configs, compressor=compressor, on_rows=lambda skid, r: rows.extend(r),
+        )
+        await service.start()
+        await asyncio.sleep(0)
+        for second in range(1200):  # 0.5 GPM/s ramp for 10 minutes, then flat
+            value = 1000.0 + 0.5 * min(second, 600)
+            broker.publish("dra/A/sensors", {"timestamp": float(T0 / 1e9 + second), "sensor_id": "F1", "value": value})
+        while service.metrics().messages_processed < 1200:
+            await asyncio.sleep(0.01)
+        await service.stop()
+        rows += service.flush()["A"]
+        return np.array([row.flow_rate_f1 for row in rows]), service
+
+    raw, _ = asyncio.run(scenario(None))
+    compressed, service = asyncio.run(scenario(SensorCompressor(configs, step_only=True)))
+    assert len(compressed) == len(raw) == 20
+    assert np.abs(compressed - raw).max() <= 2.0
+    assert service.builders["A"].late_points == 0 and service.metrics().records_compressed > 900
@@ -0,0 +1,194 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.models.digital_twin_models import PolledDeviceConfig, PolledPointConfig, PumpStatus
+from src.core.time_spine import encode_pump_status
+from src.iot_integration.device_polling import (
+    ModbusReadPlan,
+    ModbusSimulator,
+    ModbusTcpClient,
+    PollingScheduler,
+    encode_registers,
+)
+from src.iot_integration.sensor_codes import STATUS_OK, STATUS_OUT_OF_RANGE
+from src.iot_integration.sensor_data_ingestion import InMemoryBroker, SensorIngestionService
+
+POINTS = [
+    PolledPointConfig(sensor_id="F1", address=0),
+    PolledPointConfig(sensor_id="P1", address=4, data_type="int16", scale=0.1),
+    PolledPointConfig(sensor_id="F2", address=2),
+    PolledPointConfig(sensor_id="T1", address=60, data_type="int32", offset=-40.0),
+]
+
+
+def _device(port, n=0, points=POINTS, interval=1.0):
+    return PolledDeviceConfig(
+        device_id=f"PLC_{n}", skid_id=f"SKID_{n}", host="127.0.0.1", port=port, unit_id=n + 1,
+        poll_interval_seconds=interval, points=points,
+    )
+
+
+def _load(simulator, unit_id):
+    simulator.set_value(unit_id, 0, 1200.5)
+    simulator.set_value(unit_id, 2, 1190.0)
+    simulator.set_value(unit_id, 4, -25, "int16")
+    simulator.set_value(unit_id, 60, 65, "int32")
+
+
+def test_read_plan_coalesces_and_decodes():
+    """Nearby registers are read in one block and decoded with their scale and offset."""
+    plan = ModbusReadPlan(POINTS)
+    assert plan.blocks == [(0, 5), (60, 2)]
+    blocks = [
+        np.concatenate([encode_registers(1200.5), encode_registers(1190.0), encode_registers(-25, "int16")]),
+        encode_registers(65, "int32"),
+    ]
+    np.testing.assert_allclose(plan.decode(blocks), [1200.5, -2.5, 1190.0, 25.0])
+
+    assert ModbusReadPlan(POINTS, max_gap=0).blocks == [(0, 5), (60, 2)]
+    assert len(ModbusReadPlan(POINTS, max_registers=4).blocks) == 3
+    with pytest.raises(ValueError):
+        ModbusReadPlan([PolledPointConfig(sensor_id="F1", address="ns=2;s=Flow")])
+
+
+def test_poll_reads_device_in_one_round_of_requests():
+    """One poll issues a request per block and flags implausible values."""
+    async def scenario():
+        simulator = ModbusSimulator()
+        port = await simulator.start()
+        _load(simulator, 1)
+        scheduler = PollingScheduler([_device(port)])
+        batch = await scheduler.poll(scheduler.devices[0])
+        metrics = scheduler.metrics()
+        await scheduler.stop()
+        await simulator.stop()
+        return batch, metrics, simulator
+
+    batch, metrics, simulator = asyncio.run(scenario())
+    assert list(batch.sensor_ids) == ["F1", "P1", "F2", "T1"]
+    np.testing.assert_allclose(batch.values, [1200.5, -2.5, 1190.0, 25.0])
+    # Negative pressure is implausible
+    np.testing.assert_array_equal(batch.statuses, [STATUS_OK, STATUS_OUT_OF_RANGE, STATUS_OK, STATUS_OK])
+    assert len(set(batch.timestamps_ns)) == 1 and batch.skid_ids[0] == "SKID_0"
+    assert metrics.requests == simulator.requests == 2
+
+
+def test_pipelined_reads_share_a_connection():
+    """Concurrent reads are pipelined over a single connection."""
+    async def scenario():
+        simulator = ModbusSimulator(latency_seconds=0.05)
+        port = await simulator.start()
+        for unit_id in range(1, 21):
+            simulator.set_value(unit_id, 0, float(unit_id))
+        client = await ModbusTcpClient("127.0.0.1", port).connect()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(*(client.read_registers(unit_id, 0, 2) for unit_id in range(1, 21)))
+        elapsed = loop.time() - started
+        await client.close()
+        await simulator.stop()
+        return results, elapsed, simulator.connections
+
+    results, elapsed, connections = asyncio.run(scenario())
+    assert [ModbusReadPlan(POINTS[:1]).decode([r])[0] for r in results] == list(range(1, 21))
+    assert elapsed < 0.5 and connections == 1
+
+
+def test_scheduler_polls_devices_concurrently_into_ingestion_service():
+    """Devices are polled concurrently on schedule and their batches feed the ingestion service."""
+    async def scenario():
+        simulator = ModbusSimulator(latency_seconds=0.05)
+        port = await simulator.start()
+        for n in range(30):
+            _load(simulator, n + 1)
+        service = SensorIngestionService(InMemoryBroker().client())
+        scheduler = PollingScheduler([_device(port, n, interval=0.2) for n in range(30)], on_batch=service.ingest)
+        await scheduler.start()
+        await asyncio.sleep(0.7)
+        metrics = scheduler.metrics()
+        await scheduler.stop()
+        await simulator.stop()
+        return metrics, service, simulator.connections
+
+    metrics, service, connections = asyncio.run(scenario())
+    # 30 devices x 50 ms one at a time would take 1.5 s per sweep
+    assert metrics.polls >= 90 and metrics.failed_polls == 0 and metrics.missed_ticks == 0
+    assert connections == 1
+    assert len(service.builders) == 30
+    assert service.builders["SKID_3"].last_known_values == {}  # minute still open
+    assert service.metrics().records_accepted == 3 * metrics.polls
+
+
+def test_failures_are_counted_and_connections_recovered():
+    """Failed polls are counted, and the connection is reopened once the device is back."""
+    async def scenario():
+        simulator = ModbusSimulator(registers_per_unit=100)
+        port = await simulator.start()
+        scheduler = PollingScheduler([_device(port, points=[PolledPointConfig(sensor_id="F1", address=200)]), _device(port, 1)])
+        bad, good = scheduler.devices
+        assert await scheduler.poll(bad) is None  # Modbus exception: illegal address
+        assert await scheduler.poll(good) is not None
+        await simulator.stop()
+        assert await scheduler.poll(good) is None
+        assert scheduler.metrics().open_connections == 0
+        await simulator.start(port=port)
+        batch = await scheduler.poll(good)
+        metrics = scheduler.metrics()
+        await scheduler.stop()
+        await simulator.stop()
+        return batch, metrics
+
+    batch, metrics = asyncio.run(scenario())
+    assert batch is not None
+    assert metrics.failed_polls == 2 and metrics.polls == 2
+
+
+def test_polled_pump_status_register_is_encoded():
+    """A polled pump status register is encoded like an MQTT status and reaches the spine."""
+    async def scenario():
+        simulator = ModbusSimulator()
+        port = await simulator.start()
+        _load(simulator, 1)
+        simulator.set_value(1, 10, 1, "uint16")
+        points = POINTS + [PolledPointConfig(sensor_id="S1", address=10, data_type="uint16")]
+        service = SensorIngestionService(InMemoryBroker().client())
+        scheduler = PollingScheduler([_device(port, points=points)])
+        batch = await scheduler.poll(scheduler.devices[0])
+        await service.ingest("SKID_0", batch)
+        await scheduler.stop()
+        await simulator.stop()
+        return batch, service.flush()["SKID_0"]
+
+    batch, rows = asyncio.run(scenario())
+    assert batch.values[-1] == encode_pump_status(PumpStatus.ON)
+    assert batch.statuses[-1] == STATUS_OK
+    assert rows[-1].pump_status_s1 == PumpStatus.ON
+
+
+def test_failing_callback_does_not_stop_polling():
+    """A sink that raises is logged and counted, and the device keeps being polled."""
+    async def scenario():
+        simulator = ModbusSimulator()
+        port = await simulator.start()
+        _load(simulator, 1)
+        calls = []
+
+        def sink(skid_id, batch):
+            calls.append(skid_id)
+            if len(calls) == 1:
+                raise ValueError("sink rejected the batch")
+
+        scheduler = PollingScheduler([_device(port, interval=0.05)], on_batch=sink)
+        await scheduler.start()
+        await asyncio.sleep(0.3)
+        alive = not any(task.done() for task in scheduler._tasks)
+        metrics = scheduler.metrics()
+        await scheduler.stop()
+        await simulator.stop()
+        return calls, metrics, alive
+
+    calls, metrics, alive = asyncio.run(scenario())
+    assert alive and len(calls) >= 3
+    assert metrics.errors == 1
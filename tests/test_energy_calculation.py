@@ -0,0 +1,60 @@
+import numpy as np
+from datetime import datetime, timedelta
+
+from src.models.digital_twin_models import SensorDataPoint, PumpStatus
+from src.core.time_spine import arrays_from_points, build_minute_spine
+from src.core.energy_calculation import (
+    calculate_pump_power_kw,
+    calculate_pump_power_kw_array,
+    calculate_efficiency_factor,
+    calculate_efficiency_factor_array,
+    calculate_energy_cost_per_minute,
+    calculate_energy_cost_array,
+    calculate_spine_energy,
+)
+
+
+def test_array_versions_equal_scalar_path():
+    """Array functions return exactly what the scalar functions return element by element."""
+    rng = np.random.default_rng(1)
+    flow = rng.uniform(0, 3000, 200)
+    pressure = rng.uniform(0, 500, 200)
+    efficiency = rng.uniform(-0.1, 1.0, 200)
+    efficiency[::10] = 0.0
+
+    power = calculate_pump_power_kw_array(flow, pressure, efficiency)
+    factor = calculate_efficiency_factor_array(efficiency, flow / 30.0, 0.98)
+    cost = calculate_energy_cost_array(power, efficiency, 1.0, 0.12)
+    for i in range(200):
+        assert power[i] == calculate_pump_power_kw(flow[i], pressure[i], {"default_efficiency": efficiency[i]})
+        assert factor[i] == calculate_efficiency_factor(efficiency[i], flow[i] / 30.0, 0.98)
+        assert cost[i] == calculate_energy_cost_per_minute(power[i], efficiency[i], 1.0, 0.12)
+
+
+def test_scalar_functions_do_not_print(capsys):
+    """The per-minute functions no longer write to stdout."""
+    calculate_pump_power_kw(1500, 300, {"default_efficiency": 0.8})
+    calculate_efficiency_factor(0.8, 2.5, 0.98)
+    calculate_energy_cost_per_minute(100.0, 0.9, 1.0, 0.12)
+    assert capsys.readouterr().out == ""
+
+
+def test_calculate_spine_energy_fills_columns():
+    """Spine pricing fills the energy columns and charges nothing while the pump is off."""
+    start = datetime(2023, 1, 1, 10, 0, 0)
+    points = [
+        SensorDataPoint(timestamp=start, sensor_id="F1", value=1500.0),
+        SensorDataPoint(timestamp=start, sensor_id="P1", value=300.0),
+        SensorDataPoint(timestamp=start, sensor_id="S1", value=PumpStatus.ON),
+        SensorDataPoint(timestamp=start + timedelta(minutes=2, seconds=30), sensor_id="S1", value=PumpStatus.OFF),
+    ]
+    spine = build_minute_spine(*arrays_from_points(points))
+    result = calculate_spine_energy(spine, {"default_efficiency": 0.8}, energy_rate_per_kwh=0.12, motor_efficiency=0.9)
+
+    shaft = calculate_pump_power_kw(1500.0, 300.0, {"default_efficiency": 0.8})
+    expected_cost = calculate_energy_cost_per_minute(shaft, 0.9, 1.0, 0.12)
+    np.testing.assert_array_equal(result["energy_cost_per_minute"], [expected_cost, expected_cost, 0.0])
+    rows = spine.to_minute_level_data()
+    assert rows[0].pump_power_kw == shaft
+    assert rows[0].pump_efficiency_factor == 0.9
+    assert rows[2].energy_cost_per_minute == 0.0
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from datetime import date, datetime, timedelta
+
+from src.models.digital_twin_models import ExternalData, TariffRule, TariffDayType, SensorDataPoint
+from src.core.energy_rates import TimeOfUseRateSchedule, parse_period
+from src.core.time_spine import arrays_from_points, build_minute_spine
+from src.core.energy_calculation import calculate_spine_energy
+
+
+def _schedule():
+    return TimeOfUseRateSchedule.from_external_data(
+        ExternalData(
+            energy_pricing_schedule={"22:00-06:00": 0.05, "06:00-22:00": 0.10},
+            tariff_rules=[
+                TariffRule(period="14:00-18:00", rate_per_kwh=0.25, day_types=[TariffDayType.WEEKDAY], months=[7, 8]),
+                TariffRule(period="00:00-24:00", rate_per_kwh=0.04, day_types=[TariffDayType.HOLIDAY]),
+            ],
+            holidays=[date(2023, 7, 4)],
+        )
+    )
+
+
+def test_rates_follow_bands_seasons_and_holidays():
+    """Wrapping bands, seasonal weekday peaks, weekends and holidays all resolve correctly."""
+    schedule = _schedule()
+    assert schedule.rate_at(datetime(2023, 1, 2, 23, 30)) == 0.05  # band wraps past midnight
+    assert schedule.rate_at(datetime(2023, 1, 3, 5, 59)) == 0.05
+    assert schedule.rate_at(datetime(2023, 1, 3, 15, 0)) == 0.10  # winter, no peak
+    assert schedule.rate_at(datetime(2023, 7, 3, 15, 0)) == 0.25  # summer weekday peak
+    assert schedule.rate_at(datetime(2023, 7, 8, 15, 0)) == 0.10  # summer Saturday
+    assert schedule.rate_at(datetime(2023, 7, 4, 15, 0)) == 0.04  # holiday
+
+
+def test_vectorised_lookup_matches_scalar_lookup():
+    """rates_at over a minute grid agrees with per-timestamp lookups."""
+    schedule = _schedule()
+    minutes = np.arange("2023-06-28T00:00", "2023-07-06T00:00", 37, dtype="datetime64[m]")
+    rates = schedule.rates_at(minutes)
+    assert rates.tolist() == [schedule.rate_at(ts) for ts in minutes.tolist()]
+
+
+def test_uncovered_minutes_use_default_and_bad_periods_rejected():
+    """Gaps take the default rate (NaN without one); malformed bands raise ValueError."""
+    partial = [TariffRule(period="08:00-09:00", rate_per_kwh=0.2)]
+    assert np.isnan(TimeOfUseRateSchedule(partial).rate_at(datetime(2023, 1, 2, 10, 0)))
+    assert TimeOfUseRateSchedule(partial, default_rate_per_kwh=0.11).rate_at(datetime(2023, 1, 2, 10, 0)) == 0.11
+    with pytest.raises(ValueError):
+        parse_period("25:00-26:00")
+
+
+def test_spine_energy_priced_with_schedule():
+    """calculate_spine_energy looks up the schedule for every minute of the spine."""
+    start = datetime(2023, 1, 2, 21, 58)
+    points = [
+        SensorDataPoint(timestamp=start, sensor_id="F1", value=1500.0),
+        SensorDataPoint(timestamp=start, sensor_id="P1", value=300.0),
+        SensorDataPoint(timestamp=start + timedelta(minutes=3), sensor_id="F1", value=1500.0),
+    ]
+    spine = build_minute_spine(*arrays_from_points(points))
+    cost = calculate_spine_energy(spine, {"default_efficiency": 0.8}, _schedule())["energy_cost_per_minute"]
+    assert cost[0] == pytest.approx(cost[3] * 2)  # 0.10 before 22:00, 0.05 after
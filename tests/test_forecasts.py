@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.gcp_integration.forecasts import Forecast, ForecastCoverageError, as_forecast
+
+START = datetime(2024, 3, 4, 0, 0)
+
+
+def test_hourly_grid_source_returned_unchanged():
+    """A source already on the hourly grid aligns to its own values."""
+    records = [{'timestamp': START + timedelta(hours=i), 'flow_gpm': 1000.0 + i} for i in range(24)]
+    aligned = as_forecast(records).align('flow_gpm', START, 24)
+    np.testing.assert_allclose(aligned, 1000.0 + np.arange(24))
+
+
+def test_quarter_hourly_and_irregular_sources_averaged_per_slot():
+    """Finer and irregular sources are averaged per slot; coarser ones are held across slots."""
+    quarter = Forecast(
+        np.array([START + timedelta(minutes=15 * i) for i in range(8)], dtype="datetime64[ns]"),
+        {'rate_per_kwh': [0.1, 0.2, 0.3, 0.4, 1.0, 1.0, 1.0, 1.0]},
+    )
+    np.testing.assert_allclose(quarter.align('rate_per_kwh', START, 2), [0.25, 1.0])
+
+    irregular = Forecast.from_records([
+        {'timestamp': START + timedelta(minutes=20), 'flow_gpm': 1300},  # out of order on purpose
+        {'timestamp': START, 'flow_gpm': 1000},
+        {'timestamp': START + timedelta(hours=2, minutes=45), 'flow_gpm': 900},
+    ])
+    np.testing.assert_allclose(irregular.align('flow_gpm', START, 4), [1200, 1300, 1200, 900])
+    # 15-minute planning slots on an hourly source
+    hourly = Forecast.from_records([{'timestamp': START, 'flow_gpm': 1.0}, {'timestamp': START + timedelta(hours=1), 'flow_gpm': 2.0}])
+    np.testing.assert_allclose(hourly.align('flow_gpm', START, 8, slot_minutes=15), [1, 1, 1, 1, 2, 2, 2, 2])
+
+
+def test_coverage_validation():
+    """Coverage gaps are reported and rejected on request; missing optional fields use the default."""
+    forecast = Forecast.from_records([{'timestamp': START + timedelta(hours=i), 'flow_gpm': 1000.0} for i in range(1, 24) if i not in (10, 11)])
+    issues = forecast.coverage_issues('flow_gpm', START, START + timedelta(days=2))
+    assert len(issues) == 3  # late start, early end, one gap
+    with pytest.raises(ForecastCoverageError):
+        forecast.align('flow_gpm', START, 48, require_coverage=True)
+    # Missing optional fields fall back to the default without complaint
+    np.testing.assert_allclose(forecast.align('pressure_psi', START, 3, default=300.0, require_coverage=True), 300.0)
+
+
+def test_aligned_results_cached_and_read_only():
+    """Repeated alignments return the same read-only array; the columns are read-only too."""
+    forecast = Forecast.from_records([{'timestamp': START, 'rate_per_kwh': 0.12, 'flow_gpm': 900.0}])
+    aligned = forecast.align('rate_per_kwh', START, 168)
+    assert forecast.align('rate_per_kwh', START, 168) is aligned
+    assert forecast.align('rate_per_kwh', START + timedelta(hours=1), 168) is not aligned
+    with pytest.raises(ValueError):
+        aligned[0] = 1.0
+    with pytest.raises(ValueError):
+        forecast.columns['flow_gpm'][0] = 1.0
+
+
+def test_aligned_cache_stays_bounded_across_replans():
+    """Rolling the horizon forward evicts the oldest alignments instead of growing the cache."""
+    forecast = Forecast.from_records([{'timestamp': START, 'rate_per_kwh': 0.12}])
+    first = forecast.align('rate_per_kwh', START + timedelta(hours=1), 24)
+    latest = forecast.align('rate_per_kwh', START, 24)
+    for hour in range(2, 100):
+        assert forecast.align('rate_per_kwh', START, 24) is latest  # Kept while still in use
+        forecast.align('rate_per_kwh', START + timedelta(hours=hour), 24)
+    assert len(forecast._aligned) == Forecast.ALIGNED_CACHE_SIZE
+    assert forecast.align('rate_per_kwh', START + timedelta(hours=1), 24) is not first
+
+
+def test_window_and_scaled_share_memory():
+    """Windows and scaled forecasts share the untouched columns with the original."""
+    forecast = Forecast.from_records([{'timestamp': START + timedelta(hours=i), 'flow_gpm': float(i), 'pressure_psi': 300.0} for i in range(48)])
+    window = forecast.window(START + timedelta(hours=5, minutes=30), START + timedelta(hours=10))
+    assert np.shares_memory(window.columns['flow_gpm'], forecast.columns['flow_gpm'])
+    np.testing.assert_allclose(window.align('flow_gpm', START + timedelta(hours=6), 4), forecast.align('flow_gpm', START + timedelta(hours=6), 4))
+    scaled = forecast.scaled('flow_gpm', 2.0)
+    assert scaled.columns['flow_gpm'][3] == 6.0
+    assert np.shares_memory(scaled.columns['pressure_psi'], forecast.columns['pressure_psi'])
+    assert as_forecast(forecast) is forecast
@@ -0,0 +1,109 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.models.digital_twin_models import GeneticAlgorithmParameters, ModelType, OptimizationConstraints, PumpType
+from src.gcp_integration.genetic_optimizer import GeneticScheduleOptimizer
+from src.gcp_integration.optimization import NO_PUMP, optimize_injection_schedule
+from src.gcp_integration.schedule_evaluation import ScheduleEvaluator, evaluate_schedule
+
+START = datetime(2024, 3, 4, 0, 0)
+DEMAND = [{'timestamp': START + timedelta(hours=i), 'flow_gpm': 900 + (i % 24) * 20} for i in range(48)]
+PRICES = [{'timestamp': START + timedelta(hours=i), 'rate_per_kwh': 0.06 + (i % 5) * 0.03} for i in range(48)]
+CONSTRAINTS = OptimizationConstraints(
+    min_dra_concentration_ppm=5.0,
+    max_dra_concentration_ppm=15.0,
+    max_continuous_pump_runtime_hours=12,
+    maintenance_windows=[{'start': START + timedelta(hours=20), 'end': START + timedelta(hours=24)}],
+)
+
+
+def _ga(**overrides):
+    values = dict(seed=7, max_generations=150)
+    values.update(overrides)
+    return GeneticAlgorithmParameters(**values)
+
+
+def test_ga_schedule_is_feasible_and_close_to_milp():
+    """The GA schedule is feasible and costs within 3% of the MILP schedule."""
+    ga = optimize_injection_schedule(
+        CONSTRAINTS, START, DEMAND, PRICES, horizon_hours=48,
+        model_type=ModelType.GENETIC_ALGORITHMS, ga_parameters=_ga(), time_limit_seconds=20,
+    )
+    milp = optimize_injection_schedule(CONSTRAINTS, START, DEMAND, PRICES, horizon_hours=48)
+    ga_eval = evaluate_schedule(ga, DEMAND, PRICES)
+    milp_eval = evaluate_schedule(milp, DEMAND, PRICES)
+    assert ga_eval.feasible
+    assert ga_eval.total_cost <= milp_eval.total_cost * 1.03
+    assert all(a.active_pump == PumpType.BACKUP for a in ga.actions[20:24])
+
+
+def test_same_seed_reproduces_schedule():
+    """Two runs with the same seed produce the same schedule."""
+    runs = [
+        optimize_injection_schedule(
+            CONSTRAINTS, START, DEMAND, PRICES, horizon_hours=48,
+            model_type=ModelType.GENETIC_ALGORITHMS, ga_parameters=_ga(max_generations=30), time_limit_seconds=60,
+        )
+        for _ in range(2)
+    ]
+    assert [a.model_dump() for a in runs[0].actions] == [a.model_dump() for a in runs[1].actions]
+
+
+def test_wall_clock_budget_respected():
+    """The search stops on its time limit."""
+    evaluator = ScheduleEvaluator(CONSTRAINTS, START, 48, DEMAND, PRICES)
+    optimizer = GeneticScheduleOptimizer(evaluator, _ga(max_generations=10**6, stall_generations=None))
+    started = time.perf_counter()
+    _, _, stats = optimizer.run(time_limit_seconds=0.3)
+    assert time.perf_counter() - started < 1.5
+    assert stats["stop_reason"] == "time_limit"
+
+
+def test_repair_enforces_maintenance_runtime_and_ppm():
+    """Repair turns arbitrary candidates into feasible ones."""
+    evaluator = ScheduleEvaluator(CONSTRAINTS, START, 48, DEMAND, PRICES)
+    optimizer = GeneticScheduleOptimizer(evaluator, _ga())
+    pumps = np.zeros((3, 48), dtype=np.int64)
+    pumps[1] = NO_PUMP
+    ppm = np.full((3, 48), 30.0)
+    pumps, ppm = optimizer.repair(pumps, ppm)
+    evaluation = evaluator.evaluate(pumps, ppm)
+    assert evaluation.feasible.all()
+    assert (ppm == 15.0).all()
+
+
+def test_executor_fitness_matches_in_process():
+    """Evaluating fitness on an executor gives the same result as in process."""
+    evaluator = ScheduleEvaluator(CONSTRAINTS, START, 48, DEMAND, PRICES)
+    local = GeneticScheduleOptimizer(evaluator, _ga(max_generations=20)).run(60)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        pooled = GeneticScheduleOptimizer(evaluator, _ga(max_generations=20), executor=pool, workers=3).run(60)
+    np.testing.assert_array_equal(local[0], pooled[0])
+    assert local[2]["best_fitness"] == pytest.approx(pooled[2]["best_fitness"])
+
+
+def test_unsupported_model_type_rejected():
+    """Model types without a backend raise ValueError."""
+    with pytest.raises(ValueError):
+        optimize_injection_schedule(CONSTRAINTS, START, DEMAND, PRICES, model_type=ModelType.LSTM)
+
+
+@pytest.mark.parametrize("overrides", [
+    dict(max_continuous_pump_runtime_hours=0),
+    dict(max_continuous_pump_runtime_hours=4,
+         maintenance_windows=[{'start': START, 'end': START + timedelta(hours=100)}]),
+])
+def test_infeasible_constraints_raise_like_milp(overrides):
+    """A GA schedule that still breaks hard constraints raises ValueError, as the MILP backend does."""
+    constraints = CONSTRAINTS.model_copy(update=overrides)
+    with pytest.raises(ValueError):
+        optimize_injection_schedule(constraints, START, DEMAND, PRICES, horizon_hours=48)
+    with pytest.raises(ValueError, match="No feasible injection schedule"):
+        optimize_injection_schedule(
+            constraints, START, DEMAND, PRICES, horizon_hours=48,
+            model_type=ModelType.GENETIC_ALGORITHMS, ga_parameters=_ga(max_generations=20), time_limit_seconds=5,
+        )
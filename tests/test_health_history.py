@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from agents.predictive_maintenance_agent import PredictiveMaintenanceAgent
+from src.core.health_history import NS_PER_SECOND, EquipmentHealthHistory, MetricHistory
+from src.models.digital_twin_models import HealthHistoryConfig
+
+T0 = np.datetime64("2024-03-04", "ns").astype(np.int64)
+CONFIG = HealthHistoryConfig(raw_capacity=500, minute_retention_hours=1, hour_retention_days=1)
+
+
+def _readings(count=20_000, step_seconds=7, seed=0):
+    timestamps = T0 + np.arange(count) * step_seconds * NS_PER_SECOND
+    return timestamps, np.random.default_rng(seed).normal(5, 1, count)
+
+
+def _fill(history, timestamps, values, chunks=(1, 3, 250, 999, 17)):
+    position, n = 0, 0
+    while position < len(values):
+        size = chunks[n % len(chunks)]
+        history.extend(timestamps[position:position + size], values[position:position + size])
+        position += size
+        n += 1
+
+
+def test_raw_window_and_rolling_stats_are_bounded():
+    """Only the newest raw readings are kept, and the rolling stats cover exactly those."""
+    timestamps, values = _readings()
+    history = MetricHistory(CONFIG)
+    _fill(history, timestamps, values)
+
+    assert len(history) == 500
+    stats = history.stats()
+    assert stats["count"] == 500 and stats["last"] == values[-1]
+    assert stats["mean"] == pytest.approx(values[-500:].mean())
+    assert stats["std"] == pytest.approx(values[-500:].std())
+    ts, raw = history.raw_range()
+    np.testing.assert_array_equal(raw, values[-500:])
+    np.testing.assert_array_equal(ts.astype(np.int64), timestamps[-500:])
+
+
+def test_raw_range_slices_across_the_wrap():
+    """Raw range queries span the ring's wrap point; evicted ranges come back empty."""
+    timestamps, values = _readings(1_230)
+    history = MetricHistory(CONFIG)
+    _fill(history, timestamps, values)
+    start, end = timestamps[800], timestamps[1_100]
+    ts, raw = history.raw_range(np.datetime64(int(start), "ns"), int(end))
+    np.testing.assert_array_equal(raw, values[800:1_100])
+    assert len(history.raw_range(int(T0), int(timestamps[700]))[1]) == 0
+
+
+def test_rollups_match_grouped_readings_and_respect_retention():
+    """Rollup buckets match stats of the grouped readings and keep only their retention."""
+    timestamps, values = _readings()
+    history = MetricHistory(CONFIG)
+    _fill(history, timestamps, values)
+
+    minutes = history.rollup_range("1min")
+    assert len(minutes["count"]) == 61  # 60 closed buckets kept plus the open one
+    buckets = timestamps // (60 * NS_PER_SECOND)
+    for i in (0, 30, 60):
+        bucket = minutes["timestamp"][i].astype(np.int64) // (60 * NS_PER_SECOND)
+        selected = values[buckets == bucket]
+        assert minutes["count"][i] == len(selected)
+        assert minutes["mean"][i] == pytest.approx(selected.mean())
+        assert minutes["std"][i] == pytest.approx(selected.std())
+        assert (minutes["min"][i], minutes["max"][i], minutes["last"][i]) == (selected.min(), selected.max(), selected[-1])
+
+    hours = history.rollup_range("1h")
+    assert len(hours["count"]) == 25  # 39 hours of data, a day of closed buckets kept
+    assert hours["count"].sum() == (timestamps >= hours["timestamp"][0].astype(np.int64)).sum()
+    recent = history.rollup_range("1h", start=int(timestamps[-1]) - 2 * 3600 * NS_PER_SECOND)
+    assert len(recent["count"]) == 3  # Partial hour two hours back, the hour after, the open hour
+
+
+def test_out_of_order_and_nan_readings_are_dropped():
+    """Out-of-order, duplicate and NaN readings are dropped and counted."""
+    history = MetricHistory(CONFIG)
+    assert history.extend(T0 + np.array([0, 5, 3, 5, 9]) * NS_PER_SECOND, [1.0, 2.0, 3.0, np.nan, 4.0]) == 3
+    assert history.extend([T0], [9.0]) == 0
+    assert history.dropped == 3
+    np.testing.assert_array_equal(history.raw_range()[1], [1.0, 2.0, 4.0])
+
+
+def test_query_uses_finest_resolution_that_covers_the_start():
+    """Queries use the finest resolution whose history reaches the start."""
+    timestamps, values = _readings()
+    history = MetricHistory(CONFIG)
+    _fill(history, timestamps, values)
+    last = int(timestamps[-1])
+    assert history.query(last - 600 * NS_PER_SECOND)[2] == "raw"
+    start = last - 3550 * NS_PER_SECOND  # Raw reaches back ~58 minutes
+    _, means, resolution = history.query(start)
+    assert resolution == "1min"
+    assert len(means) == len(np.unique(timestamps[timestamps >= start] // (60 * NS_PER_SECOND)))
+    assert history.query(last - 10 * 3600 * NS_PER_SECOND)[2] == "1h"
+    assert history.query()[2] == "1h"
+
+
+def test_agent_tracks_health_and_feeds_history_to_prediction():
+    """The agent records health readings and passes history features to failure prediction."""
+    agent = PredictiveMaintenanceAgent("PdMA-1", {"health_history": CONFIG.model_dump(), "rul_threshold_days": 0}, None)
+    for minute in range(120):
+        agent.track_equipment_health("PMP-1", {"type": "vibration", "value": 2.0 + 0.01 * minute,
+                                               "timestamp": int(T0) + minute * 60 * NS_PER_SECOND})
+    sent = []
+    agent.pdm_model_endpoint = None
+    agent.logger.info = lambda message: sent.append(message)
+    agent.predict_equipment_failure("PMP-1", {"vibration_mm_s": 3.2})
+
+    store = agent.health_history
+    assert isinstance(store, EquipmentHealthHistory) and store.metrics("PMP-1") == ["vibration"]
+    features = store.features("PMP-1")
+    assert features["vibration_last"] == pytest.approx(3.19)
+    assert features["vibration_trend_per_hour"] == pytest.approx(0.6)
+    assert any("vibration_trend_per_hour" in message for message in sent)
+    assert store.nbytes() == len(store.series("PMP-1", "vibration").raw.columns["value"]) * 16 + (60 + 24) * 7 * 8
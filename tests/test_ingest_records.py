@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from src.models.digital_twin_models import PumpStatus, SensorConfig, SensorDataPoint, SensorType
+from src.core.time_spine import arrays_from_points
+from src.iot_integration.ingest_records import IngestBatch, validate_batch
+from src.iot_integration.ring_buffer import SensorRingBuffer
+from src.iot_integration.sensor_codes import STATUS_INVALID, STATUS_OK, STATUS_OUT_OF_RANGE
+
+T0 = datetime(2024, 3, 4)
+
+
+def _payloads(count):
+    return [
+        {"timestamp": (T0 + timedelta(seconds=i)).isoformat(), "sensor_id": "F1", "value": 1000.0 + i}
+        for i in range(count)
+    ]
+
+
+def test_timestamp_formats_agree():
+    """ISO strings, offsets, epoch seconds and datetimes decode to the same instant."""
+    expected = np.datetime64("2024-03-04T01:02:03.500", "ns").astype(np.int64)
+    batch = validate_batch([
+        {"timestamp": "2024-03-04T01:02:03.5", "sensor_id": "F1", "value": 1},
+        {"timestamp": "2024-03-04T01:02:03.5Z", "sensor_id": "F1", "value": 1},
+        {"timestamp": "2024-03-04T03:02:03.5+02:00", "sensor_id": "F1", "value": 1},
+        {"timestamp": datetime(2024, 3, 4, 1, 2, 3, 500000, tzinfo=timezone.utc).timestamp(), "sensor_id": "F1", "value": 1},
+        {"timestamp": datetime(2024, 3, 4, 1, 2, 3, 500000), "sensor_id": "F1", "value": 1},
+    ])
+    assert len(batch) == 5 and not batch.rejected
+    np.testing.assert_array_equal(batch.timestamps_ns, expected)
+
+
+def test_bad_payloads_are_rejected_or_flagged():
+    """Unusable payloads are rejected; bad or out-of-range values are flagged."""
+    batch = validate_batch([
+        {"timestamp": "2024-03-04T00:00:00", "sensor_id": "F1", "value": 1000},
+        {"timestamp": "2024-03-04T00:00:01", "value": 1000},
+        {"timestamp": "not a time", "sensor_id": "F1", "value": 1000},
+        "garbage",
+        {"timestamp": "2024-03-04T00:00:02", "sensor_id": "P1", "value": "n/a"},
+        {"timestamp": "2024-03-04T00:00:03", "sensor_id": "P1", "value": -50.0},
+        {"timestamp": "2024-03-04T00:00:04", "sensor_id": "S1", "value": "MAYBE"},
+    ])
+    assert [index for index, _ in batch.rejected] == [1, 2, 3]
+    np.testing.assert_array_equal(batch.statuses, [STATUS_OK, STATUS_INVALID, STATUS_OUT_OF_RANGE, STATUS_INVALID])
+    assert np.isnan(batch.values[1])
+
+
+def test_sensor_configs_extend_range_checks():
+    """Sensor configs add range checks for sensors without a built-in range."""
+    configs = [SensorConfig(sensor_id="P9", sensor_type=SensorType.PRESSURE, location="x", purpose="test")]
+    batch = validate_batch([{"timestamp": 0, "sensor_id": "P9", "value": 1e6}], sensor_configs=configs)
+    assert batch.statuses[0] == STATUS_OUT_OF_RANGE
+    assert validate_batch([{"timestamp": 0, "sensor_id": "P9", "value": 1e6}]).statuses[0] == STATUS_OK
+
+
+def test_spine_arrays_match_sensor_data_point_path():
+    """Batch spine arrays match arrays built from SensorDataPoint and convert back to them."""
+    payloads = _payloads(20) + [
+        {"timestamp": (T0 + timedelta(seconds=5)).isoformat(), "sensor_id": "S1", "value": "ON"},
+    ]
+    batch = IngestBatch.concat([validate_batch(payloads[:8]), validate_batch(payloads[8:])])
+    points = [SensorDataPoint(**{**p, "timestamp": datetime.fromisoformat(p["timestamp"])}) for p in payloads]
+    expected = arrays_from_points(points)
+    for actual, wanted in zip(batch.spine_arrays(), expected):
+        np.testing.assert_array_equal(actual, wanted)
+
+    converted = batch.to_sensor_data_points()
+    assert converted[-1].value == PumpStatus.ON
+    assert [p.timestamp for p in converted[:20]] == [p.timestamp for p in points[:20]]
+
+
+def test_append_to_ring_buffer(tmp_path):
+    """A batch appends to the ring buffer with its statuses; flagged readings stay out of the spine."""
+    batch = validate_batch(_payloads(10) + [{"timestamp": 0, "sensor_id": "F1", "value": "bad"}])
+    with SensorRingBuffer(str(tmp_path / "buf"), capacity=100) as buffer:
+        assert batch.append_to(buffer) == 11
+        records = buffer.records()
+        np.testing.assert_array_equal(records["status"], batch.statuses)
+        timestamps, _, values = buffer.spine_arrays()
+        np.testing.assert_array_equal(values, batch.values[:10])
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from src.models.digital_twin_models import OptimizationConstraints, PumpType
+from src.gcp_integration.maintenance_windows import MaintenanceWindowIndex, get_maintenance_index, merge_intervals
+from src.gcp_integration.optimization import optimize_injection_schedule
+
+START = datetime(2024, 3, 4, 0, 0)
+
+
+def _window(start_h, end_h, pump=None):
+    window = {'start': START + timedelta(hours=start_h), 'end': START + timedelta(hours=end_h)}
+    if pump is not None:
+        window['pump'] = pump
+    return window
+
+
+def test_overlapping_and_touching_windows_merged():
+    """Overlapping and touching intervals merge; empty ones are dropped."""
+    starts = np.array([10, 0, 5, 30, 20, 40])
+    ends = np.array([15, 6, 8, 35, 30, 40])  # [40, 40) is empty
+    merged_starts, merged_ends = merge_intervals(starts, ends)
+    np.testing.assert_array_equal(merged_starts, [0, 10, 20])
+    np.testing.assert_array_equal(merged_ends, [8, 15, 35])
+
+
+def test_windows_are_per_pump_with_primary_default():
+    """Windows apply to their own pump, and windows without a pump apply to the primary."""
+    index = MaintenanceWindowIndex([_window(0, 2), _window(1, 3, PumpType.PRIMARY), _window(5, 6, "BACKUP")])
+    assert len(index) == 2
+    primary_starts, primary_ends = index.intervals(PumpType.PRIMARY)
+    assert primary_starts[0] == np.datetime64(START) and primary_ends[0] == np.datetime64(START + timedelta(hours=3))
+    slots = np.datetime64(START, "ns") + np.arange(8) * np.timedelta64(1, "h")
+    mask = index.slot_mask(slots, 60, (PumpType.PRIMARY, PumpType.BACKUP))
+    np.testing.assert_array_equal(mask[0], [1, 1, 1, 0, 0, 0, 0, 0])
+    np.testing.assert_array_equal(mask[1], [0, 0, 0, 0, 0, 1, 0, 0])
+
+
+def test_slot_mask_matches_pairwise_check():
+    """The slot mask matches checking every slot against every window."""
+    rng = np.random.default_rng(3)
+    windows = []
+    for _ in range(300):
+        start = int(rng.integers(0, 24 * 60 * 14))
+        windows.append({
+            'start': START + timedelta(minutes=start),
+            'end': START + timedelta(minutes=start + int(rng.integers(1, 600))),
+            'pump': PumpType.PRIMARY if rng.random() < 0.5 else PumpType.BACKUP,
+        })
+    index = MaintenanceWindowIndex(windows)
+    slots = np.datetime64(START, "ns") + np.arange(14 * 96) * np.timedelta64(15, "m")
+    mask = index.slot_mask(slots, 15, (PumpType.PRIMARY, PumpType.BACKUP))
+    slot_ends = slots + np.timedelta64(15, "m")
+    for p, pump in enumerate((PumpType.PRIMARY, PumpType.BACKUP)):
+        expected = np.zeros(len(slots), dtype=bool)
+        for window in windows:
+            if window['pump'] == pump:
+                expected |= (slots < np.datetime64(window['end'])) & (slot_ends > np.datetime64(window['start']))
+        np.testing.assert_array_equal(mask[p], expected)
+
+
+def test_index_cached_per_window_set():
+    """Constraints with the same windows share one index."""
+    constraints = OptimizationConstraints(min_dra_concentration_ppm=5, max_dra_concentration_ppm=15, maintenance_windows=[_window(0, 4)])
+    same = constraints.model_copy(deep=True)
+    assert get_maintenance_index(constraints) is get_maintenance_index(same)
+
+
+def test_optimizer_honours_per_pump_windows():
+    """A backup-pump window keeps the primary running; both pumps down leaves the slot unserved."""
+    constraints = OptimizationConstraints(
+        min_dra_concentration_ppm=5.0,
+        max_dra_concentration_ppm=15.0,
+        maintenance_windows=[_window(0, 10, PumpType.PRIMARY), _window(4, 6, PumpType.BACKUP)],
+    )
+    schedule = optimize_injection_schedule(constraints, START, [], [], horizon_hours=24)
+    pumps = [action.active_pump for action in schedule.actions]
+    assert pumps[:4] == [PumpType.BACKUP] * 4
+    assert pumps[4:6] == [None, None]
+    assert pumps[6:10] == [PumpType.BACKUP] * 4
+    assert all(action.notes == "Maintenance scheduled" for action in schedule.actions[6:10])
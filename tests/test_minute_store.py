@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from src.core.minute_store import MinuteSpineStore
+from src.core.time_spine import MISSING_STATUS_CODE, MinuteSpine
+from src.models.digital_twin_models import PumpStatus
+
+START = np.datetime64("2023-03-01T22:00", "m")
+
+
+def _spine(minutes=6 * 60, offset=0, value=1.0):
+    timestamps = START + np.arange(offset, offset + minutes)
+    flow = np.full(minutes, value)
+    flow[::7] = np.nan
+    status = np.zeros(minutes, dtype=np.int8)
+    status[::5] = -1
+    return MinuteSpine(timestamps, {"flow_rate_f1": flow, "pump_status_s1": status, "pressure_p1": np.arange(minutes, dtype=np.float64)})
+
+
+def test_round_trip_partitions_by_day(tmp_path):
+    """A spine written across midnight lands in two day partitions and reads back unchanged."""
+    store = MinuteSpineStore(str(tmp_path))
+    spine = _spine()
+    assert store.write("SKID_A", spine) == 2  # 22:00 on day one to 04:00 on day two
+    assert store.skids() == ["SKID_A"]
+    assert [str(day) for day in store.days("SKID_A")] == ["2023-03-01", "2023-03-02"]
+
+    loaded = store.read("SKID_A")
+    np.testing.assert_array_equal(loaded.timestamps, spine.timestamps)
+    for name in spine.columns:
+        np.testing.assert_array_equal(loaded[name], spine[name])
+        assert loaded[name].dtype == spine[name].dtype
+
+
+def test_time_range_and_column_pruning(tmp_path):
+    """Reads return only the requested time range and columns."""
+    store = MinuteSpineStore(str(tmp_path))
+    store.write("SKID_A", _spine())
+    window = store.read("SKID_A", start="2023-03-01T23:30", end="2023-03-02T00:30", columns=["pressure_p1"])
+    assert list(window.columns) == ["pressure_p1"]
+    assert len(window) == 60
+    assert window.timestamps[0] == np.datetime64("2023-03-01T23:30")
+    np.testing.assert_array_equal(window["pressure_p1"], np.arange(90, 150))
+
+
+def test_rewrite_merges_with_stored_minutes(tmp_path):
+    """Rewriting overlapping minutes replaces them and keeps the rest."""
+    store = MinuteSpineStore(str(tmp_path))
+    store.write("SKID_A", _spine(minutes=60, value=1.0))
+    store.write("SKID_A", _spine(minutes=60, offset=30, value=2.0))
+    loaded = store.read("SKID_A")
+    assert len(loaded) == 90
+    flow = loaded["flow_rate_f1"]
+    assert np.nanmax(flow[:30]) == 1.0 and np.nanmin(flow[30:]) == 2.0
+
+
+def test_skids_are_isolated_and_unknown_skid_is_empty(tmp_path):
+    """Each skid reads its own data; an unknown skid reads empty."""
+    store = MinuteSpineStore(str(tmp_path))
+    store.write("SKID_A", _spine(value=1.0))
+    store.write("SKID_B", _spine(value=5.0))
+    assert np.nanmax(store.read("SKID_A")["flow_rate_f1"]) == 1.0
+    assert np.nanmin(store.read("SKID_B")["flow_rate_f1"]) == 5.0
+    assert len(store.read("SKID_C", columns=["flow_rate_f1"])) == 0
+
+
+def test_columns_missing_from_older_days_read_as_missing(tmp_path):
+    """Columns added after a day was written read as missing for that day."""
+    store = MinuteSpineStore(str(tmp_path))
+    day_one = START + np.arange(60)
+    store.write("SKID_A", MinuteSpine(day_one, {"flow_rate_f1": np.ones(60)}))
+    day_two = np.datetime64("2023-03-02T00:00", "m") + np.arange(60)
+    store.write("SKID_A", MinuteSpine(day_two, {"flow_rate_f1": np.ones(60), "pump_status_s1": np.zeros(60, dtype=np.int8)}))
+
+    loaded = store.read("SKID_A")
+    status = loaded["pump_status_s1"]
+    assert status.dtype == np.int8
+    np.testing.assert_array_equal(status, [MISSING_STATUS_CODE] * 60 + [0] * 60)
+    rows = loaded.to_minute_level_data()
+    assert rows[0].pump_status_s1 is None and rows[-1].pump_status_s1 == PumpStatus.ON
+
+
+def test_read_opens_only_the_skid_and_days_requested(tmp_path):
+    """Reads never open files for other skids or days outside the range."""
+    store = MinuteSpineStore(str(tmp_path))
+    store.write("SKID_A", _spine())
+    store.write("SKID_B", _spine())
+    (tmp_path / "skid_id=SKID_B" / "date=2023-03-01" / "part-0.parquet").write_bytes(b"not parquet")
+    assert len(store.read("SKID_A")) == 6 * 60
+    assert len(store.read("SKID_B", start="2023-03-02")) == 4 * 60
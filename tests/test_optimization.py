@@ -0,0 +1,172 @@
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.models.digital_twin_models import OptimizationConstraints, PumpType, ScheduleCostParameters
+from src.gcp_integration.optimization import (
+    InjectionScheduleProblem,
+    RollingHorizonOptimizer,
+    optimize_injection_schedule,
+)
+
+START = datetime(2024, 3, 4, 0, 0)
+
+
+def _forecasts(hours=168):
+    demand = [{'timestamp': START + timedelta(hours=i), 'flow_gpm': 900 + (i % 24) * 20} for i in range(hours)]
+    prices = [{'timestamp': START + timedelta(hours=i), 'rate_per_kwh': 0.06 + (i % 5) * 0.03} for i in range(hours)]
+    return demand, prices
+
+
+def _constraints(**overrides):
+    values = dict(min_dra_concentration_ppm=5.0, max_dra_concentration_ppm=15.0, max_continuous_pump_runtime_hours=100)
+    values.update(overrides)
+    return OptimizationConstraints(**values)
+
+
+def test_full_horizon_within_ppm_bounds_and_fast():
+    """A 168-slot schedule solves in a few seconds and keeps every slot inside the ppm range."""
+    demand, prices = _forecasts()
+    started = time.perf_counter()
+    schedule = optimize_injection_schedule(_constraints(), START, demand, prices)
+    assert time.perf_counter() - started < 5.0
+
+    assert len(schedule.actions) == 168
+    assert schedule.planning_horizon_end == START + timedelta(hours=167)
+    ppm = np.array([a.dra_injection_rate_ppm for a in schedule.actions])
+    assert np.all((ppm >= 5.0 - 1e-6) & (ppm <= 15.0 + 1e-6))
+    assert schedule.projected_total_energy_cost == pytest.approx(
+        sum(a.projected_energy_cost_for_period for a in schedule.actions)
+    )
+
+
+def test_maintenance_window_runs_backup_pump():
+    """Slots overlapping a maintenance window run on the backup pump."""
+    window = {'start': START + timedelta(hours=26), 'end': START + timedelta(hours=30)}
+    demand, prices = _forecasts()
+    schedule = optimize_injection_schedule(_constraints(maintenance_windows=[window]), START, demand, prices)
+    for action in schedule.actions:
+        if window['start'] <= action.timestamp < window['end']:
+            assert action.active_pump == PumpType.BACKUP
+            assert action.notes == "Maintenance scheduled"
+
+
+def test_continuous_runtime_limit_respected():
+    """No pump runs more consecutive slots than max_continuous_pump_runtime_hours allows."""
+    demand, prices = _forecasts()
+    schedule = optimize_injection_schedule(_constraints(max_continuous_pump_runtime_hours=12), START, demand, prices)
+    pumps = [a.active_pump for a in schedule.actions]
+    longest = run = 1
+    for previous, current in zip(pumps, pumps[1:]):
+        run = run + 1 if current == previous else 1
+        longest = max(longest, run)
+    assert longest <= 12
+    # The cheaper primary pump is still preferred when it is allowed to run.
+    assert pumps.count(PumpType.PRIMARY) > pumps.count(PumpType.BACKUP)
+
+
+def test_expensive_energy_buys_more_dra():
+    """DRA is worth injecting at high energy prices and not at low ones."""
+    demand, _ = _forecasts()
+    cheap = [{'timestamp': START, 'rate_per_kwh': 0.01}]
+    dear = [{'timestamp': START, 'rate_per_kwh': 0.50}]
+    low = optimize_injection_schedule(_constraints(), START, demand, cheap)
+    high = optimize_injection_schedule(_constraints(), START, demand, dear)
+    assert all(a.dra_injection_rate_ppm == pytest.approx(5.0) for a in low.actions)
+    assert all(a.dra_injection_rate_ppm == pytest.approx(15.0) for a in high.actions)
+    assert high.projected_dra_usage_gallons > low.projected_dra_usage_gallons
+
+
+def test_infeasible_constraints_raise():
+    """Both pumps limited to zero consecutive hours cannot cover the horizon."""
+    demand, prices = _forecasts()
+    with pytest.raises(ValueError):
+        optimize_injection_schedule(_constraints(max_continuous_pump_runtime_hours=0), START, demand, prices)
+
+
+def test_drag_reduction_must_stay_below_full_pressure():
+    """0.03 per ppm up to 40 ppm would cut the pump pressure by 120%."""
+    demand, prices = _forecasts()
+    params = ScheduleCostParameters(drag_reduction_per_ppm=0.03)
+    with pytest.raises(ValueError, match="drag_reduction_per_ppm"):
+        optimize_injection_schedule(_constraints(max_dra_concentration_ppm=40.0), START, demand, prices, params)
+    with pytest.raises(ValueError, match="drag_reduction_per_ppm"):
+        RollingHorizonOptimizer(_constraints(max_dra_concentration_ppm=40.0), params).replan(START, demand, prices)
+    schedule = optimize_injection_schedule(_constraints(max_dra_concentration_ppm=30.0), START, demand, prices, params)
+    assert all(a.projected_energy_cost_for_period > 0 for a in schedule.actions)
+
+
+def test_rolling_replan_matches_cold_solve_and_reuses_matrix():
+    """The first replan equals a cold solve; later replans shift the horizon on the same matrix."""
+    demand, prices = _forecasts(200)
+    constraints = _constraints(max_continuous_pump_runtime_hours=12)
+    optimizer = RollingHorizonOptimizer(constraints)
+    first = optimizer.replan(START, demand, prices)
+    cold = optimize_injection_schedule(constraints, START, demand, prices)
+    assert first.projected_total_energy_cost == pytest.approx(cold.projected_total_energy_cost)
+
+    problem = optimizer.problem
+    later = optimizer.replan(START + timedelta(hours=3, minutes=5), demand, prices)
+    assert optimizer.problem is problem
+    assert later.planning_horizon_start == START + timedelta(hours=3)
+    assert len(later.actions) == 168
+
+    optimizer.update_constraints(_constraints(max_continuous_pump_runtime_hours=12, maintenance_windows=[]))
+    assert optimizer.problem is problem
+    optimizer.update_constraints(_constraints(max_continuous_pump_runtime_hours=24))
+    assert optimizer.problem is not problem
+
+
+def test_rolling_replan_carries_pump_runtime():
+    """Runtime accumulated before the new horizon start counts towards the continuous limit."""
+    demand, prices = _forecasts(200)
+    optimizer = RollingHorizonOptimizer(_constraints(max_continuous_pump_runtime_hours=12))
+    optimizer.replan(START, demand, prices)
+    schedule = optimizer.replan(START, demand, prices, carried_runtime_slots={PumpType.PRIMARY: 10})
+    leading_primary = 0
+    for action in schedule.actions:
+        if action.active_pump != PumpType.PRIMARY:
+            break
+        leading_primary += 1
+    assert leading_primary <= 2
+
+
+def test_limit_longer_than_horizon_still_counts_carried_runtime():
+    """A 200 h limit on a 168 h horizon still stops a pump that has already run 150 h."""
+    demand, prices = _forecasts(200)
+    optimizer = RollingHorizonOptimizer(_constraints(max_continuous_pump_runtime_hours=200))
+    schedule = optimizer.replan(START, demand, prices, carried_runtime_slots={PumpType.PRIMARY: 150})
+    pumps = [a.active_pump for a in schedule.actions]
+    assert PumpType.BACKUP in pumps[:51]  # At most 50 more primary slots
+    assert pumps.count(PumpType.PRIMARY) > 100  # Still preferred once it has been stopped
+
+
+def test_warm_start_incumbent_kept_when_solver_runs_out_of_time():
+    """With no time to search, the feasible warm-start schedule is returned unchanged."""
+    rng = np.random.default_rng(0)
+    base_cost = rng.uniform(5, 10, (2, 168))
+    ppm_cost = rng.uniform(-0.2, 0.2, (2, 168))
+    unavailable = np.zeros((2, 168), dtype=bool)
+    incumbent = (np.resize([0] * 12 + [1], 168), np.full(168, 5.0))
+    problem = InjectionScheduleProblem(168, 5.0, 15.0, 12)
+    assert problem.is_feasible(*incumbent, unavailable)
+    pump_index, ppm = problem.solve(base_cost, ppm_cost, unavailable, time_limit_seconds=0.0, incumbent=incumbent)
+    assert problem.schedule_cost(base_cost, ppm_cost, pump_index, ppm) <= problem.schedule_cost(base_cost, ppm_cost, *incumbent)
+
+
+def test_runtime_limit_rows_do_not_grow_with_the_limit():
+    """A day-long limit on a 5-minute grid stays O(slots) and still caps every run, carried runtime included."""
+    rng = np.random.default_rng(1)
+    num_slots = 2016
+    base_cost = rng.uniform(5, 10, (2, num_slots))
+    ppm_cost = rng.uniform(-0.2, 0.2, (2, num_slots))
+    unavailable = np.zeros((2, num_slots), dtype=bool)
+    short, long = InjectionScheduleProblem(num_slots, 5.0, 15.0, 12), InjectionScheduleProblem(num_slots, 5.0, 15.0, 288)
+    assert long.matrix.nnz <= short.matrix.nnz < 10 * 2 * num_slots
+
+    carried = np.array([280, 0])
+    pump_index, ppm = long.solve(base_cost, ppm_cost, unavailable, carried)
+    assert long.is_feasible(pump_index, ppm, unavailable, carried)
+    assert pump_index[:9].tolist() != [0] * 9  # 280 carried + 9 would exceed 288
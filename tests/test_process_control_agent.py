@@ -0,0 +1,23 @@
+from agents.process_control_agent import ProcessControlAgent
+
+
+def test_batch_monitoring_returns_exceptions_against_per_equipment_thresholds():
+    """Batch monitoring flags the same readings as per-reading checks, with one shutdown per equipment."""
+    agent = ProcessControlAgent("PCA-1", {"critical_pressure_threshold": 180,
+                                          "equipment_pressure_thresholds": {"PMP-2": 160}}, None)
+    shutdowns = []
+    agent.emergency_shutdown_protocol = shutdowns.append
+    pressures = [150, 170, 185, 175, 190, float("nan")]
+    equipment = ["PMP-1", "PMP-2", "PMP-1", "PMP-1", "PMP-1", "PMP-2"]
+    exceptions = agent.monitor_injection_rates_batch(pressures, equipment, timestamps=list(range(6)))
+
+    assert [(e["index"], e["equipment_id"], e["threshold"]) for e in exceptions] == [
+        (1, "PMP-2", 160.0), (2, "PMP-1", 180.0), (4, "PMP-1", 180.0),
+    ]
+    assert exceptions[2]["timestamp"] == 4
+    # One shutdown per equipment, for its worst reading
+    assert len(shutdowns) == 2 and any("190" in reason for reason in shutdowns)
+    single = [agent.monitor_injection_rates({"pressure": p, "equipment_id": e})["status"]
+              for p, e in zip(pressures, equipment)]
+    assert [i for i, status in enumerate(single) if status == "anomaly_detected"] == [1, 2, 4]
+    assert agent.monitor_injection_rates_batch([], []) == []
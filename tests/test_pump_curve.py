@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from src.models.digital_twin_models import Pump, PumpCurve, PumpType
+from src.core.pump_curve import get_pump_curve_table, resolve_pump_efficiency
+from src.core.energy_calculation import calculate_pump_power_kw, calculate_pump_power_kw_array
+
+
+def _curve(resolution=2048):
+    return PumpCurve(
+        flow_points_gpm=[0, 500, 1000, 1500, 2000],
+        head_points_ft=[800, 780, 740, 680, 600],
+        efficiency_points=[0.0, 0.55, 0.75, 0.82, 0.78],
+        grid_resolution=resolution,
+    )
+
+
+def test_table_matches_interpolated_curve_and_is_cached():
+    """Grid lookups agree with interpolating the manufacturer points; tables are reused."""
+    curve = _curve()
+    table = get_pump_curve_table(curve)
+    flows = np.linspace(0, 2000, 501)
+    expected = np.interp(flows, curve.flow_points_gpm, curve.efficiency_points)
+    np.testing.assert_allclose(table.efficiency_at(flows), expected, atol=1e-3)
+    assert table.head_at(1000.0) == pytest.approx(740.0, abs=0.1)
+    assert get_pump_curve_table(_curve()) is table
+
+
+def test_out_of_range_and_missing_flows():
+    """Flows beyond the curve clamp to its ends; NaN flows stay NaN."""
+    table = get_pump_curve_table(_curve())
+    result = table.efficiency_at(np.array([-100.0, 5000.0, np.nan]))
+    assert result[0] == 0.0
+    assert result[1] == pytest.approx(0.78)
+    assert np.isnan(result[2])
+
+
+def test_energy_functions_use_curve_from_pump():
+    """calculate_pump_power_kw takes a Pump with a curve and uses the operating-point efficiency."""
+    pump = Pump(pump_id="P001", pump_type=PumpType.PRIMARY, pump_curve=_curve())
+    efficiency = float(resolve_pump_efficiency(pump, 1500.0))
+    assert efficiency == pytest.approx(0.82, abs=1e-3)
+    assert calculate_pump_power_kw(1500.0, 300.0, pump) == float(calculate_pump_power_kw_array(1500.0, 300.0, efficiency))
+    # A pump without a curve falls back to the legacy default efficiency
+    plain = Pump(pump_id="P002", pump_type=PumpType.BACKUP)
+    assert calculate_pump_power_kw(1500.0, 300.0, plain) == calculate_pump_power_kw(1500.0, 300.0, {})
+
+
+def test_invalid_curve_rejected():
+    """Mismatched or non-increasing points are rejected by the model."""
+    with pytest.raises(ValidationError):
+        PumpCurve(flow_points_gpm=[0, 500, 400], head_points_ft=[1, 2, 3], efficiency_points=[0.1, 0.2, 0.3])
+    with pytest.raises(ValidationError):
+        PumpCurve(flow_points_gpm=[0, 500], head_points_ft=[1], efficiency_points=[0.1, 0.2])
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.models.digital_twin_models import PumpStatus, SensorDataPoint
+from src.core.time_spine import arrays_from_points, build_minute_spine
+from src.iot_integration.ring_buffer import RECORD_DTYPE, SensorRingBuffer
+from src.iot_integration.sensor_codes import STATUS_INVALID, SensorCodebook
+
+T0 = np.datetime64("2024-03-04T00:00", "ns")
+
+
+def _append(buffer, start, count):
+    ts = T0 + np.arange(start, start + count) * np.timedelta64(1, "s")
+    return buffer.append(ts, np.full(count, buffer.codebook.code("F1")), np.arange(start, start + count, dtype=float))
+
+
+def test_record_layout_is_fixed_width():
+    """Records are 20 bytes wide."""
+    assert RECORD_DTYPE.itemsize == 20
+
+
+def test_wraparound_keeps_newest_records_in_order(tmp_path):
+    """After wrapping, the buffer holds the newest records in order across two segments."""
+    with SensorRingBuffer(str(tmp_path / "buf"), capacity=10) as buffer:
+        _append(buffer, 0, 7)
+        assert len(buffer.segments()) == 1
+        _append(buffer, 7, 6)
+        assert buffer.total_written == 13 and len(buffer) == 10 and buffer.oldest_sequence == 3
+        segments = buffer.segments()
+        assert len(segments) == 2
+        np.testing.assert_array_equal(buffer.records()["value"], np.arange(3, 13))
+        np.testing.assert_array_equal(buffer.records(since=11)["value"], [11, 12])
+        # A batch larger than the buffer keeps only its tail
+        _append(buffer, 13, 25)
+        np.testing.assert_array_equal(buffer.records()["value"], np.arange(28, 38))
+        assert buffer.total_written == 38
+
+
+def test_views_are_zero_copy(tmp_path):
+    """Record views share memory with the mapped file."""
+    with SensorRingBuffer(str(tmp_path / "buf"), capacity=100) as buffer:
+        _append(buffer, 0, 50)
+        view = buffer.records()
+        assert np.shares_memory(view, buffer._records)
+        assert len(buffer.records(since=50)) == 0
+
+
+def test_survives_reopen_with_codebook(tmp_path):
+    """Reopening keeps capacity, records and codebook; a different capacity is rejected."""
+    path = str(tmp_path / "buf")
+    with SensorRingBuffer(path, capacity=16) as buffer:
+        buffer.codebook.code("T7")
+        _append(buffer, 0, 5)
+    with SensorRingBuffer(path) as reopened:
+        assert reopened.capacity == 16 and reopened.total_written == 5
+        assert reopened.codebook.code("T7") == SensorCodebook().code("P1") + 1
+        np.testing.assert_array_equal(reopened.records()["value"], np.arange(5))
+    with pytest.raises(ValueError):
+        SensorRingBuffer(path, capacity=32)
+
+
+def test_spine_from_buffer_matches_points(tmp_path):
+    """A spine built from the buffer matches one built from the points, in any arrival order."""
+    start = datetime(2024, 3, 4)
+    points = [
+        SensorDataPoint(timestamp=start + timedelta(seconds=50 * i), sensor_id=("F1", "S1", "P1")[i % 3],
+                        value=(PumpStatus.ON if i % 2 else PumpStatus.OFF) if i % 3 == 1 else 100.0 + i)
+        for i in range(200)
+    ]
+    with SensorRingBuffer(str(tmp_path / "buf"), capacity=1000) as buffer:
+        buffer.append_points(points[::-1])  # arrival order does not matter
+        buffer.append([T0], [buffer.codebook.code("F1")], [np.nan], [STATUS_INVALID])  # excluded
+        from_buffer = build_minute_spine(*buffer.spine_arrays())
+    expected = build_minute_spine(*arrays_from_points(points))
+    for name in expected.columns:
+        np.testing.assert_array_equal(from_buffer[name], expected[name])
@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.digital_twin_models import OptimizationConstraints, PumpType, WhatIfScenario
+from src.gcp_integration.scenarios import BASELINE_SCENARIO_ID, apply_scenario, run_what_if_scenarios
+
+START = datetime(2024, 3, 4, 0, 0)
+CONSTRAINTS = OptimizationConstraints(
+    min_dra_concentration_ppm=5.0, max_dra_concentration_ppm=15.0, max_continuous_pump_runtime_hours=48
+)
+DEMAND = [{'timestamp': START + timedelta(hours=i), 'flow_gpm': 1000.0} for i in range(168)]
+PRICES = [{'timestamp': START + timedelta(hours=i), 'rate_per_kwh': 0.10} for i in range(168)]
+
+
+def test_apply_scenario_scales_and_adds_windows():
+    """Scales multiply the forecasts and extra windows are appended without touching the baseline."""
+    window = {'start': START, 'end': START + timedelta(hours=4)}
+    scenario = WhatIfScenario(scenario_id="s", demand_scale=1.5, price_scale=2.0, additional_maintenance_windows=[window])
+    constraints, demand, prices = apply_scenario(scenario, CONSTRAINTS, DEMAND, PRICES)
+    assert demand.columns['flow_gpm'][0] == 1500.0 and DEMAND[0]['flow_gpm'] == 1000.0
+    assert prices.columns['rate_per_kwh'][0] == pytest.approx(0.20)
+    assert constraints.maintenance_windows == [window]
+    assert CONSTRAINTS.maintenance_windows is None
+
+
+def test_scenarios_ranked_with_spread_and_savings():
+    """Schedules come back cheapest first; spread and savings are derived from their costs."""
+    scenarios = [
+        WhatIfScenario(scenario_id="cheap_power", price_scale=0.5),
+        WhatIfScenario(scenario_id="high_demand", demand_scale=1.3),
+        WhatIfScenario(
+            scenario_id="primary_down",
+            additional_maintenance_windows=[{'start': START, 'end': START + timedelta(days=1)}],
+        ),
+    ]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        plan = run_what_if_scenarios(CONSTRAINTS, START, DEMAND, PRICES, scenarios, executor=pool)
+
+    ids = [s.scenario_id for s in plan.recommended_schedules]
+    costs = [s.projected_total_operating_cost for s in plan.recommended_schedules]
+    assert sorted(ids) == sorted([BASELINE_SCENARIO_ID, "cheap_power", "high_demand", "primary_down"])
+    assert costs == sorted(costs)
+    assert ids[0] == "cheap_power" and ids[-1] == "high_demand"
+    assert plan.what_if_scenarios_available
+    assert plan.cost_spread == pytest.approx(costs[-1] - costs[0])
+    baseline_cost = costs[ids.index(BASELINE_SCENARIO_ID)]
+    assert [s.cost_delta_vs_baseline for s in plan.recommended_schedules] == pytest.approx([c - baseline_cost for c in costs])
+    # Cheaper power alone is not a saving; re-optimizing DRA for it is
+    assert 0 < plan.expected_total_cost_savings < baseline_cost - costs[0]
+
+    primary_down = plan.recommended_schedules[ids.index("primary_down")]
+    assert all(entry['active_pump'] == PumpType.BACKUP for entry in primary_down.schedule[:24])
+
+
+def test_infeasible_scenario_is_skipped_and_top_n_applied():
+    """A scenario that cannot be solved is left out; top_n truncates the ranking."""
+    scenarios = [
+        WhatIfScenario(scenario_id="ok", price_scale=0.8),
+        # The backup pump cannot cover three days alone within the 48 h runtime limit
+        WhatIfScenario(
+            scenario_id="bad",
+            additional_maintenance_windows=[{'start': START, 'end': START + timedelta(days=3)}],
+        ),
+    ]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        plan = run_what_if_scenarios(CONSTRAINTS, START, DEMAND, PRICES, scenarios, executor=pool, top_n=2)
+    assert [s.scenario_id for s in plan.recommended_schedules] == ["ok", BASELINE_SCENARIO_ID]
+
+
+def test_lower_demand_is_not_reported_as_savings():
+    """Savings compare schedules under the same inputs, so pumping less is not a saving."""
+    scenarios = [WhatIfScenario(scenario_id="low_demand", demand_scale=0.8)]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        plan = run_what_if_scenarios(CONSTRAINTS, START, DEMAND, PRICES, scenarios, executor=pool)
+    low_demand = plan.recommended_schedules[0]
+    assert low_demand.scenario_id == "low_demand" and low_demand.cost_delta_vs_baseline < 0
+    assert plan.expected_total_cost_savings == pytest.approx(0.0, abs=1e-6)
+
+
+def test_duplicate_scenario_ids_rejected():
+    """A scenario reusing the baseline id raises ValueError."""
+    with pytest.raises(ValueError):
+        run_what_if_scenarios(CONSTRAINTS, START, DEMAND, PRICES, [WhatIfScenario(scenario_id=BASELINE_SCENARIO_ID)])
+
+
+def test_process_pool_runs_scenarios():
+    """The default executor is a process pool; results match the in-process run."""
+    scenarios = [WhatIfScenario(scenario_id=f"s{i}", price_scale=1.0 + 0.1 * i) for i in range(3)]
+    plan = run_what_if_scenarios(CONSTRAINTS, START, DEMAND, PRICES, scenarios, max_workers=2)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        local = run_what_if_scenarios(CONSTRAINTS, START, DEMAND, PRICES, scenarios, executor=pool)
+    assert [s.scenario_id for s in plan.recommended_schedules] == [s.scenario_id for s in local.recommended_schedules]
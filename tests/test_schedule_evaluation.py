@@ -0,0 +1,97 @@
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from src.models.digital_twin_models import OptimizationConstraints, PumpType
+from src.gcp_integration.optimization import NO_PUMP, optimize_injection_schedule
+from src.gcp_integration.schedule_evaluation import (
+    ScheduleEvaluator,
+    actions_to_arrays,
+    apply_evaluation,
+    evaluate_schedule,
+)
+
+START = datetime(2024, 3, 4, 0, 0)
+DEMAND = [{'timestamp': START + timedelta(hours=i), 'flow_gpm': 900 + (i % 24) * 20} for i in range(168)]
+PRICES = [{'timestamp': START + timedelta(hours=i), 'rate_per_kwh': 0.06 + (i % 5) * 0.03} for i in range(168)]
+WINDOW = {'start': START + timedelta(hours=10), 'end': START + timedelta(hours=14)}
+CONSTRAINTS = OptimizationConstraints(
+    min_dra_concentration_ppm=5.0,
+    max_dra_concentration_ppm=15.0,
+    max_continuous_pump_runtime_hours=24,
+    maintenance_windows=[WINDOW],
+)
+
+
+def test_optimized_schedule_is_feasible_and_prices_match():
+    """The evaluator agrees with the optimizer's own projections and finds no violations."""
+    schedule = optimize_injection_schedule(CONSTRAINTS, START, DEMAND, PRICES)
+    evaluation = evaluate_schedule(schedule, DEMAND, PRICES)
+    assert evaluation.feasible
+    assert evaluation.total_energy_cost == pytest.approx(schedule.projected_total_energy_cost)
+    assert evaluation.total_dra_gallons == pytest.approx(schedule.projected_dra_usage_gallons)
+    np.testing.assert_allclose(
+        evaluation.slot_energy_cost, [a.projected_energy_cost_for_period for a in schedule.actions]
+    )
+
+
+def test_each_violation_type_is_counted():
+    """Maintenance, coverage, ppm and runtime violations are each counted."""
+    evaluator = ScheduleEvaluator(CONSTRAINTS, START, 168, DEMAND, PRICES)
+    pump_index = np.resize([0] * 20 + [1] * 4, 168)  # primary never exceeds 20 h, backup covers 20-23
+    pump_index[10:14] = 1  # maintenance window on the backup
+    ppm = np.full(168, 10.0)
+    assert evaluator.evaluate(pump_index, ppm).feasible
+
+    bad = pump_index.copy()
+    bad[11] = 0  # primary during maintenance
+    bad[50] = NO_PUMP  # nobody runs
+    bad_ppm = ppm.copy()
+    bad_ppm[[60, 61]] = [4.0, 16.0]
+    evaluation = evaluator.evaluate(bad, bad_ppm)
+    assert evaluation.maintenance_violations == 1
+    assert evaluation.coverage_violations == 1
+    assert evaluation.ppm_violations == 2
+    assert evaluation.runtime_violations == 0
+
+    always_primary = np.zeros(168, dtype=np.int64)
+    always_primary[10:14] = 1
+    # Run of 154 slots from 14 onwards; slots beyond the 24th of the run violate the limit
+    assert evaluator.evaluate(always_primary, ppm).runtime_violations == 154 - 24
+
+
+def test_batch_matches_single_evaluations():
+    """Evaluating a batch gives the same costs and violations as evaluating each schedule."""
+    evaluator = ScheduleEvaluator(CONSTRAINTS, START, 168, DEMAND, PRICES)
+    rng = np.random.default_rng(1)
+    pumps = rng.integers(-1, 2, size=(20, 168))
+    ppm = rng.uniform(4.0, 16.0, size=(20, 168))
+    batch = evaluator.evaluate(pumps, ppm)
+    for k in range(20):
+        single = evaluator.evaluate(pumps[k], ppm[k])
+        assert batch.total_cost[k] == pytest.approx(single.total_cost)
+        assert batch.violations[k] == single.violations
+
+
+def test_repricing_against_new_forecast():
+    """apply_evaluation refreshes projections when the price forecast changes."""
+    schedule = optimize_injection_schedule(CONSTRAINTS, START, DEMAND, PRICES)
+    doubled = [{**entry, 'rate_per_kwh': entry['rate_per_kwh'] * 2} for entry in PRICES]
+    repriced = apply_evaluation(schedule, evaluate_schedule(schedule, DEMAND, doubled))
+    assert repriced.projected_total_energy_cost == pytest.approx(2 * schedule.projected_total_energy_cost)
+    assert [a.active_pump for a in repriced.actions] == [a.active_pump for a in schedule.actions]
+    assert actions_to_arrays(repriced.actions)[0][12] == 1  # backup during maintenance
+    assert repriced.actions[12].active_pump == PumpType.BACKUP
+
+
+def test_thousands_of_candidates_per_second():
+    """Two thousand week-long candidates evaluate in under a second."""
+    evaluator = ScheduleEvaluator(CONSTRAINTS, START, 168, DEMAND, PRICES)
+    rng = np.random.default_rng(2)
+    pumps = rng.integers(0, 2, size=(2000, 168))
+    ppm = rng.uniform(5.0, 15.0, size=(2000, 168))
+    started = time.perf_counter()
+    evaluator.evaluate(pumps, ppm)
+    assert time.perf_counter() - started < 1.0
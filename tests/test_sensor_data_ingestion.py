@@ -0,0 +1,176 @@
+import asyncio
+from datetime import datetime
+
+from src.iot_integration.sensor_data_ingestion import (
+    InMemoryBroker,
+    InMemoryMqttClient,
+    SensorIngestionService,
+    topic_matches,
+)
+
+T0 = datetime(2024, 3, 4).timestamp()
+
+
+def _readings(second, value):
+    return [
+        {"timestamp": f"2024-03-04T00:{second // 60:02d}:{second % 60:02d}", "sensor_id": "F1", "value": value},
+        {"timestamp": f"2024-03-04T00:{second // 60:02d}:{second % 60:02d}", "sensor_id": "P1", "value": 300.0},
+    ]
+
+
+async def _until(condition, timeout=10.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_topic_matches():
+    """MQTT + and # wildcards match the way the broker does."""
+    assert topic_matches("dra/+/sensors", "dra/SKID_1/sensors")
+    assert not topic_matches("dra/+/sensors", "dra/SKID_1/status")
+    assert topic_matches("dra/#", "dra/SKID_1/sensors")
+    assert not topic_matches("dra/+", "dra/SKID_1/sensors")
+
+
+def test_rows_are_built_per_skid():
+    """Readings from each skid's topic build that skid's minute rows."""
+    async def scenario():
+        broker = InMemoryBroker()
+        rows = {}
+        service = SensorIngestionService(broker.client(), on_rows=lambda skid, r: rows.setdefault(skid, []).extend(r))
+        await service.start()
+        await asyncio.sleep(0)
+        for second in range(0, 180, 10):
+            broker.publish("dra/SKID_A/sensors", _readings(second, 1000.0 + second))
+            broker.publish("dra/SKID_B/sensors", _readings(second, 2000.0))
+        await _until(lambda: service.metrics().messages_processed == 36)
+        await service.stop()
+        for skid, flushed in service.flush().items():
+            rows.setdefault(skid, []).extend(flushed)
+        return rows
+
+    rows = asyncio.run(scenario())
+    assert [r.flow_rate_f1 for r in rows["SKID_A"]] == [1060.0, 1120.0, 1170.0]
+    assert [r.flow_rate_f1 for r in rows["SKID_B"]] == [2000.0] * 3
+    assert rows["SKID_A"][0].pressure_p1 == 300.0
+
+
+def test_burst_after_outage_is_not_dropped():
+    """A burst after an outage is held back by the full queue and then processed in full."""
+    async def scenario():
+        broker = InMemoryBroker()
+        seen = []
+        gate = asyncio.Event()
+
+        async def slow_sink(skid, rows):
+            seen.extend(rows)
+            await gate.wait()
+
+        service = SensorIngestionService(
+            broker.client(), on_rows=slow_sink, queue_size=16, batch_size=4, reconnect_delay_seconds=0.01
+        )
+        await service.start()
+        await asyncio.sleep(0)
+        broker.go_offline()
+        await asyncio.sleep(0.02)
+        for second in range(600):
+            broker.publish("dra/SKID_A/sensors", _readings(second, float(second)))
+        broker.restore()
+
+        # Backpressure: the backlog stays with the broker while the queue is full
+        await _until(lambda: service.metrics().queue_depth == 16)
+        assert broker.pending() > 0
+        gate.set()
+        await _until(lambda: service.metrics().messages_processed == 600)
+        metrics = service.metrics()
+        await service.stop()
+        return metrics, seen + service.flush()["SKID_A"]
+
+    metrics, rows = asyncio.run(scenario())
+    assert metrics.max_queue_depth <= 16
+    assert metrics.reconnects == 1
+    assert metrics.records_accepted == 1200
+    assert len(rows) == 10 and rows[-1].flow_rate_f1 == 599.0
+
+
+def test_bad_messages_are_counted():
+    """Undecodable messages and rejected records are counted without stopping the service."""
+    async def scenario():
+        broker = InMemoryBroker()
+        service = SensorIngestionService(broker.client())
+        await service.start()
+        await asyncio.sleep(0)
+        broker.publish("dra/SKID_A/sensors", b"{not json")
+        broker.publish("dra/SKID_A/sensors", [{"timestamp": T0, "sensor_id": "F1", "value": "n/a"}, {"value": 1}])
+        broker.publish("dra/SKID_A/sensors", {"timestamp": T0, "sensor_id": "F1", "value": 1000})
+        await _until(lambda: service.metrics().messages_processed == 3)
+        await service.stop()
+        return service.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics.decode_errors == 1
+    assert metrics.records_rejected == 2 and metrics.records_accepted == 1
+    assert metrics.messages_per_second > 0 and metrics.event_lag_seconds is not None
+
+
+def test_failing_skid_does_not_drop_the_rest_of_the_batch():
+    """A failing sink for one skid dead-letters its rows and keeps delivering the others."""
+    async def scenario():
+        broker = InMemoryBroker()
+        rows = []
+
+        def sink(skid, closed):
+            if skid == "SKID_BAD":
+                raise RuntimeError("sink unavailable")
+            rows.extend(closed)
+
+        service = SensorIngestionService(broker.client(), on_rows=sink, batch_size=100)
+        await service.start()
+        await asyncio.sleep(0)
+        for second in range(0, 180, 10):
+            broker.publish("dra/SKID_A/sensors", _readings(second, 1000.0))
+            broker.publish("dra/SKID_BAD/sensors", _readings(second, 2000.0))
+        await _until(lambda: service.metrics().messages_processed == 36)
+        await service.stop()
+        return service, rows
+
+    service, rows = asyncio.run(scenario())
+    assert len(rows) == 2 and rows[0].flow_rate_f1 == 1000.0
+    assert service.metrics().processing_errors >= 1
+    assert {skid for skid, _ in service.dead_letters} == {"SKID_BAD"}
+
+
+def test_reconnect_disconnects_the_previous_client():
+    """Each reconnect closes the previous connection first."""
+    class TrackingClient(InMemoryMqttClient):
+        opened = 0
+        leaked = 0
+
+        async def connect(self):
+            await super().connect()
+            TrackingClient.leaked += TrackingClient.opened  # Still open from before
+            TrackingClient.opened = 1
+
+        async def disconnect(self):
+            TrackingClient.opened = 0
+            await super().disconnect()
+
+    async def scenario():
+        broker = InMemoryBroker()
+        service = SensorIngestionService(TrackingClient(broker, "dra-ingest"), reconnect_delay_seconds=0.01)
+        await service.start()
+        for _ in range(3):
+            await asyncio.sleep(0.02)
+            broker.go_offline()
+            broker.publish("dra/SKID_A/sensors", _readings(0, 1000.0))
+            await asyncio.sleep(0.02)
+            broker.restore()
+        await _until(lambda: service.metrics().reconnects == 3)
+        await service.stop()
+        return service.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert metrics.reconnects == 3
+    assert TrackingClient.leaked == 0 and TrackingClient.opened == 0
@@ -0,0 +1,79 @@
+import numpy as np
+from datetime import datetime
+
+from src.models.digital_twin_models import SensorDataPoint, PumpStatus, SensorConfig, SensorType
+from src.core.time_spine import (
+    arrays_from_points,
+    build_minute_spine,
+    create_time_spine,
+)
+
+
+def _sample_points():
+    return [
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 2, 5), sensor_id="P1", value=301.0),
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 0, 15), sensor_id="F1", value=1500.0),
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 0, 20), sensor_id="P1", value=300.0),
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 0, 25), sensor_id="S1", value=PumpStatus.ON),
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 1, 30), sensor_id="F1", value=1505.0),
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 2, 50), sensor_id="F2", value=1490.0),
+    ]
+
+
+def test_build_minute_spine_interpolates_per_sensor_type():
+    """Flow and pressure are interpolated linearly at each minute end; status is stepped."""
+    spine = build_minute_spine(*arrays_from_points(_sample_points()))
+    assert len(spine) == 3
+    assert spine.timestamps[0] == np.datetime64("2023-01-01T10:00")
+    # F1: 1500 @10:00:15 -> 1505 @10:01:30, sampled at 10:01:00 and held after the last report
+    np.testing.assert_allclose(spine["flow_rate_f1"], [1503.0, 1505.0, 1505.0])
+    # P1: 300 @10:00:20 -> 301 @10:02:05
+    np.testing.assert_allclose(spine["pressure_p1"], [300.0 + 40 / 105, 300.0 + 100 / 105, 301.0])
+    np.testing.assert_array_equal(spine["pump_status_s1"], [0, 0, 0])
+    assert np.isnan(spine["flow_rate_f2"][:2]).all()
+    assert spine["flow_rate_f2"][2] == 1490.0
+
+
+def test_staleness_limit_emits_none():
+    """Values older than the sensor's max_staleness_minutes become missing."""
+    points = [
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 0, 30), sensor_id="P1", value=300.0),
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 10, 30), sensor_id="P1", value=310.0),
+    ]
+    config = SensorConfig(
+        sensor_id="P1", sensor_type=SensorType.PRESSURE, location="Skid", purpose="Test", max_staleness_minutes=3
+    )
+    rows = create_time_spine(points, sensor_configs=[config])
+    pressures = [r.pressure_p1 for r in rows]
+    assert pressures[0] is not None and pressures[2] is not None
+    assert pressures[3:10] == [None] * 7
+    assert pressures[10] == 310.0
+
+
+def test_reading_on_minute_boundary_counts_for_previous_minute():
+    """A reading at exactly HH:MM:00 is visible in the minute that just ended."""
+    points = [
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 0, 30), sensor_id="F1", value=1.0),
+        SensorDataPoint(timestamp=datetime(2023, 1, 1, 10, 1, 0), sensor_id="F1", value=2.0),
+    ]
+    spine = build_minute_spine(*arrays_from_points(points))
+    np.testing.assert_array_equal(spine["flow_rate_f1"], [2.0, 2.0])
+
+
+def test_create_time_spine_rows_and_input_not_mutated():
+    """create_time_spine materialises MinuteLevelData rows and leaves the input order alone."""
+    points = _sample_points()
+    original_order = [p.timestamp for p in points]
+    rows = create_time_spine(points)
+
+    assert [p.timestamp for p in points] == original_order
+    assert [r.timestamp for r in rows] == [datetime(2023, 1, 1, 10, m) for m in range(3)]
+    assert rows[0].pump_status_s1 == PumpStatus.ON
+    assert rows[0].flow_rate_f2 is None  # no made-up 0.0 before a sensor has reported
+    assert rows[2].flow_rate_f2 == 1490.0
+
+
+def test_empty_input():
+    """Empty input produces an empty spine and no rows."""
+    assert create_time_spine([]) == []
+    assert len(build_minute_spine(*arrays_from_points([]))) == 0
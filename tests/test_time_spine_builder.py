@@ -0,0 +1,117 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+
+from src.models.digital_twin_models import SensorDataPoint, PumpStatus, SensorType
+from src.core.interpolation import DEFAULT_STRATEGY_BY_SENSOR_TYPE
+from src.core.time_spine import arrays_from_points, build_minute_spine
+from src.core.time_spine_builder import TimeSpineBuilder
+
+
+@pytest.fixture(autouse=True)
+def step_strategies(monkeypatch):
+    """The builder forward-fills, so compare it with a step-only batch engine."""
+    for sensor_type in SensorType:
+        monkeypatch.setitem(DEFAULT_STRATEGY_BY_SENSOR_TYPE, sensor_type, "step")
+
+
+def _feed(n_points=500, seed=7):
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1, 10, 0, 0)
+    points = []
+    for i in range(n_points):
+        sensor_id = rng.choice(["F1", "F2", "P1", "S1"])
+        value = rng.choice([PumpStatus.ON, PumpStatus.OFF]) if sensor_id == "S1" else rng.uniform(100, 200)
+        points.append(SensorDataPoint(timestamp=start + timedelta(seconds=7 * i), sensor_id=sensor_id, value=value))
+    return points
+
+
+def test_streaming_matches_batch_engine():
+    """Feeding points one by one and flushing gives the same rows as the batch engine."""
+    points = _feed()
+    builder = TimeSpineBuilder(allowed_lateness=timedelta(seconds=0))
+    rows = []
+    for point in points:
+        rows.extend(builder.add(point))
+    rows.extend(builder.flush())
+
+    expected = build_minute_spine(*arrays_from_points(points)).to_minute_level_data()
+    assert rows == expected
+
+
+def test_out_of_order_within_lateness_is_placed_correctly():
+    """Micro-batches shuffled within the lateness window still match the batch result."""
+    points = _feed()
+    rng = random.Random(3)
+    builder = TimeSpineBuilder(allowed_lateness=timedelta(seconds=60))
+    rows = []
+    for i in range(0, len(points), 5):
+        batch = points[i:i + 5]
+        rng.shuffle(batch)
+        rows.extend(builder.add_batch(batch))
+    rows.extend(builder.flush())
+
+    assert builder.late_points == 0
+    assert rows == build_minute_spine(*arrays_from_points(points)).to_minute_level_data()
+
+
+def test_minutes_close_incrementally_and_late_points_are_counted():
+    """Rows are emitted as the watermark passes minute ends; stale points are counted."""
+    builder = TimeSpineBuilder(allowed_lateness=timedelta(seconds=0))
+    start = datetime(2023, 1, 1, 10, 0, 0)
+    assert builder.add(SensorDataPoint(timestamp=start + timedelta(seconds=10), sensor_id="F1", value=1.0)) == []
+
+    rows = builder.add(SensorDataPoint(timestamp=start + timedelta(minutes=2, seconds=5), sensor_id="F1", value=2.0))
+    assert [r.timestamp for r in rows] == [start, start + timedelta(minutes=1)]
+    assert rows[0].flow_rate_f1 == 1.0 and rows[0].pressure_p1 is None
+
+    late = builder.add(SensorDataPoint(timestamp=start + timedelta(seconds=30), sensor_id="P1", value=300.0))
+    assert late == [] and builder.late_points == 1
+
+    final = builder.flush()
+    assert final[-1].flow_rate_f1 == 2.0
+    assert final[-1].pressure_p1 == 300.0
+    assert builder.last_known_values["F1"] == 2.0
+
+
+def test_add_arrays_matches_add_batch():
+    """The array fast path gives the same rows as SensorDataPoint micro-batches."""
+    points = _feed()
+    timestamps, sensor_ids, values = arrays_from_points(points)
+    fast = TimeSpineBuilder(allowed_lateness=timedelta(seconds=0))
+    slow = TimeSpineBuilder(allowed_lateness=timedelta(seconds=0))
+    fast_rows, slow_rows = [], []
+    for i in range(0, len(points), 50):
+        fast_rows.extend(fast.add_arrays(timestamps[i:i + 50], sensor_ids[i:i + 50], values[i:i + 50]))
+        slow_rows.extend(slow.add_batch(points[i:i + 50]))
+    assert fast.add_arrays([], [], []) == []
+    assert fast_rows + fast.flush() == slow_rows + slow.flush()
+
+
+def test_shuffled_first_batch_starts_at_its_earliest_minute():
+    """The spine starts at the earliest reading of the first batch, not the first one received."""
+    points = _feed(40)
+    timestamps, sensor_ids, values = arrays_from_points(points)
+    expected = build_minute_spine(timestamps, sensor_ids, values).to_minute_level_data()
+    from_arrays = TimeSpineBuilder(allowed_lateness=timedelta(seconds=0))
+    from_points = TimeSpineBuilder(allowed_lateness=timedelta(seconds=0))
+    rows = from_arrays.add_arrays(timestamps[::-1], sensor_ids[::-1], values[::-1]) + from_arrays.flush()
+    assert rows == expected and from_arrays.late_points == 0
+    assert from_points.add_batch(points[::-1]) + from_points.flush() == expected
+
+
+def test_nan_pump_status_reads_as_missing():
+    """A NaN S1 value marks the status missing instead of failing the micro-batch."""
+    start = datetime(2023, 1, 1, 10, 0, 0)
+    points = [
+        SensorDataPoint(timestamp=start + timedelta(seconds=10), sensor_id="S1", value=PumpStatus.ON),
+        SensorDataPoint(timestamp=start + timedelta(seconds=20), sensor_id="F1", value=1500.0),
+        SensorDataPoint(timestamp=start + timedelta(minutes=1, seconds=10), sensor_id="S1", value=PumpStatus.ON),
+    ]
+    timestamps, sensor_ids, values = arrays_from_points(points)
+    values[2] = float("nan")
+    builder = TimeSpineBuilder(allowed_lateness=timedelta(seconds=0))
+    rows = builder.add_arrays(timestamps, sensor_ids, values) + builder.flush()
+    assert [row.pump_status_s1 for row in rows] == [PumpStatus.ON, None]
+    assert rows[-1].flow_rate_f1 == 1500.0
+    assert rows == build_minute_spine(timestamps, sensor_ids, values).to_minute_level_data()
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from agents.predictive_maintenance_agent import PredictiveMaintenanceAgent
+from src.core.vibration_features import (
+    BAND_NAMES,
+    STANDARD_GRAVITY,
+    VibrationFeatureExtractor,
+    bearing_fault_frequencies,
+    feature_summary,
+    waveform_features,
+)
+from src.models.digital_twin_models import BearingGeometry, PumpVibrationConfig
+
+BEARING = BearingGeometry(ball_count=9, ball_diameter_mm=7.94, pitch_diameter_mm=39.04)
+RATE = 8192.0
+
+
+def test_bearing_fault_frequencies():
+    """Bearing fault frequencies follow the textbook relations; no bearing gives NaN."""
+    shaft, ftf, bsf, bpfo, bpfi = bearing_fault_frequencies(BEARING, 30.0)
+    assert shaft == 30.0
+    assert bpfo + bpfi == pytest.approx(9 * 30.0)
+    assert bpfo == pytest.approx(9 * ftf)
+    assert bpfo == pytest.approx(107.5, abs=0.1) and bsf == pytest.approx(70.7, abs=0.1)
+    assert np.isnan(bearing_fault_frequencies(None, 30.0)[1:]).all()
+
+
+def test_sine_features_and_band_energy():
+    """A sine on an FFT bin gives its known RMS, crest factor, kurtosis, velocity and band energy."""
+    t = np.arange(8192) / RATE
+    amplitude, frequency = 0.5, 40.0  # Exactly on an FFT bin
+    blocks = np.vstack([amplitude * np.sin(2 * np.pi * frequency * t), np.zeros(8192)])
+    bands = np.array([[frequency, 100.0, np.nan, np.nan, np.nan]] * 2)
+    features = waveform_features(blocks, RATE, bands, harmonics=1)
+
+    assert features["rms"][0] == pytest.approx(amplitude / np.sqrt(2), rel=1e-4)
+    assert features["crest_factor"][0] == pytest.approx(np.sqrt(2), rel=1e-3)
+    assert features["kurtosis"][0] == pytest.approx(1.5, rel=1e-3)
+    velocity = amplitude * STANDARD_GRAVITY * 1000 / (2 * np.pi * frequency) / np.sqrt(2)
+    assert features["velocity_rms_mm_s"][0] == pytest.approx(velocity, rel=1e-3)
+    assert features["band_energy"][0, 0] == pytest.approx(amplitude ** 2 / 2, rel=1e-3)
+    assert features["band_energy"][0, 1] < 1e-6
+    assert np.isnan(features["band_energy"][:, 2:]).all()
+    assert features["band_energy"][1, 0] == 0 and np.isnan(features["crest_factor"][1])
+
+
+def test_noise_spectrum_matches_mean_square():
+    """Band energy over the whole spectrum matches the mean square, and noise kurtosis is about 3."""
+    noise = np.random.default_rng(0).normal(0, 0.1, (20, 4096))
+    features = waveform_features(noise, RATE, np.full((20, 1), RATE / 4), harmonics=1, relative_bandwidth=0.99)
+    # The band spans 0-Nyquist, so on average it holds the whole mean square
+    assert features["band_energy"][:, 0].mean() == pytest.approx((features["rms"] ** 2).mean(), rel=0.02)
+    assert abs(features["kurtosis"].mean() - 3) < 0.1
+
+
+def test_extractor_windows_streams_across_calls():
+    """Streaming in chunks gives the same window features as one call."""
+    pumps = [PumpVibrationConfig(equipment_id=name, sample_rate_hz=RATE, shaft_speed_hz=30.0, bearing=BEARING)
+             for name in ("A", "B")]
+    rng = np.random.default_rng(1)
+    streams = {"A": rng.normal(0, 1, 10_000), "B": rng.normal(0, 1, 3_000)}
+    one_shot = VibrationFeatureExtractor(pumps, window_samples=2048, hop_samples=1024).add(streams)
+
+    chunked = VibrationFeatureExtractor(pumps, window_samples=2048, hop_samples=1024)
+    collected = {"A": [], "B": []}
+    for lo in range(0, 10_000, 1500):
+        for name, features in chunked.add({name: s[lo:lo + 1500] for name, s in streams.items()}).items():
+            collected[name].append(features)
+    for name in ("A", "B"):
+        for feature in ("rms", "kurtosis", "band_energy", "end_seconds"):
+            np.testing.assert_allclose(np.concatenate([f[feature] for f in collected[name]]), one_shot[name][feature])
+    assert len(one_shot["A"]["rms"]) == 8 and len(one_shot["B"]["rms"]) == 1
+    assert one_shot["A"]["end_seconds"][0] == pytest.approx(2048 / RATE)
+    assert set(feature_summary(one_shot["A"])) >= {f"band_{name}" for name in BAND_NAMES}
+    with pytest.raises(KeyError):
+        chunked.add({"C": np.zeros(10)})
+
+
+def test_agent_predicts_failure_for_impulsive_pump():
+    """Only the pump with bearing impacts is sent to failure prediction."""
+    config = {"vibration_threshold_mm_s": 10.0, "kurtosis_threshold": 4.0, "vibration_window_samples": 4096,
+              "vibration_hop_samples": 4096, "vibration_pumps": [
+                  {"equipment_id": name, "sample_rate_hz": RATE, "shaft_speed_hz": 30.0, "bearing": BEARING.model_dump()}
+                  for name in ("PMP-1", "PMP-2")]}
+    agent = PredictiveMaintenanceAgent("PdMA-1", config, None)
+    predicted = []
+    agent.predict_equipment_failure = lambda equipment_id, data: predicted.append((equipment_id, data)) or {}
+    rng = np.random.default_rng(2)
+    t = np.arange(8192) / RATE
+    healthy = rng.normal(0, 0.02, 8192)
+    faulty = healthy + 0.5 * (np.sin(2 * np.pi * 107.5 * t) > 0.995)
+    results = agent.analyze_vibration_waveforms({"PMP-1": healthy, "PMP-2": faulty})
+
+    assert [equipment_id for equipment_id, _ in predicted] == ["PMP-2"]
+    assert predicted[0][1]["kurtosis"] > 4 and "band_bpfo" in predicted[0][1]
+    assert results["PMP-2"]["band_bpfo"] > 10 * results["PMP-1"]["band_bpfo"]
+    assert len(agent.health_history.series("PMP-1", "velocity_rms")) == 2
+    assert PredictiveMaintenanceAgent("PdMA-2", {}, None).analyze_vibration_waveforms({"PMP-1": healthy}) == {}
+
+
+def test_agent_waveform_windows_survive_pauses_and_scalar_readings(monkeypatch):
+    """Waveform windows re-anchor after a pause and do not clash with scalar readings."""
+    clock = [1_700_000_000 * 10 ** 9]
+    monkeypatch.setattr("agents.predictive_maintenance_agent.time.time_ns", lambda: clock[0])
+    config = {"vibration_window_samples": 4096, "vibration_hop_samples": 4096, "vibration_pumps": [
+        {"equipment_id": "PMP-1", "sample_rate_hz": RATE, "shaft_speed_hz": 30.0}]}
+    agent = PredictiveMaintenanceAgent("PdMA-1", config, None)
+    samples = np.random.default_rng(3).normal(0, 0.02, 4096)
+
+    agent.analyze_vibration_waveforms({"PMP-1": samples})
+    clock[0] += 60 * 10 ** 9  # The stream pauses for a minute; a scalar reading arrives meanwhile
+    agent.track_equipment_health("PMP-1", {"type": "vibration", "value": 2.0, "timestamp": clock[0]})
+    clock[0] += 10 ** 9
+    agent.analyze_vibration_waveforms({"PMP-1": samples})
+
+    history = agent.health_history
+    windows = history.series("PMP-1", "velocity_rms")
+    assert len(windows) == 2 and windows.dropped == 0
+    assert windows.raw_range()[0][-1].astype(np.int64) == clock[0]  # Re-anchored to the clock after the pause
+    assert len(history.series("PMP-1", "vibration")) == 1
+    assert len(history.series("PMP-1", "kurtosis")) == 2